@@ -0,0 +1,54 @@
+"""
+Attachment identity
+The content hash of an attachment is computed once per search and shared by
+the PDF history, text cache, full-text index and auto-save. Hashes are stored
+with the server ids of the attachment (PDFHistoryManager), so an attachment
+seen in an earlier search is recognised without downloading it again
+"""
+import hashlib
+
+
+def compute_content_hash(content):
+    """Return the SHA-256 hex digest identifying attachment content"""
+    return hashlib.sha256(content).hexdigest()
+
+
+def get_attachment_server_key(message, attachment):
+    """
+    Build a key identifying an attachment on the server
+
+    Exchange attachments are identified by item id + attachment id, IMAP
+    attachments carry their own key (account, folder, UIDVALIDITY, UID, part)
+
+    Args:
+        message: Message the attachment belongs to
+        attachment: Attachment object
+
+    Returns:
+        str: Server key, or None when the server doesn't identify the attachment
+    """
+    server_key = getattr(attachment, 'server_key', None)
+    if isinstance(server_key, str):
+        return server_key
+
+    attachment_id = getattr(getattr(attachment, 'attachment_id', None), 'id', None)
+    item_id = getattr(message, 'id', None)
+    if isinstance(attachment_id, str) and isinstance(item_id, str):
+        return f"ews:{item_id}:{attachment_id}"
+
+    return None
+
+
+
+def get_imap_server_key_prefix(account, folder, uidvalidity):
+    """
+    Build the server key prefix of attachments in an IMAP folder
+
+    UIDs are only stable within one UIDVALIDITY, so without it no key is built.
+
+    Returns:
+        str: Prefix completed with ':<uid>:<section>' per attachment, or None
+    """
+    if not isinstance(uidvalidity, int):
+        return None
+    return f"imap:{account}:{folder}:{uidvalidity}"
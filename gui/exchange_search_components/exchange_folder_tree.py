@@ -0,0 +1,156 @@
+"""
+Cached Exchange folder tree
+The whole folder hierarchy of an account is read with one deep FindFolder
+(root.walk()) and kept per account for a limited time, so folder discovery in
+the UI and the folder list of every search don't walk folder.children level
+by level
+"""
+import threading
+import time
+from tools.logger import log
+
+
+# Seconds a folder tree is reused before it is read from the server again
+EXCHANGE_FOLDER_TREE_TTL = 300
+
+# Folder properties requested in the deep traversal (id and changekey are always returned)
+EXCHANGE_FOLDER_FIELDS = ('name', 'parent_folder_id', 'folder_class', 'total_count', 'child_folder_count')
+
+
+def _folder_id(folder_or_id):
+    """Id string of a folder or FolderId"""
+    return getattr(folder_or_id, 'id', None)
+
+
+class ExchangeFolderTree:
+    """Snapshot of an account folder hierarchy indexed by folder id"""
+
+    def __init__(self, root, folders):
+        self.root = root
+        self.created_at = time.monotonic()
+        self.folders_by_id = {}
+        self.change_keys = {}
+        self.children_by_id = {}
+
+        for folder in folders:
+            folder_id = _folder_id(folder)
+            if folder_id is None:
+                continue
+            self.folders_by_id[folder_id] = folder
+            self.change_keys[folder_id] = getattr(folder, 'changekey', None)
+            parent_id = _folder_id(getattr(folder, 'parent_folder_id', None))
+            self.children_by_id.setdefault(parent_id, []).append(folder)
+
+    @classmethod
+    def load(cls, account, clear_cache=False):
+        """
+        Read the folder tree of an account with a single deep traversal
+
+        account.root keeps the folders of its first traversal in memory;
+        clear_cache drops them so walk() reads the hierarchy from the server again.
+        """
+        root = account.root
+        if clear_cache and hasattr(root, 'clear_cache'):
+            root.clear_cache()
+        folders = root.walk()
+        if hasattr(folders, 'only'):
+            folders = folders.only(*EXCHANGE_FOLDER_FIELDS)
+        # Folders the account can't access come back as exceptions
+        return cls(root, [f for f in folders if not isinstance(f, Exception)])
+
+    def is_expired(self, ttl=EXCHANGE_FOLDER_TREE_TTL):
+        return time.monotonic() - self.created_at > ttl
+
+    def __len__(self):
+        return len(self.folders_by_id)
+
+    def contains(self, folder):
+        folder_id = _folder_id(folder)
+        return folder_id in self.folders_by_id or folder_id == _folder_id(self.root)
+
+    def get_children(self, folder):
+        """Direct subfolders of a folder"""
+        return list(self.children_by_id.get(_folder_id(folder), []))
+
+    def get_parent(self, folder):
+        """Parent folder from the tree (None for the root or unknown folders)"""
+        parent_id = _folder_id(getattr(folder, 'parent_folder_id', None))
+        if parent_id is not None and parent_id == _folder_id(self.root):
+            return self.root
+        return self.folders_by_id.get(parent_id)
+
+    def get_descendants(self, folder, excluded_names=None):
+        """
+        All subfolders of a folder in depth-first order
+
+        Excluded folders are skipped together with their subfolders.
+        """
+        excluded_names = excluded_names or set()
+        descendants = []
+        stack = list(reversed(self.get_children(folder)))
+        while stack:
+            child = stack.pop()
+            if child.name in excluded_names:
+                log(f"Wykluczono folder: {child.name}")
+                continue
+            descendants.append(child)
+            stack.extend(reversed(self.get_children(child)))
+        return descendants
+
+    def changed_folder_ids(self, previous):
+        """Ids of folders added or changed (different change key) since a previous tree"""
+        return {folder_id for folder_id, changekey in self.change_keys.items()
+                if previous.change_keys.get(folder_id, object()) != changekey}
+
+
+class ExchangeFolderTreeCache:
+    """Folder trees per account, reused until they expire"""
+
+    def __init__(self, ttl=EXCHANGE_FOLDER_TREE_TTL):
+        self.ttl = ttl
+        self._trees = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _account_key(account):
+        return (getattr(account, 'primary_smtp_address', None) or str(id(account))).lower()
+
+    def get(self, account, refresh=False):
+        """
+        Get the folder tree of an account, reading it from the server when missing or expired
+
+        Returns:
+            ExchangeFolderTree: Folder tree of the account
+        """
+        key = self._account_key(account)
+        with self._lock:
+            tree = self._trees.get(key)
+            if tree is not None and not refresh and not tree.is_expired(self.ttl):
+                return tree
+
+            previous = tree
+            tree = ExchangeFolderTree.load(account, clear_cache=refresh or previous is not None)
+            self._trees[key] = tree
+
+        if previous is not None:
+            log(f"[FOLDER TREE] Odświeżono drzewo folderów: {len(tree)} folderów, "
+                f"{len(tree.changed_folder_ids(previous))} nowych lub zmienionych")
+        else:
+            log(f"[FOLDER TREE] Wczytano drzewo folderów: {len(tree)} folderów (jedno zapytanie)")
+        return tree
+
+    def get_cached(self, account):
+        """Folder tree of an account if it is cached and still valid"""
+        with self._lock:
+            tree = self._trees.get(self._account_key(account))
+        if tree is None or tree.is_expired(self.ttl):
+            return None
+        return tree
+
+    def invalidate(self, account=None):
+        """Forget the tree of one account (or all accounts)"""
+        with self._lock:
+            if account is None:
+                self._trees.clear()
+            else:
+                self._trees.pop(self._account_key(account), None)
@@ -0,0 +1,212 @@
+"""
+IMAP BODYSTRUCTURE part map
+Parses the BODYSTRUCTURE returned by the server into a flat list of parts with
+their IMAP section numbers, so single attachments and text parts can be
+fetched with BODY.PEEK[<section>] instead of downloading the whole message
+"""
+import binascii
+import email.header
+import quopri
+from urllib.parse import unquote_to_bytes
+
+
+# Size of base64 input decoded at once
+DECODE_CHUNK_SIZE = 64 * 1024
+
+
+class MessagePart:
+    """Single (non-multipart) part of a message"""
+
+    def __init__(self, section, content_type, filename=None, size=0, encoding=None, charset=None, disposition=None):
+        self.section = section
+        self.content_type = content_type
+        self.filename = filename
+        self.size = size
+        self.encoding = encoding
+        self.charset = charset
+        self.disposition = disposition
+
+    @property
+    def is_attachment(self):
+        """Part is an attachment (explicit disposition or a named non-text part)"""
+        if not self.filename or self.disposition == 'inline':
+            return False
+        return self.disposition == 'attachment' or not self.content_type.startswith('text/')
+
+    @property
+    def is_body_text(self):
+        """Part is a text part of the message body"""
+        return self.content_type.startswith('text/') and not self.is_attachment
+
+    def __repr__(self):
+        return f"MessagePart(section={self.section}, type={self.content_type}, filename={self.filename}, size={self.size})"
+
+
+def _to_str(value):
+    """Decode an IMAP atom/string to str"""
+    if value is None:
+        return None
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    return str(value)
+
+
+def _decode_encoded_words(value):
+    """Decode RFC 2047 encoded words (=?utf-8?B?...?=)"""
+    if not value or '=?' not in value:
+        return value
+    try:
+        return str(email.header.make_header(email.header.decode_header(value)))
+    except Exception:
+        return value
+
+
+def _param_pairs(params):
+    """Turn a BODYSTRUCTURE parameter list into (lowercase name, value) pairs"""
+    if not isinstance(params, (tuple, list)):
+        return []
+    return [(_to_str(params[i]).lower(), params[i + 1]) for i in range(0, len(params) - 1, 2)]
+
+
+def get_param(params, name):
+    """
+    Get a BODYSTRUCTURE parameter value, handling RFC 2231 and RFC 2047 encodings
+
+    Supports plain (name), extended (name*) and continued (name*0, name*1*...) parameters.
+    """
+    name = name.lower()
+    pairs = _param_pairs(params)
+
+    for key, value in pairs:
+        if key == name:
+            return _decode_encoded_words(_to_str(value))
+
+    # Extended (name*) and continued (name*0*, name*1...) values
+    sections = []
+    for key, value in pairs:
+        if key.startswith(name + '*'):
+            index = key[len(name) + 1:].rstrip('*') or '0'
+            if index.isdigit():
+                sections.append((int(index), key.endswith('*'), _to_str(value)))
+    if not sections:
+        return None
+
+    sections.sort()
+    charset = None
+    raw = b''
+    for index, extended, value in sections:
+        if extended:
+            if index == 0 and value.count("'") >= 2:
+                charset, _, value = value.split("'", 2)
+            raw += unquote_to_bytes(value)
+        else:
+            raw += value.encode('utf-8')
+    return raw.decode(charset or 'utf-8', errors='replace')
+
+
+def _disposition(part):
+    """Return (disposition type, disposition params) of a single-part BODYSTRUCTURE"""
+    main_type = (_to_str(part[0]) or '').lower()
+    if main_type == 'text':
+        index = 9
+    elif main_type == 'message' and (_to_str(part[1]) or '').lower() == 'rfc822':
+        index = 11
+    else:
+        index = 8
+
+    if len(part) > index and isinstance(part[index], (tuple, list)) and part[index]:
+        disposition = part[index]
+        params = disposition[1] if len(disposition) > 1 else None
+        return (_to_str(disposition[0]) or '').lower(), params
+    return None, None
+
+
+def _is_multipart(structure):
+    return isinstance(structure, (tuple, list)) and len(structure) > 0 and isinstance(structure[0], (tuple, list))
+
+
+def _parse_single(part, section):
+    main_type = (_to_str(part[0]) or '').lower()
+    sub_type = (_to_str(part[1]) or '').lower()
+    params = part[2] if len(part) > 2 else None
+    encoding = (_to_str(part[5]) or '').lower() if len(part) > 5 else None
+    try:
+        size = int(part[6]) if len(part) > 6 and part[6] is not None else 0
+    except (TypeError, ValueError):
+        size = 0
+
+    disposition, disposition_params = _disposition(part)
+    filename = get_param(disposition_params, 'filename') or get_param(params, 'name')
+
+    return MessagePart(
+        section=section,
+        content_type=f"{main_type}/{sub_type}",
+        filename=filename,
+        size=size,
+        encoding=encoding,
+        charset=get_param(params, 'charset'),
+        disposition=disposition
+    )
+
+
+def _walk(structure, prefix, parts):
+    if _is_multipart(structure):
+        # IMAPClient keeps the sub-parts as a list in the first element, raw
+        # responses list them inline before the subtype
+        children = structure[0] if isinstance(structure[0], list) else structure
+        children = [child for child in children
+                    if _is_multipart(child) or (isinstance(child, (tuple, list)) and len(child) >= 7)]
+        for number, child in enumerate(children, 1):
+            _walk(child, f"{prefix}.{number}" if prefix else str(number), parts)
+    else:
+        parts.append(_parse_single(structure, prefix or '1'))
+
+
+def parse_bodystructure(bodystructure):
+    """
+    Parse a BODYSTRUCTURE into a flat list of parts
+
+    Args:
+        bodystructure: BODYSTRUCTURE as returned by IMAPClient
+
+    Returns:
+        list: MessagePart objects in section order (empty when it can't be parsed)
+    """
+    if not bodystructure:
+        return []
+    parts = []
+    try:
+        _walk(bodystructure, '', parts)
+    except Exception:
+        return []
+    return parts
+
+
+def decode_part_payload(data, encoding):
+    """
+    Decode the content transfer encoding of a fetched part
+
+    Base64 is decoded chunk by chunk so no whitespace-stripped copy of the
+    whole part is kept next to the decoded result.
+    """
+    if data is None:
+        return b''
+    encoding = (encoding or '').lower()
+
+    if encoding == 'base64':
+        view = memoryview(data)
+        decoded = bytearray()
+        pending = b''
+        for start in range(0, len(view), DECODE_CHUNK_SIZE):
+            chunk = pending + bytes(view[start:start + DECODE_CHUNK_SIZE]).translate(None, b' \t\r\n')
+            usable = len(chunk) - len(chunk) % 4
+            decoded += binascii.a2b_base64(chunk[:usable])
+            pending = chunk[usable:]
+        if pending.rstrip(b'='):
+            decoded += binascii.a2b_base64(pending + b'=' * (-len(pending) % 4))
+        return bytes(decoded)
+
+    if encoding == 'quoted-printable':
+        return quopri.decodestring(data)
+
+    return bytes(data)
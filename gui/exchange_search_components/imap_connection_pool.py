@@ -0,0 +1,200 @@
+"""
+Pool of authenticated IMAP sessions
+An IMAP session runs one command at a time and has a single selected folder,
+so folders searched in parallel and lazy attachment/body loads each borrow
+their own session instead of sharing one socket across threads
+"""
+import imaplib
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from tools.logger import log, get_logger
+
+
+# Default number of IMAP sessions opened per account
+DEFAULT_IMAP_POOL_SIZE = 4
+
+# Seconds to wait for a free session when all of them are busy
+IMAP_POOL_TIMEOUT = 120
+
+# Sessions idle longer than this (seconds) are checked with NOOP before reuse,
+# servers drop idle IMAP connections
+IMAP_IDLE_CHECK_AFTER = 60
+
+# Errors meaning the session itself is gone (socket closed, connection aborted)
+IMAP_CONNECTION_ERRORS = (OSError, EOFError, imaplib.IMAP4.abort)
+
+imap_log = get_logger('imap')
+
+
+class IMAPPoolExhausted(TimeoutError):
+    """No pooled session became free in time"""
+
+
+def is_connection_error(error):
+    """Check if an error means the IMAP session is unusable (worth retrying on a new one)"""
+    return isinstance(error, IMAP_CONNECTION_ERRORS) and not isinstance(error, IMAPPoolExhausted)
+
+
+class IMAPConnectionPool:
+    """Bounded pool of IMAP sessions created on demand"""
+
+    def __init__(self, connect, max_size=DEFAULT_IMAP_POOL_SIZE):
+        """
+        Args:
+            connect: Callable returning a new logged in IMAPClient
+            max_size: Maximum number of sessions open at once
+        """
+        self._connect = connect
+        self.max_size = max(1, int(max_size))
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._sessions = []
+        self._selected = {}
+        self._idle_since = {}
+        self._closed = False
+
+    def acquire(self, timeout=IMAP_POOL_TIMEOUT):
+        """Borrow a session, opening a new one while the pool is not full"""
+        deadline = time.monotonic() + timeout
+        while True:
+            if self._closed:
+                raise RuntimeError("Pula połączeń IMAP została zamknięta")
+
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                session = None
+
+            if session is None:
+                with self._lock:
+                    can_open = len(self._sessions) < self.max_size
+                    if can_open:
+                        # Reserve the slot before the (slow) login
+                        self._sessions.append(None)
+
+                if can_open:
+                    return self._open_session()
+
+                try:
+                    session = self._idle.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    raise IMAPPoolExhausted("Brak wolnego połączenia IMAP w puli")
+
+            if self._is_alive(session):
+                return session
+            # Dropped by the server while idle - replace it
+            self._discard(session)
+
+    def _open_session(self):
+        try:
+            session = self._connect()
+        except Exception:
+            with self._lock:
+                self._sessions.remove(None)
+            raise
+
+        with self._lock:
+            self._sessions[self._sessions.index(None)] = session
+            count = len(self._sessions)
+        imap_log.debug("[IMAP POOL] Otwarto połączenie %d/%d", count, self.max_size)
+        return session
+
+    def _is_alive(self, session):
+        """Check a session that sat idle for a while with NOOP"""
+        idle_since = self._idle_since.pop(id(session), None)
+        if idle_since is None or time.monotonic() - idle_since < IMAP_IDLE_CHECK_AFTER:
+            return True
+        try:
+            session.noop()
+            return True
+        except Exception as e:
+            imap_log.debug("[IMAP POOL] Bezczynne połączenie zerwane przez serwer: %s", e)
+            return False
+
+    def release(self, session, broken=False):
+        """Return a session to the pool, broken sessions are closed"""
+        if broken or self._closed:
+            self._discard(session)
+        else:
+            self._idle_since[id(session)] = time.monotonic()
+            self._idle.put(session)
+
+    def select(self, session, folder):
+        """
+        Select a folder (read-only) unless the session already has it selected
+
+        Returns:
+            dict: SELECT response (UIDVALIDITY, UIDNEXT, ...)
+        """
+        selected = self._selected.get(id(session))
+        if selected and selected[0] == folder:
+            return selected[1]
+
+        self._selected.pop(id(session), None)
+        select_info = session.select_folder(folder, readonly=True)
+        self._selected[id(session)] = (folder, select_info)
+        return select_info
+
+    @contextmanager
+    def connection(self, folder=None):
+        """Borrow a session for the duration of a with block, optionally with a folder selected"""
+        session = self.acquire()
+        broken = False
+        try:
+            if folder is not None:
+                self.select(session, folder)
+            yield session
+        except Exception as e:
+            if is_connection_error(e):
+                broken = True
+            else:
+                # The session is fine (e.g. NO for a missing folder), only its folder state is unknown
+                self._selected.pop(id(session), None)
+            raise
+        finally:
+            self.release(session, broken)
+
+    def run(self, func, folder=None):
+        """
+        Call func(session) on a pooled session (with the folder selected)
+
+        When the session turns out to be dropped, the call is repeated once
+        on a fresh session.
+        """
+        try:
+            with self.connection(folder) as session:
+                return func(session)
+        except Exception as e:
+            if not is_connection_error(e) or self._closed:
+                raise
+            log(f"[IMAP POOL] Połączenie IMAP zerwane ({e}), ponawianie na nowym połączeniu")
+
+        with self.connection(folder) as session:
+            return func(session)
+
+    def _discard(self, session):
+        with self._lock:
+            if session in self._sessions:
+                self._sessions.remove(session)
+            self._selected.pop(id(session), None)
+            self._idle_since.pop(id(session), None)
+        try:
+            session.logout()
+        except Exception:
+            pass
+
+    def close(self):
+        """Log out all idle sessions, busy ones are closed when released"""
+        self._closed = True
+        closed = 0
+        while True:
+            try:
+                session = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(session)
+            closed += 1
+        if closed:
+            log(f"[IMAP POOL] Zamknięto {closed} połączeń IMAP")
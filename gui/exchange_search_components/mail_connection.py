@@ -7,6 +7,8 @@ import poplib
 import email
 from exchangelib import Credentials, Account, Configuration, DELEGATE
 from tools.logger import log
+from .imap_connection_pool import IMAPConnectionPool, DEFAULT_IMAP_POOL_SIZE
+from .exchange_folder_tree import ExchangeFolderTreeCache
 
 # Handle optional tkinter import
 try:
@@ -175,8 +177,11 @@ class MailConnection:
     def __init__(self):
         self.account = None
         self.imap_connection = None
+        self.imap_pool = None
         self.pop3_connection = None
         self.current_account_config = None
+        # Exchange folder trees per account, kept across reconnects and shared by search and folder discovery
+        self.exchange_folder_trees = ExchangeFolderTreeCache()
     
     def load_mail_config(self):
         """Load mail configuration from config file with fallback to legacy"""
@@ -320,13 +325,14 @@ class MailConnection:
                 log(f"[MAIL CONNECTION] Could not access root folder, using inbox parent: {root_error}")
                 root_folder = account.inbox.parent
             
-            # Get all folders recursively
-            all_folders = self._get_all_subfolders_recursive(root_folder, set())
+            # Get all folders from the cached folder tree
+            all_folders = self._get_exchange_subfolders(account, root_folder)
             
             # Include root and well-known folders
+            folder_ids = {getattr(folder, 'id', None) for folder in all_folders}
             well_known = [account.inbox, account.sent, account.drafts, account.trash]
             for folder in well_known:
-                if folder and folder not in all_folders:
+                if folder and getattr(folder, 'id', None) not in folder_ids:
                     all_folders.insert(0, folder)
             
             log(f"[MAIL CONNECTION] Processing {len(all_folders)} Exchange folders")
@@ -430,6 +436,13 @@ class MailConnection:
     
     def get_exchange_account(self):
         """Get first available Exchange account connection from exchange_mail_config.json"""
+        account_config = self.get_exchange_account_config()
+        if not account_config:
+            return None
+        return self._get_account_connection(account_config)
+    
+    def get_exchange_account_config(self):
+        """Get the configuration of the Exchange account used by get_exchange_account() (no connection)"""
         # Try to load from Exchange-specific config first
         config = self.load_exchange_mail_config()
         
@@ -456,7 +469,7 @@ class MailConnection:
                 # Add type field if missing (for exchange_mail_config.json accounts)
                 if "type" not in main_account:
                     main_account["type"] = "exchange"
-                return self._get_account_connection(main_account)
+                return main_account
         
         # If main account is not Exchange, find the first Exchange account
         for idx, account_config in enumerate(accounts):
@@ -466,7 +479,7 @@ class MailConnection:
                 # Add type field if missing (for exchange_mail_config.json accounts)
                 if "type" not in account_config:
                     account_config["type"] = "exchange"
-                return self._get_account_connection(account_config)
+                return account_config
         
         # No Exchange accounts found
         log("[MAIL CONNECTION] No Exchange accounts found in configuration")
@@ -536,6 +549,12 @@ class MailConnection:
     
     def _get_imap_connection(self, account_config):
         """Get IMAP connection"""
+        imap = self._create_imap_client(account_config)
+        self.imap_connection = imap
+        return imap
+    
+    def _create_imap_client(self, account_config):
+        """Open and log in a new IMAP session"""
         imap = IMAPClient(
             account_config.get("imap_server", ""),
             port=account_config.get("imap_port", 993),
@@ -546,9 +565,26 @@ class MailConnection:
             account_config.get("username", ""),
             account_config.get("password", "")
         )
-        self.imap_connection = imap
         return imap
     
+    def get_imap_pool(self):
+        """
+        Pool of IMAP sessions of the current account, used for parallel folder
+        searches and lazy attachment/body loads (created on first use)
+        
+        Returns:
+            IMAPConnectionPool: Pool, or None for non-IMAP accounts
+        """
+        config = self.current_account_config
+        if not config or config.get("type") != "imap_smtp":
+            return None
+        
+        if self.imap_pool is None:
+            pool_size = config.get("imap_pool_size", DEFAULT_IMAP_POOL_SIZE)
+            self.imap_pool = IMAPConnectionPool(lambda: self._create_imap_client(config), max_size=pool_size)
+            log(f"[MAIL CONNECTION] Utworzono pulę połączeń IMAP (maks. {self.imap_pool.max_size})")
+        return self.imap_pool
+    
     def _get_pop3_connection(self, account_config):
         """Get POP3 connection"""
         if account_config.get("pop3_ssl", True):
@@ -597,10 +633,15 @@ class MailConnection:
             if first_part_mapped == "INBOX" or path_parts[0].lower() in ["inbox", "skrzynka odbiorcza"]:
                 path_parts = path_parts[1:]  # Skip inbox part
             
+            folder_tree = self.get_exchange_folder_tree(account)
             for part in path_parts:
                 if part:
                     found = False
-                    for child in current_folder.children:
+                    if folder_tree is not None and folder_tree.contains(current_folder):
+                        children = folder_tree.get_children(current_folder)
+                    else:
+                        children = current_folder.children
+                    for child in children:
                         if child.name.lower() == part.lower():
                             current_folder = child
                             found = True
@@ -657,10 +698,7 @@ class MailConnection:
             # For POP3, this is simplified as POP3 only has one mailbox
             return ["INBOX"]
         elif account_type == "imap_smtp":
-            log("[MAIL CONNECTION] IMAP simplified folder handling")
-            # For IMAP, this is simplified as most IMAP operations work on single folders
-            folder = self.get_folder_by_path(account, folder_path)
-            return [folder] if folder else []
+            return self._get_imap_folder_with_subfolders(account, folder_path, excluded_folders)
         else:
             log(f"[MAIL CONNECTION] WARNING: Unknown account type '{account_type}', defaulting to IMAP behavior")
             folder = self.get_folder_by_path(account, folder_path)
@@ -704,8 +742,8 @@ class MailConnection:
                 if excluded_names:
                     log(f"[MAIL CONNECTION] Excluding {len(excluded_names)} folders: {', '.join(excluded_names)}")
             
-            # Get all subfolders recursively from root (this covers entire mailbox)
-            all_folders = self._get_all_subfolders_recursive(root_folder, excluded_names)
+            # Get all subfolders from root (this covers entire mailbox)
+            all_folders = self._get_exchange_subfolders(account, root_folder, excluded_names)
             
             # Include root folder itself if it's not excluded
             if root_folder.name not in excluded_names:
@@ -726,10 +764,12 @@ class MailConnection:
                     well_known_folders.append(account.junk)
                 
                 # Add well-known folders if not already in list and not excluded
+                folder_names = {f.name for f in all_folders}
                 for wk_folder in well_known_folders:
                     if wk_folder and wk_folder.name not in excluded_names:
-                        if not any(f.name == wk_folder.name for f in all_folders):
+                        if wk_folder.name not in folder_names:
                             all_folders.append(wk_folder)
+                            folder_names.add(wk_folder.name)
                             log(f"[MAIL CONNECTION] Added well-known folder: {wk_folder.name}")
             except Exception as wk_error:
                 log(f"[MAIL CONNECTION] Warning: Could not access well-known folders: {wk_error}")
@@ -744,6 +784,72 @@ class MailConnection:
             messagebox.showerror("Błąd folderów", f"Błąd pobierania listy folderów: {str(e)}")
             return []
     
+    def _get_imap_folder_with_subfolders(self, imap, folder_path, excluded_folders=None):
+        """
+        Get IMAP folder and all its subfolders
+        
+        The whole hierarchy comes from a single LIST. A folder is excluded (with
+        its subfolders) when its full name or any level of its path is on the
+        excluded list; \\Noselect containers are skipped.
+        """
+        base_folder = self.get_folder_by_path(imap, folder_path)
+        if not base_folder:
+            return []
+        
+        excluded_names = set()
+        if excluded_folders:
+            if isinstance(excluded_folders, str):
+                excluded_names = set(f.strip() for f in excluded_folders.split(',') if f.strip())
+            elif isinstance(excluded_folders, (list, set)):
+                excluded_names = set(excluded_folders)
+        
+        try:
+            folder_list = imap.list_folders()
+        except Exception as e:
+            log(f"[MAIL CONNECTION] ERROR listing IMAP folders: {str(e)} - searching only '{base_folder}'")
+            return [base_folder]
+        
+        subfolders = []
+        for flags, delimiter, name in folder_list:
+            if isinstance(name, bytes):
+                name = name.decode('utf-8')
+            if isinstance(delimiter, bytes):
+                delimiter = delimiter.decode('utf-8')
+            if not delimiter or not name.startswith(base_folder + delimiter):
+                continue
+            if any(flag.lower() == b'\\noselect' for flag in flags if isinstance(flag, bytes)):
+                continue
+            
+            relative_parts = name[len(base_folder) + len(delimiter):].split(delimiter)
+            if name in excluded_names or any(part in excluded_names for part in relative_parts):
+                log(f"Wykluczono folder: {name}")
+                continue
+            subfolders.append(name)
+        
+        folders = [base_folder] + sorted(subfolders)
+        log(f"[MAIL CONNECTION] IMAP folder search: {len(folders)} folders under '{base_folder}'")
+        return folders
+    
+    def get_exchange_folder_tree(self, account, refresh=False):
+        """
+        Folder tree of an Exchange account read with one deep traversal and cached
+        
+        Returns:
+            ExchangeFolderTree: Folder tree, or None if the traversal failed
+        """
+        try:
+            return self.exchange_folder_trees.get(account, refresh=refresh)
+        except Exception as e:
+            log(f"[MAIL CONNECTION] ERROR reading Exchange folder tree: {str(e)}")
+            return None
+    
+    def _get_exchange_subfolders(self, account, folder, excluded_folder_names=None):
+        """All subfolders of an Exchange folder, from the cached folder tree when possible"""
+        folder_tree = self.get_exchange_folder_tree(account)
+        if folder_tree is not None and folder_tree.contains(folder):
+            return folder_tree.get_descendants(folder, excluded_folder_names)
+        return self._get_all_subfolders_recursive(folder, excluded_folder_names)
+    
     def _get_all_subfolders_recursive(self, folder, excluded_folder_names=None):
         """Recursively get all subfolders of a given folder"""
         if excluded_folder_names is None:
@@ -866,8 +972,8 @@ class MailConnection:
                         log("[MAIL CONNECTION] ERROR: Could not access any folder for discovery")
                         return self._get_fallback_folders()
             
-            # Get all subfolders recursively (without exclusions since we want to show all as options)
-            all_subfolders = self._get_all_subfolders_recursive(root_folder, set())
+            # Get all subfolders (without exclusions since we want to show all as options)
+            all_subfolders = self._get_exchange_subfolders(account, root_folder)
             
             # Extract folder names from folder objects
             folder_names = [subfolder.name for subfolder in all_subfolders]
@@ -1039,6 +1145,10 @@ class MailConnection:
                 pass
             self.imap_connection = None
         
+        if self.imap_pool:
+            self.imap_pool.close()
+            self.imap_pool = None
+        
         if self.pop3_connection:
             try:
                 self.pop3_connection.quit()
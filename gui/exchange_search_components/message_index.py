@@ -0,0 +1,368 @@
+"""
+Local message-metadata index module
+Keeps message headers per account and folder in SQLite and syncs them
+incrementally (IMAP UIDVALIDITY/UIDNEXT/MODSEQ, Exchange sync_items, POP3 UIDL)
+"""
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+from tools.logger import log
+from .datetime_utils import IMAPDateHandler
+
+
+# Fields requested from Exchange while syncing headers
+EXCHANGE_SYNC_FIELDS = ['subject', 'sender', 'datetime_received', 'is_read', 'has_attachments']
+
+# How many messages are parsed in one IMAP/POP3 fetch while syncing
+SYNC_BATCH_SIZE = 200
+
+
+class MessageIndex:
+    """Persistent index of message headers with incremental server sync"""
+
+    def __init__(self, index_file_path="message_index.db"):
+        """
+        Initialize message index
+
+        Args:
+            index_file_path: Path to the SQLite database file
+        """
+        self.index_file_path = index_file_path
+        directory = os.path.dirname(index_file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Folders are searched from several worker threads, so one connection is shared under a lock
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(index_file_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        """Create index tables if they don't exist"""
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS folder_state (
+                    account TEXT NOT NULL,
+                    folder TEXT NOT NULL,
+                    state TEXT,
+                    last_sync TEXT,
+                    PRIMARY KEY (account, folder)
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS messages (
+                    account TEXT NOT NULL,
+                    folder TEXT NOT NULL,
+                    msg_key TEXT NOT NULL,
+                    changekey TEXT,
+                    message_num INTEGER,
+                    subject TEXT,
+                    sender_name TEXT,
+                    sender_email TEXT,
+                    datetime_received TEXT,
+                    is_read INTEGER,
+                    has_attachments INTEGER,
+                    size INTEGER,
+                    PRIMARY KEY (account, folder, msg_key)
+                )
+            """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_messages_date ON messages (account, folder, datetime_received)"
+            )
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    # ------------------------------------------------------------------
+    # Low level storage
+    # ------------------------------------------------------------------
+
+    def get_folder_state(self, account, folder):
+        """Return stored sync state dict for a folder (empty dict if never synced)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state FROM folder_state WHERE account = ? AND folder = ?", (account, folder)
+            ).fetchone()
+        if not row or not row[0]:
+            return {}
+        try:
+            return json.loads(row[0])
+        except ValueError:
+            return {}
+
+    def save_folder_state(self, account, folder, state):
+        """Store sync state dict for a folder"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO folder_state (account, folder, state, last_sync) VALUES (?, ?, ?, ?)",
+                (account, folder, json.dumps(state), datetime.now().isoformat())
+            )
+
+    def clear_folder(self, account, folder):
+        """Remove all indexed messages and sync state of a folder"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM messages WHERE account = ? AND folder = ?", (account, folder))
+            self._conn.execute("DELETE FROM folder_state WHERE account = ? AND folder = ?", (account, folder))
+
+    def upsert_messages(self, account, folder, rows):
+        """Insert or update message rows (dicts as produced by row_from_message)"""
+        if not rows:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                """INSERT OR REPLACE INTO messages
+                   (account, folder, msg_key, changekey, message_num, subject, sender_name, sender_email,
+                    datetime_received, is_read, has_attachments, size)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                [
+                    (account, folder, str(row['key']), row.get('changekey'), row.get('message_num'),
+                     row.get('subject'), row.get('sender_name'), row.get('sender_email'),
+                     row.get('datetime_received'), int(bool(row.get('is_read'))),
+                     int(bool(row.get('has_attachments'))), row.get('size') or 0)
+                    for row in rows
+                ]
+            )
+
+    def update_read_flags(self, account, folder, flags_by_key):
+        """Update is_read flags for known messages"""
+        if not flags_by_key:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE messages SET is_read = ? WHERE account = ? AND folder = ? AND msg_key = ?",
+                [(int(bool(is_read)), account, folder, str(key)) for key, is_read in flags_by_key.items()]
+            )
+
+    def delete_messages(self, account, folder, keys):
+        """Remove messages that disappeared from the server"""
+        if not keys:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM messages WHERE account = ? AND folder = ? AND msg_key = ?",
+                [(account, folder, str(key)) for key in keys]
+            )
+
+    def known_keys(self, account, folder):
+        """Set of message keys indexed for a folder"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT msg_key FROM messages WHERE account = ? AND folder = ?", (account, folder)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def query(self, account, folder, subject=None, sender=None, since=None, unread_only=False, limit=None):
+        """
+        Search indexed headers locally
+
+        Args:
+            account: Account identifier
+            folder: Folder identifier
+            subject: Case-insensitive subject fragment
+            sender: Case-insensitive sender name/email fragment
+            since: Only messages received at or after this datetime
+            unread_only: Only unread messages
+            limit: Maximum number of rows (newest first)
+
+        Returns:
+            list: Row dicts ordered by datetime_received descending
+        """
+        sql = "SELECT * FROM messages WHERE account = ? AND folder = ?"
+        params = [account, folder]
+
+        if subject:
+            sql += " AND LOWER(subject) LIKE ?"
+            params.append(f"%{subject.lower()}%")
+        if sender:
+            sql += " AND (LOWER(sender_email) LIKE ? OR LOWER(sender_name) LIKE ?)"
+            params.extend([f"%{sender.lower()}%"] * 2)
+        if since:
+            sql += " AND datetime_received >= ?"
+            params.append(self._format_date(since))
+        if unread_only:
+            sql += " AND is_read = 0"
+
+        sql += " ORDER BY datetime_received DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            columns = [column[0] for column in cursor.description]
+            rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+        for row in rows:
+            row['datetime_received'] = self._parse_date(row['datetime_received'])
+            row['is_read'] = bool(row['is_read'])
+            row['has_attachments'] = bool(row['has_attachments'])
+        return rows
+
+    @staticmethod
+    def _format_date(dt):
+        """Store dates as sortable UTC ISO strings"""
+        if not dt:
+            return None
+        return IMAPDateHandler.ensure_timezone(dt).astimezone(timezone.utc).isoformat()
+
+    @staticmethod
+    def _parse_date(value):
+        """Parse stored ISO date back to aware datetime"""
+        if not value:
+            return None
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+
+    @classmethod
+    def row_from_message(cls, message, key=None):
+        """Build an index row from a message-like object (Exchange, IMAP or POP3)"""
+        sender = getattr(message, 'sender', None)
+        return {
+            'key': key if key is not None else getattr(message, 'id', None),
+            'changekey': getattr(message, 'changekey', None),
+            'message_num': getattr(message, 'message_num', None),
+            'subject': getattr(message, 'subject', None) or '',
+            'sender_name': getattr(sender, 'name', None) if sender else None,
+            'sender_email': getattr(sender, 'email_address', None) if sender else None,
+            'datetime_received': cls._format_date(getattr(message, 'datetime_received', None)),
+            'is_read': getattr(message, 'is_read', True),
+            'has_attachments': getattr(message, 'has_attachments', False),
+            'size': getattr(message, 'size', 0)
+        }
+
+    # ------------------------------------------------------------------
+    # Incremental sync
+    # ------------------------------------------------------------------
+
+    def sync_imap_folder(self, imap, account, folder, fetch_messages):
+        """
+        Sync an IMAP folder using UIDVALIDITY/UIDNEXT (and MODSEQ when available)
+
+        Args:
+            imap: IMAPClient connection
+            account: Account identifier
+            folder: Server folder name
+            fetch_messages: Callable(uids) -> list of parsed message objects
+        """
+        select_info = imap.select_folder(folder, readonly=True)
+        uidvalidity = select_info.get(b'UIDVALIDITY')
+        uidnext = select_info.get(b'UIDNEXT')
+        modseq = select_info.get(b'HIGHESTMODSEQ')
+
+        state = self.get_folder_state(account, folder)
+        if state.get('uidvalidity') != uidvalidity:
+            if state:
+                log(f"[MESSAGE INDEX] Zmiana UIDVALIDITY folderu '{folder}' - pełna resynchronizacja")
+            self.clear_folder(account, folder)
+            state = {}
+
+        if state and state.get('uidnext') == uidnext and (modseq is None or state.get('modseq') == modseq):
+            log(f"[MESSAGE INDEX] Folder '{folder}' bez zmian (UIDNEXT={uidnext})")
+            return 0
+
+        server_uids = set(imap.search(['ALL']))
+        known = {int(key) for key in self.known_keys(account, folder)}
+
+        # Expunged messages
+        removed = known - server_uids
+        self.delete_messages(account, folder, removed)
+
+        # New messages
+        new_uids = sorted(server_uids - known)
+        for i in range(0, len(new_uids), SYNC_BATCH_SIZE):
+            batch = new_uids[i:i + SYNC_BATCH_SIZE]
+            messages = fetch_messages(batch)
+            self.upsert_messages(account, folder, [self.row_from_message(m, m.uid) for m in messages])
+
+        # Flag changes on already known messages
+        still_known = sorted(known & server_uids)
+        if still_known:
+            if modseq is not None and state.get('modseq') is not None:
+                response = imap.fetch(still_known, ['FLAGS'], modifiers=[f"CHANGEDSINCE {state['modseq']}"])
+            else:
+                response = imap.fetch(still_known, ['FLAGS'])
+            self.update_read_flags(account, folder, {
+                uid: b'\\Seen' in data.get(b'FLAGS', ()) for uid, data in response.items()
+            })
+
+        self.save_folder_state(account, folder, {'uidvalidity': uidvalidity, 'uidnext': uidnext, 'modseq': modseq})
+        log(f"[MESSAGE INDEX] Zsynchronizowano folder '{folder}': +{len(new_uids)} / -{len(removed)}")
+        return len(new_uids) + len(removed)
+
+    def sync_exchange_folder(self, folder, account, folder_key):
+        """
+        Sync an Exchange folder using sync_items state
+
+        Args:
+            folder: exchangelib folder object
+            account: Account identifier
+            folder_key: Stable folder identifier (folder id)
+        """
+        state = self.get_folder_state(account, folder_key)
+        folder.item_sync_state = state.get('sync_state')
+
+        upserts = []
+        deleted = []
+        read_flags = {}
+        for change_type, item in folder.sync_items(only_fields=EXCHANGE_SYNC_FIELDS):
+            if change_type in ('create', 'update'):
+                upserts.append(self.row_from_message(item))
+            elif change_type == 'delete':
+                deleted.append(getattr(item, 'id', item))
+            elif change_type == 'read_flag_change':
+                item_id, is_read = item
+                read_flags[getattr(item_id, 'id', item_id)] = is_read
+
+        self.upsert_messages(account, folder_key, upserts)
+        self.delete_messages(account, folder_key, deleted)
+        self.update_read_flags(account, folder_key, read_flags)
+        self.save_folder_state(account, folder_key, {'sync_state': folder.item_sync_state})
+
+        log(f"[MESSAGE INDEX] Zsynchronizowano folder Exchange '{folder.name}': "
+            f"{len(upserts)} nowych/zmienionych, {len(deleted)} usuniętych, {len(read_flags)} zmian flag")
+        return len(upserts) + len(deleted) + len(read_flags)
+
+    def sync_pop3_mailbox(self, pop3, account, fetch_message):
+        """
+        Sync a POP3 mailbox using UIDL
+
+        Args:
+            pop3: poplib connection
+            account: Account identifier
+            fetch_message: Callable(message_num) -> parsed message object
+        """
+        folder = "INBOX"
+        uid_to_num = {}
+        for line in pop3.uidl()[1]:
+            message_num, uid = line.decode('utf-8', errors='ignore').split(None, 1)
+            uid_to_num[uid.strip()] = int(message_num)
+
+        known = self.known_keys(account, folder)
+        removed = known - set(uid_to_num)
+        self.delete_messages(account, folder, removed)
+
+        # Message numbers are only valid in this session, refresh them for known messages
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE messages SET message_num = ? WHERE account = ? AND folder = ? AND msg_key = ?",
+                [(num, account, folder, uid) for uid, num in uid_to_num.items() if uid in known]
+            )
+
+        rows = []
+        for uid, message_num in uid_to_num.items():
+            if uid in known:
+                continue
+            message = fetch_message(message_num)
+            if message:
+                rows.append(self.row_from_message(message, uid))
+        self.upsert_messages(account, folder, rows)
+
+        log(f"[MESSAGE INDEX] Zsynchronizowano skrzynkę POP3: +{len(rows)} / -{len(removed)}")
+        return len(rows) + len(removed)
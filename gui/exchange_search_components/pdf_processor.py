@@ -5,7 +5,10 @@ import io
 import os
 import re
 import tempfile
-from tools.logger import log
+from tools.logger import log, get_logger
+from .attachment_identity import compute_content_hash
+# Text extraction lives in a light module so extraction worker processes don't import OCR
+from .pdf_text_worker import extract_text_pages, page_matches
 
 # Import poppler utilities for automatic path detection
 try:
@@ -45,7 +48,7 @@ except ImportError as e:
 # Try to import required packages, handle missing dependencies gracefully
 try:
     import pytesseract
-    from pdf2image import convert_from_bytes
+    from pdf2image import convert_from_bytes, pdfinfo_from_bytes
     pytesseract.pytesseract.tesseract_cmd = TESSERACT_PATH
     HAVE_OCR = True
     log("PDF OCR dependencies available")
@@ -62,17 +65,32 @@ except ImportError as e:
     log(f"pdfplumber not available: {e}")
 
 
+# DPI used to render PDF pages for OCR (part of the text cache key)
+OCR_DPI = 200
+
+# Number of pages rendered to images at once for OCR
+OCR_RENDER_WINDOW = 4
+
+# Per-attachment and per-page diagnostics are logged at DEBUG level
+pdf_log = get_logger('pdf')
+
+# Minimum number of non-whitespace characters for a page to count as having a text layer
+MIN_TEXT_LAYER_CHARS = 20
+
+
 class PDFProcessor:
     """Handles PDF text extraction and search operations"""
     
-    def __init__(self):
+    def __init__(self, text_cache=None):
         self.search_cancelled = False
+        # Optional PDFTextCache with per-page text of already processed PDFs
+        self.text_cache = text_cache
     
     def cancel_search(self):
         """Cancel ongoing PDF processing"""
         self.search_cancelled = True
     
-    def search_in_pdf_attachment(self, attachment, search_text, attachment_name=""):
+    def search_in_pdf_attachment(self, attachment, search_text, attachment_name="", find_all_matches=False, content_hash=None):
         """
         Search for text in a PDF attachment
         
@@ -80,11 +98,14 @@ class PDFProcessor:
             attachment: Email attachment object with content
             search_text: Text to search for (case-insensitive)
             attachment_name: Name of the attachment for logging
+            find_all_matches: Extract all pages instead of stopping at the first page with a match
+            content_hash: Already computed SHA-256 of the attachment content (computed here when missing)
             
         Returns:
             dict: {
                 'found': bool,
                 'matches': list of found text snippets,
+                'match_pages': page numbers (1-based) containing the search text,
                 'method': 'text_extraction' or 'ocr'
             }
         """
@@ -95,7 +116,7 @@ class PDFProcessor:
             return {'found': False, 'matches': [], 'method': 'no_content'}
         
         # Check if PDF processing is available
-        if not HAVE_PDFPLUMBER and not HAVE_OCR:
+        if not HAVE_PDFPLUMBER and not HAVE_OCR and not self.text_cache:
             log("PDF search not available: missing dependencies (pdfplumber, pytesseract)")
             return {'found': False, 'matches': [], 'method': 'missing_dependencies'}
         
@@ -103,92 +124,278 @@ class PDFProcessor:
         if not search_text_lower:
             return {'found': False, 'matches': [], 'method': 'empty_search'}
         
-        log(f"Wyszukiwanie '{search_text}' w załączniku PDF: {attachment_name}")
+        pdf_log.debug("Wyszukiwanie '%s' w załączniku PDF: %s", search_text, attachment_name)
         
         try:
+            if content_hash is None and self.text_cache:
+                content_hash = compute_content_hash(attachment.content)
+            
             # First try text extraction (faster) if available
-            if HAVE_PDFPLUMBER:
-                result = self._search_with_text_extraction(attachment.content, search_text_lower, attachment_name)
+            text_pages = None
+            if HAVE_PDFPLUMBER or self.text_cache:
+                result = self._search_with_text_extraction(
+                    attachment.content, search_text_lower, attachment_name, content_hash, find_all_matches
+                )
                 if result['found']:
                     return result
+                text_pages = result.get('pages')
             
-            # If text extraction fails or finds nothing, try OCR if available
-            if HAVE_OCR and not self.search_cancelled:
-                result = self._search_with_ocr(attachment.content, search_text_lower, attachment_name)
+            # If text extraction fails or finds nothing, OCR pages without a text layer
+            if (HAVE_OCR or self.text_cache) and not self.search_cancelled:
+                if not self.needs_ocr(text_pages):
+                    pdf_log.debug("Wszystkie strony PDF %s mają warstwę tekstową - pomijam OCR", attachment_name)
+                    return {'found': False, 'matches': [], 'method': 'not_found', 'pages': text_pages}
+                result = self._search_with_ocr(
+                    attachment.content, search_text_lower, attachment_name, content_hash, find_all_matches, text_pages
+                )
+                if text_pages and not result.get('pages'):
+                    # Keep extracted text for callers that index it
+                    result['pages'] = text_pages
                 return result
+            
+            if text_pages:
+                return {'found': False, 'matches': [], 'method': 'not_found', 'pages': text_pages}
                 
         except Exception as e:
-            log(f"Error searching PDF {attachment_name}: {str(e)}")
+            pdf_log.error("Error searching PDF %s: %s", attachment_name, e)
             return {'found': False, 'matches': [], 'method': 'error', 'error': str(e)}
         
         return {'found': False, 'matches': [], 'method': 'not_found'}
     
-    def _search_with_text_extraction(self, pdf_content, search_text_lower, attachment_name):
-        """Try to extract text directly from PDF and search"""
+    def get_cached_text_pages(self, pdf_content, content_hash=None):
+        """
+        Look up the text layer of a PDF in the text cache
+        
+        Returns:
+            tuple: (content_hash or None, cached page texts or None)
+        """
+        if not self.text_cache:
+            return content_hash, None
+        if content_hash is None:
+            content_hash = compute_content_hash(pdf_content)
+        return content_hash, self._get_cached_pages(content_hash, 'text')
+    
+    def search_text_pages(self, pages, search_text, attachment_name="", content_hash=None):
+        """
+        Search text-layer pages extracted outside this processor (e.g. in a worker process)
+        
+        The pages are stored in the text cache like pages extracted by this processor.
+        """
+        self._store_cached_pages(content_hash, 'text', pages)
+        return self._search_in_pages(pages, search_text.lower().strip(), attachment_name, 'text_extraction', 'ekstrakcję tekstu')
+    
+    def search_with_ocr(self, pdf_content, search_text, attachment_name="", content_hash=None, text_pages=None):
+        """Search a PDF using OCR for pages without a text layer (text layer already checked)"""
+        if self.search_cancelled:
+            return {'found': False, 'matches': [], 'method': 'cancelled'}
+        if not HAVE_OCR and not self.text_cache:
+            return {'found': False, 'matches': [], 'method': 'ocr_not_available'}
+        return self._search_with_ocr(pdf_content, search_text.lower().strip(), attachment_name, content_hash, text_pages=text_pages)
+    
+    @staticmethod
+    def has_text_layer(page_text):
+        """Check if an extracted page has enough text to skip OCR for it"""
+        return len("".join((page_text or "").split())) >= MIN_TEXT_LAYER_CHARS
+    
+    def get_ocr_page_numbers(self, text_pages):
+        """
+        Page numbers (1-based) that need OCR
+        
+        Returns:
+            list: Pages without a text layer, or None when the text layer is unknown (all pages)
+        """
+        if text_pages is None:
+            return None
+        return [page_num + 1 for page_num, page_text in enumerate(text_pages) if not self.has_text_layer(page_text)]
+    
+    def needs_ocr(self, text_pages):
+        """Check if any page of the PDF has to be OCR'd"""
+        return text_pages is None or bool(self.get_ocr_page_numbers(text_pages))
+    
+    def _get_cached_pages(self, content_hash, method, engine='', dpi=0):
+        """Get cached page texts for a PDF, or None when not cached"""
+        if not self.text_cache or not content_hash:
+            return None
+        return self.text_cache.get(content_hash, method, engine, dpi)
+    
+    def _store_cached_pages(self, content_hash, method, pages, engine='', dpi=0):
+        """Store complete page texts of a PDF in the text cache"""
+        if self.text_cache and content_hash and not self.search_cancelled:
+            self.text_cache.put(content_hash, method, pages, engine, dpi)
+    
+    def _search_with_text_extraction(self, pdf_content, search_text_lower, attachment_name, content_hash=None, find_all_matches=False):
+        """
+        Try to extract text directly from PDF and search
+        
+        Pages are checked as they are extracted; unless find_all_matches is
+        set, extraction stops at the first page containing the search text.
+        """
+        pages = self._get_cached_pages(content_hash, 'text')
+        if pages is not None:
+            pdf_log.debug("Tekst PDF %s pobrany z cache (%d stron)", attachment_name, len(pages))
+            return self._search_in_pages(pages, search_text_lower, attachment_name, 'text_extraction', 'ekstrakcję tekstu')
+        
         if not HAVE_PDFPLUMBER:
             return {'found': False, 'matches': [], 'method': 'pdfplumber_not_available'}
             
         try:
-            log(f"Próba ekstrakcji tekstu z PDF: {attachment_name}")
+            pdf_log.debug("Próba ekstrakcji tekstu z PDF: %s", attachment_name)
             
-            # Use pdfplumber to extract text
+            # Use pdfplumber to extract text page by page
+            pages = []
             with io.BytesIO(pdf_content) as pdf_stream:
                 with pdfplumber.open(pdf_stream) as pdf:
-                    all_text = ""
+                    page_count = len(pdf.pages)
                     for page_num, page in enumerate(pdf.pages):
                         if self.search_cancelled:
                             break
                         
-                        page_text = page.extract_text()
-                        if page_text:
-                            all_text += page_text + "\n"
-                    
-                    if all_text.strip():
-                        # Search for the text (case-insensitive)
-                        all_text_lower = all_text.lower()
-                        if search_text_lower in all_text_lower:
-                            matches = self._extract_matches(all_text, search_text_lower)
-                            log(f"Tekst znaleziony w PDF {attachment_name} przez ekstrakcję tekstu (dokładne dopasowanie)")
-                            return {'found': True, 'matches': matches, 'method': 'text_extraction'}
-                        else:
-                            # Try normalized search if exact match not found
-                            log(f"Dokładne dopasowanie nie znalezione, próba znormalizowanego wyszukiwania...")
-                            matches = self._extract_matches(all_text, search_text_lower)
-                            if matches:
-                                log(f"Tekst znaleziony w PDF {attachment_name} przez ekstrakcję tekstu (dopasowanie przybliżone)")
-                                return {'found': True, 'matches': matches, 'method': 'text_extraction_normalized'}
-                            else:
-                                log(f"Tekst nie znaleziony w PDF {attachment_name} przez ekstrakcję tekstu")
-                    else:
-                        log(f"Brak tekstu do ekstrakcji z PDF {attachment_name}")
+                        page_text = page.extract_text() or ""
+                        pages.append(page_text)
+                        
+                        if not find_all_matches and self._page_matches(page_text, search_text_lower):
+                            pdf_log.debug("Tekst znaleziony na stronie %d/%d PDF %s - pominięto pozostałe strony", page_num + 1, page_count, attachment_name)
+                            break
+            
+            result = self._search_in_pages(pages, search_text_lower, attachment_name, 'text_extraction', 'ekstrakcję tekstu')
+            if len(pages) < page_count:
+                # Incomplete text is neither cached nor returned for indexing
+                result.pop('pages', None)
+            else:
+                self._store_cached_pages(content_hash, 'text', pages)
+            return result
                         
         except Exception as e:
-            log(f"Error during text extraction from {attachment_name}: {str(e)}")
+            pdf_log.error("Error during text extraction from %s: %s", attachment_name, e)
         
         return {'found': False, 'matches': [], 'method': 'text_extraction_failed'}
     
-    def _search_with_ocr(self, pdf_content, search_text_lower, attachment_name):
-        """Use OCR to extract text from PDF and search"""
+    def _search_with_ocr(self, pdf_content, search_text_lower, attachment_name, content_hash=None, find_all_matches=False, text_pages=None):
+        """
+        Use OCR to extract text from PDF and search
+        
+        When the text layer of every page is known (text_pages), only pages
+        without a text layer are OCR'd and the rest keep their extracted text.
+        Pages are rendered a small window at a time (first_page/last_page),
+        OCR'd and released before the next window, so memory stays bounded.
+        Unless find_all_matches is set, OCR stops after the window with the first match.
+        """
+        engine = ocr_manager.get_current_engine() if HAVE_ADVANCED_OCR else 'tesseract'
+        ocr_pages = self._get_cached_pages(content_hash, 'ocr', engine or '', OCR_DPI)
+        if ocr_pages is not None:
+            pdf_log.debug("Tekst OCR PDF %s pobrany z cache (%d stron)", attachment_name, len(ocr_pages))
+            pages = self._merge_ocr_pages(text_pages, ocr_pages)
+            return self._search_in_pages(pages, search_text_lower, attachment_name, 'ocr', 'OCR')
+        
         if not HAVE_OCR:
             return {'found': False, 'matches': [], 'method': 'ocr_not_available'}
             
         try:
-            log(f"Próba OCR z PDF: {attachment_name}")
+            page_count = len(text_pages) if text_pages is not None else self._get_pdf_page_count(pdf_content)
+            ocr_page_numbers = self.get_ocr_page_numbers(text_pages)
+            if page_count is None:
+                # Page count unknown - render the whole document as a single window
+                windows = [(None, None)]
+            else:
+                if ocr_page_numbers is None:
+                    ocr_page_numbers = list(range(1, page_count + 1))
+                windows = self._group_page_windows(ocr_page_numbers)
+            
+            if ocr_page_numbers is not None:
+                pdf_log.debug("Próba OCR z PDF: %s (%d/%d stron bez warstwy tekstowej)", attachment_name, len(ocr_page_numbers), page_count)
+            else:
+                pdf_log.debug("Próba OCR z PDF: %s", attachment_name)
             
-            # Convert PDF to images
-            images = convert_from_bytes(pdf_content, dpi=200, poppler_path=POPPLER_PATH)
+            ocr_texts = {}
+            complete = True
+            for window_idx, (first_page, last_page) in enumerate(windows):
+                if self.search_cancelled:
+                    complete = False
+                    break
+                
+                window_texts, engine = self._ocr_page_window(pdf_content, first_page, last_page, page_count, attachment_name, engine)
+                if window_texts is None:
+                    complete = False
+                    break
+                for offset, page_text in enumerate(window_texts):
+                    ocr_texts[(first_page or 1) + offset] = page_text
+                
+                if not find_all_matches and any(self._page_matches(page_text, search_text_lower) for page_text in window_texts):
+                    if window_idx < len(windows) - 1:
+                        pdf_log.debug("Tekst znaleziony przez OCR do strony %d/%d PDF %s - pominięto pozostałe strony", last_page, page_count, attachment_name)
+                        complete = False
+                    break
             
-            all_ocr_text = ""
+            total_pages = page_count or max(ocr_texts, default=0)
+            ocr_pages = [ocr_texts.get(page_num, "") for page_num in range(1, total_pages + 1)]
+            pages = self._merge_ocr_pages(text_pages, ocr_pages)
             
+            result = self._search_in_pages(pages, search_text_lower, attachment_name, 'ocr', 'OCR')
+            if complete:
+                self._store_cached_pages(content_hash, 'ocr', ocr_pages, engine or '', OCR_DPI)
+            else:
+                # Incomplete text is neither cached nor returned for indexing
+                result.pop('pages', None)
+            return result
+                
+        except Exception as e:
+            pdf_log.error("Error during OCR from %s: %s", attachment_name, e)
+        
+        return {'found': False, 'matches': [], 'method': 'ocr_failed'}
+    
+    def _merge_ocr_pages(self, text_pages, ocr_pages):
+        """Combine text-layer pages with OCR text of pages that have no text layer"""
+        if text_pages is None:
+            return list(ocr_pages)
+        return [
+            page_text if self.has_text_layer(page_text) or page_num >= len(ocr_pages) else ocr_pages[page_num]
+            for page_num, page_text in enumerate(text_pages)
+        ]
+    
+    @staticmethod
+    def _group_page_windows(page_numbers):
+        """Group page numbers into (first_page, last_page) runs of consecutive pages, at most OCR_RENDER_WINDOW long"""
+        windows = []
+        for page_num in page_numbers:
+            if windows and page_num == windows[-1][1] + 1 and page_num - windows[-1][0] < OCR_RENDER_WINDOW:
+                windows[-1] = (windows[-1][0], page_num)
+            else:
+                windows.append((page_num, page_num))
+        return windows
+    
+    def _get_pdf_page_count(self, pdf_content):
+        """Get number of pages of a PDF (None if it can't be determined)"""
+        try:
+            info = pdfinfo_from_bytes(pdf_content, poppler_path=POPPLER_PATH)
+            return int(info["Pages"])
+        except Exception as e:
+            log(f"Nie można odczytać liczby stron PDF: {e}")
+            return None
+    
+    def _ocr_page_window(self, pdf_content, first_page, last_page, page_count, attachment_name, engine):
+        """
+        Render and OCR a window of PDF pages, releasing the images afterwards
+        
+        Returns:
+            tuple: (list of page texts or None if cancelled, engine used)
+        """
+        render_options = {}
+        if first_page is not None:
+            render_options = {'first_page': first_page, 'last_page': last_page}
+        images = convert_from_bytes(pdf_content, dpi=OCR_DPI, poppler_path=POPPLER_PATH, **render_options)
+        first_page = first_page or 1
+        total = page_count or len(images)
+        
+        try:
             # Use advanced OCR engine manager if available, otherwise fallback to pytesseract
             if HAVE_ADVANCED_OCR:
                 try:
-                    log(f"Używam zaawansowanego OCR dla PDF {attachment_name}")
+                    pdf_log.debug("Używam zaawansowanego OCR dla PDF %s (strony %d-%d/%d)", attachment_name, first_page, first_page + len(images) - 1, total)
                     
                     # Progress callback for OCR
-                    def progress_callback(processed, total):
+                    def progress_callback(processed, window_total):
                         if not self.search_cancelled:
-                            log(f"OCR PDF {attachment_name}: {processed + 1}/{total} stron")
+                            pdf_log.debug("OCR PDF %s: %d/%d stron", attachment_name, first_page + processed, total)
                     
                     # Use batch OCR processing
                     ocr_results = ocr_manager.perform_ocr_batch(
@@ -197,56 +404,66 @@ class PDFProcessor:
                         progress_callback=progress_callback
                     )
                     
-                    # Combine all results
-                    all_ocr_text = "\n".join(filter(None, ocr_results))
+                    return [page_text or "" for page_text in ocr_results], engine
                     
                 except Exception as e:
                     log(f"Błąd zaawansowanego OCR, fallback do pytesseract: {e}")
-                    # Fallback to original method
-                    for page_num, image in enumerate(images):
-                        if self.search_cancelled:
-                            break
-                        
-                        log(f"OCR (fallback) strona {page_num + 1}/{len(images)} z PDF {attachment_name}")
-                        page_text = pytesseract.image_to_string(image, lang='pol+eng')
-                        if page_text:
-                            all_ocr_text += page_text + "\n"
-            else:
-                # Original single-threaded processing
-                for page_num, image in enumerate(images):
-                    if self.search_cancelled:
-                        break
-                    
-                    log(f"OCR strona {page_num + 1}/{len(images)} z PDF {attachment_name}")
-                    
-                    # Perform OCR
-                    page_text = pytesseract.image_to_string(image, lang='pol+eng')
-                    if page_text:
-                        all_ocr_text += page_text + "\n"
+                    engine = 'tesseract'
             
-            if all_ocr_text.strip():
-                # Search for the text (case-insensitive)
-                all_ocr_text_lower = all_ocr_text.lower()
-                if search_text_lower in all_ocr_text_lower:
-                    matches = self._extract_matches(all_ocr_text, search_text_lower)
-                    log(f"Tekst znaleziony w PDF {attachment_name} przez OCR (dokładne dopasowanie)")
-                    return {'found': True, 'matches': matches, 'method': 'ocr'}
-                else:
-                    # Try normalized search if exact match not found
-                    log(f"Dokładne dopasowanie OCR nie znalezione, próba znormalizowanego wyszukiwania...")
-                    matches = self._extract_matches(all_ocr_text, search_text_lower)
-                    if matches:
-                        log(f"Tekst znaleziony w PDF {attachment_name} przez OCR (dopasowanie przybliżone)")
-                        return {'found': True, 'matches': matches, 'method': 'ocr_normalized'}
-                    else:
-                        log(f"Tekst nie znaleziony w PDF {attachment_name} przez OCR")
-            else:
-                log(f"Brak tekstu z OCR z PDF {attachment_name}")
+            # Single-threaded pytesseract processing
+            page_texts = []
+            for offset, image in enumerate(images):
+                if self.search_cancelled:
+                    return None, engine
                 
-        except Exception as e:
-            log(f"Error during OCR from {attachment_name}: {str(e)}")
+                pdf_log.debug("OCR strona %d/%d z PDF %s", first_page + offset, total, attachment_name)
+                page_texts.append(pytesseract.image_to_string(image, lang='pol+eng') or "")
+            return page_texts, engine
+        finally:
+            for image in images:
+                image.close()
+            del images
+    
+    def _search_in_pages(self, pages, search_text_lower, attachment_name, method, method_label):
+        """
+        Search extracted page texts (from PDF parsing, OCR or cache)
         
-        return {'found': False, 'matches': [], 'method': 'ocr_failed'}
+        Args:
+            pages: List of page texts
+            search_text_lower: Lowercase search text
+            attachment_name: Name of the attachment for logging
+            method: Result method name ('text_extraction' or 'ocr')
+            method_label: Method description for log messages
+        
+        Returns:
+            dict: Search result, including the searched 'pages' when there was text
+        """
+        all_text = "\n".join(page for page in pages if page)
+        if not all_text.strip():
+            pdf_log.debug("Brak tekstu (%s) z PDF %s", method_label, attachment_name)
+            return {'found': False, 'matches': [], 'method': f'{method}_failed', 'pages': pages}
+        
+        match_pages = [page_num + 1 for page_num, page_text in enumerate(pages) if self._page_matches(page_text, search_text_lower)]
+        
+        # Search for the text (case-insensitive)
+        if search_text_lower in all_text.lower():
+            matches = self._extract_matches(all_text, search_text_lower)
+            log(f"Tekst znaleziony w PDF {attachment_name} przez {method_label} (dokładne dopasowanie, strony: {match_pages})")
+            return {'found': True, 'matches': matches, 'method': method, 'match_pages': match_pages, 'pages': pages}
+        
+        # Try normalized search if exact match not found
+        pdf_log.debug("Dokładne dopasowanie nie znalezione, próba znormalizowanego wyszukiwania...")
+        matches = self._extract_matches(all_text, search_text_lower)
+        if matches:
+            log(f"Tekst znaleziony w PDF {attachment_name} przez {method_label} (dopasowanie przybliżone, strony: {match_pages})")
+            return {'found': True, 'matches': matches, 'method': f'{method}_normalized', 'match_pages': match_pages, 'pages': pages}
+        
+        pdf_log.debug("Tekst nie znaleziony w PDF %s przez %s", attachment_name, method_label)
+        return {'found': False, 'matches': [], 'method': f'{method}_failed', 'pages': pages}
+    
+    def _page_matches(self, page_text, search_text_lower):
+        """Check a single page for the search text (exact or normalized, like _extract_matches)"""
+        return page_matches(page_text, search_text_lower)
     
     def _extract_matches(self, full_text, search_text_lower):
         """Extract text snippets around matches"""
@@ -0,0 +1,247 @@
+"""
+Pipelined scanning of PDF attachments across many messages
+Attachment download, text extraction and OCR run in separate pools so a
+single scanned multi-page PDF no longer stalls every message behind it
+"""
+import atexit
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from tools.logger import log
+from . import pdf_processor as pdf_processor_module
+
+
+# Threads downloading attachments (I/O bound)
+DEFAULT_DOWNLOAD_WORKERS = 4
+
+# Processes running pdfplumber text extraction (CPU bound)
+DEFAULT_EXTRACTION_WORKERS = max(1, min(4, (os.cpu_count() or 2) - 1))
+
+# OCR jobs running at the same time (each OCR job uses its own page workers)
+DEFAULT_OCR_WORKERS = 1
+
+# How often the cancellation flag is checked while waiting for workers (seconds)
+CANCEL_POLL_INTERVAL = 0.2
+
+# Text extraction processes are started once and shared by all scans
+_extraction_pool = None
+_extraction_pool_size = None
+_extraction_pool_lock = threading.Lock()
+
+
+def get_extraction_pool(max_workers):
+    """
+    Get the shared text extraction process pool, (re)creating it if needed
+
+    Returns:
+        ProcessPoolExecutor: Pool, or None when processes are not available
+    """
+    global _extraction_pool, _extraction_pool_size
+    with _extraction_pool_lock:
+        if _extraction_pool is not None and (_extraction_pool_size != max_workers
+                                             or getattr(_extraction_pool, '_broken', False)):
+            _extraction_pool.shutdown(wait=False, cancel_futures=True)
+            _extraction_pool = None
+
+        if _extraction_pool is None:
+            try:
+                _extraction_pool = ProcessPoolExecutor(max_workers=max_workers)
+                _extraction_pool_size = max_workers
+                log(f"[PDF PIPELINE] Utworzono pulę {max_workers} procesów ekstrakcji tekstu")
+            except Exception as e:
+                log(f"[PDF PIPELINE] Pula procesów niedostępna, ekstrakcja w wątkach: {e}")
+                return None
+        return _extraction_pool
+
+
+def shutdown_extraction_pool(wait=True):
+    """Stop the shared text extraction processes (a new pool is started by the next scan)"""
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool is not None:
+            _extraction_pool.shutdown(wait=wait, cancel_futures=True)
+            _extraction_pool = None
+
+
+atexit.register(shutdown_extraction_pool)
+
+
+class PDFScanPipeline:
+    """Download -> text extraction (process pool) -> OCR (size-limited pool) for PDF attachments"""
+
+    def __init__(self, pdf_processor, is_cancelled=None, download_workers=DEFAULT_DOWNLOAD_WORKERS,
+                 extraction_workers=DEFAULT_EXTRACTION_WORKERS, ocr_workers=DEFAULT_OCR_WORKERS,
+                 use_processes=True, find_all_matches=False):
+        """
+        Initialize PDF scan pipeline
+
+        Args:
+            pdf_processor: PDFProcessor used for searching page texts and OCR
+            is_cancelled: Callable returning True when the scan should stop
+            download_workers: Threads loading message attachments
+            extraction_workers: Workers extracting the PDF text layer
+            ocr_workers: OCR jobs allowed to run at the same time
+            use_processes: Run text extraction in processes (threads otherwise)
+            find_all_matches: Extract all pages instead of stopping at the first page with a match
+        """
+        self.pdf_processor = pdf_processor
+        self.is_cancelled = is_cancelled or (lambda: False)
+        self.download_workers = max(1, download_workers)
+        self.extraction_workers = max(1, extraction_workers)
+        self.ocr_workers = max(1, ocr_workers)
+        self.use_processes = use_processes
+        self.find_all_matches = find_all_matches
+
+    def _get_extraction_pool(self):
+        """
+        Get the text extraction pool, falling back to threads if processes are not available
+
+        Returns:
+            tuple: (executor, True when the executor belongs to this scan and is shut down after it)
+        """
+        if self.use_processes:
+            pool = get_extraction_pool(self.extraction_workers)
+            if pool is not None:
+                return pool, False
+        return ThreadPoolExecutor(max_workers=self.extraction_workers, thread_name_prefix="pdf-extract"), True
+
+    def scan(self, items, load_attachments, search_text):
+        """
+        Scan PDF attachments of many items (messages)
+
+        Args:
+            items: Items to scan
+            load_attachments: Callable(item) run in download threads, returning
+                (list of (attachment, name, content, content_hash), skipped_count)
+                or a result dict when the item can't be scanned; content_hash may
+                be None when the attachment wasn't hashed yet
+            search_text: Text searched for in the PDFs
+
+        Yields:
+            tuple: (item, outcome) in completion order, where outcome is either
+                {'early_result': dict} or {'attachments': [(attachment, name, result, content_hash)], 'skipped_count': int}
+        """
+        items = list(items)
+        if not items:
+            return
+
+        log(f"[PDF PIPELINE] Skanowanie {len(items)} wiadomości: pobieranie={self.download_workers}, "
+            f"ekstrakcja={self.extraction_workers}, OCR={self.ocr_workers}")
+
+        download_pool = ThreadPoolExecutor(max_workers=self.download_workers, thread_name_prefix="pdf-download")
+        extraction_pool, own_extraction_pool = (
+            self._get_extraction_pool() if pdf_processor_module.HAVE_PDFPLUMBER else (None, False)
+        )
+        ocr_pool = ThreadPoolExecutor(max_workers=self.ocr_workers, thread_name_prefix="pdf-ocr")
+        pending = {}
+        states = {}
+
+        try:
+            for idx, item in enumerate(items):
+                pending[download_pool.submit(load_attachments, item)] = ('download', idx, None)
+
+            while pending:
+                if self.is_cancelled():
+                    log("[PDF PIPELINE] Skanowanie PDF anulowane przez użytkownika")
+                    return
+
+                done, _ = wait(pending, timeout=CANCEL_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                completed = []
+
+                for future in done:
+                    stage, idx, job = pending.pop(future)
+
+                    if stage == 'download':
+                        try:
+                            loaded = future.result()
+                        except Exception as e:
+                            loaded = {'found': False, 'matches': [], 'method': 'attachment_access_error', 'error': str(e)}
+
+                        if isinstance(loaded, dict):
+                            completed.append((idx, {'early_result': loaded}))
+                            continue
+
+                        attachments, skipped_count = loaded
+                        states[idx] = {'remaining': len(attachments), 'attachments': [], 'skipped_count': skipped_count}
+                        if not attachments:
+                            completed.append((idx, states.pop(idx)))
+                            continue
+
+                        for attachment, name, content, content_hash in attachments:
+                            job = {'attachment': attachment, 'name': name, 'content': content, 'text_pages': None}
+                            job['content_hash'], cached_pages = self.pdf_processor.get_cached_text_pages(content, content_hash)
+                            if cached_pages is not None or extraction_pool is None:
+                                result = self._search_text_layer(job, cached_pages, search_text, from_cache=True)
+                                self._after_text_layer(job, result, idx, states, pending, ocr_pool, completed, search_text)
+                            else:
+                                stop_at_text = None if self.find_all_matches else search_text.lower().strip()
+                                future = extraction_pool.submit(pdf_processor_module.extract_text_pages, content, stop_at_text)
+                                pending[future] = ('extract', idx, job)
+
+                    elif stage == 'extract':
+                        try:
+                            pages, complete = future.result()
+                            result = self._search_text_layer(job, pages, search_text, complete=complete)
+                        except Exception as e:
+                            log(f"[PDF PIPELINE] Błąd ekstrakcji tekstu z {job['name']}: {e}")
+                            result = {'found': False, 'matches': [], 'method': 'text_extraction_failed'}
+                        self._after_text_layer(job, result, idx, states, pending, ocr_pool, completed, search_text)
+
+                    elif stage == 'ocr':
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            log(f"[PDF PIPELINE] Błąd OCR {job['name']}: {e}")
+                            result = {'found': False, 'matches': [], 'method': 'ocr_failed'}
+                        if job['text_pages'] and not result.get('pages'):
+                            result['pages'] = job['text_pages']
+                        self._finish_attachment(job, result, idx, states, completed)
+
+                for idx, outcome in completed:
+                    yield items[idx], outcome
+        finally:
+            for future in pending:
+                future.cancel()
+            download_pool.shutdown(wait=False, cancel_futures=True)
+            ocr_pool.shutdown(wait=False, cancel_futures=True)
+            if own_extraction_pool:
+                extraction_pool.shutdown(wait=False, cancel_futures=True)
+
+    def _search_text_layer(self, job, pages, search_text, from_cache=False, complete=True):
+        """
+        Search text-layer pages of an attachment (None when no text layer could be read)
+        
+        Extraction stopped at a hit (complete=False) gives a partial document,
+        which is neither cached nor returned for indexing.
+        """
+        if pages is None:
+            return {'found': False, 'matches': [], 'method': 'pdfplumber_not_available'}
+        # Pages read from the cache don't need to be stored again
+        content_hash = None if from_cache or not complete else job['content_hash']
+        result = self.pdf_processor.search_text_pages(pages, search_text, job['name'], content_hash)
+        if complete:
+            job['text_pages'] = pages
+        else:
+            result.pop('pages', None)
+        return result
+
+    def _after_text_layer(self, job, result, idx, states, pending, ocr_pool, completed, search_text):
+        """Finish the attachment on a text hit, otherwise send pages without a text layer to the OCR pool"""
+        if (result['found'] or self.is_cancelled() or not (pdf_processor_module.HAVE_OCR or self.pdf_processor.text_cache)
+                or not self.pdf_processor.needs_ocr(job['text_pages'])):
+            if job['text_pages'] and not result.get('pages'):
+                result['pages'] = job['text_pages']
+            self._finish_attachment(job, result, idx, states, completed)
+            return
+
+        future = ocr_pool.submit(self.pdf_processor.search_with_ocr, job['content'], search_text, job['name'],
+                                 job['content_hash'], job['text_pages'])
+        pending[future] = ('ocr', idx, job)
+
+    def _finish_attachment(self, job, result, idx, states, completed):
+        """Record an attachment result and complete the item when all its attachments are done"""
+        state = states[idx]
+        state['attachments'].append((job['attachment'], job['name'], result, job['content_hash']))
+        state['remaining'] -= 1
+        if state['remaining'] == 0:
+            completed.append((idx, states.pop(idx)))
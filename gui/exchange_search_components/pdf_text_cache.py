@@ -0,0 +1,157 @@
+"""
+Content-addressed cache of text extracted from PDF attachments
+Stores per-page text keyed by the SHA-256 of the PDF content together with
+the extraction method (text/ocr), OCR engine and DPI, with size-based LRU eviction
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from tools.logger import log
+from .attachment_identity import compute_content_hash
+
+
+# Default maximum cache size (bytes of stored page text)
+DEFAULT_MAX_CACHE_SIZE = 200 * 1024 * 1024
+
+
+class PDFTextCache:
+    """Disk-backed cache of extracted PDF page texts"""
+
+    def __init__(self, cache_file_path="pdf_text_cache.db", max_size_bytes=DEFAULT_MAX_CACHE_SIZE):
+        """
+        Initialize PDF text cache
+
+        Args:
+            cache_file_path: Path to the SQLite database file
+            max_size_bytes: Size limit of stored text, least recently used entries are evicted above it
+        """
+        self.cache_file_path = cache_file_path
+        self.max_size_bytes = max_size_bytes
+        directory = os.path.dirname(cache_file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(cache_file_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS pdf_text (
+                    content_hash TEXT NOT NULL,
+                    method TEXT NOT NULL,
+                    engine TEXT NOT NULL DEFAULT '',
+                    dpi INTEGER NOT NULL DEFAULT 0,
+                    pages TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created TEXT,
+                    last_access REAL,
+                    PRIMARY KEY (content_hash, method, engine, dpi)
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_pdf_text_access ON pdf_text (last_access)")
+
+    @staticmethod
+    def compute_hash(pdf_content):
+        """Return the SHA-256 hex digest used as cache key"""
+        return compute_content_hash(pdf_content)
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def get(self, content_hash, method, engine='', dpi=0):
+        """
+        Get cached page texts
+
+        Args:
+            content_hash: SHA-256 of the PDF content
+            method: 'text' or 'ocr'
+            engine: OCR engine name (empty for text extraction)
+            dpi: Rendering DPI used for OCR (0 for text extraction)
+
+        Returns:
+            list: Page texts, or None on cache miss
+        """
+        try:
+            with self._lock, self._conn:
+                row = self._conn.execute(
+                    "SELECT pages FROM pdf_text WHERE content_hash = ? AND method = ? AND engine = ? AND dpi = ?",
+                    (content_hash, method, engine or '', dpi or 0)
+                ).fetchone()
+                if row is None:
+                    return None
+                self._conn.execute(
+                    "UPDATE pdf_text SET last_access = ? WHERE content_hash = ? AND method = ? AND engine = ? AND dpi = ?",
+                    (time.time(), content_hash, method, engine or '', dpi or 0)
+                )
+            return json.loads(row[0])
+        except Exception as e:
+            log(f"[PDF TEXT CACHE] Błąd odczytu z cache: {e}")
+            return None
+
+    def put(self, content_hash, method, pages, engine='', dpi=0):
+        """Store page texts for a PDF and evict old entries if over the size limit"""
+        try:
+            payload = json.dumps(pages, ensure_ascii=False)
+            with self._lock, self._conn:
+                self._conn.execute(
+                    """INSERT OR REPLACE INTO pdf_text
+                       (content_hash, method, engine, dpi, pages, size, created, last_access)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (content_hash, method, engine or '', dpi or 0, payload, len(payload.encode('utf-8')),
+                     datetime.now().isoformat(), time.time())
+                )
+            log(f"[PDF TEXT CACHE] Zapisano tekst {len(pages)} stron ({method}) dla {content_hash[:16]}")
+            self._evict()
+        except Exception as e:
+            log(f"[PDF TEXT CACHE] Błąd zapisu do cache: {e}")
+
+    def _evict(self):
+        """Remove least recently used entries until the cache fits its size limit"""
+        with self._lock, self._conn:
+            total_size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM pdf_text").fetchone()[0]
+            if total_size <= self.max_size_bytes:
+                return
+
+            evicted = 0
+            rows = self._conn.execute(
+                "SELECT content_hash, method, engine, dpi, size FROM pdf_text ORDER BY last_access ASC"
+            ).fetchall()
+            for content_hash, method, engine, dpi, size in rows:
+                if total_size <= self.max_size_bytes:
+                    break
+                self._conn.execute(
+                    "DELETE FROM pdf_text WHERE content_hash = ? AND method = ? AND engine = ? AND dpi = ?",
+                    (content_hash, method, engine, dpi)
+                )
+                total_size -= size
+                evicted += 1
+        log(f"[PDF TEXT CACHE] Usunięto {evicted} najdawniej używanych wpisów (rozmiar: {total_size} B)")
+
+    def clear(self):
+        """Remove all cached texts"""
+        try:
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM pdf_text")
+            log("[PDF TEXT CACHE] Cache tekstu PDF został wyczyszczony")
+            return True
+        except Exception as e:
+            log(f"[PDF TEXT CACHE] Błąd czyszczenia cache: {e}")
+            return False
+
+    def get_stats(self):
+        """
+        Get statistics about the cache
+
+        Returns:
+            dict: Number of entries and total size in bytes
+        """
+        with self._lock:
+            entries, total_size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pdf_text"
+            ).fetchone()
+        return {"entries": entries, "total_size": total_size, "max_size": self.max_size_bytes}
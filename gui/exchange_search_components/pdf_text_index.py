@@ -0,0 +1,247 @@
+"""
+Local full-text index over text extracted from PDF attachments
+Uses SQLite FTS5 (one row per PDF page) so that NIP / invoice number lookups
+across already processed mail are answered without touching the mail server
+"""
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from tools.logger import log
+
+
+# Separators ignored inside numbers (same set as PDFProcessor._extract_matches fallback)
+NUMBER_SEPARATORS_PATTERN = re.compile(r'(?<=\d)[\s\-_./\\]+(?=\d)')
+
+# Tokens as seen by the unicode61 tokenizer (letters and digits, '_' is a separator)
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+# Maximum number of hits returned by a single index search
+DEFAULT_SEARCH_LIMIT = 1000
+
+
+def normalize_text(text):
+    """
+    Normalize text for the index: join digit groups split by spaces, dashes,
+    dots or slashes (123-456-78-90 -> 1234567890) and fold 'ł', which the
+    unicode61 tokenizer does not treat as a diacritic
+    """
+    return NUMBER_SEPARATORS_PATTERN.sub('', (text or '').lower().replace('ł', 'l'))
+
+
+class PDFTextIndex:
+    """SQLite FTS5 index of PDF attachment text and the messages the PDFs came from"""
+
+    def __init__(self, index_file_path="pdf_text_index.db"):
+        """
+        Initialize PDF full-text index
+
+        Args:
+            index_file_path: Path to the SQLite database file
+        """
+        self.index_file_path = index_file_path
+        directory = os.path.dirname(index_file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(index_file_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS pdf_documents (
+                    content_hash TEXT PRIMARY KEY,
+                    page_count INTEGER,
+                    indexed TEXT
+                )
+            """)
+            self._conn.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS pdf_pages USING fts5(
+                    content_hash UNINDEXED,
+                    page UNINDEXED,
+                    text,
+                    normalized,
+                    tokenize = 'unicode61 remove_diacritics 2'
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS pdf_occurrences (
+                    content_hash TEXT NOT NULL,
+                    account TEXT NOT NULL,
+                    message_key TEXT NOT NULL,
+                    attachment_name TEXT NOT NULL,
+                    folder TEXT,
+                    subject TEXT,
+                    sender_name TEXT,
+                    sender_email TEXT,
+                    datetime_received TEXT,
+                    saved_path TEXT,
+                    PRIMARY KEY (content_hash, account, message_key, attachment_name)
+                )
+            """)
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def is_indexed(self, content_hash):
+        """Check if text of the PDF with this hash is already in the index"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM pdf_documents WHERE content_hash = ?", (content_hash,)
+            ).fetchone()
+        return row is not None
+
+    def index_document(self, content_hash, pages):
+        """
+        Add (or replace) page texts of a PDF
+
+        Args:
+            content_hash: SHA-256 of the PDF content
+            pages: List of page texts
+        """
+        try:
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM pdf_pages WHERE content_hash = ?", (content_hash,))
+                self._conn.executemany(
+                    "INSERT INTO pdf_pages (content_hash, page, text, normalized) VALUES (?, ?, ?, ?)",
+                    [(content_hash, page_num + 1, page_text, normalize_text(page_text))
+                     for page_num, page_text in enumerate(pages) if page_text and page_text.strip()]
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO pdf_documents (content_hash, page_count, indexed) VALUES (?, ?, ?)",
+                    (content_hash, len(pages), datetime.now().isoformat())
+                )
+            log(f"[PDF INDEX] Zaindeksowano {len(pages)} stron PDF {content_hash[:16]}")
+        except Exception as e:
+            log(f"[PDF INDEX] Błąd indeksowania PDF {content_hash[:16]}: {e}")
+
+    def add_occurrence(self, content_hash, account, message_key, attachment_name, folder=None,
+                       subject=None, sender_name=None, sender_email=None, datetime_received=None, saved_path=None):
+        """Record a message attachment that contains the indexed PDF"""
+        if isinstance(datetime_received, datetime):
+            datetime_received = datetime_received.isoformat()
+        try:
+            with self._lock, self._conn:
+                existing = self._conn.execute(
+                    """SELECT saved_path FROM pdf_occurrences
+                       WHERE content_hash = ? AND account = ? AND message_key = ? AND attachment_name = ?""",
+                    (content_hash, account, str(message_key), attachment_name)
+                ).fetchone()
+                if saved_path is None and existing is not None:
+                    saved_path = existing['saved_path']
+                self._conn.execute(
+                    """INSERT OR REPLACE INTO pdf_occurrences
+                       (content_hash, account, message_key, attachment_name, folder, subject,
+                        sender_name, sender_email, datetime_received, saved_path)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    (content_hash, account, str(message_key), attachment_name, folder, subject,
+                     sender_name, sender_email, datetime_received, saved_path)
+                )
+        except Exception as e:
+            log(f"[PDF INDEX] Błąd zapisu wystąpienia PDF {attachment_name}: {e}")
+
+    @staticmethod
+    def build_match_query(search_text):
+        """
+        Build an FTS5 MATCH expression for the search text
+
+        The phrase is matched against the raw page text and, with digit
+        separators removed, against the normalized column. The last token
+        is a prefix so partially typed numbers still match.
+        """
+        tokens = TOKEN_PATTERN.findall((search_text or '').lower())
+        normalized_tokens = TOKEN_PATTERN.findall(normalize_text(search_text))
+        if not tokens:
+            return None
+        query = f'text : "{" ".join(tokens)}" *'
+        if normalized_tokens:
+            query += f' OR normalized : "{" ".join(normalized_tokens)}" *'
+        return query
+
+    def search(self, search_text, account=None, limit=DEFAULT_SEARCH_LIMIT):
+        """
+        Find message attachments whose PDF text contains the search text
+
+        Args:
+            search_text: Text to look for (NIP, invoice number, ...)
+            account: Optional account to restrict results to
+            limit: Maximum number of matching pages considered
+
+        Returns:
+            list: Occurrence dicts with 'pages' (page numbers) and 'matches' (snippets)
+        """
+        match_query = self.build_match_query(search_text)
+        if not match_query:
+            return []
+
+        try:
+            with self._lock:
+                page_rows = self._conn.execute(
+                    """SELECT content_hash, page, snippet(pdf_pages, 2, '', '', '...', 16) AS snippet
+                       FROM pdf_pages WHERE pdf_pages MATCH ? ORDER BY rank LIMIT ?""",
+                    (match_query, limit)
+                ).fetchall()
+
+                documents = {}
+                for row in page_rows:
+                    document = documents.setdefault(row['content_hash'], {'pages': [], 'matches': []})
+                    document['pages'].append(row['page'])
+                    if row['snippet'] and row['snippet'] not in document['matches']:
+                        document['matches'].append(row['snippet'])
+
+                if not documents:
+                    return []
+
+                placeholders = ",".join("?" * len(documents))
+                sql = f"SELECT * FROM pdf_occurrences WHERE content_hash IN ({placeholders})"
+                params = list(documents)
+                if account:
+                    sql += " AND account = ?"
+                    params.append(account)
+                occurrence_rows = self._conn.execute(sql, params).fetchall()
+        except Exception as e:
+            log(f"[PDF INDEX] Błąd wyszukiwania w indeksie '{search_text}': {e}")
+            return []
+
+        results = []
+        for row in occurrence_rows:
+            occurrence = dict(row)
+            if occurrence['datetime_received']:
+                occurrence['datetime_received'] = datetime.fromisoformat(occurrence['datetime_received'])
+            document = documents[row['content_hash']]
+            occurrence['pages'] = sorted(document['pages'])
+            occurrence['matches'] = document['matches'][:5]
+            results.append(occurrence)
+
+        log(f"[PDF INDEX] '{search_text}': {len(documents)} dokumentów PDF, {len(results)} załączników w wiadomościach")
+        return results
+
+    def clear(self):
+        """Remove all indexed documents and occurrences"""
+        try:
+            with self._lock, self._conn:
+                self._conn.execute("DELETE FROM pdf_pages")
+                self._conn.execute("DELETE FROM pdf_documents")
+                self._conn.execute("DELETE FROM pdf_occurrences")
+            log("[PDF INDEX] Indeks PDF został wyczyszczony")
+            return True
+        except Exception as e:
+            log(f"[PDF INDEX] Błąd czyszczenia indeksu: {e}")
+            return False
+
+    def get_stats(self):
+        """
+        Get statistics about the index
+
+        Returns:
+            dict: Number of indexed documents, pages and message attachments
+        """
+        with self._lock:
+            documents = self._conn.execute("SELECT COUNT(*) FROM pdf_documents").fetchone()[0]
+            pages = self._conn.execute("SELECT COUNT(*) FROM pdf_pages").fetchone()[0]
+            occurrences = self._conn.execute("SELECT COUNT(*) FROM pdf_occurrences").fetchone()[0]
+        return {"documents": documents, "pages": pages, "occurrences": occurrences}
@@ -0,0 +1,56 @@
+"""
+PDF text layer extraction run in worker processes
+Only pdfplumber is imported here, so a spawned worker (Windows) starts
+without the poppler/Tesseract detection and OCR engine setup done by
+pdf_processor
+"""
+import io
+import re
+
+try:
+    import pdfplumber
+    HAVE_PDFPLUMBER = True
+except ImportError:
+    HAVE_PDFPLUMBER = False
+
+
+# Separators ignored by the normalized (approximate) search
+SEARCH_NORMALIZE_PATTERN = re.compile(r'[\s\-_./\\]+')
+
+
+def page_matches(page_text, search_text_lower):
+    """Check a single page for the search text (exact or normalized, like PDFProcessor._extract_matches)"""
+    if not page_text:
+        return False
+    page_text_lower = page_text.lower()
+    if search_text_lower in page_text_lower:
+        return True
+    if len(search_text_lower) > 3:
+        normalized_search = SEARCH_NORMALIZE_PATTERN.sub('', search_text_lower)
+        return bool(normalized_search) and normalized_search in SEARCH_NORMALIZE_PATTERN.sub('', page_text_lower)
+    return False
+
+
+def extract_text_pages(pdf_content, stop_at_text=None):
+    """
+    Extract the text layer of PDF pages with pdfplumber, page by page
+    
+    Args:
+        pdf_content: PDF bytes
+        stop_at_text: Lowercase search text; extraction stops at the first page
+            containing it (None reads every page)
+    
+    Returns:
+        tuple: (page texts, empty string for pages without text;
+                True when every page was read)
+    """
+    pages = []
+    with io.BytesIO(pdf_content) as pdf_stream:
+        with pdfplumber.open(pdf_stream) as pdf:
+            page_count = len(pdf.pages)
+            for page in pdf.pages:
+                page_text = page.extract_text() or ""
+                pages.append(page_text)
+                if stop_at_text and page_matches(page_text, stop_at_text):
+                    break
+    return pages, len(pages) == page_count
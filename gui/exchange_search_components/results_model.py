@@ -0,0 +1,121 @@
+"""
+In-memory model of the search results list
+Rows are kept, sorted and filtered here, so the results view only has to
+materialise the handful of rows currently visible on screen
+"""
+
+
+def _date_key(row):
+    """Received date as a timestamp (rows without a usable date sort as oldest)"""
+    received = row.get('datetime_received')
+    try:
+        return received.timestamp()
+    except (AttributeError, ValueError, OverflowError, OSError):
+        return 0.0
+
+
+def _text_key(field):
+    return lambda row: (row.get(field) or '').lower()
+
+
+# Sort key per results column
+SORT_KEYS = {
+    'Date': _date_key,
+    'Folder': _text_key('folder_path'),
+    'Sender': _text_key('sender'),
+    'Subject': _text_key('subject'),
+    'Status': lambda row: bool(row.get('is_read')),
+    'Attachments': lambda row: (bool(row.get('has_attachments')), row.get('attachment_count') or 0),
+    'PDFMatch': lambda row: bool((row.get('pdf_match_info') or {}).get('found')),
+}
+
+# Row fields searched by the quick filter
+FILTER_FIELDS = ('sender', 'subject', 'folder_path')
+
+
+class ResultListModel:
+    """Result rows with the sorted, filtered view shown in the results list"""
+
+    def __init__(self):
+        self.rows = []
+        self.view = []
+        # None keeps the order of the search engine (newest first)
+        self.sort_column = None
+        self.sort_reverse = False
+        self.filter_text = ''
+
+    def __len__(self):
+        return len(self.view)
+
+    def __getitem__(self, index):
+        return self.view[index]
+
+    def set_rows(self, rows):
+        """Replace all rows, keeping the current sorting and filter"""
+        self.rows = list(rows)
+        self._rebuild_view()
+
+    def clear(self):
+        self.rows = []
+        self.view = []
+
+    def insert_sorted(self, row):
+        """
+        Add a row at its place in the current order
+
+        Returns:
+            int: Position of the row in the view, or None if the filter hides it
+        """
+        self.rows.append(row)
+        if not self._matches_filter(row):
+            return None
+
+        key_func, reverse = self._get_order()
+        key = key_func(row)
+        position = len(self.view)
+        for index, other in enumerate(self.view):
+            other_key = key_func(other)
+            if (other_key < key) if reverse else (other_key > key):
+                position = index
+                break
+        self.view.insert(position, row)
+        return position
+
+    def sort(self, column, reverse=None):
+        """Sort by a column; sorting by the same column again reverses the order"""
+        if reverse is None:
+            reverse = not self.sort_reverse if column == self.sort_column else column == 'Date'
+        self.sort_column = column
+        self.sort_reverse = reverse
+        self._rebuild_view()
+
+    def set_filter(self, text):
+        """Show only rows whose sender, subject or folder contains the text"""
+        self.filter_text = (text or '').strip().lower()
+        self._rebuild_view()
+
+    def window(self, start, count):
+        """Rows of the view from start, at most count of them"""
+        return self.view[start:start + count]
+
+    def index_of(self, row):
+        """Position of a row in the view (None if it is not shown)"""
+        for index, other in enumerate(self.view):
+            if other is row:
+                return index
+        return None
+
+    def _get_order(self):
+        if self.sort_column in SORT_KEYS:
+            return SORT_KEYS[self.sort_column], self.sort_reverse
+        return _date_key, True
+
+    def _matches_filter(self, row):
+        if not self.filter_text:
+            return True
+        return any(self.filter_text in (row.get(field) or '').lower() for field in FILTER_FIELDS)
+
+    def _rebuild_view(self):
+        self.view = [row for row in self.rows if self._matches_filter(row)]
+        if self.sort_column in SORT_KEYS:
+            self.view.sort(key=SORT_KEYS[self.sort_column], reverse=self.sort_reverse)
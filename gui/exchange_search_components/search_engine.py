@@ -8,13 +8,27 @@ import time
 import email
 import email.header
 import email.utils
+import mimetypes
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
 from exchangelib import Q, Message
 from imapclient import IMAPClient
-from tools.logger import log
+from tools.logger import log, get_logger
 from .pdf_processor import PDFProcessor
 from .datetime_utils import IMAPDateHandler
+from .imap_bodystructure import parse_bodystructure, decode_part_payload
+from .search_session import SearchSession, NewestMessageTracker, ResultStream
+from .pdf_scan_pipeline import PDFScanPipeline
+from .exchange_folder_tree import ExchangeFolderTree
+from .attachment_identity import compute_content_hash, get_attachment_server_key, get_imap_server_key_prefix
+from .imap_connection_pool import is_connection_error
+
+# Per-message diagnostics go through subsystem loggers at DEBUG level
+pdf_log = get_logger('pdf')
+imap_log = get_logger('imap')
+history_log = get_logger('history')
+exchange_log = get_logger('exchange')
 
 # Handle optional tkinter import
 try:
@@ -30,23 +44,66 @@ except ImportError:
     messagebox = DummyMessagebox()
 
 
+# Default number of folders queried in parallel (keeps EWS throttling in check)
+DEFAULT_MAX_FOLDER_WORKERS = 4
+
+# Exchange fields of the first (metadata-only) pass; attachment metadata and
+# content are loaded later, only for messages that need them
+EXCHANGE_HEADER_FIELDS = ('subject', 'sender', 'datetime_received', 'is_read', 'has_attachments', 'id')
+
+# Messages per GetItem call when loading attachment metadata
+EXCHANGE_ATTACHMENT_BATCH_SIZE = 50
+
+# Attachments per GetAttachment call when downloading PDF content
+EXCHANGE_CONTENT_BATCH_SIZE = 10
+
+# Largest EWS FindItem page requested while reading a folder (EWS default)
+EXCHANGE_QUERY_PAGE_SIZE = 100
+
+
 class EmailSearchEngine:
     """Handles email search operations in background thread"""
     
-    def __init__(self, progress_callback, result_callback):
+    def __init__(self, progress_callback, result_callback, max_folder_workers=DEFAULT_MAX_FOLDER_WORKERS):
         self.progress_callback = progress_callback
         self.result_callback = result_callback
         self.search_cancelled = False
         self.search_thread = None
+        self.max_folder_workers = max_folder_workers
         self.pdf_processor = PDFProcessor()
         
         # PDF auto-save support
         self.auto_save_pdfs = False
         self.pdf_save_directory = None
         self.saved_pdf_count = 0
+        # Saved file per content hash, so the same PDF is written once per search
+        self._saved_pdf_paths = {}
         
         # PDF history manager (will be set by external components)
         self.pdf_history_manager = None
+        # Attachments are collected by several download threads during PDF scans
+        self._pdf_history_lock = threading.Lock()
+        
+        # Local message-metadata index (will be set by external components)
+        self.message_index = None
+        
+        # Full-text index of PDF attachment text (will be set by external components)
+        self.pdf_text_index = None
+        self._index_account_id = 'unknown'
+        
+        # Result cursor of the last completed search (used for page changes)
+        self.search_session = None
+        self._pdf_matches = {}
+        
+        # Exchange messages from the metadata-only pass whose attachments are not loaded yet
+        self._exchange_account = None
+        self._pending_attachment_ids = set()
+        
+        # Pooled IMAP sessions of the current IMAP search (folders are searched in parallel)
+        self._imap_pool = None
+        
+        # Exchange folder tree of the current search (parents for folder paths)
+        self._folder_tree = None
         
         # Cache valid Message field names for validation
         self._valid_fields = self._get_valid_message_fields()
@@ -143,13 +200,236 @@ class EmailSearchEngine:
         )
         self.search_thread.start()
     
+    def search_pdf_index_threaded(self, connection, search_criteria, page=0, per_page=500):
+        """Start threaded search answered only from the local PDF full-text index"""
+        self.search_cancelled = False
+        
+        self.search_thread = threading.Thread(
+            target=self._threaded_index_search,
+            args=(connection, search_criteria, page, per_page),
+            daemon=True
+        )
+        self.search_thread.start()
+    
     def cancel_search(self):
         """Cancel ongoing search"""
         self.search_cancelled = True
         self.pdf_processor.cancel_search()
     
+    def has_session_for(self, criteria, per_page):
+        """Check if the last search session can serve pages for these criteria"""
+        return self.search_session is not None and self.search_session.can_serve(criteria, per_page)
+    
+    def load_page_threaded(self, page, per_page=500):
+        """Serve a page from the current search session in a background thread"""
+        self.search_cancelled = False
+        
+        self.search_thread = threading.Thread(
+            target=self._threaded_load_page,
+            args=(page, per_page),
+            daemon=True
+        )
+        self.search_thread.start()
+    
+    def _threaded_load_page(self, page, per_page):
+        """Build a page of results from the session without contacting the server for the list"""
+        try:
+            session = self.search_session
+            if session is None:
+                raise Exception("Brak sesji wyszukiwania - uruchom wyszukiwanie ponownie")
+            
+            log(f"[SEARCH SESSION] Ładowanie strony {page + 1} (na stronie {per_page}) z sesji")
+            results = self._build_page_results(session, page, per_page)
+            if results is None:
+                self.result_callback({'type': 'search_cancelled'})
+                return
+            
+            self.result_callback(self._make_page_result(session, results, page, per_page))
+            
+        except Exception as e:
+            log(f"[SEARCH SESSION] BŁĄD ładowania strony: {str(e)}")
+            self.result_callback({
+                'type': 'search_error',
+                'error': str(e)
+            })
+    
+    def _make_page_result(self, session, results, page, per_page):
+        """Create search_complete event for a page of results"""
+        return {
+            'type': 'search_complete',
+            'results': results,
+            'count': len(results),
+            'total_count': session.total_count,
+            'page': page,
+            'per_page': per_page,
+            'total_pages': session.total_pages(per_page)
+        }
+    
+    def _build_page_results(self, session, page, per_page):
+        """
+        Build result rows for the visible page only
+        
+        Returns:
+            list: Result dicts for display, or None if cancelled
+        """
+        start_idx = page * per_page
+        paginated_messages = session.get_page(page, per_page)
+        exchange_log.debug("Wiadomości po paginacji: %d", len(paginated_messages))
+        self._load_exchange_attachment_metadata(paginated_messages)
+        
+        results = []
+        result_processing_errors = 0
+        
+        exchange_log.debug("=== TWORZENIE WYNIKÓW ===")
+        for i, message in enumerate(paginated_messages):
+            if self.search_cancelled:
+                return None
+            
+            if i % 5 == 0:  # Update progress every 5 messages
+                self.progress_callback(f"Przetworzono {i + start_idx} wiadomości...")
+            
+            try:
+                results.append(self._make_result_row(
+                    message,
+                    session.get_folder_path(message),  # Use message-specific folder path
+                    session.get_pdf_match_info(message)  # Add PDF match information
+                ))
+                
+            except Exception as e:
+                # Skip messages that cause errors
+                result_processing_errors += 1
+                exchange_log.error("Błąd przetwarzania wyniku %d: %s", i, e)
+                continue
+        
+        if result_processing_errors > 0:
+            exchange_log.warning("Błędy przetwarzania wyników: %d", result_processing_errors)
+        
+        return results
+    
+    def _make_result_row(self, message, folder_path, pdf_match_info=None):
+        """Result dict shown in the results list for one message"""
+        # Extract clean sender email address from Mailbox object
+        sender_display = 'Nieznany'
+        if message.sender:
+            if hasattr(message.sender, 'email_address') and message.sender.email_address:
+                sender_display = message.sender.email_address
+            else:
+                sender_display = str(message.sender)
+        
+        return {
+            'datetime_received': message.datetime_received,
+            'sender': sender_display,
+            'subject': message.subject if message.subject else 'Brak tematu',
+            'is_read': message.is_read if hasattr(message, 'is_read') else True,
+            'has_attachments': message.has_attachments if hasattr(message, 'has_attachments') else False,
+            'attachment_count': len(message.attachments) if message.attachments else 0,
+            'message_id': message.id if hasattr(message, 'id') else None,
+            'folder_path': folder_path,
+            'message_obj': message,  # Store full message object for opening
+            'attachments': list(message.attachments) if message.attachments else [],
+            'pdf_match_info': pdf_match_info
+        }
+    
+    def _threaded_index_search(self, connection, criteria, page=0, per_page=500):
+        """
+        Search PDF text in the local full-text index without connecting to the mail server
+        
+        Results are limited to the searched account and to the folders the
+        server search would cover (selected folder, excluded folders).
+        """
+        self.search_session = None
+        self._pdf_matches = {}
+        
+        try:
+            pdf_search_text = (criteria.get('pdf_search_text') or '').strip()
+            if not self.pdf_text_index:
+                raise Exception("Lokalny indeks PDF nie jest dostępny")
+            if not pdf_search_text:
+                raise Exception("Wyszukiwanie tylko w indeksie wymaga tekstu do wyszukania w PDF")
+            
+            log(f"=== WYSZUKIWANIE W LOKALNYM INDEKSIE PDF: '{pdf_search_text}' ===")
+            self.progress_callback(f"Wyszukiwanie '{pdf_search_text}' w lokalnym indeksie PDF...")
+            
+            # The account the server search would use (no connection is made)
+            account_config = connection.current_account_config or connection.get_exchange_account_config() or {}
+            account_id = self._get_account_id(connection, account_config)
+            account_type = account_config.get('type', 'exchange')
+            
+            subject_search = (criteria.get('subject_search') or '').lower()
+            sender_search = (criteria.get('sender') or '').lower()
+            period_start = IMAPDateHandler.get_period_start_date(criteria.get('selected_period'))
+            excluded_names = {f.strip() for f in (criteria.get('excluded_folders') or '').split(',') if f.strip()}
+            
+            messages = {}
+            message_to_folder_map = {}
+            for occurrence in self.pdf_text_index.search(pdf_search_text, account=account_id):
+                if self.search_cancelled:
+                    self.result_callback({'type': 'search_cancelled'})
+                    return
+                
+                if not self._index_folder_in_scope(occurrence['folder'], account_type, criteria.get('folder_path'), excluded_names):
+                    continue
+                if subject_search and subject_search not in (occurrence['subject'] or '').lower():
+                    continue
+                sender_text = f"{occurrence['sender_name'] or ''} {occurrence['sender_email'] or ''}".lower()
+                if sender_search and sender_search not in sender_text:
+                    continue
+                received = occurrence['datetime_received']
+                if period_start and received and IMAPDateHandler.ensure_timezone(received) < period_start:
+                    continue
+                
+                key = (occurrence['account'], occurrence['folder'], occurrence['message_key'])
+                message = messages.get(key)
+                if message is None:
+                    message = messages[key] = IndexedPDFMessage(occurrence)
+                    message_to_folder_map[message.id] = occurrence['folder']
+                message.add_attachment(occurrence['attachment_name'], occurrence['saved_path'])
+                
+                match_info = self._pdf_matches.setdefault(
+                    message.id, {'found': True, 'attachments': [], 'all_matches': [], 'skipped_count': 0}
+                )
+                match_info['attachments'].append({
+                    'name': occurrence['attachment_name'],
+                    'method': 'index',
+                    'matches': occurrence['matches'],
+                    'pages': occurrence['pages']
+                })
+                match_info['all_matches'].extend(occurrence['matches'])
+            
+            found_messages = sorted(
+                messages.values(),
+                key=lambda m: IMAPDateHandler.ensure_timezone(m.datetime_received) if m.datetime_received else datetime.min.replace(tzinfo=timezone.utc),
+                reverse=True
+            )
+            log(f"[PDF INDEX] Wiadomości z pasującymi PDF-ami: {len(found_messages)}")
+            
+            self.search_session = SearchSession(
+                criteria, per_page, found_messages, message_to_folder_map, self._pdf_matches
+            )
+            results = self._build_page_results(self.search_session, page, per_page)
+            if results is None:
+                self.result_callback({'type': 'search_cancelled'})
+                return
+            
+            self.result_callback(self._make_page_result(self.search_session, results, page, per_page))
+            
+        except Exception as e:
+            log(f"BŁĄD wyszukiwania w indeksie PDF: {str(e)}")
+            self.result_callback({
+                'type': 'search_error',
+                'error': str(e)
+            })
+    
     def _threaded_search(self, connection, criteria, page=0, per_page=500):
         """Main search logic running in background thread"""
+        # A new search invalidates the previous result cursor
+        self.search_session = None
+        self._pdf_matches = {}
+        self._exchange_account = None
+        self._pending_attachment_ids = set()
+        self._imap_pool = None
+        self._folder_tree = None
+        
         try:
             # Log search start
             search_params = {k: v for k, v in criteria.items() if k != 'password'}  # Exclude sensitive data
@@ -171,8 +451,11 @@ class EmailSearchEngine:
             # Exchange uses connection.account, IMAP/POP3 use connection.imap_connection or connection.pop3_connection
             if account_type == "exchange":
                 account = connection.account
+                self._exchange_account = account
             elif account_type in ["imap_smtp", "pop3_smtp"]:
                 account = connection.imap_connection or connection.pop3_connection
+                if account_type == "imap_smtp":
+                    self._imap_pool = connection.get_imap_pool()
             else:
                 log(f"BŁĄD: Nieznany typ konta: {account_type}")
                 raise Exception(f"Nieznany typ konta: {account_type}")
@@ -182,6 +465,7 @@ class EmailSearchEngine:
                 raise Exception("Nie można nawiązać połączenia z serwerem poczty")
             
             log(f"Using account type: {account_type}")
+            self._index_account_id = self._get_account_id(connection)
             
             # Enhanced account and folder context logging
             if connection.current_account_config:
@@ -231,6 +515,11 @@ class EmailSearchEngine:
                 log("BŁĄD: Nie znaleziono folderów do przeszukiwania")
                 raise Exception("Nie znaleziono folderów do przeszukiwania")
             
+            if account_type == "exchange":
+                # Same cached tree the folder list came from, folder paths need no extra requests
+                folder_tree = connection.get_exchange_folder_tree(account)
+                self._folder_tree = folder_tree if isinstance(folder_tree, ExchangeFolderTree) else None
+            
             log(f"Znaleziono {len(folders_to_search)} folderów do przeszukiwania:")
             for i, folder in enumerate(folders_to_search, 1):
                 log(f"  {i}. {self._get_safe_folder_name(folder)}")
@@ -314,7 +603,7 @@ class EmailSearchEngine:
                     else:
                         invalid_field_warnings.append(f"  └── Pola rozpoczynające się od '_' nie powinny być używane w filtrach wiadomości.")
                 elif key in ['folder_path', 'excluded_folders', 'subject_search', 'pdf_search_text', 'sender', 'unread_only', 'attachments_required', 
-                           'attachment_name', 'attachment_extension', 'selected_period']:
+                           'attachment_name', 'attachment_extension', 'selected_period', 'max_folder_workers', 'use_message_index', 'pdf_index_only']:
                     # These are valid UI/search criteria (not Message fields)
                     valid_field_count += 1
                 elif key in self._valid_fields:
@@ -374,124 +663,62 @@ class EmailSearchEngine:
             folder_results = {}  # Track results per folder
             message_to_folder_map = {}  # Map message IDs to their folder paths (avoid modifying message objects)
             
-            for idx, search_folder in enumerate(folders_to_search):
-                if self.search_cancelled:
-                    log("Wyszukiwanie anulowane przez użytkownika")
-                    self.result_callback({'type': 'search_cancelled'})
-                    return
+            # Limit total messages for performance (use multiple of per_page to allow proper pagination)
+            max_total_messages = max(per_page * 10, 1000)  # At least 10 pages worth, minimum 1000
+            
+            subject_search = criteria.get('subject_search', '').lower() if criteria.get('subject_search') else None
+            pdf_search_text = criteria.get('pdf_search_text', '').strip() if criteria.get('pdf_search_text') else None
+            has_attachment_filter = criteria.get('attachments_required') or criteria.get('no_attachments_only') or criteria.get('attachment_name') or criteria.get('attachment_extension')
+            has_pdf_search = pdf_search_text is not None and len(pdf_search_text) > 0
+            
+            # Matches of the first page are shown while the search is still running
+            result_stream = ResultStream(self.result_callback, per_page) if page == 0 else None
+            
+            def stream_folder_matches(outcome):
+                """Matches of a searched folder are final unless PDFs or attachment names still have to be checked"""
+                for message in outcome['messages']:
+                    try:
+                        if not self._matches_local_filters(message, criteria, subject_search):
+                            continue
+                        if has_attachment_filter and not self._check_attachment_filters(message, criteria):
+                            continue
+                        result_stream.add(self._make_result_row(message, outcome['folder_path']))
+                    except Exception as stream_error:
+                        log(f"Błąd przetwarzania wiadomości: {str(stream_error)}")
+            
+            stream_folders = (result_stream is not None and not has_pdf_search
+                              and not criteria.get('attachment_name') and not criteria.get('attachment_extension'))
+            
+            # Folders stop reading once their messages can't reach the newest max_total_messages
+            newest_tracker = NewestMessageTracker(max_total_messages)
+            folder_outcomes = self._search_folders_concurrently(
+                folders_to_search, connection, combined_query, criteria, account_type, per_page, newest_tracker,
+                on_folder_done=stream_folder_matches if stream_folders else None
+            )
+            if folder_outcomes is None:
+                log("Wyszukiwanie anulowane przez użytkownika")
+                self.result_callback({'type': 'search_cancelled'})
+                return
+            
+            # Merge per-folder outcomes in the original folder order so the summary stays deterministic
+            for outcome in folder_outcomes:
+                folder_name = outcome['folder_name']
+                if 'error' in outcome:
+                    folder_results[folder_name] = {'error': outcome['error']}
+                    continue
                 
-                folder_name = self._get_safe_folder_name(search_folder)
-                log(f"--- Folder {idx + 1}/{len(folders_to_search)}: '{folder_name}' ---")
+                folder_messages = outcome['messages']
+                for message in folder_messages:
+                    # Use message ID or object reference as key to map to folder path
+                    message_key = getattr(message, 'id', id(message))
+                    message_to_folder_map[message_key] = outcome['folder_path']
                 
-                try:
-                    self.progress_callback(f"Przeszukiwanie folderu {idx + 1}/{len(folders_to_search)}: {folder_name}")
-                    
-                    # Strategy varies by account type
-                    messages_list = []
-                    query_success = False
-                    
-                    if account_type == "exchange" and hasattr(search_folder, 'filter'):
-                        # Exchange-specific folder operations
-                        if combined_query:
-                            try:
-                                log(f"Próba zapytania z filtrami dla folderu '{folder_name}'")
-                                messages = search_folder.filter(combined_query).only(
-                                    'subject', 'sender', 'datetime_received', 'is_read', 
-                                    'has_attachments', 'attachments', 'id'
-                                ).order_by('-datetime_received')
-                                messages_list = list(messages)
-                                query_success = True
-                                log(f"Zapytanie z filtrami: znaleziono {len(messages_list)} wiadomości")
-                            except Exception as query_error:
-                                log(f"BŁĄD zapytania z filtrami: {str(query_error)}")
-                                # Query failed, fallback to getting all messages and filtering manually
-                                try:
-                                    log(f"Fallback: pobieranie wszystkich wiadomości z folderu '{folder_name}'")
-                                    messages = search_folder.all().only(
-                                        'subject', 'sender', 'datetime_received', 'is_read', 
-                                        'has_attachments', 'attachments', 'id'
-                                    ).order_by('-datetime_received')
-                                    messages_list = list(messages)
-                                    log(f"Fallback: pobrano {len(messages_list)} wszystkich wiadomości")
-                                except Exception as fallback_error:
-                                    log(f"BŁĄD fallback: {str(fallback_error)}")
-                        else:
-                            try:
-                                log(f"Pobieranie wszystkich wiadomości z folderu '{folder_name}' (brak filtrów)")
-                                messages = search_folder.all().only(
-                                    'subject', 'sender', 'datetime_received', 'is_read', 
-                                    'has_attachments', 'attachments', 'id'
-                                ).order_by('-datetime_received')
-                                messages_list = list(messages)
-                                log(f"Pobrano {len(messages_list)} wszystkich wiadomości")
-                            except Exception as all_error:
-                                log(f"BŁĄD pobierania wszystkich: {str(all_error)}")
-                        
-                        # If we still have no messages, try alternative QuerySet conversion
-                        if not messages_list:
-                            log(f"Brak wiadomości - próba alternatywnej metody konwersji")
-                            try:
-                                if combined_query:
-                                    messages = search_folder.filter(combined_query).only(
-                                        'subject', 'sender', 'datetime_received', 'is_read', 
-                                        'has_attachments', 'attachments', 'id'
-                                    )
-                                else:
-                                    messages = search_folder.all().only(
-                                        'subject', 'sender', 'datetime_received', 'is_read', 
-                                        'has_attachments', 'attachments', 'id'
-                                    )
-                                
-                                # Use normal iteration instead of .iterator()
-                                messages_list = [msg for msg in messages][:per_page]  # Limit during iteration
-                                log(f"Alternatywna metoda: znaleziono {len(messages_list)} wiadomości (limit {per_page})")
-                            except Exception as iteration_error:
-                                log(f"BŁĄD alternatywnej metody: {str(iteration_error)}")
-                                pass  # Continue with empty list
-                    
-                    else:
-                        # IMAP/POP3 implementation using IMAPClient
-                        log(f"Non-Exchange account type '{account_type}': Using IMAPClient message retrieval for folder '{folder_name}'")
-                        messages_list = self._get_imap_messages(search_folder, connection, combined_query, criteria, account_type, per_page)
-                        log(f"IMAP/POP3 retrieval completed: found {len(messages_list)} messages")
-                    
-                    # Apply per-folder limit
-                    original_count = len(messages_list)
-                    folder_messages = messages_list[:per_page]  # Limit per folder after converting to list
-                    if original_count > per_page:
-                        log(f"Ograniczono z {original_count} do {len(folder_messages)} wiadomości (limit na folder: {per_page})")
-                    
-                    log(f"Folder '{folder_name}' - szczegóły wiadomości:")
-                    log(f"  - Znalezione wiadomości: {original_count}")
-                    log(f"  - Po limicie folderu: {len(folder_messages)}")
-                    log(f"  - Strategia pobierania: {'z filtrami' if query_success else 'wszystkie (fallback)'}")
-                    
-                    # Map each message to its folder path (DO NOT modify message objects)
-                    # This avoids adding non-standard fields like _folder_reference to Message objects
-                    folder_path_for_display = self._get_folder_path(search_folder)
-                    for message in folder_messages:
-                        # Use message ID or object reference as key to map to folder path
-                        message_key = getattr(message, 'id', id(message))
-                        message_to_folder_map[message_key] = folder_path_for_display
-                    
-                    all_messages.extend(folder_messages)
-                    
-                    # Store folder results for summary
-                    folder_results[folder_name] = {
-                        'original_count': original_count,
-                        'limited_count': len(folder_messages),
-                        'query_success': query_success
-                    }
-                    
-                    log(f"Folder '{folder_name}': {len(folder_messages)} wiadomości dodano do wyników")
-                    
-                except Exception as e:
-                    # Log the error but continue with other folders
-                    error_msg = f"Błąd w folderze {folder_name}: {str(e)}"
-                    log(f"BŁĄD FOLDERU '{folder_name}': {str(e)}")
-                    folder_results[folder_name] = {'error': str(e)}
-                    self.progress_callback(error_msg)
-                    continue
+                all_messages.extend(folder_messages)
+                folder_results[folder_name] = {
+                    'original_count': outcome['original_count'],
+                    'limited_count': len(folder_messages),
+                    'query_success': outcome['query_success']
+                }
             
             # Log folder search summary
             log("=== PODSUMOWANIE PRZESZUKIWANIA FOLDERÓW ===")
@@ -519,8 +746,6 @@ class EmailSearchEngine:
             end_idx = start_idx + per_page
             log(f"Paginacja: indeksy {start_idx}-{end_idx}")
             
-            # Limit total messages for performance (use multiple of per_page to allow proper pagination)
-            max_total_messages = max(per_page * 10, 1000)  # At least 10 pages worth, minimum 1000
             original_total = len(all_messages)
             total_messages = all_messages[:max_total_messages]
             total_count = len(total_messages)
@@ -532,10 +757,6 @@ class EmailSearchEngine:
             
             # Filter by attachment criteria if needed  
             filtered_messages = []
-            subject_search = criteria.get('subject_search', '').lower() if criteria.get('subject_search') else None
-            pdf_search_text = criteria.get('pdf_search_text', '').strip() if criteria.get('pdf_search_text') else None
-            has_attachment_filter = criteria.get('attachments_required') or criteria.get('no_attachments_only') or criteria.get('attachment_name') or criteria.get('attachment_extension')
-            has_pdf_search = pdf_search_text is not None and len(pdf_search_text) > 0
             
             # Setup PDF auto-save if PDF search is enabled
             if has_pdf_search:
@@ -543,6 +764,7 @@ class EmailSearchEngine:
                 # Use configurable PDF save directory from criteria, fallback to default
                 self.pdf_save_directory = criteria.get('pdf_save_directory') or os.path.join(os.getcwd(), "odczyty", "Faktury")
                 self.saved_pdf_count = 0
+                self._saved_pdf_paths = {}
                 
                 # Create output directory if it doesn't exist
                 try:
@@ -590,77 +812,73 @@ class EmailSearchEngine:
                     return
                 
                 try:
-                    # Manual subject filtering (case-insensitive) - this acts as backup when query filtering didn't work properly
-                    if subject_search:
-                        message_subject = (message.subject or '').lower()
-                        if subject_search not in message_subject:
-                            subject_filtered_out += 1
-                            continue
-                    
-                    # Manual sender filtering for fragments (case-insensitive)
-                    if criteria.get('sender'):
-                        sender_value = criteria['sender']
-                        if not self._is_email_address(sender_value):
-                            # This is a fragment, do local filtering
-                            sender_fragment = sender_value.lower()
-                            message_sender_matches = False
-                            
-                            # Check sender display name/email
-                            if message.sender:
-                                # For Exchange messages
-                                if hasattr(message.sender, 'email_address') and message.sender.email_address:
-                                    sender_email = message.sender.email_address.lower()
-                                    if sender_fragment in sender_email:
-                                        message_sender_matches = True
-                                
-                                # Check sender name if available
-                                if hasattr(message.sender, 'name') and message.sender.name:
-                                    sender_name = message.sender.name.lower()
-                                    if sender_fragment in sender_name:
-                                        message_sender_matches = True
-                                
-                                # For IMAP messages or fallback
-                                sender_str = str(message.sender).lower()
-                                if sender_fragment in sender_str:
-                                    message_sender_matches = True
-                            
-                            if not message_sender_matches:
-                                subject_filtered_out += 1  # Use same counter for simplicity
-                                continue
-                    
-                    # Check attachment filters if needed
-                    if has_attachment_filter:
-                        if not self._check_attachment_filters(message, criteria):
-                            attachment_filtered_out += 1
-                            continue
+                    # Manual subject/sender filtering - this acts as backup when query filtering didn't work properly
+                    if not self._matches_local_filters(message, criteria, subject_search):
+                        subject_filtered_out += 1  # Use same counter for simplicity
+                        continue
                     
-                    # Check PDF content search if needed
-                    pdf_match_info = None
-                    if has_pdf_search:
-                        skip_searched_pdfs = criteria.get('skip_searched_pdfs', False)
-                        pdf_match_result = self._check_pdf_content(message, pdf_search_text, skip_searched_pdfs)
-                        if not pdf_match_result['found']:
-                            pdf_search_filtered_out += 1
-                            continue
-                        else:
-                            pdf_match_info = pdf_match_result  # Store for results display
-                            
                     filtered_messages.append(message)
                     
-                    # Store PDF match info if found (for later use in results)
-                    if pdf_match_info:
-                        # Use message ID or object reference as key to store PDF match info
-                        message_key = getattr(message, 'id', id(message))
-                        if not hasattr(self, '_pdf_matches'):
-                            self._pdf_matches = {}
-                        self._pdf_matches[message_key] = pdf_match_info
-                    
                 except Exception as filter_error:
                     # Skip messages that cause errors
                     processing_errors += 1
                     log(f"Błąd przetwarzania wiadomości: {str(filter_error)}")
                     continue
             
+            # Check attachment filters if needed (attachment metadata is loaded only for header matches)
+            if has_attachment_filter:
+                if criteria.get('attachment_name') or criteria.get('attachment_extension'):
+                    self._load_exchange_attachment_metadata(filtered_messages)
+                attachment_matched_messages = []
+                for message in filtered_messages:
+                    try:
+                        if not self._check_attachment_filters(message, criteria):
+                            attachment_filtered_out += 1
+                            continue
+                        attachment_matched_messages.append(message)
+                    except Exception as filter_error:
+                        processing_errors += 1
+                        log(f"Błąd przetwarzania wiadomości: {str(filter_error)}")
+                filtered_messages = attachment_matched_messages
+            
+            # Check PDF content of the remaining messages through the scan pipeline
+            if has_pdf_search and filtered_messages:
+                self._load_exchange_attachment_metadata(filtered_messages)
+                skip_searched_pdfs = criteria.get('skip_searched_pdfs', False)
+                download_workers = self._get_folder_worker_count(criteria, account_type, len(filtered_messages))
+                
+                def stream_pdf_match(message, pdf_match_result, scanned):
+                    """A message is a final match as soon as its PDFs contain the text"""
+                    if pdf_match_result and pdf_match_result.get('found'):
+                        message_key = getattr(message, 'id', id(message))
+                        folder_path = message_to_folder_map.get(message_key, 'Skrzynka odbiorcza')
+                        result_stream.add(self._make_result_row(message, folder_path, pdf_match_result))
+                    result_stream.set_progress(scanned, len(filtered_messages))
+                
+                pdf_results = self._scan_pdf_messages(
+                    filtered_messages, pdf_search_text, skip_searched_pdfs, message_to_folder_map, download_workers,
+                    on_result=stream_pdf_match if result_stream is not None else None
+                )
+                if pdf_results is None:
+                    if result_stream is not None:
+                        # Keep the matches confirmed before cancelling on screen
+                        result_stream.flush(force=True)
+                    log("Filtrowanie anulowane przez użytkownika")
+                    self.result_callback({'type': 'search_cancelled'})
+                    return
+                
+                pdf_matched_messages = []
+                for message in filtered_messages:
+                    # Use message ID or object reference as key to store PDF match info
+                    message_key = getattr(message, 'id', id(message))
+                    pdf_match_result = pdf_results.get(message_key)
+                    if not pdf_match_result or not pdf_match_result['found']:
+                        pdf_search_filtered_out += 1
+                        continue
+                    pdf_matched_messages.append(message)
+                    self._pdf_matches[message_key] = pdf_match_result  # Store for results display
+                filtered_messages = pdf_matched_messages
+            
             # Log filtering results
             log(f"Wyniki filtrowania:")
             log(f"  - Wiadomości po filtrach: {len(filtered_messages)}")
@@ -694,62 +912,17 @@ class EmailSearchEngine:
                     filtered_messages = fallback_messages
                     log("Używam wyników z ręcznego filtrowania fallback")
             
-            # Apply pagination to filtered messages
-            paginated_messages = filtered_messages[start_idx:end_idx]
-            log(f"Wiadomości po paginacji: {len(paginated_messages)}")
-            
-            results = []
-            result_processing_errors = 0
-            
-            log("=== TWORZENIE WYNIKÓW ===")
-            for i, message in enumerate(paginated_messages):
-                if self.search_cancelled:
-                    log("Tworzenie wyników anulowane przez użytkownika")
-                    self.result_callback({'type': 'search_cancelled'})
-                    return
-
-                if i % 5 == 0:  # Update progress every 5 messages
-                    self.progress_callback(f"Przetworzono {i + start_idx} wiadomości...")
-                
-                try:
-                    # Extract clean sender email address from Mailbox object
-                    sender_display = 'Nieznany'
-                    if message.sender:
-                        if hasattr(message.sender, 'email_address') and message.sender.email_address:
-                            sender_display = message.sender.email_address
-                        else:
-                            sender_display = str(message.sender)
-                    
-                    # Get folder path for this specific message from our mapping
-                    message_key = getattr(message, 'id', id(message))
-                    message_folder_path = message_to_folder_map.get(message_key, 'Skrzynka odbiorcza')
-                    
-                    # Get PDF match info if available
-                    pdf_match_info = getattr(self, '_pdf_matches', {}).get(message_key, None)
-                    
-                    result_info = {
-                        'datetime_received': message.datetime_received,
-                        'sender': sender_display,
-                        'subject': message.subject if message.subject else 'Brak tematu',
-                        'is_read': message.is_read if hasattr(message, 'is_read') else True,
-                        'has_attachments': message.has_attachments if hasattr(message, 'has_attachments') else False,
-                        'attachment_count': len(message.attachments) if message.attachments else 0,
-                        'message_id': message.id if hasattr(message, 'id') else None,
-                        'folder_path': message_folder_path,  # Use message-specific folder path
-                        'message_obj': message,  # Store full message object for opening
-                        'attachments': list(message.attachments) if message.attachments else [],
-                        'pdf_match_info': pdf_match_info  # Add PDF match information
-                    }
-                    results.append(result_info)
-                    
-                except Exception as e:
-                    # Skip messages that cause errors
-                    result_processing_errors += 1
-                    log(f"Błąd przetwarzania wyniku {i}: {str(e)}")
-                    continue
+            # Keep the ordered result set so page changes don't have to search again
+            self.search_session = SearchSession(
+                criteria, per_page, filtered_messages, message_to_folder_map, self._pdf_matches
+            )
+            log(f"[SEARCH SESSION] Zapisano sesję wyników: {self.search_session.total_count} wiadomości")
             
-            if result_processing_errors > 0:
-                log(f"Błędy przetwarzania wyników: {result_processing_errors}")
+            results = self._build_page_results(self.search_session, page, per_page)
+            if results is None:
+                log("Tworzenie wyników anulowane przez użytkownika")
+                self.result_callback({'type': 'search_cancelled'})
+                return
             
             # Log final summary
             log("=== PODSUMOWANIE WYSZUKIWANIA ===")
@@ -772,15 +945,7 @@ class EmailSearchEngine:
             
             log("=== KONIEC WYSZUKIWANIA ===")
             
-            self.result_callback({
-                'type': 'search_complete',
-                'results': results,
-                'count': len(results),
-                'total_count': len(filtered_messages),
-                'page': page,
-                'per_page': per_page,
-                'total_pages': (len(filtered_messages) + per_page - 1) // per_page
-            })
+            self.result_callback(self._make_page_result(self.search_session, results, page, per_page))
             
         except Exception as e:
             log(f"BŁĄD KRYTYCZNY wyszukiwania: {str(e)}")
@@ -789,6 +954,445 @@ class EmailSearchEngine:
                 'error': str(e)
             })
     
+    def _matches_local_filters(self, message, criteria, subject_search=None):
+        """Check subject and sender fragment filters that the server query can't express"""
+        # Manual subject filtering (case-insensitive)
+        if subject_search:
+            message_subject = (message.subject or '').lower()
+            if subject_search not in message_subject:
+                return False
+        
+        # Manual sender filtering for fragments (case-insensitive)
+        if criteria.get('sender'):
+            sender_value = criteria['sender']
+            if not self._is_email_address(sender_value):
+                # This is a fragment, do local filtering
+                sender_fragment = sender_value.lower()
+                message_sender_matches = False
+                
+                # Check sender display name/email
+                if message.sender:
+                    # For Exchange messages
+                    if hasattr(message.sender, 'email_address') and message.sender.email_address:
+                        sender_email = message.sender.email_address.lower()
+                        if sender_fragment in sender_email:
+                            message_sender_matches = True
+                    
+                    # Check sender name if available
+                    if hasattr(message.sender, 'name') and message.sender.name:
+                        sender_name = message.sender.name.lower()
+                        if sender_fragment in sender_name:
+                            message_sender_matches = True
+                    
+                    # For IMAP messages or fallback
+                    sender_str = str(message.sender).lower()
+                    if sender_fragment in sender_str:
+                        message_sender_matches = True
+                
+                if not message_sender_matches:
+                    return False
+        
+        return True
+    
+    def _load_exchange_attachment_metadata(self, messages):
+        """
+        Load attachment metadata (name, size, content type, attachment id) of Exchange
+        messages from the metadata-only pass in batched GetItem calls
+        
+        Attachment content is not downloaded here, it is fetched on first access.
+        """
+        if not self._exchange_account or not self._pending_attachment_ids:
+            return
+        
+        pending = [m for m in messages if getattr(m, 'id', None) in self._pending_attachment_ids]
+        if not pending:
+            return
+        
+        log(f"[EXCHANGE] Pobieranie metadanych załączników dla {len(pending)} wiadomości")
+        for start in range(0, len(pending), EXCHANGE_ATTACHMENT_BATCH_SIZE):
+            if self.search_cancelled:
+                return
+            batch = pending[start:start + EXCHANGE_ATTACHMENT_BATCH_SIZE]
+            try:
+                items = list(self._exchange_account.fetch(ids=batch, only_fields=['attachments']))
+            except Exception as e:
+                log(f"[EXCHANGE] Błąd pobierania metadanych załączników: {e}")
+                continue
+            
+            for message, item in zip(batch, items):
+                if isinstance(item, Exception):
+                    log(f"[EXCHANGE] Błąd pobierania załączników wiadomości '{(message.subject or 'Bez tematu')[:50]}': {item}")
+                    continue
+                message.attachments = list(item.attachments or [])
+                self._pending_attachment_ids.discard(message.id)
+    
+    def _download_attachments(self, message, attachments):
+        """Download content of the given attachments of a message in as few requests as possible"""
+        if not attachments:
+            return
+        if isinstance(message, IMAPMessage):
+            # IMAP: all parts in one FETCH of BODY.PEEK[<section>] items
+            try:
+                message.load_attachment_contents(attachments)
+            except Exception as e:
+                imap_log.warning("[IMAP] Pobieranie części wiadomości UID %s nie powiodło się: %s", message.uid, e)
+            return
+        self._download_exchange_attachments(attachments)
+    
+    def _download_exchange_attachments(self, attachments):
+        """
+        Download content of several Exchange file attachments in batched GetAttachment calls
+        
+        Attachments that can't be fetched in a batch keep loading lazily on first access.
+        """
+        if not self._exchange_account:
+            return
+        
+        pending = [a for a in attachments if getattr(a, 'attachment_id', None) is not None and getattr(a, '_content', None) is None]
+        if len(pending) < 2:
+            return
+        
+        try:
+            from exchangelib.services import GetAttachment
+        except ImportError:
+            return
+        
+        for start in range(0, len(pending), EXCHANGE_CONTENT_BATCH_SIZE):
+            batch = pending[start:start + EXCHANGE_CONTENT_BATCH_SIZE]
+            try:
+                fetched = list(GetAttachment(account=self._exchange_account).call(
+                    items=[a.attachment_id for a in batch], include_mime_content=False,
+                    body_type=None, filter_html_content=None, additional_fields=None
+                ))
+                for attachment, loaded in zip(batch, fetched):
+                    if not isinstance(loaded, Exception) and getattr(loaded, 'content', None) is not None:
+                        attachment.content = loaded.content
+            except Exception as e:
+                pdf_log.warning("[PDF SEARCH] Pobieranie załączników partiami nie powiodło się, pobieranie pojedynczo: %s", e)
+                return
+    
+    def _get_folder_worker_count(self, criteria, account_type, folder_count):
+        """Resolve how many folders may be queried in parallel"""
+        if account_type == "imap_smtp" and self._imap_pool is not None:
+            # Each IMAP worker borrows its own session from the pool
+            pool_size = self._imap_pool.max_size
+        elif account_type != "exchange":
+            # POP3 (and IMAP without a pool) share a single socket that must select folders one at a time
+            return 1
+        else:
+            pool_size = folder_count
+        
+        try:
+            max_workers = int(criteria.get('max_folder_workers') or self.max_folder_workers)
+        except (TypeError, ValueError):
+            max_workers = self.max_folder_workers
+        
+        return max(1, min(max_workers, pool_size, folder_count))
+    
+    def _search_folders_concurrently(self, folders_to_search, connection, combined_query, criteria, account_type, per_page,
+                                     newest_tracker=None, on_folder_done=None):
+        """
+        Query folders using a bounded worker pool
+        
+        on_folder_done(outcome) is called on the search thread for every folder
+        searched without error, in completion order.
+        
+        Returns:
+            list: One outcome dict per folder in the original folder order,
+                  or None if the search was cancelled
+        """
+        total_folders = len(folders_to_search)
+        max_workers = self._get_folder_worker_count(criteria, account_type, total_folders)
+        log(f"Równoległe przeszukiwanie folderów: {max_workers} wątków dla {total_folders} folderów")
+        
+        outcomes = [None] * total_folders
+        completed = 0
+        
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="folder-search")
+        try:
+            future_to_idx = {
+                executor.submit(
+                    self._search_single_folder, search_folder, idx, total_folders,
+                    connection, combined_query, criteria, account_type, per_page, newest_tracker
+                ): idx
+                for idx, search_folder in enumerate(folders_to_search)
+            }
+            
+            for future in as_completed(future_to_idx):
+                idx = future_to_idx[future]
+                outcomes[idx] = future.result()
+                completed += 1
+                
+                if self.search_cancelled:
+                    for pending in future_to_idx:
+                        pending.cancel()
+                    return None
+                
+                folder_name = outcomes[idx]['folder_name']
+                if 'error' in outcomes[idx]:
+                    self.progress_callback(f"Błąd w folderze {folder_name}: {outcomes[idx]['error']}")
+                else:
+                    self.progress_callback(f"Przeszukano {completed}/{total_folders} folderów (ostatni: {folder_name})")
+                    if on_folder_done:
+                        on_folder_done(outcomes[idx])
+        finally:
+            executor.shutdown(wait=not self.search_cancelled, cancel_futures=self.search_cancelled)
+        
+        if self.search_cancelled:
+            return None
+        
+        return outcomes
+    
+    def _search_single_folder(self, search_folder, idx, total_folders, connection, combined_query, criteria, account_type, per_page,
+                              newest_tracker=None):
+        """Retrieve and limit messages from one folder (runs in a worker thread)"""
+        folder_name = self._get_safe_folder_name(search_folder)
+        
+        if self.search_cancelled:
+            return {'folder_name': folder_name, 'error': 'anulowano'}
+        
+        exchange_log.debug("--- Folder %d/%d: '%s' ---", idx + 1, total_folders, folder_name)
+        
+        try:
+            # Strategy varies by account type
+            messages_list = []
+            query_success = False
+            # Reading stopped because the folder only has messages older than the results
+            reached_older = False
+            
+            indexed_messages = None
+            if self.message_index and criteria.get('use_message_index'):
+                indexed_messages = self._get_indexed_messages(search_folder, connection, criteria, account_type, per_page)
+            
+            if indexed_messages is not None:
+                messages_list = indexed_messages
+                query_success = True
+                exchange_log.debug("Folder '%s': %d wiadomości z lokalnego indeksu", folder_name, len(messages_list))
+            
+            elif account_type == "exchange" and hasattr(search_folder, 'filter'):
+                # Exchange-specific folder operations
+                if combined_query:
+                    try:
+                        exchange_log.debug("Próba zapytania z filtrami dla folderu '%s'", folder_name)
+                        messages = search_folder.filter(combined_query).only(*EXCHANGE_HEADER_FIELDS).order_by('-datetime_received')
+                        messages_list, reached_older = self._take_newest_messages(messages, per_page, newest_tracker)
+                        query_success = True
+                        exchange_log.debug("Zapytanie z filtrami: znaleziono %d wiadomości", len(messages_list))
+                    except Exception as query_error:
+                        exchange_log.warning("BŁĄD zapytania z filtrami: %s", query_error)
+                        # Query failed, fallback to getting all messages and filtering manually
+                        try:
+                            exchange_log.debug("Fallback: pobieranie wszystkich wiadomości z folderu '%s'", folder_name)
+                            messages = search_folder.all().only(*EXCHANGE_HEADER_FIELDS).order_by('-datetime_received')
+                            messages_list, reached_older = self._take_newest_messages(messages, per_page, newest_tracker)
+                            exchange_log.debug("Fallback: pobrano %d wszystkich wiadomości", len(messages_list))
+                        except Exception as fallback_error:
+                            exchange_log.error("BŁĄD fallback: %s", fallback_error)
+                else:
+                    try:
+                        exchange_log.debug("Pobieranie wszystkich wiadomości z folderu '%s' (brak filtrów)", folder_name)
+                        messages = search_folder.all().only(*EXCHANGE_HEADER_FIELDS).order_by('-datetime_received')
+                        messages_list, reached_older = self._take_newest_messages(messages, per_page, newest_tracker)
+                        exchange_log.debug("Pobrano %d wszystkich wiadomości", len(messages_list))
+                    except Exception as all_error:
+                        exchange_log.error("BŁĄD pobierania wszystkich: %s", all_error)
+                
+                # If we still have no messages, try alternative QuerySet conversion
+                if not messages_list and not reached_older:
+                    exchange_log.debug("Brak wiadomości - próba alternatywnej metody konwersji")
+                    try:
+                        if combined_query:
+                            messages = search_folder.filter(combined_query).only(*EXCHANGE_HEADER_FIELDS)
+                        else:
+                            messages = search_folder.all().only(*EXCHANGE_HEADER_FIELDS)
+                        
+                        # Use normal iteration instead of .iterator(), the limit is pushed into the query
+                        messages_list = list(messages[:per_page])
+                        exchange_log.debug("Alternatywna metoda: znaleziono %d wiadomości (limit %d)", len(messages_list), per_page)
+                    except Exception as iteration_error:
+                        exchange_log.error("BŁĄD alternatywnej metody: %s", iteration_error)
+                        pass  # Continue with empty list
+                
+                # Attachment metadata is loaded later, only for messages that need it
+                self._pending_attachment_ids.update(
+                    message.id for message in messages_list if getattr(message, 'has_attachments', False)
+                )
+            
+            else:
+                # IMAP/POP3 implementation using IMAPClient
+                imap_log.debug("Non-Exchange account type '%s': Using IMAPClient message retrieval for folder '%s'", account_type, folder_name)
+                messages_list = self._get_imap_messages(search_folder, connection, combined_query, criteria, account_type, per_page)
+                imap_log.debug("IMAP/POP3 retrieval completed: found %d messages", len(messages_list))
+            
+            # Apply per-folder limit
+            original_count = len(messages_list)
+            folder_messages = messages_list[:per_page]  # Limit per folder after converting to list
+            if original_count > per_page:
+                exchange_log.debug("Ograniczono z %d do %d wiadomości (limit na folder: %d)", original_count, len(folder_messages), per_page)
+            
+            exchange_log.debug("Folder '%s' - szczegóły wiadomości:", folder_name)
+            exchange_log.debug("  - Znalezione wiadomości: %d", original_count)
+            exchange_log.debug("  - Po limicie folderu: %d", len(folder_messages))
+            exchange_log.debug("  - Strategia pobierania: %s", 'z filtrami' if query_success else 'wszystkie (fallback)')
+            exchange_log.debug("Folder '%s': %d wiadomości dodano do wyników", folder_name, len(folder_messages))
+            
+            return {
+                'folder_name': folder_name,
+                # Map messages to this path later (DO NOT modify message objects)
+                'folder_path': self._get_folder_path(search_folder),
+                'messages': folder_messages,
+                'original_count': original_count,
+                'query_success': query_success
+            }
+            
+        except Exception as e:
+            # Log the error but let the other folders continue
+            exchange_log.error("BŁĄD FOLDERU '%s': %s", folder_name, e)
+            return {'folder_name': folder_name, 'error': str(e)}
+    
+    def _take_newest_messages(self, queryset, limit, newest_tracker=None):
+        """
+        Read a QuerySet ordered newest first, fetching no more than needed
+        
+        The limit is pushed into the QuerySet so EWS stops paging there, items
+        are iterated page by page and reading stops at the first message older
+        than the newest messages already collected from all folders.
+        
+        Returns:
+            tuple: (messages, True if reading stopped at an older message)
+        """
+        # Slicing runs the query and returns an iterator, so the page size is set first
+        if hasattr(queryset, 'page_size'):
+            queryset.page_size = min(limit, EXCHANGE_QUERY_PAGE_SIZE)
+        queryset = queryset[:limit]
+        
+        messages = []
+        for message in queryset:
+            if isinstance(message, Exception):
+                exchange_log.warning("Pominięto błędny element wyniku: %s", message)
+                continue
+            if newest_tracker is not None and not newest_tracker.offer(message.datetime_received):
+                exchange_log.debug("Pozostałe wiadomości folderu są starsze niż zebrane wyniki - przerwano pobieranie")
+                return messages, True
+            messages.append(message)
+        return messages, False
+    
+    def _get_indexed_messages(self, search_folder, connection, criteria, account_type, per_page):
+        """
+        Answer header-only criteria from the local message index after an incremental sync
+        
+        Returns:
+            list: Message objects newest first, or None if the server must be queried instead
+        """
+        if criteria.get('body_search'):
+            log("[MESSAGE INDEX] Wyszukiwanie w treści nie jest indeksowane - zapytanie do serwera")
+            return None
+        
+        account_id = self._get_account_id(connection)
+        
+        try:
+            if account_type == "exchange":
+                folder_key = getattr(search_folder, 'id', None) or self._get_folder_path(search_folder)
+                self.message_index.sync_exchange_folder(search_folder, account_id, folder_key)
+            elif account_type == "imap_smtp":
+                folder_key = search_folder
+                if self._imap_pool is not None:
+                    self._imap_pool.run(
+                        lambda imap: self.message_index.sync_imap_folder(
+                            imap, account_id, search_folder,
+                            lambda uids: self._fetch_imap_messages(imap, uids, criteria, search_folder)
+                        ),
+                        search_folder
+                    )
+                else:
+                    imap = connection.imap_connection
+                    self.message_index.sync_imap_folder(
+                        imap, account_id, search_folder,
+                        lambda uids: self._fetch_imap_messages(imap, uids, criteria)
+                    )
+                    # Lazy attachment/body loads expect the folder to stay selected
+                    imap.select_folder(search_folder)
+            elif account_type == "pop3_smtp":
+                pop3 = connection.pop3_connection
+                folder_key = "INBOX"
+                self.message_index.sync_pop3_mailbox(
+                    pop3, account_id,
+                    lambda message_num: self._fetch_pop3_message_headers(pop3, message_num)
+                )
+            else:
+                return None
+        except Exception as e:
+            log(f"[MESSAGE INDEX] Błąd synchronizacji indeksu: {str(e)} - zapytanie do serwera")
+            return None
+        
+        since = None
+        if criteria.get('selected_period') and criteria['selected_period'] != 'wszystkie':
+            since = self._get_period_start_date(criteria['selected_period'])
+        
+        rows = self.message_index.query(
+            account_id, folder_key,
+            subject=criteria.get('subject_search'),
+            sender=criteria.get('sender'),
+            since=since,
+            unread_only=criteria.get('unread_only', False),
+            limit=per_page
+        )
+        return [self._message_from_index_row(row, connection, account_type, search_folder) for row in rows]
+    
+    def _get_account_id(self, connection, account_config=None):
+        """Account identifier used as key in the local indexes"""
+        config = account_config or connection.current_account_config or {}
+        return config.get('email') or config.get('name', 'unknown')
+    
+    def _index_folder_in_scope(self, folder, account_type, folder_path, excluded_names):
+        """
+        Check if an indexed folder path is covered by the server search
+        
+        Exchange searches the whole mailbox, IMAP the selected folder and its
+        subfolders; a folder is left out when any level of its path is excluded.
+        """
+        folder = folder or 'Skrzynka odbiorcza'
+        if any(part in excluded_names for part in folder.strip('/').split('/')):
+            return False
+        
+        if account_type == 'exchange' or not folder_path:
+            return True
+        
+        inbox_names = ('inbox', 'skrzynka odbiorcza')
+        base = 'INBOX' if folder_path.lower() in inbox_names else folder_path
+        folder_name = 'INBOX' if folder.lower() in inbox_names else folder
+        return folder_name == base or folder_name.startswith((base + '/', base + '.'))
+    
+    def _message_from_index_row(self, row, connection, account_type, folder=None):
+        """Rebuild a message object from an index row"""
+        sender = IMAPSender(row['sender_name'] or row['sender_email'], row['sender_email'])
+        
+        if account_type == "exchange":
+            return IndexedExchangeMessage(row, sender, connection.account)
+        if account_type == "pop3_smtp":
+            return POP3Message(
+                message_num=row['message_num'],
+                subject=row['subject'],
+                sender=sender,
+                datetime_received=row['datetime_received'],
+                is_read=row['is_read'],
+                has_attachments=row['has_attachments'],
+                pop3_connection=connection.pop3_connection,
+                email_message=None
+            )
+        return IMAPMessage(
+            uid=int(row['msg_key']),
+            subject=row['subject'],
+            sender=sender,
+            datetime_received=row['datetime_received'],
+            is_read=row['is_read'],
+            has_attachments=row['has_attachments'],
+            imap_connection=connection.imap_connection,
+            size=row['size'],
+            folder=folder if self._imap_pool is not None else None,
+            connection_pool=self._imap_pool
+        )
+    
     def _get_period_start_date(self, period):
         """Get start date for the selected period using proper datetime methods"""
         return IMAPDateHandler.get_period_start_date(period)
@@ -850,8 +1454,9 @@ class EmailSearchEngine:
                     path_parts.insert(0, folder_name)
                     
                     # Move to parent folder
-                    if hasattr(current_folder, 'parent') and current_folder.parent:
-                        current_folder = current_folder.parent
+                    parent_folder = self._get_parent_folder(current_folder)
+                    if parent_folder:
+                        current_folder = parent_folder
                     else:
                         break
                 
@@ -876,6 +1481,12 @@ class EmailSearchEngine:
             except:
                 return 'Skrzynka odbiorcza'
 
+    def _get_parent_folder(self, folder):
+        """Parent of an Exchange folder, from the folder tree when it knows the folder"""
+        if self._folder_tree is not None and self._folder_tree.contains(folder):
+            return self._folder_tree.get_parent(folder)
+        return getattr(folder, 'parent', None)
+    
     def _get_monthly_folder_path(self, base_directory, email_date):
         """Create monthly folder path based on email date using proper datetime methods"""
         try:
@@ -903,42 +1514,90 @@ class EmailSearchEngine:
         if not attachment_name_filter and not attachment_ext_filter:
             return True
         
-        # Safely access attachments with error handling
+        # Names and content types come from BODYSTRUCTURE / Exchange metadata, nothing is downloaded
         try:
-            attachments_list = list(message.attachments) if message.attachments else []
-            if not attachments_list:
+            descriptors = self._get_attachment_descriptors(message)
+            if not descriptors:
                 log(f"[ATTACHMENT FILTER] Wiadomość ma has_attachments=True ale brak załączników do sprawdzenia")
                 return False
         except Exception as e:
             log(f"[ATTACHMENT FILTER] Błąd dostępu do załączników: {str(e)}")
             return False
-            
-        for attachment in attachments_list:
-            if hasattr(attachment, 'name') and attachment.name:
-                attachment_name = attachment.name.lower()
-                
-                # Check name filter
-                if attachment_name_filter and attachment_name_filter not in attachment_name:
-                    continue
-                    
-                # Check extension filter
-                if attachment_ext_filter:
-                    if not attachment_name.endswith(f'.{attachment_ext_filter}'):
-                        continue
-                
-                # If we get here, attachment matches filters
+        
+        for attachment_name, content_type in descriptors:
+            if self._attachment_matches_filters(attachment_name, content_type, attachment_name_filter, attachment_ext_filter):
                 return True
         
         return False
     
-    def _check_pdf_content(self, message, search_text, skip_searched_pdfs=False):
+    def _get_attachment_descriptors(self, message):
+        """
+        Get (name, content type) of the message attachments without downloading them
+        
+        IMAP messages answer from the BODYSTRUCTURE part map (RFC 2231/2047 names
+        decoded), other messages from their attachment metadata.
+        """
+        if isinstance(message, IMAPMessage):
+            parts = message.get_parts()
+            if parts:
+                return [(part.filename, part.content_type) for part in parts if part.is_attachment]
+        
+        attachments = list(message.attachments) if message.attachments else []
+        return [(getattr(a, 'name', None), getattr(a, 'content_type', None)) for a in attachments]
+    
+    def _attachment_matches_filters(self, attachment_name, content_type, name_filter, ext_filter):
+        """Check a single attachment against the name and extension filters"""
+        attachment_name = (attachment_name or '').lower()
+        if name_filter and name_filter not in attachment_name:
+            return False
+        if not ext_filter:
+            return bool(attachment_name)
+        
+        ext_filter = ext_filter.lstrip('.')
+        if attachment_name.endswith(f'.{ext_filter}'):
+            return True
+        # Attachment without an extension in its name - use the content type
+        if content_type and '.' not in attachment_name:
+            return f'.{ext_filter}' in mimetypes.guess_all_extensions(content_type.lower())
+        return False
+    
+    def _check_pdf_content(self, message, search_text, skip_searched_pdfs=False, folder_path=None):
         """Check if message has PDF attachments containing the search text"""
         if not search_text:
             return {'found': False, 'matches': [], 'method': 'no_search_text'}
         
+        collected = self._collect_pdf_attachments(message, search_text, skip_searched_pdfs)
+        if isinstance(collected, dict):
+            return collected
+        pdf_attachments, skipped_pdfs_count = collected
+        
+        attachment_results = []
+        for attachment, attachment_name, attachment_content, content_hash in pdf_attachments:
+            if self.search_cancelled:
+                return {'found': False, 'matches': [], 'method': 'cancelled'}
+            
+            # Search in this PDF attachment
+            result = self.pdf_processor.search_in_pdf_attachment(
+                attachment, search_text, attachment_name, content_hash=content_hash
+            )
+            attachment_results.append((attachment, attachment_name, result, content_hash))
+        
+        return self._finish_pdf_check(message, search_text, attachment_results, skipped_pdfs_count, folder_path)
+    
+    def _collect_pdf_attachments(self, message, search_text, skip_searched_pdfs=False):
+        """
+        Load PDF attachments of a message that still need to be searched
+        
+        Each attachment is hashed at most once; attachments whose hash is
+        already known by their server key are skipped without downloading.
+        
+        Returns:
+            tuple: (list of (attachment, name, content, content_hash), skipped_count),
+                   or a result dict when the message can't be searched
+        """
         # First check the has_attachments flag - this is more reliable than checking attachments directly
         if hasattr(message, 'has_attachments') and not message.has_attachments:
-            log(f"[PDF SEARCH] Wiadomość '{message.subject[:50] if message.subject else 'Bez tematu'}' nie ma załączników (has_attachments=False)")
+            pdf_log.debug("[PDF SEARCH] Wiadomość '%.50s' nie ma załączników (has_attachments=False)", message.subject or 'Bez tematu')
             return {'found': False, 'matches': [], 'method': 'no_attachments_flag'}
         
         # Now try to access attachments with proper error handling
@@ -948,20 +1607,21 @@ class EmailSearchEngine:
             attachment_count = len(attachments_list)
             
             if attachment_count == 0:
-                log(f"[PDF SEARCH] Wiadomość '{message.subject[:50] if message.subject else 'Bez tematu'}' ma has_attachments=True ale attachments jest pusta!")
+                pdf_log.warning("[PDF SEARCH] Wiadomość '%.50s' ma has_attachments=True ale attachments jest pusta!", message.subject or 'Bez tematu')
                 # This is the bug - has_attachments says True but attachments is empty
                 # This means attachments weren't properly loaded
                 return {'found': False, 'matches': [], 'method': 'attachments_not_loaded'}
             
-            log(f"[PDF SEARCH] Sprawdzanie {attachment_count} załączników w wiadomości: {message.subject[:50] if message.subject else 'Bez tematu'}...")
+            pdf_log.debug("[PDF SEARCH] Sprawdzanie %d załączników w wiadomości: %.50s...", attachment_count, message.subject or 'Bez tematu')
             
         except Exception as e:
-            log(f"[PDF SEARCH] BŁĄD dostępu do załączników w wiadomości '{message.subject[:50] if message.subject else 'Bez tematu'}': {str(e)}")
+            pdf_log.error("[PDF SEARCH] BŁĄD dostępu do załączników w wiadomości '%.50s': %s", message.subject or 'Bez tematu', e)
             return {'found': False, 'matches': [], 'method': 'attachment_access_error', 'error': str(e)}
         
-        found_matches = []
-        found_attachment_names = []
+        to_download = []
+        pdf_attachments = []
         skipped_pdfs_count = 0
+        skip_by_history = skip_searched_pdfs and self.pdf_history_manager
         
         for attachment in attachments_list:
             if self.search_cancelled:
@@ -972,50 +1632,115 @@ class EmailSearchEngine:
             if not attachment_name.lower().endswith('.pdf'):
                 continue
             
-            # Check if we should skip this PDF based on history
-            if skip_searched_pdfs and self.pdf_history_manager:
-                try:
-                    attachment_content = getattr(attachment, 'content', None)
-                    if attachment_content and self.pdf_history_manager.is_pdf_already_searched(
-                        attachment_name, attachment_content, search_text
-                    ):
-                        # Mark as skipped and continue to next attachment
-                        self.pdf_history_manager.mark_pdf_as_skipped(
-                            attachment_name, attachment_content, search_text
-                        )
-                        skipped_pdfs_count += 1
-                        log(f"[PDF HISTORY] Pominięto już przeszukany PDF: {attachment_name}")
-                        continue
-                except Exception as e:
-                    log(f"[PDF HISTORY] Błąd sprawdzania historii dla {attachment_name}: {e}")
-                    # Continue with search if history check fails
+            server_key = get_attachment_server_key(message, attachment)
+            known_hash = self._get_known_content_hash(server_key)
             
-            # Search in this PDF attachment
-            result = self.pdf_processor.search_in_pdf_attachment(attachment, search_text, attachment_name)
+            # Attachments known by their server key are checked before downloading
+            if skip_by_history and known_hash and self._skip_searched_pdf(attachment_name, known_hash, search_text):
+                skipped_pdfs_count += 1
+                continue
+            
+            to_download.append((attachment, attachment_name, server_key, known_hash))
+        
+        # PDFs that still need scanning are downloaded together (content is loaded lazily otherwise)
+        self._download_attachments(message, [attachment for attachment, _, _, _ in to_download])
+        
+        for attachment, attachment_name, server_key, known_hash in to_download:
+            if self.search_cancelled:
+                return {'found': False, 'matches': [], 'method': 'cancelled'}
+            
+            attachment_content = getattr(attachment, 'content', None)
+            content_hash = known_hash
+            if content_hash is None and attachment_content:
+                content_hash = compute_content_hash(attachment_content)
+                if server_key and self.pdf_history_manager:
+                    self.pdf_history_manager.remember_content_hash(server_key, content_hash)
+                
+                # Check if we should skip this PDF based on history
+                if skip_by_history and self._skip_searched_pdf(attachment_name, content_hash, search_text):
+                    skipped_pdfs_count += 1
+                    continue
+            
+            pdf_attachments.append((attachment, attachment_name, attachment_content, content_hash))
+        
+        return pdf_attachments, skipped_pdfs_count
+    
+    def _get_known_content_hash(self, server_key):
+        """Content hash remembered for an attachment server key, or None"""
+        if not server_key or not self.pdf_history_manager:
+            return None
+        return self.pdf_history_manager.get_content_hash(server_key)
+    
+    def _skip_searched_pdf(self, attachment_name, content_hash, search_text):
+        """
+        Check the PDF history and mark the PDF as skipped when it was already searched
+        
+        Returns:
+            bool: True if the PDF should be skipped
+        """
+        try:
+            with self._pdf_history_lock:
+                already_searched = self.pdf_history_manager.is_pdf_already_searched(
+                    attachment_name, None, search_text, content_hash=content_hash
+                )
+                if already_searched:
+                    self.pdf_history_manager.mark_pdf_as_skipped(
+                        attachment_name, None, search_text, content_hash=content_hash
+                    )
+            if already_searched:
+                history_log.debug("[PDF HISTORY] Pominięto już przeszukany PDF: %s", attachment_name)
+            return already_searched
+        except Exception as e:
+            history_log.error("[PDF HISTORY] Błąd sprawdzania historii dla %s: %s", attachment_name, e)
+            # Continue with search if history check fails
+            return False
+    
+    def _finish_pdf_check(self, message, search_text, attachment_results, skipped_pdfs_count, folder_path=None):
+        """
+        Record history, auto-save and index the searched PDF attachments of a message
+        
+        Args:
+            attachment_results: List of (attachment, name, search result, content_hash) tuples
+        
+        Returns:
+            dict: PDF match info for the message
+        """
+        found_matches = []
+        found_attachment_names = []
+        
+        for attachment, attachment_name, result, content_hash in attachment_results:
+            saved_path = None
+            if content_hash is None and getattr(attachment, 'content', None):
+                content_hash = compute_content_hash(attachment.content)
             
             if result['found']:
                 found_matches.extend(result.get('matches', []))
                 found_attachment_names.append({
                     'name': attachment_name,
                     'method': result.get('method', 'unknown'),
-                    'matches': result.get('matches', [])
+                    'matches': result.get('matches', []),
+                    'pages': result.get('match_pages', [])
                 })
                 
                 # Mark PDF as searched in history
                 if self.pdf_history_manager:
                     try:
-                        attachment_content = getattr(attachment, 'content', None)
-                        if attachment_content:
+                        if content_hash:
                             # Get sender email from message
                             sender_email = getattr(message.sender, 'email_address', None) if hasattr(message, 'sender') else None
-                            self.pdf_history_manager.mark_pdf_as_searched(
-                                attachment_name, attachment_content, search_text, result.get('matches', []), sender_email
-                            )
+                            with self._pdf_history_lock:
+                                self.pdf_history_manager.mark_pdf_as_searched(
+                                    attachment_name, None, search_text, result.get('matches', []), sender_email,
+                                    content_hash=content_hash
+                                )
                     except Exception as e:
-                        log(f"[PDF HISTORY] Błąd oznaczania PDF {attachment_name} jako przeszukany: {e}")
+                        history_log.error("[PDF HISTORY] Błąd oznaczania PDF %s jako przeszukany: %s", attachment_name, e)
                 
                 # Auto-save PDF if enabled
-                if self.auto_save_pdfs and self.pdf_save_directory:
+                if self.auto_save_pdfs and self.pdf_save_directory and content_hash in self._saved_pdf_paths:
+                    saved_path = self._saved_pdf_paths[content_hash]
+                    pdf_log.debug("PDF %s już zapisany w tym wyszukiwaniu: %s", attachment_name, saved_path)
+                elif self.auto_save_pdfs and self.pdf_save_directory:
                     try:
                         # Get monthly folder path based on email date
                         monthly_folder = self._get_monthly_folder_path(self.pdf_save_directory, message.datetime_received)
@@ -1037,6 +1762,9 @@ class EmailSearchEngine:
                         # Write PDF content to file (overwrite if exists to avoid duplicates)
                         with open(output_path, 'wb') as f:
                             f.write(attachment.content)
+                        saved_path = output_path
+                        if content_hash:
+                            self._saved_pdf_paths[content_hash] = output_path
                         
                         # Set file modification time to match email date using proper methods
                         if message.datetime_received:
@@ -1046,7 +1774,7 @@ class EmailSearchEngine:
                                 if email_timestamp:
                                     # Set both access time and modification time to email date
                                     os.utime(output_path, (email_timestamp, email_timestamp))
-                                    log(f"Ustawiono datę modyfikacji pliku {safe_filename} na: {message.datetime_received}")
+                                    pdf_log.debug("Ustawiono datę modyfikacji pliku %s na: %s", safe_filename, message.datetime_received)
                             except Exception as e:
                                 log(f"OSTRZEŻENIE: Nie można ustawić daty modyfikacji pliku {safe_filename}: {e}")
                         
@@ -1061,23 +1789,28 @@ class EmailSearchEngine:
                     except Exception as e:
                         log(f"BŁĄD auto-zapisu PDF {attachment_name}: {e}")
                         # Don't stop processing, just log the error
-            else:
+            elif result.get('method') != 'cancelled':
                 # Mark PDF as searched in history even if no matches found
                 if self.pdf_history_manager:
                     try:
-                        attachment_content = getattr(attachment, 'content', None)
-                        if attachment_content:
+                        if content_hash:
                             # Get sender email from message
                             sender_email = getattr(message.sender, 'email_address', None) if hasattr(message, 'sender') else None
-                            self.pdf_history_manager.mark_pdf_as_searched(
-                                attachment_name, attachment_content, search_text, [], sender_email
-                            )
+                            with self._pdf_history_lock:
+                                self.pdf_history_manager.mark_pdf_as_searched(
+                                    attachment_name, None, search_text, [], sender_email, content_hash=content_hash
+                                )
                     except Exception as e:
-                        log(f"[PDF HISTORY] Błąd oznaczania PDF {attachment_name} jako przeszukany (bez wyników): {e}")
+                        history_log.error("[PDF HISTORY] Błąd oznaczania PDF %s jako przeszukany (bez wyników): %s", attachment_name, e)
+            
+            # Add extracted text to the full-text index for later lookups
+            if self.pdf_text_index and result.get('pages'):
+                self._index_pdf_attachment(message, attachment, attachment_name, result['pages'], folder_path, saved_path,
+                                           content_hash)
         
         # Log statistics about skipped PDFs
         if skipped_pdfs_count > 0:
-            log(f"[PDF HISTORY] Pominięto {skipped_pdfs_count} już przeszukanych PDF-ów")
+            history_log.debug("[PDF HISTORY] Pominięto %d już przeszukanych PDF-ów", skipped_pdfs_count)
         
         if found_attachment_names:
             return {
@@ -1088,32 +1821,128 @@ class EmailSearchEngine:
             }
         
         return {'found': False, 'matches': [], 'method': 'not_found_in_pdfs', 'skipped_count': skipped_pdfs_count}
-
+    
+    def _scan_pdf_messages(self, messages, search_text, skip_searched_pdfs, message_to_folder_map, download_workers=1,
+                           on_result=None):
+        """
+        Search PDF attachments of many messages through the PDF scan pipeline
+        
+        on_result(message, pdf_match_result, scanned_count) is called as soon as
+        a message is checked, in completion order.
+        
+        Returns:
+            dict: PDF match info per message key, or None if the search was cancelled
+        """
+        pipeline = PDFScanPipeline(
+            self.pdf_processor,
+            is_cancelled=lambda: self.search_cancelled,
+            download_workers=download_workers
+        )
+        
+        def load_attachments(message):
+            return self._collect_pdf_attachments(message, search_text, skip_searched_pdfs)
+        
+        pdf_results = {}
+        scanned = 0
+        try:
+            for message, outcome in pipeline.scan(messages, load_attachments, search_text):
+                scanned += 1
+                message_key = getattr(message, 'id', id(message))
+                if 'early_result' in outcome:
+                    pdf_results[message_key] = outcome['early_result']
+                else:
+                    pdf_results[message_key] = self._finish_pdf_check(
+                        message, search_text, outcome['attachments'], outcome['skipped_count'],
+                        message_to_folder_map.get(message_key)
+                    )
+                if on_result:
+                    on_result(message, pdf_results[message_key], scanned)
+                
+                if scanned % 5 == 0:
+                    self.progress_callback(f"Przeszukano PDF-y w {scanned}/{len(messages)} wiadomościach...")
+        finally:
+            # History writes of the whole scan are committed in one batch
+            if self.pdf_history_manager:
+                self.pdf_history_manager.flush()
+        
+        if self.search_cancelled:
+            return None
+        return pdf_results
+    
+    def _index_pdf_attachment(self, message, attachment, attachment_name, pages, folder_path=None, saved_path=None,
+                              content_hash=None):
+        """Store PDF page text and the message it came from in the full-text index"""
+        try:
+            if content_hash is None:
+                attachment_content = getattr(attachment, 'content', None)
+                if not attachment_content:
+                    return
+                content_hash = compute_content_hash(attachment_content)
+            
+            if not self.pdf_text_index.is_indexed(content_hash):
+                self.pdf_text_index.index_document(content_hash, pages)
+            
+            sender = getattr(message, 'sender', None)
+            self.pdf_text_index.add_occurrence(
+                content_hash, self._index_account_id, getattr(message, 'id', id(message)), attachment_name,
+                folder=folder_path or 'Skrzynka odbiorcza',
+                subject=message.subject,
+                sender_name=getattr(sender, 'name', None),
+                sender_email=getattr(sender, 'email_address', None),
+                datetime_received=message.datetime_received,
+                saved_path=saved_path
+            )
+        except Exception as e:
+            log(f"[PDF INDEX] Błąd indeksowania załącznika {attachment_name}: {e}")
+    
     def _get_imap_messages(self, folder_name, connection, combined_query, criteria, account_type, per_page=500):
         """Retrieve messages from IMAP folder using IMAPClient"""
         try:
             if account_type == "pop3_smtp":
                 return self._get_pop3_messages(connection, criteria, per_page)
             
+            if self._imap_pool is not None:
+                # Folders are searched in parallel, each on its own pooled session, a session dropped
+                # by the server is retried once on a fresh one
+                return self._imap_pool.run(
+                    lambda imap: self._search_imap_folder(imap, folder_name, connection, criteria, per_page)
+                )
+            
             # For IMAP accounts, use the existing IMAP connection
             imap = connection.imap_connection
             if not imap:
                 log("[IMAP] ERROR: No IMAP connection available")
                 return []
+            return self._search_imap_folder(imap, folder_name, connection, criteria, per_page)
             
+        except Exception as e:
+            log(f"[IMAP] ERROR in _get_imap_messages: {str(e)}")
+            if is_connection_error(e):
+                # Report the folder as failed instead of silently empty
+                raise
+            return []
+    
+    def _search_imap_folder(self, imap, folder_name, connection, criteria, per_page):
+        """Select a folder on the given session, search it and fetch the message headers"""
+        try:
             # Select the folder
             try:
                 if isinstance(folder_name, str):
-                    imap.select_folder(folder_name)
+                    selected_folder = folder_name
+                    select_info = self._select_imap_folder(imap, folder_name)
                     log(f"[IMAP] Selected folder: {folder_name}")
                 else:
                     # Should not happen for IMAP, but fallback to INBOX
-                    imap.select_folder("INBOX")
+                    selected_folder = "INBOX"
+                    select_info = self._select_imap_folder(imap, "INBOX")
                     log(f"[IMAP] Fallback to INBOX folder")
             except Exception as folder_error:
+                if is_connection_error(folder_error):
+                    raise
                 log(f"[IMAP] ERROR selecting folder {folder_name}: {str(folder_error)}")
                 try:
-                    imap.select_folder("INBOX")
+                    selected_folder = "INBOX"
+                    select_info = self._select_imap_folder(imap, "INBOX")
                     log("[IMAP] Fallback to INBOX after folder selection error")
                 except Exception as inbox_error:
                     log(f"[IMAP] ERROR: Cannot even select INBOX: {str(inbox_error)}")
@@ -1128,6 +1957,8 @@ class EmailSearchEngine:
                 message_uids = imap.search(search_criteria)
                 log(f"[IMAP] Found {len(message_uids)} messages matching criteria")
             except Exception as search_error:
+                if is_connection_error(search_error):
+                    raise
                 log(f"[IMAP] Search failed: {str(search_error)}, falling back to ALL")
                 try:
                     message_uids = imap.search(['ALL'])
@@ -1147,15 +1978,29 @@ class EmailSearchEngine:
             
             # Fetch message data
             log(f"[IMAP] Fetching message data for {len(limited_uids)} messages...")
-            messages_list = self._fetch_imap_messages(imap, limited_uids, criteria)
+            messages_list = self._fetch_imap_messages(imap, limited_uids, criteria, selected_folder)
+            
+            # Attachments are identified by account, folder, UIDVALIDITY, UID and part section
+            uidvalidity = select_info.get(b'UIDVALIDITY') if isinstance(select_info, dict) else None
+            server_key_prefix = get_imap_server_key_prefix(self._get_account_id(connection), selected_folder, uidvalidity)
+            for message in messages_list:
+                message.server_key_prefix = server_key_prefix
             
             log(f"[IMAP] Successfully retrieved {len(messages_list)} message objects")
             return messages_list
             
         except Exception as e:
-            log(f"[IMAP] ERROR in _get_imap_messages: {str(e)}")
+            if is_connection_error(e):
+                raise
+            log(f"[IMAP] ERROR searching folder {folder_name}: {str(e)}")
             return []
     
+    def _select_imap_folder(self, imap, folder_name):
+        """Select a folder, pooled sessions remember their selected folder"""
+        if self._imap_pool is not None:
+            return self._imap_pool.select(imap, folder_name)
+        return imap.select_folder(folder_name)
+    
     def _build_imap_search_criteria(self, criteria):
         """Build IMAP search criteria from GUI criteria as flat list"""
         search_terms = []
@@ -1202,7 +2047,7 @@ class EmailSearchEngine:
         
         return search_terms
     
-    def _fetch_imap_messages(self, imap, message_uids, criteria):
+    def _fetch_imap_messages(self, imap, message_uids, criteria, folder=None):
         """Fetch and parse IMAP messages"""
         messages_list = []
         
@@ -1215,7 +2060,7 @@ class EmailSearchEngine:
                     break
                 
                 batch_uids = message_uids[i:i + batch_size]
-                log(f"[IMAP] Fetching batch {i//batch_size + 1}: UIDs {len(batch_uids)} messages")
+                imap_log.debug("[IMAP] Fetching batch %d: UIDs %d messages", i // batch_size + 1, len(batch_uids))
                 
                 try:
                     # Fetch headers and basic info
@@ -1227,23 +2072,27 @@ class EmailSearchEngine:
                         
                         if uid in response:
                             try:
-                                message_obj = self._parse_imap_message(imap, uid, response[uid], criteria)
+                                message_obj = self._parse_imap_message(imap, uid, response[uid], criteria, folder)
                                 if message_obj:
                                     messages_list.append(message_obj)
                             except Exception as parse_error:
-                                log(f"[IMAP] Error parsing message UID {uid}: {str(parse_error)}")
+                                imap_log.error("[IMAP] Error parsing message UID %s: %s", uid, parse_error)
                                 continue
                 
                 except Exception as batch_error:
+                    if is_connection_error(batch_error):
+                        raise
                     log(f"[IMAP] Error fetching batch: {str(batch_error)}")
                     continue
         
         except Exception as e:
+            if is_connection_error(e):
+                raise
             log(f"[IMAP] ERROR in _fetch_imap_messages: {str(e)}")
         
         return messages_list
     
-    def _parse_imap_message(self, imap, uid, message_data, criteria):
+    def _parse_imap_message(self, imap, uid, message_data, criteria, folder=None):
         """Parse IMAP message data into a message-like object"""
         try:
             envelope = message_data.get(b'ENVELOPE')
@@ -1252,7 +2101,7 @@ class EmailSearchEngine:
             size = message_data.get(b'RFC822.SIZE', 0)
             
             if not envelope:
-                log(f"[IMAP] No envelope data for UID {uid}")
+                imap_log.debug("[IMAP] No envelope data for UID %s", uid)
                 return None
             
             # Parse envelope data
@@ -1294,13 +2143,15 @@ class EmailSearchEngine:
                 has_attachments=has_attachments,
                 imap_connection=imap,
                 size=size,
-                bodystructure=bodystructure
+                bodystructure=bodystructure,
+                folder=folder if self._imap_pool is not None else None,
+                connection_pool=self._imap_pool
             )
             
             return message_obj
             
         except Exception as e:
-            log(f"[IMAP] ERROR parsing message UID {uid}: {str(e)}")
+            imap_log.error("[IMAP] ERROR parsing message UID %s: %s", uid, e)
             return None
     
     def _decode_imap_header(self, header_value):
@@ -1339,40 +2190,12 @@ class EmailSearchEngine:
             return False
         
         try:
-            # Recursively check bodystructure for attachments
-            return self._has_attachments_recursive(bodystructure)
+            # Same part map (and attachment rules) as used for listing attachments
+            return any(part.is_attachment for part in parse_bodystructure(bodystructure))
         except Exception as e:
             log(f"[IMAP] Error checking attachments: {str(e)}")
             return False
     
-    def _has_attachments_recursive(self, structure):
-        """Recursively check bodystructure for attachments"""
-        if not structure:
-            return False
-        
-        try:
-            # If it's a tuple/list and has multiple parts
-            if isinstance(structure, (tuple, list)) and len(structure) > 0:
-                # Check if this is a multipart structure
-                if isinstance(structure[0], (tuple, list)):
-                    # Multipart - check each part
-                    for part in structure:
-                        if isinstance(part, (tuple, list)) and self._has_attachments_recursive(part):
-                            return True
-                else:
-                    # Single part - check disposition
-                    if len(structure) > 8:
-                        disposition = structure[8] if len(structure) > 8 else None
-                        if disposition and isinstance(disposition, (tuple, list)) and len(disposition) > 0:
-                            if disposition[0] and b'attachment' in disposition[0].lower():
-                                return True
-            
-            return False
-            
-        except Exception as e:
-            log(f"[IMAP] Error in recursive attachment check: {str(e)}")
-            return False
-    
     def _get_pop3_messages(self, connection, criteria, per_page=500):
         """Retrieve messages from POP3 connection"""
         try:
@@ -1400,19 +2223,9 @@ class EmailSearchEngine:
                     break
                 
                 try:
-                    # Get message headers
-                    response = pop3.top(i, 0)  # Get headers only
-                    if response:
-                        header_lines = response[1]
-                        header_text = b'\n'.join(header_lines).decode('utf-8', errors='ignore')
-                        
-                        # Parse headers
-                        msg = email.message_from_string(header_text)
-                        
-                        # Create message object
-                        message_obj = self._create_pop3_message_object(i, msg, pop3)
-                        if message_obj:
-                            messages_list.append(message_obj)
+                    message_obj = self._fetch_pop3_message_headers(pop3, i)
+                    if message_obj:
+                        messages_list.append(message_obj)
                 
                 except Exception as msg_error:
                     log(f"[POP3] Error retrieving message {i}: {str(msg_error)}")
@@ -1425,6 +2238,21 @@ class EmailSearchEngine:
             log(f"[POP3] ERROR in _get_pop3_messages: {str(e)}")
             return []
     
+    def _fetch_pop3_message_headers(self, pop3, message_num):
+        """Fetch headers of one POP3 message and build a message object"""
+        response = pop3.top(message_num, 0)  # Get headers only
+        if not response:
+            return None
+        
+        header_lines = response[1]
+        header_text = b'\n'.join(header_lines).decode('utf-8', errors='ignore')
+        
+        # Parse headers
+        msg = email.message_from_string(header_text)
+        
+        # Create message object
+        return self._create_pop3_message_object(message_num, msg, pop3)
+    
     def _create_pop3_message_object(self, message_num, email_msg, pop3_connection):
         """Create a message-like object from POP3 email"""
         try:
@@ -1472,12 +2300,83 @@ class IMAPSender:
         return self.name if self.name else self.email_address
 
 
+class IndexedExchangeMessage:
+    """Exchange message rebuilt from the local index, the full item is fetched on demand"""
+    def __init__(self, row, sender, account):
+        self.id = row['msg_key']
+        self.changekey = row['changekey']
+        self.subject = row['subject']
+        self.sender = sender
+        self.datetime_received = row['datetime_received']
+        self.is_read = row['is_read']
+        self.has_attachments = row['has_attachments']
+        self._account = account
+        self._item = None
+    
+    def _load_item(self):
+        """Fetch the full item from Exchange once"""
+        if self._item is None:
+            log(f"[MESSAGE INDEX] Pobieranie pełnej wiadomości Exchange: {self.subject[:50] if self.subject else 'Bez tematu'}")
+            items = [item for item in self._account.fetch(ids=[(self.id, self.changekey)]) if not isinstance(item, Exception)]
+            if not items:
+                raise AttributeError(f"Wiadomość {self.id} nie jest już dostępna na serwerze")
+            self._item = items[0]
+        return self._item
+    
+    @property
+    def attachments(self):
+        """Lazy load attachments when requested"""
+        if not self.has_attachments:
+            return []
+        return self._load_item().attachments or []
+    
+    def __getattr__(self, name):
+        # Any field not kept in the index (body, recipients...) comes from the full item
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self._load_item(), name)
+
+
+class IndexedPDFMessage:
+    """Message rebuilt from the PDF full-text index, attachments are the locally saved PDF copies"""
+    def __init__(self, occurrence):
+        self.id = occurrence['message_key']
+        self.subject = occurrence['subject']
+        sender_name = occurrence['sender_name'] or occurrence['sender_email']
+        self.sender = IMAPSender(sender_name, occurrence['sender_email']) if sender_name else None
+        self.datetime_received = occurrence['datetime_received']
+        self.is_read = True
+        self.has_attachments = True
+        self._attachment_paths = []
+        self._attachments = None
+    
+    def add_attachment(self, name, saved_path):
+        """Register a matching PDF attachment of this message"""
+        self._attachment_paths.append((name, saved_path))
+    
+    @property
+    def attachments(self):
+        """Load saved PDF copies (attachments that were never auto-saved are not available offline)"""
+        if self._attachments is None:
+            self._attachments = []
+            for name, saved_path in self._attachment_paths:
+                if saved_path and os.path.exists(saved_path):
+                    try:
+                        with open(saved_path, 'rb') as f:
+                            self._attachments.append(IMAPAttachment(name, f.read()))
+                    except Exception as e:
+                        log(f"[PDF INDEX] Nie można wczytać zapisanego PDF {saved_path}: {e}")
+        return self._attachments
+
+
 class IMAPMessage:
     """Message object for IMAP messages, compatible with Exchange Message interface"""
     def __init__(self, uid, subject, sender, datetime_received, is_read, has_attachments, 
-                 imap_connection, size=0, bodystructure=None):
-        self.id = uid
+                 imap_connection, size=0, bodystructure=None, folder=None, connection_pool=None):
+        # UIDs are only unique within a folder
+        self.id = f"{folder}:{uid}" if folder else uid
         self.uid = uid
+        self.folder = folder
         self.subject = subject
         self.sender = sender
         self.datetime_received = datetime_received
@@ -1487,7 +2386,11 @@ class IMAPMessage:
         self.has_attachments = has_attachments
         self.size = size
         self.bodystructure = bodystructure
+        # Prefix of attachment server keys (account, folder, UIDVALIDITY), set by the search engine
+        self.server_key_prefix = None
         self._imap_connection = imap_connection
+        self._connection_pool = connection_pool
+        self._parts = None
         self._attachments = None
         self._body = None
     
@@ -1505,16 +2408,91 @@ class IMAPMessage:
             self._body = self._load_body()
         return self._body
     
+    def get_parts(self):
+        """
+        Part map of the message built from BODYSTRUCTURE
+        
+        Returns:
+            list: MessagePart objects, empty when the structure is not available
+        """
+        if self._parts is None:
+            bodystructure = self.bodystructure
+            if not bodystructure:
+                try:
+                    response = self._fetch(['BODYSTRUCTURE'])
+                    bodystructure = response.get(self.uid, {}).get(b'BODYSTRUCTURE')
+                except Exception as e:
+                    log(f"[IMAP] Error fetching BODYSTRUCTURE for UID {self.uid}: {str(e)}")
+            self._parts = parse_bodystructure(bodystructure)
+        return self._parts
+    
+    def _fetch(self, items):
+        """FETCH on a pooled session with the message folder selected, or on the shared connection"""
+        if self._connection_pool is not None and self.folder:
+            return self._connection_pool.run(lambda imap: imap.fetch([self.uid], items), self.folder)
+        return self._imap_connection.fetch([self.uid], items)
+    
+    def _fetch_parts(self, parts):
+        """
+        Fetch several parts with a single BODY.PEEK command (does not set \\Seen)
+        
+        Returns:
+            dict: Decoded content per section
+        """
+        response = self._fetch([f'BODY.PEEK[{part.section}]' for part in parts])
+        data = response.get(self.uid, {})
+        return {
+            part.section: decode_part_payload(data.get(f'BODY[{part.section}]'.encode()), part.encoding)
+            for part in parts
+        }
+    
+    def load_attachment_contents(self, attachments):
+        """Download content of several attachments of this message with one FETCH"""
+        parts_by_section = {part.section: part for part in self.get_parts()}
+        pending = [a for a in attachments if a.section in parts_by_section and not a.is_loaded]
+        if not pending:
+            return
+        
+        contents = self._fetch_parts([parts_by_section[a.section] for a in pending])
+        for attachment in pending:
+            attachment.content = contents.get(attachment.section)
+    
+    def _load_attachment_content(self, attachment):
+        """Loader of a single attachment part"""
+        self.load_attachment_contents([attachment])
+        return attachment.content if attachment.is_loaded else None
+    
     def _load_attachments(self):
-        """Load attachments from IMAP message"""
+        """Load attachment list from the part map, content is fetched per part on first access"""
         try:
             if not self.has_attachments:
                 return []
             
+            parts = self.get_parts()
+            if not parts:
+                return self._load_attachments_from_message()
+            
+            attachments = []
+            for part in parts:
+                if part.is_attachment:
+                    server_key = f"{self.server_key_prefix}:{self.uid}:{part.section}" if self.server_key_prefix else None
+                    attachments.append(IMAPAttachment(
+                        part.filename, size=part.size, content_type=part.content_type, section=part.section,
+                        loader=self._load_attachment_content, server_key=server_key
+                    ))
+            return attachments
+            
+        except Exception as e:
+            log(f"[IMAP] Error loading attachments for UID {self.uid}: {str(e)}")
+            return []
+    
+    def _load_attachments_from_message(self):
+        """Load attachments by fetching the full message (no usable BODYSTRUCTURE)"""
+        try:
             log(f"[IMAP] Loading attachments for message UID {self.uid}")
             
             # Fetch the full message to get attachments
-            response = self._imap_connection.fetch([self.uid], ['RFC822'])
+            response = self._fetch(['RFC822'])
             if self.uid not in response:
                 log(f"[IMAP] Could not fetch full message for UID {self.uid}")
                 return []
@@ -1541,12 +2519,38 @@ class IMAPMessage:
             return []
     
     def _load_body(self):
-        """Load message body from IMAP message"""
+        """Load message body from the text parts of the part map"""
+        try:
+            text_parts = [part for part in self.get_parts() if part.is_body_text]
+            body_parts = ([part for part in text_parts if part.content_type == 'text/plain']
+                          or [part for part in text_parts if part.content_type == 'text/html'])
+            if not body_parts:
+                return self._load_body_from_message()
+            
+            contents = self._fetch_parts(body_parts)
+            body_text = ""
+            for part in body_parts:
+                payload = contents.get(part.section)
+                if payload:
+                    try:
+                        body_text += payload.decode(part.charset or 'utf-8', errors='ignore')
+                    except LookupError:
+                        body_text += payload.decode('utf-8', errors='ignore')
+                    body_text += "\n"
+            
+            return body_text.strip()
+            
+        except Exception as e:
+            log(f"[IMAP] Error loading body for UID {self.uid}: {str(e)}")
+            return ""
+    
+    def _load_body_from_message(self):
+        """Load message body from the raw message (no usable BODYSTRUCTURE)"""
         try:
             log(f"[IMAP] Loading body for message UID {self.uid}")
             
             # Try to get just the text parts first
-            response = self._imap_connection.fetch([self.uid], ['BODY[TEXT]'])
+            response = self._fetch(['BODY[TEXT]'])
             if self.uid in response and b'BODY[TEXT]' in response[self.uid]:
                 body_text = response[self.uid][b'BODY[TEXT]']
                 if isinstance(body_text, bytes):
@@ -1554,7 +2558,7 @@ class IMAPMessage:
                 return str(body_text)
             
             # Fallback to full message
-            response = self._imap_connection.fetch([self.uid], ['RFC822'])
+            response = self._fetch(['RFC822'])
             if self.uid not in response:
                 return ""
             
@@ -1582,11 +2586,31 @@ class IMAPMessage:
 
 
 class IMAPAttachment:
-    """Attachment object for IMAP messages"""
-    def __init__(self, name, content):
+    """Attachment object for IMAP messages, content of a part is fetched on first access"""
+    def __init__(self, name, content=None, size=None, content_type=None, section=None, loader=None, server_key=None):
         self.name = name
-        self.content = content
-        self.size = len(content) if content else 0
+        self.size = size if size is not None else (len(content) if content else 0)
+        self.content_type = content_type
+        self.section = section
+        self.server_key = server_key
+        self._content = content
+        self._loader = loader
+    
+    @property
+    def is_loaded(self):
+        """Content is already available locally"""
+        return self._content is not None
+    
+    @property
+    def content(self):
+        """Attachment content, fetched from the server when first needed"""
+        if self._content is None and self._loader is not None:
+            self._content = self._loader(self)
+        return self._content
+    
+    @content.setter
+    def content(self, value):
+        self._content = value
     
     def __str__(self):
         return f"IMAPAttachment(name={self.name}, size={self.size})"
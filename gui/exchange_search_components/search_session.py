@@ -0,0 +1,185 @@
+"""
+Search session (result cursor) for paginated mail search results
+Keeps the ordered, filtered messages of the last search so that page
+changes can be served without querying the server again
+"""
+import heapq
+import threading
+import time
+from datetime import datetime, timezone
+from tools.logger import log
+
+
+# Criteria keys that do not influence which messages are found
+SESSION_IGNORED_CRITERIA = {'pdf_save_directory'}
+
+# Sort key of messages without a received date
+OLDEST_DATE = datetime.min.replace(tzinfo=timezone.utc)
+
+# Minimum seconds between two result_batch events of a running search
+RESULT_BATCH_INTERVAL = 0.5
+
+
+class SearchSession:
+    """Cursor over the ordered, filtered messages of one completed search"""
+
+    def __init__(self, criteria, fetch_per_page, messages, message_to_folder_map=None, pdf_matches=None):
+        """
+        Initialize search session
+
+        Args:
+            criteria: Search criteria used to build this session
+            fetch_per_page: per_page value used while fetching (limits messages per folder)
+            messages: Filtered messages ordered newest first
+            message_to_folder_map: Map of message key to display folder path
+            pdf_matches: Map of message key to PDF match info
+        """
+        self.criteria = self._normalize_criteria(criteria)
+        self.fetch_per_page = fetch_per_page
+        self.messages = list(messages)
+        self.message_to_folder_map = message_to_folder_map or {}
+        self.pdf_matches = pdf_matches or {}
+        self.created_at = datetime.now()
+
+    @staticmethod
+    def _normalize_criteria(criteria):
+        """Drop criteria that do not change the result set"""
+        return {k: v for k, v in (criteria or {}).items() if k not in SESSION_IGNORED_CRITERIA}
+
+    @staticmethod
+    def get_message_key(message):
+        """Key used to look up per-message data (message ID or object identity)"""
+        return getattr(message, 'id', id(message))
+
+    @property
+    def total_count(self):
+        """Number of messages available in this session"""
+        return len(self.messages)
+
+    def total_pages(self, per_page):
+        """Number of pages for the given page size"""
+        if per_page <= 0:
+            return 0
+        return (self.total_count + per_page - 1) // per_page
+
+    def can_serve(self, criteria, per_page):
+        """
+        Check if this session can answer a page request without a new search
+
+        The session was built with a per-folder limit of fetch_per_page, so a
+        larger page size needs a fresh search to be complete.
+        """
+        if self._normalize_criteria(criteria) != self.criteria:
+            log("[SEARCH SESSION] Kryteria zmienione - wymagane nowe wyszukiwanie")
+            return False
+        if per_page > self.fetch_per_page:
+            log(f"[SEARCH SESSION] Rozmiar strony {per_page} większy niż limit sesji {self.fetch_per_page} - wymagane nowe wyszukiwanie")
+            return False
+        return True
+
+    def get_page(self, page, per_page):
+        """Return messages visible on the given page"""
+        start_idx = page * per_page
+        end_idx = start_idx + per_page
+        return self.messages[start_idx:end_idx]
+
+    def get_folder_path(self, message):
+        """Display folder path recorded for a message"""
+        return self.message_to_folder_map.get(self.get_message_key(message), 'Skrzynka odbiorcza')
+
+    def get_pdf_match_info(self, message):
+        """PDF match info recorded for a message, if any"""
+        return self.pdf_matches.get(self.get_message_key(message))
+
+
+class NewestMessageTracker:
+    """
+    Receive dates of the newest messages collected from all folders of a search
+
+    Folders are read newest first, so once a folder yields a message older
+    than all of the newest `limit` messages already collected, nothing more
+    from that folder can reach the result and its iteration can stop.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self._dates = []
+        self._lock = threading.Lock()
+
+    def offer(self, received):
+        """
+        Record a message date
+
+        Returns:
+            bool: False if the message is older than the newest `limit` messages
+        """
+        received = received or OLDEST_DATE
+        with self._lock:
+            if len(self._dates) < self.limit:
+                heapq.heappush(self._dates, received)
+                return True
+            if received < self._dates[0]:
+                return False
+            heapq.heapreplace(self._dates, received)
+            return True
+
+
+class ResultStream:
+    """
+    Send matches of a running search to the UI as soon as they are confirmed
+
+    Rows are collected and sent as 'result_batch' events with running totals,
+    at most every RESULT_BATCH_INTERVAL seconds. Only the first `limit` rows
+    (one page) are sent, later matches only raise the totals.
+    """
+
+    def __init__(self, emit, limit, interval=None):
+        """
+        Args:
+            emit: Result callback of the search engine
+            limit: Maximum number of rows sent during the search
+            interval: Minimum seconds between two batches
+        """
+        self.emit = emit
+        self.limit = limit
+        self.interval = RESULT_BATCH_INTERVAL if interval is None else interval
+        self.found_count = 0
+        self.sent_count = 0
+        self.checked_count = 0
+        self.total_to_check = 0
+        self._pending = []
+        self._reported_count = 0
+        self._last_emit = 0.0
+
+    def add(self, row):
+        """Record a confirmed match"""
+        self.found_count += 1
+        if self.sent_count + len(self._pending) < self.limit:
+            self._pending.append(row)
+        self.flush()
+
+    def set_progress(self, checked_count, total_to_check):
+        """Record how many candidate messages have been checked so far"""
+        self.checked_count = checked_count
+        self.total_to_check = total_to_check
+        self.flush()
+
+    def flush(self, force=False):
+        """Send collected rows if the batch interval passed (or always when forced)"""
+        now = time.monotonic()
+        if not force and now - self._last_emit < self.interval:
+            return
+        if not force and self.found_count == self._reported_count:
+            return
+
+        rows, self._pending = self._pending, []
+        self.sent_count += len(rows)
+        self._reported_count = self.found_count
+        self._last_emit = now
+        self.emit({
+            'type': 'result_batch',
+            'results': rows,
+            'found_count': self.found_count,
+            'checked_count': self.checked_count,
+            'total_to_check': self.total_to_check
+        })
@@ -85,6 +85,14 @@ class MailSearchUI:
             )
             show_history_button.grid(row=0, column=2, padx=5, sticky="w")
         
+        # Checkbox for answering PDF search from the local full-text index only
+        index_only_checkbox = ttk.Checkbutton(
+            pdf_history_frame, 
+            text="Tylko indeks PDF (bez serwera)", 
+            variable=self.vars['pdf_index_only']
+        )
+        index_only_checkbox.grid(row=0, column=3, padx=5, sticky="w")
+        
         ttk.Label(self.parent, text="Nadawca maila:").grid(row=6, column=0, sticky="e", padx=5, pady=5)
         ttk.Entry(self.parent, textvariable=self.vars['sender'], width=40).grid(row=6, column=1, padx=5, pady=5)
         
@@ -92,6 +100,7 @@ class MailSearchUI:
         ttk.Checkbutton(self.parent, text="Tylko nieprzeczytane", variable=self.vars['unread_only']).grid(row=7, column=0, sticky="w", padx=5, pady=5)
         ttk.Checkbutton(self.parent, text="Tylko z załącznikami", variable=self.vars['attachments_required']).grid(row=7, column=1, sticky="w", padx=5, pady=5)
         ttk.Checkbutton(self.parent, text="Tylko bez załączników", variable=self.vars['no_attachments_only']).grid(row=7, column=2, sticky="w", padx=5, pady=5)
+        ttk.Checkbutton(self.parent, text="Szukaj w lokalnym indeksie", variable=self.vars['use_message_index']).grid(row=7, column=3, sticky="w", padx=5, pady=5)
         
         # Attachment filters
         ttk.Label(self.parent, text="Nazwa załącznika (zawiera):").grid(row=8, column=0, sticky="e", padx=5, pady=5)
@@ -110,6 +110,7 @@ class FolderBrowser(ttk.Frame):
         self.mail_connection = mail_connection
         self.folders = []
         self.folder_map = {}  # Map folder names to FolderInfo objects
+        self.shown_account = None  # Email of the account whose folders are in the tree
         
         self.create_widgets()
     
@@ -204,6 +205,13 @@ class FolderBrowser(ttk.Frame):
                 foreground='black'
             ))
             
+            # Show the folders from the previous refresh while the server is asked
+            cached_data = self.mail_connection.get_cached_folders_with_details(account_config)
+            if cached_data and self.shown_account != account_email:
+                cached_info = self._build_folder_infos(cached_data)
+                self.shown_account = account_email
+                self.after_idle(lambda: self._update_tree(cached_info))
+            
             # Use the enhanced method to get folders with details
             folders_data = self.mail_connection.get_folders_with_details(account_config)
             
@@ -211,25 +219,18 @@ class FolderBrowser(ttk.Frame):
                 self.after_idle(lambda: self._show_error("Nie można pobrać listy folderów z serwera"))
                 return
             
-            folders_info = []
+            # Unchanged mailbox (same folders, same UIDVALIDITY/UIDNEXT) - keep the tree as it is
+            if (cached_data and not any(f.get('changed') for f in folders_data)
+                    and {f['name'] for f in cached_data} == {f['name'] for f in folders_data}):
+                log("[FOLDER BROWSER] Folders unchanged since last refresh")
+                self.after_idle(lambda: self.status_label.config(
+                    text=f"Znaleziono {len(folders_data)} folderów (bez zmian)",
+                    foreground='green'
+                ))
+                return
             
-            for folder_data in folders_data:
-                try:
-                    # Create FolderInfo object from the data
-                    folder_info = FolderInfo(
-                        name=folder_data['name'],
-                        display_name=folder_data['name'],
-                        message_count=folder_data['message_count'],
-                        size=folder_data['size'],
-                        flags=folder_data['flags'],
-                        delimiter=folder_data['delimiter']
-                    )
-                    
-                    folders_info.append(folder_info)
-                    
-                except Exception as folder_error:
-                    log(f"[FOLDER BROWSER] Error processing folder data: {folder_error}")
-                    continue
+            folders_info = self._build_folder_infos(folders_data)
+            self.shown_account = account_email
             
             # Update UI
             self.after_idle(lambda: self._update_tree(folders_info))
@@ -244,6 +245,30 @@ class FolderBrowser(ttk.Frame):
         finally:
             self.after_idle(lambda: self.refresh_button.config(state='normal'))
     
+    def _build_folder_infos(self, folders_data):
+        """Create FolderInfo objects from folder details of the mail connection"""
+        folders_info = []
+        
+        for folder_data in folders_data:
+            try:
+                # Create FolderInfo object from the data
+                folder_info = FolderInfo(
+                    name=folder_data['name'],
+                    display_name=folder_data['name'],
+                    message_count=folder_data['message_count'],
+                    size=folder_data['size'],
+                    flags=folder_data['flags'],
+                    delimiter=folder_data['delimiter']
+                )
+                
+                folders_info.append(folder_info)
+                
+            except Exception as folder_error:
+                log(f"[FOLDER BROWSER] Error processing folder data: {folder_error}")
+                continue
+        
+        return folders_info
+    
     def _update_tree(self, folders_info):
         """Update tree view with folder information using proper hierarchy"""
         # Clear existing items
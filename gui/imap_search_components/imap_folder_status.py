@@ -0,0 +1,89 @@
+"""
+IMAP folder status without SELECT
+Message counts and UIDVALIDITY/UIDNEXT of all folders are read with STATUS
+only: inside the LIST command when the server supports LIST-STATUS (RFC 5819),
+otherwise as STATUS commands pipelined on the connection. UIDVALIDITY/UIDNEXT
+tell which folders changed since the previous refresh
+"""
+from tools.logger import log
+
+
+# STATUS items requested per folder
+STATUS_ITEMS = ('MESSAGES', 'UIDNEXT', 'UIDVALIDITY')
+
+
+def _status_items_arg():
+    return '(' + ' '.join(STATUS_ITEMS) + ')'
+
+
+def _parse_status_responses(imap, responses):
+    """Turn untagged STATUS responses into {folder name: {b'MESSAGES': ..., ...}}"""
+    from imapclient.response_parser import parse_response
+    from imapclient.imap_utf7 import decode as decode_utf7
+
+    statuses = {}
+    for response in responses:
+        data = [response] if isinstance(response, bytes) else list(response)
+        mailbox, items = parse_response(data)
+        if isinstance(mailbox, bytes):
+            mailbox = decode_utf7(mailbox) if imap.folder_encode else mailbox.decode('utf-8')
+        statuses[mailbox] = dict(zip(items[::2], items[1::2]))
+    return statuses
+
+
+def list_folders_with_status(imap):
+    """
+    LIST all folders with their STATUS in a single command (LIST-STATUS, RFC 5819)
+
+    Returns:
+        tuple: (folder list as from list_folders(), statuses per folder name)
+    """
+    conn = imap._imap
+    typ, data = conn._simple_command('LIST', '""', '"*"', 'RETURN', f'(STATUS {_status_items_arg()})')
+    if typ != 'OK':
+        raise RuntimeError(f"LIST-STATUS nie powiodło się: {data}")
+
+    _, list_data = conn._untagged_response(typ, data, 'LIST')
+    statuses = _parse_status_responses(imap, conn.untagged_responses.pop('STATUS', []))
+    return imap._proc_folder_list(list_data), statuses
+
+
+def pipelined_folder_status(imap, folder_names):
+    """Send STATUS for all folders at once, then read the responses"""
+    conn = imap._imap
+    conn.untagged_responses.pop('STATUS', None)
+    tags = [conn._command('STATUS', imap._normalise_folder(name), _status_items_arg()) for name in folder_names]
+    for tag in tags:
+        # A NO for one folder (e.g. removed meanwhile) only leaves that folder without status
+        conn._command_complete('STATUS', tag)
+    return _parse_status_responses(imap, conn.untagged_responses.pop('STATUS', []))
+
+
+def get_folder_statuses(imap, folder_names):
+    """
+    STATUS of several folders without selecting them
+
+    Pipelined when the client allows it, otherwise one STATUS per folder.
+
+    Returns:
+        dict: Status items per folder name (folders without status are missing)
+    """
+    try:
+        return pipelined_folder_status(imap, folder_names)
+    except Exception as e:
+        log(f"[MAIL CONNECTION] Pipelined STATUS unavailable ({e}), sending STATUS per folder")
+
+    statuses = {}
+    for folder_name in folder_names:
+        try:
+            statuses[folder_name] = imap.folder_status(folder_name, list(STATUS_ITEMS))
+        except Exception as status_error:
+            log(f"[MAIL CONNECTION] Could not get status for folder '{folder_name}': {status_error}")
+    return statuses
+
+
+def folder_changed(previous, current):
+    """Check if a folder changed between two refreshes (new, re-created or with new/removed messages)"""
+    if previous is None:
+        return True
+    return any(previous.get(key) != current.get(key) for key in ('uidvalidity', 'uidnext', 'message_count'))
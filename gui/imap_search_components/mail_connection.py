@@ -7,6 +7,8 @@ import poplib
 import email
 from exchangelib import Credentials, Account, Configuration, DELEGATE
 from tools.logger import log
+from .imap_connection_pool import IMAPConnectionPool, DEFAULT_IMAP_POOL_SIZE
+from .imap_folder_status import list_folders_with_status, get_folder_statuses, folder_changed
 
 # Handle optional tkinter import
 try:
@@ -150,8 +152,11 @@ class MailConnection:
     def __init__(self):
         self.account = None
         self.imap_connection = None
+        self.imap_pool = None
         self.pop3_connection = None
         self.current_account_config = None
+        # Folder details per IMAP account, kept across reconnects for change detection
+        self.imap_folder_details = {}
     
     def load_mail_config(self):
         """Load mail configuration from config file with fallback to legacy"""
@@ -259,21 +264,54 @@ class MailConnection:
         """
         Get detailed folder information including SPECIAL-USE flags, message counts, and sizes.
         Uses XLIST if available (Gmail), otherwise LIST with SPECIAL-USE extension.
+        Message counts come from STATUS only (no SELECT): returned by LIST itself when
+        the server supports LIST-STATUS, otherwise pipelined for all folders.
         
-        Returns: List of dicts with keys: name, flags, delimiter, message_count, size
+        Returns: List of dicts with keys: name, flags, delimiter, message_count, size,
+                 uidvalidity, uidnext, changed (compared with the previous call)
         """
         log("[MAIL CONNECTION] Getting folders with details (SPECIAL-USE/XLIST)")
         
+        # Borrow a pooled session of the current account (the shared client may be
+        # in use by a running search), open a temporary one for other accounts
+        pool = self.get_imap_pool() if self.current_account_config is account_config else None
         imap = None
         try:
-            # Get IMAP connection
-            imap = self._get_imap_connection(account_config)
+            if pool is not None:
+                return pool.run(lambda session: self._read_folders_with_details(session, account_config))
+            
+            imap = self._create_imap_client(account_config)
             if not imap:
                 log("[MAIL CONNECTION] ERROR: Could not establish IMAP connection")
                 return []
+            return self._read_folders_with_details(imap, account_config)
             
-            folders_info = []
-            
+        except Exception as e:
+            log(f"[MAIL CONNECTION] ERROR getting folders with details: {str(e)}")
+            return []
+        finally:
+            # Close temporary connection if needed
+            if imap:
+                try:
+                    imap.logout()
+                    log("[MAIL CONNECTION] Closed temporary IMAP connection")
+                except:
+                    pass
+    
+    def _read_folders_with_details(self, imap, account_config):
+        """LIST the folders with their STATUS on the given session and remember them per account"""
+        folders_info = []
+        statuses = None
+        
+        if imap.has_capability('LIST-STATUS'):
+            try:
+                folder_list, statuses = list_folders_with_status(imap)
+                log(f"[MAIL CONNECTION] LIST-STATUS successful, got {len(folder_list)} folders")
+            except Exception as list_status_error:
+                log(f"[MAIL CONNECTION] LIST-STATUS failed ({list_status_error}), using LIST and STATUS")
+                statuses = None
+        
+        if statuses is None:
             # Try XLIST first (Gmail extended LIST)
             try:
                 log("[MAIL CONNECTION] Attempting XLIST command (Gmail)")
@@ -284,90 +322,90 @@ class MailConnection:
                 # Fallback to regular LIST
                 log("[MAIL CONNECTION] XLIST not supported, using regular LIST")
                 folder_list = imap.list_folders()
-            
-            # List of folder name patterns to exclude (non-mail or technical folders)
-            EXCLUDED_FOLDER_PATTERNS = [
-                'Calendar',
-                'Contacts', 
-                'Notes',
-                'Tasks',
-                'Journal',
-            ]
-            
-            for folder_data in folder_list:
-                if folder_data:
-                    try:
-                        flags, delimiter, folder_name = folder_data
-                        
-                        # Decode folder name if bytes
-                        if isinstance(folder_name, bytes):
-                            folder_name = folder_name.decode('utf-8')
-                        
-                        folder_name = folder_name.strip()
-                        
-                        if not folder_name:
-                            continue
-                        
-                        # Skip folders with \Noselect flag (hierarchy-only folders)
-                        if flags and b'\\Noselect' in flags:
-                            log(f"[MAIL CONNECTION] Skipping \\Noselect folder: {folder_name}")
-                            continue
-                        
-                        # Skip technical/non-mail folders
-                        if any(pattern in folder_name for pattern in EXCLUDED_FOLDER_PATTERNS):
-                            log(f"[MAIL CONNECTION] Skipping technical folder: {folder_name}")
-                            continue
-                        
-                        # Get folder status (message count)
-                        message_count = 0
-                        estimated_size = 0
-                        
-                        try:
-                            # Select folder to get accurate count
-                            imap.select_folder(folder_name, readonly=True)
-                            
-                            # Get folder status
-                            status = imap.folder_status(folder_name, ['MESSAGES', 'UIDVALIDITY'])
-                            message_count = status.get(b'MESSAGES', 0)
-                            
-                            # Approximate size (IMAP doesn't provide total size easily)
-                            # Estimate: 150KB per message on average (accounts for attachments)
-                            # This is a reasonable middle ground between plain text (~10KB) and 
-                            # messages with attachments (~300KB+)
-                            estimated_size = message_count * 150 * 1024
-                            
-                        except Exception as status_error:
-                            log(f"[MAIL CONNECTION] Could not get status for folder '{folder_name}': {status_error}")
-                        
-                        folder_info = {
-                            'name': folder_name,
-                            'flags': flags,
-                            'delimiter': delimiter if delimiter else '/',
-                            'message_count': message_count,
-                            'size': estimated_size
-                        }
-                        
-                        folders_info.append(folder_info)
-                        log(f"[MAIL CONNECTION] Folder '{folder_name}': {message_count} messages, flags={flags}")
-                        
-                    except Exception as folder_error:
-                        log(f"[MAIL CONNECTION] Error processing folder: {folder_error}")
+        
+        # List of folder name patterns to exclude (non-mail or technical folders)
+        EXCLUDED_FOLDER_PATTERNS = [
+            'Calendar',
+            'Contacts', 
+            'Notes',
+            'Tasks',
+            'Journal',
+        ]
+        
+        selectable_folders = []
+        for folder_data in folder_list:
+            if folder_data:
+                try:
+                    flags, delimiter, folder_name = folder_data
+                    
+                    # Decode folder name if bytes
+                    if isinstance(folder_name, bytes):
+                        folder_name = folder_name.decode('utf-8')
+                    
+                    folder_name = folder_name.strip()
+                    
+                    if not folder_name:
+                        continue
+                    
+                    # Skip folders with \Noselect flag (hierarchy-only folders)
+                    if flags and b'\\Noselect' in flags:
+                        log(f"[MAIL CONNECTION] Skipping \\Noselect folder: {folder_name}")
                         continue
+                    
+                    # Skip technical/non-mail folders
+                    if any(pattern in folder_name for pattern in EXCLUDED_FOLDER_PATTERNS):
+                        log(f"[MAIL CONNECTION] Skipping technical folder: {folder_name}")
+                        continue
+                    
+                    selectable_folders.append((folder_name, flags, delimiter))
+                    
+                except Exception as folder_error:
+                    log(f"[MAIL CONNECTION] Error processing folder: {folder_error}")
+                    continue
+        
+        if statuses is None:
+            statuses = get_folder_statuses(imap, [name for name, _, _ in selectable_folders])
+        
+        cache_key = self._get_folder_cache_key(account_config)
+        previous_folders = {f['name']: f for f in self.imap_folder_details.get(cache_key, [])}
+        
+        for folder_name, flags, delimiter in selectable_folders:
+            status = statuses.get(folder_name, {})
+            message_count = status.get(b'MESSAGES', 0)
             
-            log(f"[MAIL CONNECTION] Successfully retrieved {len(folders_info)} folders with details")
-            return folders_info
+            # Approximate size (IMAP doesn't provide total size easily)
+            # Estimate: 150KB per message on average (accounts for attachments)
+            # This is a reasonable middle ground between plain text (~10KB) and 
+            # messages with attachments (~300KB+)
+            estimated_size = message_count * 150 * 1024
             
-        except Exception as e:
-            log(f"[MAIL CONNECTION] ERROR getting folders with details: {str(e)}")
-            return []
-        finally:
-            # Close temporary connection if needed
-            if imap and imap != self.imap_connection:
-                try:
-                    imap.logout()
-                    log("[MAIL CONNECTION] Closed temporary IMAP connection")
-                except:
-                    pass
+            folder_info = {
+                'name': folder_name,
+                'flags': flags,
+                'delimiter': delimiter if delimiter else '/',
+                'message_count': message_count,
+                'size': estimated_size,
+                'uidvalidity': status.get(b'UIDVALIDITY'),
+                'uidnext': status.get(b'UIDNEXT')
+            }
+            folder_info['changed'] = folder_changed(previous_folders.get(folder_name), folder_info)
+            
+            folders_info.append(folder_info)
+            log(f"[MAIL CONNECTION] Folder '{folder_name}': {message_count} messages, flags={flags}")
+        
+        self.imap_folder_details[cache_key] = folders_info
+        changed_count = sum(1 for f in folders_info if f['changed'])
+        log(f"[MAIL CONNECTION] Successfully retrieved {len(folders_info)} folders with details "
+            f"({changed_count} new or changed)")
+        return folders_info
+    
+    def get_cached_folders_with_details(self, account_config):
+        """Folder details from the last get_folders_with_details() call for the account (no server access)"""
+        return self.imap_folder_details.get(self._get_folder_cache_key(account_config))
+    
+    @staticmethod
+    def _get_folder_cache_key(account_config):
+        return (account_config.get("imap_server", "").lower(), account_config.get("username", "").lower())
     
     def load_exchange_mail_config(self):
         """Load Exchange mail configuration from exchange_mail_config.json"""
@@ -490,6 +528,12 @@ class MailConnection:
     
     def _get_imap_connection(self, account_config):
         """Get IMAP connection"""
+        imap = self._create_imap_client(account_config)
+        self.imap_connection = imap
+        return imap
+    
+    def _create_imap_client(self, account_config):
+        """Open and log in a new IMAP session"""
         imap = IMAPClient(
             account_config.get("imap_server", ""),
             port=account_config.get("imap_port", 993),
@@ -500,9 +544,26 @@ class MailConnection:
             account_config.get("username", ""),
             account_config.get("password", "")
         )
-        self.imap_connection = imap
         return imap
     
+    def get_imap_pool(self):
+        """
+        Pool of IMAP sessions of the current account, used for parallel folder
+        searches and lazy attachment/body loads (created on first use)
+        
+        Returns:
+            IMAPConnectionPool: Pool, or None for non-IMAP accounts
+        """
+        config = self.current_account_config
+        if not config or config.get("type") != "imap_smtp":
+            return None
+        
+        if self.imap_pool is None:
+            pool_size = config.get("imap_pool_size", DEFAULT_IMAP_POOL_SIZE)
+            self.imap_pool = IMAPConnectionPool(lambda: self._create_imap_client(config), max_size=pool_size)
+            log(f"[MAIL CONNECTION] Utworzono pulę połączeń IMAP (maks. {self.imap_pool.max_size})")
+        return self.imap_pool
+    
     def _get_pop3_connection(self, account_config):
         """Get POP3 connection"""
         if account_config.get("pop3_ssl", True):
@@ -611,10 +672,7 @@ class MailConnection:
             # For POP3, this is simplified as POP3 only has one mailbox
             return ["INBOX"]
         elif account_type == "imap_smtp":
-            log("[MAIL CONNECTION] IMAP simplified folder handling")
-            # For IMAP, this is simplified as most IMAP operations work on single folders
-            folder = self.get_folder_by_path(account, folder_path)
-            return [folder] if folder else []
+            return self._get_imap_folder_with_subfolders(account, folder_path, excluded_folders)
         else:
             log(f"[MAIL CONNECTION] WARNING: Unknown account type '{account_type}', defaulting to IMAP behavior")
             folder = self.get_folder_by_path(account, folder_path)
@@ -641,6 +699,52 @@ class MailConnection:
             messagebox.showerror("Błąd folderów", f"Błąd pobierania listy folderów: {str(e)}")
             return []
     
+    def _get_imap_folder_with_subfolders(self, imap, folder_path, excluded_folders=None):
+        """
+        Get IMAP folder and all its subfolders
+        
+        The whole hierarchy comes from a single LIST. A folder is excluded (with
+        its subfolders) when its full name or any level of its path is on the
+        excluded list; \\Noselect containers are skipped.
+        """
+        base_folder = self.get_folder_by_path(imap, folder_path)
+        if not base_folder:
+            return []
+        
+        excluded_names = set()
+        if excluded_folders:
+            if isinstance(excluded_folders, str):
+                excluded_names = set(f.strip() for f in excluded_folders.split(',') if f.strip())
+            elif isinstance(excluded_folders, (list, set)):
+                excluded_names = set(excluded_folders)
+        
+        try:
+            folder_list = imap.list_folders()
+        except Exception as e:
+            log(f"[MAIL CONNECTION] ERROR listing IMAP folders: {str(e)} - searching only '{base_folder}'")
+            return [base_folder]
+        
+        subfolders = []
+        for flags, delimiter, name in folder_list:
+            if isinstance(name, bytes):
+                name = name.decode('utf-8')
+            if isinstance(delimiter, bytes):
+                delimiter = delimiter.decode('utf-8')
+            if not delimiter or not name.startswith(base_folder + delimiter):
+                continue
+            if any(flag.lower() == b'\\noselect' for flag in flags if isinstance(flag, bytes)):
+                continue
+            
+            relative_parts = name[len(base_folder) + len(delimiter):].split(delimiter)
+            if name in excluded_names or any(part in excluded_names for part in relative_parts):
+                log(f"Wykluczono folder: {name}")
+                continue
+            subfolders.append(name)
+        
+        folders = [base_folder] + sorted(subfolders)
+        log(f"[MAIL CONNECTION] IMAP folder search: {len(folders)} folders under '{base_folder}'")
+        return folders
+    
     def _get_all_subfolders_recursive(self, folder, excluded_folder_names=None):
         """Recursively get all subfolders of a given folder"""
         if excluded_folder_names is None:
@@ -863,6 +967,10 @@ class MailConnection:
                 pass
             self.imap_connection = None
         
+        if self.imap_pool:
+            self.imap_pool.close()
+            self.imap_pool = None
+        
         if self.pop3_connection:
             try:
                 self.pop3_connection.quit()
@@ -1,204 +1,398 @@
 """
 PDF search history management module
 Handles tracking of previously searched PDFs and skipping logic
+History is kept in an SQLite database (WAL) with batched commits; the old
+JSON history file is imported into it once and left in place for the legacy
+mail search tab, which still reads and writes it
 """
 import json
 import os
-import hashlib
+import sqlite3
+import threading
 from datetime import datetime
-from tools.logger import log
+from tools.logger import log, get_logger
+from .attachment_identity import compute_content_hash
+
+
+history_log = get_logger('history')
+
+# Pending history changes are committed after this many writes...
+HISTORY_COMMIT_BATCH = 200
+
+# ...or by a timer this long after the first pending change (seconds), so the
+# write transaction is never held open until the end of a search
+HISTORY_COMMIT_INTERVAL = 2.0
+
+# Seconds a writer waits for the database lock held by another connection
+# (both search tabs write the same history database)
+HISTORY_BUSY_TIMEOUT = 30
 
 
 class PDFHistoryManager:
     """Manages PDF search history to track and skip previously searched PDFs"""
-    
-    def __init__(self, history_file_path="pdf_search_history.json"):
+
+    def __init__(self, history_file_path="pdf_search_history.json", db_file_path=None):
         """
         Initialize PDF history manager
-        
+
         Args:
-            history_file_path: Path to the JSON file storing search history
+            history_file_path: Path to the legacy JSON history file (migrated once)
+            db_file_path: Path to the SQLite history database (default: next to the JSON file, .db)
         """
         self.history_file_path = history_file_path
-        self.history_data = self._load_history()
-        
-    def _load_history(self):
-        """Load history data from JSON file"""
+        self.db_file_path = db_file_path or os.path.splitext(history_file_path)[0] + ".db"
+        directory = os.path.dirname(self.db_file_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._pending_writes = 0
+        self._commit_timer = None
+        self._conn = sqlite3.connect(self.db_file_path, timeout=HISTORY_BUSY_TIMEOUT, check_same_thread=False)
+        self._conn.execute(f"PRAGMA busy_timeout={int(HISTORY_BUSY_TIMEOUT * 1000)}")
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+        self._migrate_json_history()
+
+    def _create_schema(self):
+        """Create history tables"""
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS searched_pdfs (
+                    pdf_id TEXT PRIMARY KEY,
+                    attachment_name TEXT,
+                    first_searched TEXT,
+                    sender_email TEXT
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS pdf_searches (
+                    pdf_id TEXT NOT NULL,
+                    search_key TEXT NOT NULL,
+                    last_searched TEXT,
+                    found_matches INTEGER,
+                    match_count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (pdf_id, search_key)
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS skipped_pdfs (
+                    pdf_id TEXT PRIMARY KEY,
+                    attachment_name TEXT,
+                    first_skipped TEXT,
+                    last_skipped TEXT,
+                    skip_count INTEGER NOT NULL DEFAULT 0,
+                    last_search_text TEXT
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS attachment_ids (
+                    server_key TEXT PRIMARY KEY,
+                    content_hash TEXT NOT NULL,
+                    last_seen TEXT
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS history_meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                )
+            """)
+
+    def _migrate_json_history(self):
+        """
+        Import the legacy JSON history file once
+
+        The file is left in place: the legacy mail search tab keeps using it.
+        """
+        if not os.path.exists(self.history_file_path):
+            return
+
         try:
-            if os.path.exists(self.history_file_path):
+            with self._lock:
+                migrated = self._conn.execute(
+                    "SELECT value FROM history_meta WHERE key = 'json_migrated'"
+                ).fetchone()
+                if migrated:
+                    return
+
                 with open(self.history_file_path, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    log(f"[PDF HISTORY] Załadowano historię z {len(data.get('searched_pdfs', {}))} PDF-ami")
-                    return data
-            else:
-                log("[PDF HISTORY] Brak pliku historii, tworzę nową historię")
-                return {"searched_pdfs": {}, "skipped_pdfs": {}}
+
+                with self._conn:
+                    searched_pdfs = data.get("searched_pdfs", {})
+                    for pdf_id, pdf_data in searched_pdfs.items():
+                        self._conn.execute(
+                            "INSERT OR IGNORE INTO searched_pdfs VALUES (?, ?, ?, ?)",
+                            (pdf_id, pdf_data.get("attachment_name"), pdf_data.get("first_searched"),
+                             pdf_data.get("sender_email"))
+                        )
+                        self._conn.executemany(
+                            "INSERT OR REPLACE INTO pdf_searches VALUES (?, ?, ?, ?, ?)",
+                            [
+                                (pdf_id, search_key, search.get("last_searched"),
+                                 None if search.get("found_matches") is None else int(bool(search["found_matches"])),
+                                 search.get("match_count", 0))
+                                for search_key, search in pdf_data.get("searches", {}).items()
+                            ]
+                        )
+
+                    for pdf_id, pdf_data in data.get("skipped_pdfs", {}).items():
+                        self._conn.execute(
+                            "INSERT OR IGNORE INTO skipped_pdfs VALUES (?, ?, ?, ?, ?, ?)",
+                            (pdf_id, pdf_data.get("attachment_name"), pdf_data.get("first_skipped"),
+                             pdf_data.get("last_skipped"), pdf_data.get("skip_count", 0),
+                             pdf_data.get("last_search_text"))
+                        )
+
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO history_meta VALUES ('json_migrated', ?)",
+                        (datetime.now().isoformat(),)
+                    )
+
+            log(f"[PDF HISTORY] Skopiowano historię {len(searched_pdfs)} PDF-ów z {self.history_file_path} do {self.db_file_path}")
         except Exception as e:
-            log(f"[PDF HISTORY] Błąd ładowania historii: {e}, tworzę nową")
-            return {"searched_pdfs": {}, "skipped_pdfs": {}}
-    
-    def _save_history(self):
-        """Save history data to JSON file"""
+            log(f"[PDF HISTORY] Błąd migracji historii z JSON: {e}")
+
+    def _record_write(self):
+        """Count a pending change, commit the batch when it is full or start the commit timer"""
+        self._pending_writes += 1
+        if self._pending_writes >= HISTORY_COMMIT_BATCH:
+            self._commit()
+        elif self._commit_timer is None:
+            self._commit_timer = threading.Timer(HISTORY_COMMIT_INTERVAL, self.flush)
+            self._commit_timer.daemon = True
+            self._commit_timer.start()
+
+    def _commit(self):
+        """Commit pending history changes, caller holds _lock"""
+        if self._commit_timer is not None:
+            self._commit_timer.cancel()
+            self._commit_timer = None
+        if self._pending_writes:
+            self._conn.commit()
+            self._pending_writes = 0
+
+    def flush(self):
+        """Commit pending history changes (called at the end of a search)"""
         try:
-            with open(self.history_file_path, 'w', encoding='utf-8') as f:
-                json.dump(self.history_data, f, ensure_ascii=False, indent=2)
-            log(f"[PDF HISTORY] Zapisano historię do {self.history_file_path}")
+            with self._lock:
+                pending = self._pending_writes
+                self._commit()
+            if pending:
+                history_log.debug("[PDF HISTORY] Zapisano %d zmian historii", pending)
         except Exception as e:
             log(f"[PDF HISTORY] Błąd zapisywania historii: {e}")
-    
-    def _get_pdf_identifier(self, attachment_name, attachment_content):
+
+    def close(self):
+        """Commit pending changes and close the database connection"""
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def get_content_hash(self, server_key):
+        """
+        Get the remembered content hash of an attachment by its server key
+
+        Args:
+            server_key: Server-side attachment key (see attachment_identity)
+
+        Returns:
+            str: SHA-256 of the attachment content, or None when not known
+        """
+        if not server_key:
+            return None
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT content_hash FROM attachment_ids WHERE server_key = ?", (server_key,)
+                ).fetchone()
+            return row[0] if row else None
+        except Exception as e:
+            log(f"[PDF HISTORY] Błąd odczytu identyfikatora załącznika: {e}")
+            return None
+
+    def remember_content_hash(self, server_key, content_hash):
+        """
+        Store the content hash of an attachment together with its server key
+
+        Args:
+            server_key: Server-side attachment key (see attachment_identity)
+            content_hash: SHA-256 of the attachment content
+        """
+        if not server_key or not content_hash:
+            return
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO attachment_ids VALUES (?, ?, ?)",
+                    (server_key, content_hash, datetime.now().isoformat())
+                )
+                self._record_write()
+        except Exception as e:
+            log(f"[PDF HISTORY] Błąd zapisu identyfikatora załącznika: {e}")
+
+    def _get_pdf_identifier(self, attachment_name, attachment_content, content_hash=None):
         """
         Generate unique identifier for PDF attachment
-        
+
         Args:
             attachment_name: Name of the PDF attachment
             attachment_content: Binary content of the PDF
-            
+            content_hash: Already computed SHA-256 of the content (content is not hashed again)
+
         Returns:
             str: Unique identifier for the PDF
         """
         try:
             # Create hash of PDF content for reliable identification
-            content_hash = hashlib.sha256(attachment_content).hexdigest()[:16]
+            if content_hash is None:
+                content_hash = compute_content_hash(attachment_content)
             # Use both name and content hash for identification
-            pdf_id = f"{attachment_name}_{content_hash}"
+            pdf_id = f"{attachment_name}_{content_hash[:16]}"
             return pdf_id
         except Exception as e:
             log(f"[PDF HISTORY] Błąd generowania identyfikatora PDF: {e}")
             # Fallback to just attachment name
             return attachment_name
-    
-    def is_pdf_already_searched(self, attachment_name, attachment_content, search_text):
+
+    def is_pdf_already_searched(self, attachment_name, attachment_content, search_text, content_hash=None):
         """
         Check if PDF has already been searched with this search text
-        
+
         Args:
             attachment_name: Name of the PDF attachment
-            attachment_content: Binary content of the PDF
+            attachment_content: Binary content of the PDF (may be None when content_hash is given)
             search_text: Text being searched for
-            
+            content_hash: Already computed SHA-256 of the content
+
         Returns:
             bool: True if PDF was already searched with this text
         """
         try:
-            pdf_id = self._get_pdf_identifier(attachment_name, attachment_content)
-            searched_pdfs = self.history_data.get("searched_pdfs", {})
-            
-            if pdf_id in searched_pdfs:
-                pdf_searches = searched_pdfs[pdf_id].get("searches", {})
-                search_key = search_text.lower().strip()
-                
-                if search_key in pdf_searches:
-                    last_searched = pdf_searches[search_key].get("last_searched")
-                    log(f"[PDF HISTORY] PDF {attachment_name} już przeszukany dla '{search_text}' dnia {last_searched}")
-                    return True
-            
+            pdf_id = self._get_pdf_identifier(attachment_name, attachment_content, content_hash)
+            search_key = search_text.lower().strip()
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT last_searched FROM pdf_searches WHERE pdf_id = ? AND search_key = ?",
+                    (pdf_id, search_key)
+                ).fetchone()
+
+            if row:
+                history_log.debug("[PDF HISTORY] PDF %s już przeszukany dla '%s' dnia %s", attachment_name, search_text, row[0])
+                return True
+
             return False
         except Exception as e:
             log(f"[PDF HISTORY] Błąd sprawdzania historii PDF: {e}")
             return False  # In case of error, don't skip
-    
-    def mark_pdf_as_searched(self, attachment_name, attachment_content, search_text, found_matches=None, sender_email=None):
+
+    def mark_pdf_as_searched(self, attachment_name, attachment_content, search_text, found_matches=None, sender_email=None,
+                             content_hash=None):
         """
         Mark PDF as searched with given search text
-        
+
         Args:
             attachment_name: Name of the PDF attachment
             attachment_content: Binary content of the PDF
             search_text: Text that was searched for
             found_matches: List of matches found (optional)
             sender_email: Email address of the sender (optional)
+            content_hash: Already computed SHA-256 of the content (optional)
         """
         try:
-            pdf_id = self._get_pdf_identifier(attachment_name, attachment_content)
-            searched_pdfs = self.history_data.setdefault("searched_pdfs", {})
-            
-            if pdf_id not in searched_pdfs:
-                searched_pdfs[pdf_id] = {
-                    "attachment_name": attachment_name,
-                    "first_searched": datetime.now().isoformat(),
-                    "sender_email": sender_email,
-                    "searches": {}
-                }
-            else:
-                # Update sender email if provided and not already set
-                if sender_email and not searched_pdfs[pdf_id].get("sender_email"):
-                    searched_pdfs[pdf_id]["sender_email"] = sender_email
-            
+            pdf_id = self._get_pdf_identifier(attachment_name, attachment_content, content_hash)
+            now = datetime.now().isoformat()
             search_key = search_text.lower().strip()
-            searched_pdfs[pdf_id]["searches"][search_key] = {
-                "last_searched": datetime.now().isoformat(),
-                "found_matches": bool(found_matches) if found_matches is not None else None,
-                "match_count": len(found_matches) if found_matches else 0
-            }
-            
-            self._save_history()
-            log(f"[PDF HISTORY] Oznaczono PDF {attachment_name} jako przeszukany dla '{search_text}'")
-            
+
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO searched_pdfs VALUES (?, ?, ?, ?)",
+                    (pdf_id, attachment_name, now, sender_email)
+                )
+                if sender_email:
+                    # Update sender email if provided and not already set
+                    self._conn.execute(
+                        "UPDATE searched_pdfs SET sender_email = ? WHERE pdf_id = ? AND sender_email IS NULL",
+                        (sender_email, pdf_id)
+                    )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO pdf_searches VALUES (?, ?, ?, ?, ?)",
+                    (pdf_id, search_key, now,
+                     int(bool(found_matches)) if found_matches is not None else None,
+                     len(found_matches) if found_matches else 0)
+                )
+                self._record_write()
+
+            history_log.debug("[PDF HISTORY] Oznaczono PDF %s jako przeszukany dla '%s'", attachment_name, search_text)
+
         except Exception as e:
             log(f"[PDF HISTORY] Błąd oznaczania PDF jako przeszukany: {e}")
-    
-    def mark_pdf_as_skipped(self, attachment_name, attachment_content, search_text):
+
+    def mark_pdf_as_skipped(self, attachment_name, attachment_content, search_text, content_hash=None):
         """
         Mark PDF as skipped during search
-        
+
         Args:
             attachment_name: Name of the PDF attachment
             attachment_content: Binary content of the PDF
             search_text: Text being searched for
+            content_hash: Already computed SHA-256 of the content (optional)
         """
         try:
-            pdf_id = self._get_pdf_identifier(attachment_name, attachment_content)
-            skipped_pdfs = self.history_data.setdefault("skipped_pdfs", {})
-            
-            if pdf_id not in skipped_pdfs:
-                skipped_pdfs[pdf_id] = {
-                    "attachment_name": attachment_name,
-                    "first_skipped": datetime.now().isoformat(),
-                    "skip_count": 0
-                }
-            
-            skipped_pdfs[pdf_id]["skip_count"] += 1
-            skipped_pdfs[pdf_id]["last_skipped"] = datetime.now().isoformat()
-            skipped_pdfs[pdf_id]["last_search_text"] = search_text
-            
-            self._save_history()
-            log(f"[PDF HISTORY] Oznaczono PDF {attachment_name} jako pominięty (łącznie: {skipped_pdfs[pdf_id]['skip_count']} razy)")
-            
+            pdf_id = self._get_pdf_identifier(attachment_name, attachment_content, content_hash)
+            now = datetime.now().isoformat()
+
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR IGNORE INTO skipped_pdfs (pdf_id, attachment_name, first_skipped, skip_count) VALUES (?, ?, ?, 0)",
+                    (pdf_id, attachment_name, now)
+                )
+                self._conn.execute(
+                    "UPDATE skipped_pdfs SET skip_count = skip_count + 1, last_skipped = ?, last_search_text = ? WHERE pdf_id = ?",
+                    (now, search_text, pdf_id)
+                )
+                self._record_write()
+
+            history_log.debug("[PDF HISTORY] Oznaczono PDF %s jako pominięty", attachment_name)
+
         except Exception as e:
             log(f"[PDF HISTORY] Błąd oznaczania PDF jako pominięty: {e}")
-    
+
     def clear_history(self):
         """Clear all search history"""
         try:
-            self.history_data = {"searched_pdfs": {}, "skipped_pdfs": {}}
-            self._save_history()
+            with self._lock:
+                with self._conn:
+                    self._conn.execute("DELETE FROM pdf_searches")
+                    self._conn.execute("DELETE FROM searched_pdfs")
+                    self._conn.execute("DELETE FROM skipped_pdfs")
+                self._pending_writes = 0
+                if self._commit_timer is not None:
+                    self._commit_timer.cancel()
+                    self._commit_timer = None
             log("[PDF HISTORY] Historia PDF została wyczyszczona")
             return True
         except Exception as e:
             log(f"[PDF HISTORY] Błąd czyszczenia historii: {e}")
             return False
-    
+
     def get_history_stats(self):
         """
         Get statistics about search history
-        
+
         Returns:
             dict: Statistics about searched and skipped PDFs
         """
         try:
-            searched_count = len(self.history_data.get("searched_pdfs", {}))
-            skipped_count = len(self.history_data.get("skipped_pdfs", {}))
-            
-            total_searches = 0
-            total_skips = 0
-            
-            for pdf_data in self.history_data.get("searched_pdfs", {}).values():
-                total_searches += len(pdf_data.get("searches", {}))
-            
-            for pdf_data in self.history_data.get("skipped_pdfs", {}).values():
-                total_skips += pdf_data.get("skip_count", 0)
-            
+            with self._lock:
+                searched_count = self._conn.execute("SELECT COUNT(*) FROM searched_pdfs").fetchone()[0]
+                total_searches = self._conn.execute("SELECT COUNT(*) FROM pdf_searches").fetchone()[0]
+                skipped_count, total_skips = self._conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(skip_count), 0) FROM skipped_pdfs"
+                ).fetchone()
+
             return {
                 "unique_searched_pdfs": searched_count,
                 "unique_skipped_pdfs": skipped_count,
@@ -208,23 +402,24 @@ class PDFHistoryManager:
         except Exception as e:
             log(f"[PDF HISTORY] Błąd pobierania statystyk: {e}")
             return {"unique_searched_pdfs": 0, "unique_skipped_pdfs": 0, "total_searches": 0, "total_skips": 0}
-    
+
     def get_history_for_display(self):
         """
         Get history data formatted for display in table
-        
+
         Returns:
             list: List of dictionaries with keys: filename, date, sender_email
         """
         try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT attachment_name, first_searched, sender_email FROM searched_pdfs"
+                ).fetchall()
+
             history_entries = []
-            searched_pdfs = self.history_data.get("searched_pdfs", {})
-            
-            for pdf_data in searched_pdfs.values():
-                filename = pdf_data.get("attachment_name", "Nieznany")
-                first_searched = pdf_data.get("first_searched", "")
-                sender_email = pdf_data.get("sender_email", "Brak danych")
-                
+            for attachment_name, first_searched, sender_email in rows:
+                filename = attachment_name or "Nieznany"
+
                 # Format date for display
                 try:
                     if first_searched:
@@ -235,18 +430,18 @@ class PDFHistoryManager:
                         formatted_date = "Brak danych"
                 except Exception:
                     formatted_date = first_searched
-                
+
                 history_entries.append({
                     "filename": filename,
                     "date": formatted_date,
-                    "sender_email": sender_email
+                    "sender_email": sender_email if sender_email is not None else "Brak danych"
                 })
-            
+
             # Sort by date (newest first)
             history_entries.sort(key=lambda x: x["date"], reverse=True)
-            
+
             return history_entries
-            
+
         except Exception as e:
             log(f"[PDF HISTORY] Błąd pobierania historii do wyświetlenia: {e}")
-            return []
\ No newline at end of file
+            return []
@@ -4,7 +4,7 @@ PDF text extraction and search functionality for mail search
 import io
 import os
 import tempfile
-from tools.logger import log
+from tools.logger import log, get_logger
 
 # Import poppler utilities for automatic path detection
 try:
@@ -60,6 +60,8 @@ except ImportError as e:
     HAVE_PDFPLUMBER = False
     log(f"pdfplumber not available: {e}")
 
+# Per-attachment and per-page diagnostics are logged at DEBUG level
+pdf_log = get_logger('pdf')
 
 class PDFProcessor:
     """Handles PDF text extraction and search operations"""
@@ -102,7 +104,7 @@ class PDFProcessor:
         if not search_text_lower:
             return {'found': False, 'matches': [], 'method': 'empty_search'}
         
-        log(f"Wyszukiwanie '{search_text}' w załączniku PDF: {attachment_name}")
+        pdf_log.debug("Wyszukiwanie '%s' w załączniku PDF: %s", search_text, attachment_name)
         
         try:
             # First try text extraction (faster) if available
@@ -117,7 +119,7 @@ class PDFProcessor:
                 return result
                 
         except Exception as e:
-            log(f"Error searching PDF {attachment_name}: {str(e)}")
+            pdf_log.error("Error searching PDF %s: %s", attachment_name, e)
             return {'found': False, 'matches': [], 'method': 'error', 'error': str(e)}
         
         return {'found': False, 'matches': [], 'method': 'not_found'}
@@ -128,7 +130,7 @@ class PDFProcessor:
             return {'found': False, 'matches': [], 'method': 'pdfplumber_not_available'}
             
         try:
-            log(f"Próba ekstrakcji tekstu z PDF: {attachment_name}")
+            pdf_log.debug("Próba ekstrakcji tekstu z PDF: %s", attachment_name)
             
             # Use pdfplumber to extract text
             with io.BytesIO(pdf_content) as pdf_stream:
@@ -150,12 +152,12 @@ class PDFProcessor:
                             log(f"Tekst znaleziony w PDF {attachment_name} przez ekstrakcję tekstu")
                             return {'found': True, 'matches': matches, 'method': 'text_extraction'}
                         else:
-                            log(f"Tekst nie znaleziony w PDF {attachment_name} przez ekstrakcję tekstu")
+                            pdf_log.debug("Tekst nie znaleziony w PDF %s przez ekstrakcję tekstu", attachment_name)
                     else:
-                        log(f"Brak tekstu do ekstrakcji z PDF {attachment_name}")
+                        pdf_log.debug("Brak tekstu do ekstrakcji z PDF %s", attachment_name)
                         
         except Exception as e:
-            log(f"Error during text extraction from {attachment_name}: {str(e)}")
+            pdf_log.error("Error during text extraction from %s: %s", attachment_name, e)
         
         return {'found': False, 'matches': [], 'method': 'text_extraction_failed'}
     
@@ -165,7 +167,7 @@ class PDFProcessor:
             return {'found': False, 'matches': [], 'method': 'ocr_not_available'}
             
         try:
-            log(f"Próba OCR z PDF: {attachment_name}")
+            pdf_log.debug("Próba OCR z PDF: %s", attachment_name)
             
             # Convert PDF to images
             images = convert_from_bytes(pdf_content, dpi=200, poppler_path=POPPLER_PATH)
@@ -175,12 +177,12 @@ class PDFProcessor:
             # Use advanced OCR engine manager if available, otherwise fallback to pytesseract
             if HAVE_ADVANCED_OCR:
                 try:
-                    log(f"Używam zaawansowanego OCR dla PDF {attachment_name}")
+                    pdf_log.debug("Używam zaawansowanego OCR dla PDF %s", attachment_name)
                     
                     # Progress callback for OCR
                     def progress_callback(processed, total):
                         if not self.search_cancelled:
-                            log(f"OCR PDF {attachment_name}: {processed + 1}/{total} stron")
+                            pdf_log.debug("OCR PDF %s: %d/%d stron", attachment_name, processed + 1, total)
                     
                     # Use batch OCR processing
                     ocr_results = ocr_manager.perform_ocr_batch(
@@ -193,13 +195,13 @@ class PDFProcessor:
                     all_ocr_text = "\n".join(filter(None, ocr_results))
                     
                 except Exception as e:
-                    log(f"Błąd zaawansowanego OCR, fallback do pytesseract: {e}")
+                    pdf_log.warning("Błąd zaawansowanego OCR, fallback do pytesseract: %s", e)
                     # Fallback to original method
                     for page_num, image in enumerate(images):
                         if self.search_cancelled:
                             break
                         
-                        log(f"OCR (fallback) strona {page_num + 1}/{len(images)} z PDF {attachment_name}")
+                        pdf_log.debug("OCR (fallback) strona %d/%d z PDF %s", page_num + 1, len(images), attachment_name)
                         page_text = pytesseract.image_to_string(image, lang='pol+eng')
                         if page_text:
                             all_ocr_text += page_text + "\n"
@@ -209,7 +211,7 @@ class PDFProcessor:
                     if self.search_cancelled:
                         break
                     
-                    log(f"OCR strona {page_num + 1}/{len(images)} z PDF {attachment_name}")
+                    pdf_log.debug("OCR strona %d/%d z PDF %s", page_num + 1, len(images), attachment_name)
                     
                     # Perform OCR
                     page_text = pytesseract.image_to_string(image, lang='pol+eng')
@@ -224,12 +226,12 @@ class PDFProcessor:
                     log(f"Tekst znaleziony w PDF {attachment_name} przez OCR")
                     return {'found': True, 'matches': matches, 'method': 'ocr'}
                 else:
-                    log(f"Tekst nie znaleziony w PDF {attachment_name} przez OCR")
+                    pdf_log.debug("Tekst nie znaleziony w PDF %s przez OCR", attachment_name)
             else:
-                log(f"Brak tekstu z OCR z PDF {attachment_name}")
+                pdf_log.debug("Brak tekstu z OCR z PDF %s", attachment_name)
                 
         except Exception as e:
-            log(f"Error during OCR from {attachment_name}: {str(e)}")
+            pdf_log.error("Error during OCR from %s: %s", attachment_name, e)
         
         return {'found': False, 'matches': [], 'method': 'ocr_failed'}
     
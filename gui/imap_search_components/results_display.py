@@ -6,19 +6,51 @@ from tkinter import ttk, messagebox
 import os
 import threading
 from .datetime_utils import IMAPDateHandler
+from .results_model import ResultListModel
+
+
+# Columns of the results list
+RESULT_COLUMNS = ("Date", "Folder", "Sender", "Subject", "Status", "Attachments", "PDFMatch")
+
+# Tree rows created per after() call while the visible window grows
+RENDER_CHUNK_SIZE = 50
+
+# Row height (pixels) used when the Treeview style doesn't define one
+DEFAULT_ROW_HEIGHT = 20
+
+# Rows scrolled per mouse wheel step
+WHEEL_SCROLL_ROWS = 3
+
+# Delay (ms) before the quick filter is applied while typing
+FILTER_DELAY_MS = 300
 
 
 class ResultsDisplay:
-    """Handles display of search results with interactive capabilities"""
+    """
+    Handles display of search results with interactive capabilities
+    
+    The results list is virtual: rows live in a ResultListModel and the tree
+    only holds one item per visible line, refilled from the model on scroll.
+    """
     
     def __init__(self, parent_frame):
         self.parent_frame = parent_frame
-        self.results_data = []
+        self.model = ResultListModel()
         self.current_page = 0
         self.per_page = 500
         self.total_pages = 0
         self.total_count = 0
         
+        # Virtual list state: first visible model row, tree items reused for the visible rows
+        self._view_start = 0
+        self._visible_rows = 15
+        self._slots = []
+        self._slot_rows = {}
+        self._selected_row = None
+        self._placeholder = None
+        self._render_job = None
+        self._filter_job = None
+        
         # Create temp directory in the main application folder
         self.temp_dir = os.path.join(os.getcwd(), 'temp')
         os.makedirs(self.temp_dir, exist_ok=True)
@@ -38,16 +70,20 @@ class ResultsDisplay:
         self.results_frame.grid_columnconfigure(0, weight=1)
         
         # Treeview with scrollbars - Added Folder column before Sender
-        self.tree = ttk.Treeview(self.results_frame, columns=("Date", "Folder", "Sender", "Subject", "Status", "Attachments", "PDFMatch"), show="headings", height=15)
-        
-        # Configure column headings and widths
-        self.tree.heading("Date", text="Data")
-        self.tree.heading("Folder", text="Folder")
-        self.tree.heading("Sender", text="Nadawca")
-        self.tree.heading("Subject", text="Temat")
-        self.tree.heading("Status", text="Status")
-        self.tree.heading("Attachments", text="Załączniki")
-        self.tree.heading("PDFMatch", text="Znaleziono w PDF")
+        self.tree = ttk.Treeview(self.results_frame, columns=RESULT_COLUMNS, show="headings", height=self._visible_rows)
+        
+        # Configure column headings and widths (clicking a heading sorts the results)
+        self.column_titles = {
+            "Date": "Data",
+            "Folder": "Folder",
+            "Sender": "Nadawca",
+            "Subject": "Temat",
+            "Status": "Status",
+            "Attachments": "Załączniki",
+            "PDFMatch": "Znaleziono w PDF",
+        }
+        for column, title in self.column_titles.items():
+            self.tree.heading(column, text=title, command=lambda c=column: self.sort_by_column(c))
         
         self.tree.column("Date", width=120, minwidth=100)
         self.tree.column("Folder", width=150, minwidth=120)
@@ -57,14 +93,14 @@ class ResultsDisplay:
         self.tree.column("Attachments", width=80, minwidth=70)
         self.tree.column("PDFMatch", width=150, minwidth=100)
         
-        # Scrollbars
+        # Scrollbars - the vertical one scrolls the model, not the tree items
         h_scrollbar = ttk.Scrollbar(self.results_frame, orient=tk.HORIZONTAL, command=self.tree.xview)
-        v_scrollbar = ttk.Scrollbar(self.results_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(xscrollcommand=h_scrollbar.set, yscrollcommand=v_scrollbar.set)
+        self.v_scrollbar = ttk.Scrollbar(self.results_frame, orient=tk.VERTICAL, command=self._on_vertical_scroll)
+        self.tree.configure(xscrollcommand=h_scrollbar.set)
         
         # Grid the treeview and scrollbars
         self.tree.grid(row=0, column=0, sticky="nsew")
-        v_scrollbar.grid(row=0, column=1, sticky="ns")
+        self.v_scrollbar.grid(row=0, column=1, sticky="ns")
         h_scrollbar.grid(row=1, column=0, sticky="ew")
         
         # Action buttons frame
@@ -78,6 +114,12 @@ class ResultsDisplay:
         self.download_attachments_btn = ttk.Button(self.action_frame, text="Pobierz załączniki", command=self.download_attachments)
         self.download_attachments_btn.pack(side="left", padx=5)
         
+        # Quick filter of the displayed results
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", lambda *args: self._schedule_filter())
+        ttk.Entry(self.action_frame, textvariable=self.filter_var, width=30).pack(side="right", padx=5)
+        ttk.Label(self.action_frame, text="Filtruj:").pack(side="right")
+        
         # Pagination frame
         self.pagination_frame = ttk.Frame(self.parent_frame)
         self.pagination_frame.grid(row=2, column=0, sticky="ew", padx=10, pady=5)
@@ -107,58 +149,230 @@ class ResultsDisplay:
         # Double-click binding
         self.tree.bind("<Double-1>", self.on_double_click)
         
+        # Virtual list: selection, resizing, wheel and keyboard scrolling work on model rows
+        self.tree.bind("<<TreeviewSelect>>", self._on_tree_select)
+        self.tree.bind("<Configure>", self._on_tree_resize)
+        self.tree.bind("<MouseWheel>", self._on_mouse_wheel)
+        self.tree.bind("<Button-4>", self._on_mouse_wheel)
+        self.tree.bind("<Button-5>", self._on_mouse_wheel)
+        self.tree.bind("<Up>", lambda e: self._move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self._move_selection(1))
+        self.tree.bind("<Prior>", lambda e: self._move_selection(-self._visible_rows))
+        self.tree.bind("<Next>", lambda e: self._move_selection(self._visible_rows))
+        self.tree.bind("<Home>", lambda e: self._move_selection(-len(self.model)))
+        self.tree.bind("<End>", lambda e: self._move_selection(len(self.model)))
+        
         # Initially disable buttons
         self.update_button_states()
     
+    @property
+    def results_data(self):
+        """Result rows in display order (after sorting and filtering)"""
+        return self.model.view
+    
     def display_results(self, results, page=0, per_page=500, total_count=0, total_pages=0):
         """Display search results in the tree"""
-        self.results_data = results
+        self.model.set_rows(results)
         self.current_page = page
         self.per_page = per_page
         self.total_pages = total_pages
         self.total_count = total_count
         
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        self._view_start = 0
+        self._selected_row = None
+        # Placeholder for no results
+        self._placeholder = None if results else "Nie znaleziono wiadomości spełniających kryteria"
+        self._render_window()
         
-        if not results:
-            # Insert placeholder item for no results - Updated for new column structure
-            self.tree.insert("", "end", values=("", "", "", "Nie znaleziono wiadomości spełniających kryteria", "", "", ""))
-            self.update_button_states()
-            self.update_pagination_display()
-            return
-        
-        # Insert results
-        for i, result in enumerate(results):
-            # Use IMAPDateHandler for consistent date formatting - no split() operations
-            date_str = IMAPDateHandler.format_display_date(result['datetime_received'])
-            folder_path = result.get('folder_path', 'Skrzynka odbiorcza')  # New folder column
-            sender = result['sender'][:35] if len(result['sender']) > 35 else result['sender']
-            subject = result['subject'][:55] if len(result['subject']) > 55 else result['subject']
-            status = "Nieprzeczyt." if not result['is_read'] else "Przeczytane"
-            attachments = f"{result['attachment_count']}" if result['has_attachments'] else "Brak"
-            
-            # PDF match information
-            pdf_match_info = result.get('pdf_match_info')
-            pdf_match_text = ""
-            if pdf_match_info and pdf_match_info.get('found'):
-                pdf_attachments = pdf_match_info.get('attachments', [])
-                if pdf_attachments:
-                    pdf_names = [att['name'] for att in pdf_attachments]
-                    pdf_match_text = f"Tak ({len(pdf_names)} PDF)"
-                else:
-                    pdf_match_text = "Tak"
-            
-            self.tree.insert("", "end", values=(date_str, folder_path, sender, subject, status, attachments, pdf_match_text))
+        self.update_button_states()
+        self.update_pagination_display()
+    
+    def _format_result_values(self, result):
+        """Column values of one result row"""
+        # Use IMAPDateHandler for consistent date formatting - no split() operations
+        date_str = IMAPDateHandler.format_display_date(result['datetime_received'])
+        folder_path = result.get('folder_path', 'Skrzynka odbiorcza')  # New folder column
+        sender = result['sender'][:35] if len(result['sender']) > 35 else result['sender']
+        subject = result['subject'][:55] if len(result['subject']) > 55 else result['subject']
+        status = "Nieprzeczyt." if not result['is_read'] else "Przeczytane"
+        if result['has_attachments']:
+            # Attachment metadata of streamed rows may not be loaded yet
+            attachments = f"{result['attachment_count']}" if result['attachment_count'] else "Tak"
+        else:
+            attachments = "Brak"
+        
+        # PDF match information
+        pdf_match_info = result.get('pdf_match_info')
+        pdf_match_text = ""
+        if pdf_match_info and pdf_match_info.get('found'):
+            pdf_attachments = pdf_match_info.get('attachments', [])
+            if pdf_attachments:
+                pdf_names = [att['name'] for att in pdf_attachments]
+                pdf_match_text = f"Tak ({len(pdf_names)} PDF)"
+                match_pages = pdf_attachments[0].get('pages')
+                if len(pdf_attachments) == 1 and match_pages:
+                    pdf_match_text = f"Tak (str. {', '.join(str(p) for p in match_pages[:5])})"
+            else:
+                pdf_match_text = "Tak"
         
+        return (date_str, folder_path, sender, subject, status, attachments, pdf_match_text)
+    
+    def append_results(self, results, found_count):
+        """
+        Add matches of a running search at their place in the current order
+        
+        Args:
+            results: New result rows (may be empty when only the totals changed)
+            found_count: Matches confirmed so far
+        """
+        for result in results:
+            position = self.model.insert_sorted(result)
+            # Rows added above a scrolled list don't move the rows being looked at
+            if position is not None and 0 < self._view_start and position < self._view_start:
+                self._view_start += 1
+        
+        if results:
+            self._placeholder = None
+            self._schedule_render()
+        
+        self.total_count = found_count
+        self.count_label.config(text=f"Znaleziono: {found_count} wyników (wyszukiwanie trwa...)")
         self.update_button_states()
+    
+    def sort_by_column(self, column):
+        """Sort the results model by a column (clicking again reverses the order)"""
+        self.model.sort(column)
+        arrow = " ▼" if self.model.sort_reverse else " ▲"
+        for name, title in self.column_titles.items():
+            self.tree.heading(name, text=title + (arrow if name == column else ""))
+        self._view_start = 0
+        self._schedule_render()
+    
+    def _schedule_filter(self):
+        if self._filter_job is not None:
+            self.tree.after_cancel(self._filter_job)
+        self._filter_job = self.tree.after(FILTER_DELAY_MS, self._apply_filter)
+    
+    def _apply_filter(self):
+        """Filter the results model by the quick filter text"""
+        self._filter_job = None
+        self.model.set_filter(self.filter_var.get())
+        self._view_start = 0
+        self._schedule_render()
         self.update_pagination_display()
     
+    def _schedule_render(self):
+        """Render the visible window once the event queue is idle (coalesces many updates)"""
+        if self._render_job is None:
+            self._render_job = self.tree.after_idle(self._render_window)
+    
+    def _render_window(self):
+        """Fill the tree items with the model rows visible at the current scroll position"""
+        if self._render_job is not None:
+            self.tree.after_cancel(self._render_job)
+            self._render_job = None
+        
+        total = len(self.model)
+        self._view_start = max(0, min(self._view_start, total - self._visible_rows))
+        rows = self.model.window(self._view_start, self._visible_rows)
+        if rows:
+            values = [self._format_result_values(row) for row in rows]
+        elif self._placeholder or self.model.rows:
+            message = self._placeholder or "Brak wyników pasujących do filtra"
+            values = [("", "", "", message, "", "", "")]
+        else:
+            values = []
+        
+        # Missing tree items are created in chunks, the rest on the next after() round
+        missing = len(values) - len(self._slots)
+        for _ in range(min(missing, RENDER_CHUNK_SIZE)):
+            self._slots.append(self.tree.insert("", "end"))
+        if missing > RENDER_CHUNK_SIZE:
+            self._render_job = self.tree.after(1, self._render_window)
+        while len(self._slots) > len(values):
+            self.tree.delete(self._slots.pop())
+        
+        self._slot_rows = {}
+        selected_item = None
+        for index, (item, item_values) in enumerate(zip(self._slots, values)):
+            self.tree.item(item, values=item_values)
+            if index < len(rows):
+                self._slot_rows[item] = rows[index]
+                if rows[index] is self._selected_row:
+                    selected_item = item
+        
+        # Keep the selection on the selected row, wherever it is now displayed
+        wanted_selection = (selected_item,) if selected_item else ()
+        if tuple(self.tree.selection()) != wanted_selection:
+            self.tree.selection_set(wanted_selection)
+        self.tree.yview_moveto(0)
+        
+        if total:
+            self.v_scrollbar.set(self._view_start / total, min(1.0, (self._view_start + self._visible_rows) / total))
+        else:
+            self.v_scrollbar.set(0.0, 1.0)
+    
+    def _scroll_to(self, start):
+        self._view_start = max(0, min(int(start), len(self.model) - self._visible_rows))
+        self._schedule_render()
+    
+    def _on_vertical_scroll(self, action, amount, unit=None):
+        """Scrollbar command (moveto/scroll) translated to model rows"""
+        if action == "moveto":
+            self._scroll_to(float(amount) * len(self.model))
+        elif action == "scroll":
+            step = self._visible_rows if unit == "pages" else 1
+            self._scroll_to(self._view_start + int(amount) * step)
+    
+    def _on_mouse_wheel(self, event):
+        if event.num == 4 or getattr(event, 'delta', 0) > 0:
+            self._scroll_to(self._view_start - WHEEL_SCROLL_ROWS)
+        else:
+            self._scroll_to(self._view_start + WHEEL_SCROLL_ROWS)
+        return "break"
+    
+    def _on_tree_resize(self, event):
+        """Adjust the number of tree items to the rows that fit in the widget"""
+        try:
+            row_height = int(ttk.Style().lookup("Treeview", "rowheight") or DEFAULT_ROW_HEIGHT)
+        except (tk.TclError, ValueError):
+            row_height = DEFAULT_ROW_HEIGHT
+        # One row height is taken by the headings
+        visible_rows = max(1, event.height // row_height - 1)
+        if visible_rows != self._visible_rows:
+            self._visible_rows = visible_rows
+            self._schedule_render()
+    
+    def _on_tree_select(self, event=None):
+        selected_items = self.tree.selection()
+        if selected_items:
+            self._selected_row = self._slot_rows.get(selected_items[0])
+        elif self._selected_row is not None and any(row is self._selected_row for row in self._slot_rows.values()):
+            # Deselected by the user (a row scrolled out of view stays selected)
+            self._selected_row = None
+        self.update_button_states()
+    
+    def _move_selection(self, delta):
+        """Keyboard navigation over model rows, scrolling the window when needed"""
+        total = len(self.model)
+        if not total:
+            return "break"
+        
+        index = self.model.index_of(self._selected_row) if self._selected_row is not None else None
+        index = self._view_start if index is None else max(0, min(total - 1, index + delta))
+        self._selected_row = self.model[index]
+        
+        if index < self._view_start:
+            self._view_start = index
+        elif index >= self._view_start + self._visible_rows:
+            self._view_start = index - self._visible_rows + 1
+        self._render_window()
+        self.update_button_states()
+        return "break"
+    
     def update_button_states(self):
         """Update button states based on selection and data"""
-        selected_items = self.tree.selection()
-        has_selection = len(selected_items) > 0 and len(self.results_data) > 0
+        has_selection = self._selected_row is not None
         
         # Enable/disable action buttons based on selection
         state = "normal" if has_selection else "disabled"
@@ -172,21 +386,14 @@ class ResultsDisplay:
     def update_pagination_display(self):
         """Update pagination display"""
         self.page_label.config(text=f"Strona {self.current_page + 1} z {max(1, self.total_pages)}")
-        self.count_label.config(text=f"Znaleziono: {self.total_count} wyników")
+        count_text = f"Znaleziono: {self.total_count} wyników"
+        if self.model.filter_text:
+            count_text += f" (po filtrze: {len(self.model)})"
+        self.count_label.config(text=count_text)
     
     def get_selected_result(self):
         """Get the selected result data"""
-        selected_items = self.tree.selection()
-        if not selected_items or not self.results_data:
-            return None
-        
-        # Get the index of the selected item
-        item = selected_items[0]
-        index = self.tree.index(item)
-        
-        if index < len(self.results_data):
-            return self.results_data[index]
-        return None
+        return self._selected_row
     
     def on_double_click(self, event):
         """Handle double-click to open email"""
@@ -491,20 +698,23 @@ class ResultsDisplay:
     
     def clear_results(self):
         """Clear all results"""
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        self.results_data = []
+        self.model.clear()
+        self._view_start = 0
+        self._selected_row = None
+        self._placeholder = None
         self.current_page = 0
         self.total_pages = 0
         self.total_count = 0
+        self._render_window()
         self.update_button_states()
         self.update_pagination_display()
     
     def show_status(self, message):
         """Show status message in results area"""
         self.clear_results()
-        self.tree.insert("", "end", values=("", "", message, "", ""))
+        self._placeholder = message
+        self._render_window()
         
     def bind_selection_change(self):
         """Bind selection change event"""
-        self.tree.bind("<<TreeviewSelect>>", lambda e: self.update_button_states())
\ No newline at end of file
+        self.tree.bind("<<TreeviewSelect>>", lambda e: self.update_button_states(), add="+")
\ No newline at end of file
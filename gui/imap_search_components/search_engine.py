@@ -8,13 +8,23 @@ import time
 import email
 import email.header
 import email.utils
+import mimetypes
 import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta, timezone
 from exchangelib import Q, Message
 from imapclient import IMAPClient
-from tools.logger import log
+from tools.logger import log, get_logger
 from .pdf_processor import PDFProcessor
 from .datetime_utils import IMAPDateHandler
+from .imap_bodystructure import parse_bodystructure, decode_part_payload
+from .imap_connection_pool import is_connection_error
+from .attachment_identity import compute_content_hash, get_attachment_server_key, get_imap_server_key_prefix
+
+# Per-message diagnostics go through subsystem loggers at DEBUG level
+pdf_log = get_logger('pdf')
+imap_log = get_logger('imap')
+history_log = get_logger('history')
 
 # Handle optional tkinter import
 try:
@@ -48,6 +58,9 @@ class EmailSearchEngine:
         # PDF history manager (will be set by external components)
         self.pdf_history_manager = None
         
+        # Pooled IMAP sessions of the current IMAP search (folders are fetched in parallel)
+        self._imap_pool = None
+        
         # Cache valid Message field names for validation
         self._valid_fields = self._get_valid_message_fields()
         log(f"Zainicjalizowano wyszukiwarkę z {len(self._valid_fields)} dostępnymi polami Message")
@@ -150,6 +163,8 @@ class EmailSearchEngine:
     
     def _threaded_search(self, connection, criteria, page=0, per_page=500):
         """Main search logic running in background thread"""
+        self._imap_pool = None
+        
         try:
             # Log search start
             search_params = {k: v for k, v in criteria.items() if k != 'password'}  # Exclude sensitive data
@@ -173,6 +188,8 @@ class EmailSearchEngine:
                 account = connection.account
             elif account_type in ["imap_smtp", "pop3_smtp"]:
                 account = connection.imap_connection or connection.pop3_connection
+                if account_type == "imap_smtp":
+                    self._imap_pool = connection.get_imap_pool()
             else:
                 log(f"BŁĄD: Nieznany typ konta: {account_type}")
                 raise Exception(f"Nieznany typ konta: {account_type}")
@@ -374,6 +391,12 @@ class EmailSearchEngine:
             folder_results = {}  # Track results per folder
             message_to_folder_map = {}  # Map message IDs to their folder paths (avoid modifying message objects)
             
+            # IMAP folders are fetched in parallel over pooled sessions, the loop below merges them
+            prefetched_imap = {}
+            if account_type == "imap_smtp" and self._imap_pool is not None and len(folders_to_search) > 1:
+                self.progress_callback(f"Równoległe przeszukiwanie {len(folders_to_search)} folderów IMAP...")
+                prefetched_imap = self._prefetch_imap_folders(folders_to_search, connection, criteria, per_page)
+            
             for idx, search_folder in enumerate(folders_to_search):
                 if self.search_cancelled:
                     log("Wyszukiwanie anulowane przez użytkownika")
@@ -381,7 +404,7 @@ class EmailSearchEngine:
                     return
                 
                 folder_name = self._get_safe_folder_name(search_folder)
-                log(f"--- Folder {idx + 1}/{len(folders_to_search)}: '{folder_name}' ---")
+                imap_log.debug("--- Folder %d/%d: '%s' ---", idx + 1, len(folders_to_search), folder_name)
                 
                 try:
                     self.progress_callback(f"Przeszukiwanie folderu {idx + 1}/{len(folders_to_search)}: {folder_name}")
@@ -394,42 +417,42 @@ class EmailSearchEngine:
                         # Exchange-specific folder operations
                         if combined_query:
                             try:
-                                log(f"Próba zapytania z filtrami dla folderu '{folder_name}'")
+                                imap_log.debug("Próba zapytania z filtrami dla folderu '%s'", folder_name)
                                 messages = search_folder.filter(combined_query).only(
                                     'subject', 'sender', 'datetime_received', 'is_read', 
                                     'has_attachments', 'attachments', 'id'
                                 ).order_by('-datetime_received')
                                 messages_list = list(messages)
                                 query_success = True
-                                log(f"Zapytanie z filtrami: znaleziono {len(messages_list)} wiadomości")
+                                imap_log.debug("Zapytanie z filtrami: znaleziono %d wiadomości", len(messages_list))
                             except Exception as query_error:
-                                log(f"BŁĄD zapytania z filtrami: {str(query_error)}")
+                                imap_log.warning("BŁĄD zapytania z filtrami: %s", query_error)
                                 # Query failed, fallback to getting all messages and filtering manually
                                 try:
-                                    log(f"Fallback: pobieranie wszystkich wiadomości z folderu '{folder_name}'")
+                                    imap_log.debug("Fallback: pobieranie wszystkich wiadomości z folderu '%s'", folder_name)
                                     messages = search_folder.all().only(
                                         'subject', 'sender', 'datetime_received', 'is_read', 
                                         'has_attachments', 'attachments', 'id'
                                     ).order_by('-datetime_received')
                                     messages_list = list(messages)
-                                    log(f"Fallback: pobrano {len(messages_list)} wszystkich wiadomości")
+                                    imap_log.debug("Fallback: pobrano %d wszystkich wiadomości", len(messages_list))
                                 except Exception as fallback_error:
-                                    log(f"BŁĄD fallback: {str(fallback_error)}")
+                                    imap_log.error("BŁĄD fallback: %s", fallback_error)
                         else:
                             try:
-                                log(f"Pobieranie wszystkich wiadomości z folderu '{folder_name}' (brak filtrów)")
+                                imap_log.debug("Pobieranie wszystkich wiadomości z folderu '%s' (brak filtrów)", folder_name)
                                 messages = search_folder.all().only(
                                     'subject', 'sender', 'datetime_received', 'is_read', 
                                     'has_attachments', 'attachments', 'id'
                                 ).order_by('-datetime_received')
                                 messages_list = list(messages)
-                                log(f"Pobrano {len(messages_list)} wszystkich wiadomości")
+                                imap_log.debug("Pobrano %d wszystkich wiadomości", len(messages_list))
                             except Exception as all_error:
-                                log(f"BŁĄD pobierania wszystkich: {str(all_error)}")
+                                imap_log.error("BŁĄD pobierania wszystkich: %s", all_error)
                         
                         # If we still have no messages, try alternative QuerySet conversion
                         if not messages_list:
-                            log(f"Brak wiadomości - próba alternatywnej metody konwersji")
+                            imap_log.debug("Brak wiadomości - próba alternatywnej metody konwersji")
                             try:
                                 if combined_query:
                                     messages = search_folder.filter(combined_query).only(
@@ -444,27 +467,32 @@ class EmailSearchEngine:
                                 
                                 # Use normal iteration instead of .iterator()
                                 messages_list = [msg for msg in messages][:per_page]  # Limit during iteration
-                                log(f"Alternatywna metoda: znaleziono {len(messages_list)} wiadomości (limit {per_page})")
+                                imap_log.debug("Alternatywna metoda: znaleziono %d wiadomości (limit %d)", len(messages_list), per_page)
                             except Exception as iteration_error:
-                                log(f"BŁĄD alternatywnej metody: {str(iteration_error)}")
+                                imap_log.error("BŁĄD alternatywnej metody: %s", iteration_error)
                                 pass  # Continue with empty list
                     
                     else:
                         # IMAP/POP3 implementation using IMAPClient
-                        log(f"Non-Exchange account type '{account_type}': Using IMAPClient message retrieval for folder '{folder_name}'")
-                        messages_list = self._get_imap_messages(search_folder, connection, combined_query, criteria, account_type, per_page)
-                        log(f"IMAP/POP3 retrieval completed: found {len(messages_list)} messages")
+                        imap_log.debug("Non-Exchange account type '%s': Using IMAPClient message retrieval for folder '%s'", account_type, folder_name)
+                        if search_folder in prefetched_imap:
+                            messages_list = prefetched_imap[search_folder]
+                            if isinstance(messages_list, Exception):
+                                raise messages_list
+                        else:
+                            messages_list = self._get_imap_messages(search_folder, connection, combined_query, criteria, account_type, per_page)
+                        imap_log.debug("IMAP/POP3 retrieval completed: found %d messages", len(messages_list))
                     
                     # Apply per-folder limit
                     original_count = len(messages_list)
                     folder_messages = messages_list[:per_page]  # Limit per folder after converting to list
                     if original_count > per_page:
-                        log(f"Ograniczono z {original_count} do {len(folder_messages)} wiadomości (limit na folder: {per_page})")
+                        imap_log.debug("Ograniczono z %d do %d wiadomości (limit na folder: %d)", original_count, len(folder_messages), per_page)
                     
-                    log(f"Folder '{folder_name}' - szczegóły wiadomości:")
-                    log(f"  - Znalezione wiadomości: {original_count}")
-                    log(f"  - Po limicie folderu: {len(folder_messages)}")
-                    log(f"  - Strategia pobierania: {'z filtrami' if query_success else 'wszystkie (fallback)'}")
+                    imap_log.debug("Folder '%s' - szczegóły wiadomości:", folder_name)
+                    imap_log.debug("  - Znalezione wiadomości: %d", original_count)
+                    imap_log.debug("  - Po limicie folderu: %d", len(folder_messages))
+                    imap_log.debug("  - Strategia pobierania: %s", 'z filtrami' if query_success else 'wszystkie (fallback)')
                     
                     # Map each message to its folder path (DO NOT modify message objects)
                     # This avoids adding non-standard fields like _folder_reference to Message objects
@@ -483,12 +511,12 @@ class EmailSearchEngine:
                         'query_success': query_success
                     }
                     
-                    log(f"Folder '{folder_name}': {len(folder_messages)} wiadomości dodano do wyników")
+                    imap_log.debug("Folder '%s': %d wiadomości dodano do wyników", folder_name, len(folder_messages))
                     
                 except Exception as e:
                     # Log the error but continue with other folders
                     error_msg = f"Błąd w folderze {folder_name}: {str(e)}"
-                    log(f"BŁĄD FOLDERU '{folder_name}': {str(e)}")
+                    imap_log.error("BŁĄD FOLDERU '%s': %s", folder_name, e)
                     folder_results[folder_name] = {'error': str(e)}
                     self.progress_callback(error_msg)
                     continue
@@ -658,9 +686,13 @@ class EmailSearchEngine:
                 except Exception as filter_error:
                     # Skip messages that cause errors
                     processing_errors += 1
-                    log(f"Błąd przetwarzania wiadomości: {str(filter_error)}")
+                    imap_log.error("Błąd przetwarzania wiadomości: %s", filter_error)
                     continue
             
+            # History writes of the whole PDF scan are committed in one batch
+            if has_pdf_search and self.pdf_history_manager:
+                self.pdf_history_manager.flush()
+            
             # Log filtering results
             log(f"Wyniki filtrowania:")
             log(f"  - Wiadomości po filtrach: {len(filtered_messages)}")
@@ -686,7 +718,7 @@ class EmailSearchEngine:
                         if subject_search in message_subject:
                             fallback_messages.append(message)
                     except Exception as e:
-                        log(f"Błąd ręcznego filtrowania wiadomości: {str(e)}")
+                        imap_log.error("Błąd ręcznego filtrowania wiadomości: %s", e)
                         continue
                 
                 log(f"Ręczne filtrowanie po temacie: znaleziono {len(fallback_messages)} wiadomości")
@@ -745,7 +777,7 @@ class EmailSearchEngine:
                 except Exception as e:
                     # Skip messages that cause errors
                     result_processing_errors += 1
-                    log(f"Błąd przetwarzania wyniku {i}: {str(e)}")
+                    imap_log.error("Błąd przetwarzania wyniku %d: %s", i, e)
                     continue
             
             if result_processing_errors > 0:
@@ -903,34 +935,80 @@ class EmailSearchEngine:
         if not attachment_name_filter and not attachment_ext_filter:
             return True
         
-        # Safely access attachments with error handling
+        # Names and content types come from BODYSTRUCTURE / Exchange metadata, nothing is downloaded
         try:
-            attachments_list = list(message.attachments) if message.attachments else []
-            if not attachments_list:
-                log(f"[ATTACHMENT FILTER] Wiadomość ma has_attachments=True ale brak załączników do sprawdzenia")
+            descriptors = self._get_attachment_descriptors(message)
+            if not descriptors:
+                imap_log.debug("[ATTACHMENT FILTER] Wiadomość ma has_attachments=True ale brak załączników do sprawdzenia")
                 return False
         except Exception as e:
-            log(f"[ATTACHMENT FILTER] Błąd dostępu do załączników: {str(e)}")
+            imap_log.error("[ATTACHMENT FILTER] Błąd dostępu do załączników: %s", e)
             return False
-            
-        for attachment in attachments_list:
-            if hasattr(attachment, 'name') and attachment.name:
-                attachment_name = attachment.name.lower()
-                
-                # Check name filter
-                if attachment_name_filter and attachment_name_filter not in attachment_name:
-                    continue
-                    
-                # Check extension filter
-                if attachment_ext_filter:
-                    if not attachment_name.endswith(f'.{attachment_ext_filter}'):
-                        continue
-                
-                # If we get here, attachment matches filters
+        
+        for attachment_name, content_type in descriptors:
+            if self._attachment_matches_filters(attachment_name, content_type, attachment_name_filter, attachment_ext_filter):
                 return True
         
         return False
     
+    def _get_attachment_descriptors(self, message):
+        """
+        Get (name, content type) of the message attachments without downloading them
+        
+        IMAP messages answer from the BODYSTRUCTURE part map (RFC 2231/2047 names
+        decoded), other messages from their attachment metadata.
+        """
+        if isinstance(message, IMAPMessage):
+            parts = message.get_parts()
+            if parts:
+                return [(part.filename, part.content_type) for part in parts if part.is_attachment]
+        
+        attachments = list(message.attachments) if message.attachments else []
+        return [(getattr(a, 'name', None), getattr(a, 'content_type', None)) for a in attachments]
+    
+    def _attachment_matches_filters(self, attachment_name, content_type, name_filter, ext_filter):
+        """Check a single attachment against the name and extension filters"""
+        attachment_name = (attachment_name or '').lower()
+        if name_filter and name_filter not in attachment_name:
+            return False
+        if not ext_filter:
+            return bool(attachment_name)
+        
+        ext_filter = ext_filter.lstrip('.')
+        if attachment_name.endswith(f'.{ext_filter}'):
+            return True
+        # Attachment without an extension in its name - use the content type
+        if content_type and '.' not in attachment_name:
+            return f'.{ext_filter}' in mimetypes.guess_all_extensions(content_type.lower())
+        return False
+    
+    def _get_known_content_hash(self, server_key):
+        """Content hash remembered for an attachment server key, or None"""
+        if not server_key or not self.pdf_history_manager:
+            return None
+        return self.pdf_history_manager.get_content_hash(server_key)
+    
+    def _skip_searched_pdf(self, attachment_name, content_hash, search_text):
+        """
+        Check the PDF history and mark the PDF as skipped when it was already searched
+        
+        Returns:
+            bool: True if the PDF should be skipped
+        """
+        try:
+            if self.pdf_history_manager.is_pdf_already_searched(
+                attachment_name, None, search_text, content_hash=content_hash
+            ):
+                self.pdf_history_manager.mark_pdf_as_skipped(
+                    attachment_name, None, search_text, content_hash=content_hash
+                )
+                history_log.debug("[PDF HISTORY] Pominięto już przeszukany PDF: %s", attachment_name)
+                return True
+        except Exception as e:
+            history_log.error("[PDF HISTORY] Błąd sprawdzania historii dla %s: %s", attachment_name, e)
+            # Continue with search if history check fails
+        return False
+    
     def _check_pdf_content(self, message, search_text, skip_searched_pdfs=False):
         """Check if message has PDF attachments containing the search text"""
         if not search_text:
@@ -938,7 +1016,7 @@ class EmailSearchEngine:
         
         # First check the has_attachments flag - this is more reliable than checking attachments directly
         if hasattr(message, 'has_attachments') and not message.has_attachments:
-            log(f"[PDF SEARCH] Wiadomość '{message.subject[:50] if message.subject else 'Bez tematu'}' nie ma załączników (has_attachments=False)")
+            pdf_log.debug("[PDF SEARCH] Wiadomość '%.50s' nie ma załączników (has_attachments=False)", message.subject or 'Bez tematu')
             return {'found': False, 'matches': [], 'method': 'no_attachments_flag'}
         
         # Now try to access attachments with proper error handling
@@ -948,20 +1026,21 @@ class EmailSearchEngine:
             attachment_count = len(attachments_list)
             
             if attachment_count == 0:
-                log(f"[PDF SEARCH] Wiadomość '{message.subject[:50] if message.subject else 'Bez tematu'}' ma has_attachments=True ale attachments jest pusta!")
+                pdf_log.warning("[PDF SEARCH] Wiadomość '%.50s' ma has_attachments=True ale attachments jest pusta!", message.subject or 'Bez tematu')
                 # This is the bug - has_attachments says True but attachments is empty
                 # This means attachments weren't properly loaded
                 return {'found': False, 'matches': [], 'method': 'attachments_not_loaded'}
             
-            log(f"[PDF SEARCH] Sprawdzanie {attachment_count} załączników w wiadomości: {message.subject[:50] if message.subject else 'Bez tematu'}...")
+            pdf_log.debug("[PDF SEARCH] Sprawdzanie %d załączników w wiadomości: %.50s...", attachment_count, message.subject or 'Bez tematu')
             
         except Exception as e:
-            log(f"[PDF SEARCH] BŁĄD dostępu do załączników w wiadomości '{message.subject[:50] if message.subject else 'Bez tematu'}': {str(e)}")
+            pdf_log.error("[PDF SEARCH] BŁĄD dostępu do załączników w wiadomości '%.50s': %s", message.subject or 'Bez tematu', e)
             return {'found': False, 'matches': [], 'method': 'attachment_access_error', 'error': str(e)}
         
         found_matches = []
         found_attachment_names = []
         skipped_pdfs_count = 0
+        skip_by_history = skip_searched_pdfs and self.pdf_history_manager
         
         for attachment in attachments_list:
             if self.search_cancelled:
@@ -972,23 +1051,24 @@ class EmailSearchEngine:
             if not attachment_name.lower().endswith('.pdf'):
                 continue
             
-            # Check if we should skip this PDF based on history
-            if skip_searched_pdfs and self.pdf_history_manager:
-                try:
-                    attachment_content = getattr(attachment, 'content', None)
-                    if attachment_content and self.pdf_history_manager.is_pdf_already_searched(
-                        attachment_name, attachment_content, search_text
-                    ):
-                        # Mark as skipped and continue to next attachment
-                        self.pdf_history_manager.mark_pdf_as_skipped(
-                            attachment_name, attachment_content, search_text
-                        )
-                        skipped_pdfs_count += 1
-                        log(f"[PDF HISTORY] Pominięto już przeszukany PDF: {attachment_name}")
-                        continue
-                except Exception as e:
-                    log(f"[PDF HISTORY] Błąd sprawdzania historii dla {attachment_name}: {e}")
-                    # Continue with search if history check fails
+            # Attachments whose hash is known by their server key are checked before downloading
+            server_key = get_attachment_server_key(message, attachment)
+            content_hash = self._get_known_content_hash(server_key)
+            if skip_by_history and content_hash and self._skip_searched_pdf(attachment_name, content_hash, search_text):
+                skipped_pdfs_count += 1
+                continue
+            
+            # Hash the content once for all history lookups of this attachment
+            attachment_content = getattr(attachment, 'content', None)
+            if content_hash is None and attachment_content:
+                content_hash = compute_content_hash(attachment_content)
+                if server_key and self.pdf_history_manager:
+                    self.pdf_history_manager.remember_content_hash(server_key, content_hash)
+                
+                # Check if we should skip this PDF based on history
+                if skip_by_history and self._skip_searched_pdf(attachment_name, content_hash, search_text):
+                    skipped_pdfs_count += 1
+                    continue
             
             # Search in this PDF attachment
             result = self.pdf_processor.search_in_pdf_attachment(attachment, search_text, attachment_name)
@@ -1004,15 +1084,15 @@ class EmailSearchEngine:
                 # Mark PDF as searched in history
                 if self.pdf_history_manager:
                     try:
-                        attachment_content = getattr(attachment, 'content', None)
-                        if attachment_content:
+                        if content_hash:
                             # Get sender email from message
                             sender_email = getattr(message.sender, 'email_address', None) if hasattr(message, 'sender') else None
                             self.pdf_history_manager.mark_pdf_as_searched(
-                                attachment_name, attachment_content, search_text, result.get('matches', []), sender_email
+                                attachment_name, attachment_content, search_text, result.get('matches', []), sender_email,
+                                content_hash=content_hash
                             )
                     except Exception as e:
-                        log(f"[PDF HISTORY] Błąd oznaczania PDF {attachment_name} jako przeszukany: {e}")
+                        history_log.error("[PDF HISTORY] Błąd oznaczania PDF %s jako przeszukany: %s", attachment_name, e)
                 
                 # Auto-save PDF if enabled
                 if self.auto_save_pdfs and self.pdf_save_directory:
@@ -1024,7 +1104,7 @@ class EmailSearchEngine:
                         try:
                             os.makedirs(monthly_folder, exist_ok=True)
                         except Exception as e:
-                            log(f"BŁĄD: Nie można utworzyć miesięcznego folderu {monthly_folder}: {e}")
+                            pdf_log.error("BŁĄD: Nie można utworzyć miesięcznego folderu %s: %s", monthly_folder, e)
                             monthly_folder = self.pdf_save_directory  # Fallback to main directory
                         
                         # Create safe filename (remove/replace problematic characters)
@@ -1046,9 +1126,9 @@ class EmailSearchEngine:
                                 if email_timestamp:
                                     # Set both access time and modification time to email date
                                     os.utime(output_path, (email_timestamp, email_timestamp))
-                                    log(f"Ustawiono datę modyfikacji pliku {safe_filename} na: {message.datetime_received}")
+                                    pdf_log.debug("Ustawiono datę modyfikacji pliku %s na: %s", safe_filename, message.datetime_received)
                             except Exception as e:
-                                log(f"OSTRZEŻENIE: Nie można ustawić daty modyfikacji pliku {safe_filename}: {e}")
+                                pdf_log.warning("OSTRZEŻENIE: Nie można ustawić daty modyfikacji pliku %s: %s", safe_filename, e)
                         
                         self.saved_pdf_count += 1
                         
@@ -1059,25 +1139,25 @@ class EmailSearchEngine:
                         self.progress_callback(f"Zapisano: {safe_filename} -> {folder_name}/")
                         
                     except Exception as e:
-                        log(f"BŁĄD auto-zapisu PDF {attachment_name}: {e}")
+                        pdf_log.error("BŁĄD auto-zapisu PDF %s: %s", attachment_name, e)
                         # Don't stop processing, just log the error
             else:
                 # Mark PDF as searched in history even if no matches found
                 if self.pdf_history_manager:
                     try:
-                        attachment_content = getattr(attachment, 'content', None)
-                        if attachment_content:
+                        if content_hash:
                             # Get sender email from message
                             sender_email = getattr(message.sender, 'email_address', None) if hasattr(message, 'sender') else None
                             self.pdf_history_manager.mark_pdf_as_searched(
-                                attachment_name, attachment_content, search_text, [], sender_email
+                                attachment_name, attachment_content, search_text, [], sender_email,
+                                content_hash=content_hash
                             )
                     except Exception as e:
-                        log(f"[PDF HISTORY] Błąd oznaczania PDF {attachment_name} jako przeszukany (bez wyników): {e}")
+                        history_log.error("[PDF HISTORY] Błąd oznaczania PDF %s jako przeszukany (bez wyników): %s", attachment_name, e)
         
         # Log statistics about skipped PDFs
         if skipped_pdfs_count > 0:
-            log(f"[PDF HISTORY] Pominięto {skipped_pdfs_count} już przeszukanych PDF-ów")
+            history_log.debug("[PDF HISTORY] Pominięto %d już przeszukanych PDF-ów", skipped_pdfs_count)
         
         if found_attachment_names:
             return {
@@ -1095,67 +1175,142 @@ class EmailSearchEngine:
             if account_type == "pop3_smtp":
                 return self._get_pop3_messages(connection, criteria, per_page)
             
+            if self._imap_pool is not None:
+                # Each folder is searched on its own pooled session, a session dropped
+                # by the server is retried once on a fresh one
+                return self._imap_pool.run(
+                    lambda imap: self._search_imap_folder(imap, folder_name, connection, criteria, per_page)
+                )
+            
             # For IMAP accounts, use the existing IMAP connection
             imap = connection.imap_connection
             if not imap:
-                log("[IMAP] ERROR: No IMAP connection available")
+                imap_log.error("[IMAP] ERROR: No IMAP connection available")
                 return []
+            return self._search_imap_folder(imap, folder_name, connection, criteria, per_page)
+            
+        except Exception as e:
+            imap_log.error("[IMAP] ERROR in _get_imap_messages: %s", e)
+            if is_connection_error(e):
+                # Report the folder as failed instead of silently empty
+                raise
+            return []
+    
+    def _prefetch_imap_folders(self, folders, connection, criteria, per_page):
+        """
+        Search IMAP folders in parallel, each on its own pooled session
+        
+        Returns:
+            dict: Message list per folder name
+        """
+        max_workers = min(self._imap_pool.max_size, len(folders))
+        imap_log.debug("[IMAP] Równoległe przeszukiwanie %d folderów (%d połączeń)", len(folders), max_workers)
+        
+        results = {}
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="imap-folder")
+        try:
+            future_to_folder = {
+                executor.submit(self._get_imap_messages, folder, connection, None, criteria, "imap_smtp", per_page): folder
+                for folder in folders
+            }
             
+            for future in as_completed(future_to_folder):
+                if self.search_cancelled:
+                    break
+                try:
+                    results[future_to_folder[future]] = future.result()
+                except Exception as e:
+                    # Raised again by the folder loop, which reports it as a folder error
+                    results[future_to_folder[future]] = e
+        finally:
+            executor.shutdown(wait=not self.search_cancelled, cancel_futures=self.search_cancelled)
+        
+        return results
+    
+    def _search_imap_folder(self, imap, folder_name, connection, criteria, per_page):
+        """Select a folder on the given session, search it and fetch the message headers"""
+        try:
             # Select the folder
             try:
                 if isinstance(folder_name, str):
-                    imap.select_folder(folder_name)
-                    log(f"[IMAP] Selected folder: {folder_name}")
+                    selected_folder = folder_name
+                    select_info = self._select_imap_folder(imap, folder_name)
+                    imap_log.debug("[IMAP] Selected folder: %s", folder_name)
                 else:
                     # Should not happen for IMAP, but fallback to INBOX
-                    imap.select_folder("INBOX")
-                    log(f"[IMAP] Fallback to INBOX folder")
+                    selected_folder = "INBOX"
+                    select_info = self._select_imap_folder(imap, "INBOX")
+                    imap_log.warning("[IMAP] Fallback to INBOX folder")
             except Exception as folder_error:
-                log(f"[IMAP] ERROR selecting folder {folder_name}: {str(folder_error)}")
+                if is_connection_error(folder_error):
+                    raise
+                imap_log.error("[IMAP] ERROR selecting folder %s: %s", folder_name, folder_error)
                 try:
-                    imap.select_folder("INBOX")
-                    log("[IMAP] Fallback to INBOX after folder selection error")
+                    selected_folder = "INBOX"
+                    select_info = self._select_imap_folder(imap, "INBOX")
+                    imap_log.warning("[IMAP] Fallback to INBOX after folder selection error")
                 except Exception as inbox_error:
-                    log(f"[IMAP] ERROR: Cannot even select INBOX: {str(inbox_error)}")
+                    imap_log.error("[IMAP] ERROR: Cannot even select INBOX: %s", inbox_error)
                     return []
             
             # Build IMAP search criteria
             search_criteria = self._build_imap_search_criteria(criteria)
-            log(f"[IMAP] Search criteria: {search_criteria}")
+            imap_log.debug("[IMAP] Search criteria: %s", search_criteria)
             
             # Search for message UIDs
             try:
                 message_uids = imap.search(search_criteria)
-                log(f"[IMAP] Found {len(message_uids)} messages matching criteria")
+                imap_log.debug("[IMAP] Found %d messages matching criteria", len(message_uids))
             except Exception as search_error:
-                log(f"[IMAP] Search failed: {str(search_error)}, falling back to ALL")
+                if is_connection_error(search_error):
+                    raise
+                imap_log.warning("[IMAP] Search failed: %s, falling back to ALL", search_error)
                 try:
                     message_uids = imap.search(['ALL'])
-                    log(f"[IMAP] Fallback search found {len(message_uids)} messages")
+                    imap_log.debug("[IMAP] Fallback search found %d messages", len(message_uids))
                 except Exception as fallback_error:
-                    log(f"[IMAP] ERROR: Even fallback search failed: {str(fallback_error)}")
+                    imap_log.error("[IMAP] ERROR: Even fallback search failed: %s", fallback_error)
                     return []
             
             if not message_uids:
-                log("[IMAP] No messages found")
+                imap_log.debug("[IMAP] No messages found")
                 return []
             
             # Limit the number of messages for performance
             limited_uids = message_uids[-per_page:]  # Get most recent messages up to per_page limit
             if len(limited_uids) < len(message_uids):
-                log(f"[IMAP] Limited to {len(limited_uids)} most recent messages (from {len(message_uids)} total)")
+                imap_log.debug("[IMAP] Limited to %d most recent messages (from %d total)", len(limited_uids), len(message_uids))
             
             # Fetch message data
-            log(f"[IMAP] Fetching message data for {len(limited_uids)} messages...")
-            messages_list = self._fetch_imap_messages(imap, limited_uids, criteria)
+            imap_log.debug("[IMAP] Fetching message data for %d messages...", len(limited_uids))
+            messages_list = self._fetch_imap_messages(imap, limited_uids, criteria, selected_folder)
             
-            log(f"[IMAP] Successfully retrieved {len(messages_list)} message objects")
+            # Attachments are identified by account, folder, UIDVALIDITY, UID and part section
+            uidvalidity = select_info.get(b'UIDVALIDITY') if isinstance(select_info, dict) else None
+            server_key_prefix = get_imap_server_key_prefix(self._get_account_id(connection), selected_folder, uidvalidity)
+            for message in messages_list:
+                message.server_key_prefix = server_key_prefix
+            
+            imap_log.debug("[IMAP] Successfully retrieved %d message objects", len(messages_list))
             return messages_list
             
         except Exception as e:
-            log(f"[IMAP] ERROR in _get_imap_messages: {str(e)}")
+            if is_connection_error(e):
+                raise
+            imap_log.error("[IMAP] ERROR searching folder %s: %s", folder_name, e)
             return []
     
+    def _get_account_id(self, connection):
+        """Account identifier used in attachment server keys"""
+        config = connection.current_account_config or {}
+        return config.get('email') or config.get('name', 'unknown')
+    
+    def _select_imap_folder(self, imap, folder_name):
+        """Select a folder, pooled sessions remember their selected folder"""
+        if self._imap_pool is not None:
+            return self._imap_pool.select(imap, folder_name)
+        return imap.select_folder(folder_name)
+    
     def _build_imap_search_criteria(self, criteria):
         """Build IMAP search criteria from GUI criteria as flat list"""
         search_terms = []
@@ -1163,12 +1318,12 @@ class EmailSearchEngine:
         # Subject search
         if criteria.get('subject_search'):
             search_terms.extend(['SUBJECT', criteria['subject_search']])
-            log(f"[IMAP] Adding subject search: {criteria['subject_search']}")
+            imap_log.debug("[IMAP] Adding subject search: %s", criteria['subject_search'])
         
         # Body search
         if criteria.get('body_search'):
             search_terms.extend(['BODY', criteria['body_search']])
-            log(f"[IMAP] Adding body search: {criteria['body_search']}")
+            imap_log.debug("[IMAP] Adding body search: %s", criteria['body_search'])
         
         # Sender search - use IMAP FROM filter only for full email addresses
         if criteria.get('sender'):
@@ -1176,15 +1331,15 @@ class EmailSearchEngine:
             if self._is_email_address(sender_value):
                 # Full email address - use IMAP FROM filter
                 search_terms.extend(['FROM', sender_value])
-                log(f"[IMAP] Adding sender search (full email): {sender_value}")
+                imap_log.debug("[IMAP] Adding sender search (full email): %s", sender_value)
             else:
                 # Fragment - skip IMAP filter, will filter locally later
-                log(f"[IMAP] Sender fragment detected: '{sender_value}' - skipping IMAP FROM filter, will use local filtering")
+                imap_log.debug("[IMAP] Sender fragment detected: '%s' - skipping IMAP FROM filter, will use local filtering", sender_value)
         
         # Unread only
         if criteria.get('unread_only'):
             search_terms.append('UNSEEN')
-            log("[IMAP] Adding unread only filter")
+            imap_log.debug("[IMAP] Adding unread only filter")
         
         # Date period filter
         if criteria.get('selected_period') and criteria['selected_period'] != 'wszystkie':
@@ -1194,7 +1349,7 @@ class EmailSearchEngine:
                 date_str = IMAPDateHandler.format_imap_search_date(start_date)
                 if date_str:
                     search_terms.extend(['SINCE', date_str])
-                    log(f"[IMAP] Adding date filter: since {date_str}")
+                    imap_log.debug("[IMAP] Adding date filter: since %s", date_str)
         
         # If no criteria specified, return ALL
         if not search_terms:
@@ -1202,7 +1357,7 @@ class EmailSearchEngine:
         
         return search_terms
     
-    def _fetch_imap_messages(self, imap, message_uids, criteria):
+    def _fetch_imap_messages(self, imap, message_uids, criteria, folder=None):
         """Fetch and parse IMAP messages"""
         messages_list = []
         
@@ -1211,11 +1366,11 @@ class EmailSearchEngine:
             batch_size = 50
             for i in range(0, len(message_uids), batch_size):
                 if self.search_cancelled:
-                    log("[IMAP] Message fetching cancelled")
+                    imap_log.debug("[IMAP] Message fetching cancelled")
                     break
                 
                 batch_uids = message_uids[i:i + batch_size]
-                log(f"[IMAP] Fetching batch {i//batch_size + 1}: UIDs {len(batch_uids)} messages")
+                imap_log.debug("[IMAP] Fetching batch %d: UIDs %d messages", i // batch_size + 1, len(batch_uids))
                 
                 try:
                     # Fetch headers and basic info
@@ -1227,23 +1382,27 @@ class EmailSearchEngine:
                         
                         if uid in response:
                             try:
-                                message_obj = self._parse_imap_message(imap, uid, response[uid], criteria)
+                                message_obj = self._parse_imap_message(imap, uid, response[uid], criteria, folder)
                                 if message_obj:
                                     messages_list.append(message_obj)
                             except Exception as parse_error:
-                                log(f"[IMAP] Error parsing message UID {uid}: {str(parse_error)}")
+                                imap_log.error("[IMAP] Error parsing message UID %s: %s", uid, parse_error)
                                 continue
                 
                 except Exception as batch_error:
-                    log(f"[IMAP] Error fetching batch: {str(batch_error)}")
+                    if is_connection_error(batch_error):
+                        raise
+                    imap_log.error("[IMAP] Error fetching batch: %s", batch_error)
                     continue
         
         except Exception as e:
-            log(f"[IMAP] ERROR in _fetch_imap_messages: {str(e)}")
+            if is_connection_error(e):
+                raise
+            imap_log.error("[IMAP] ERROR in _fetch_imap_messages: %s", e)
         
         return messages_list
     
-    def _parse_imap_message(self, imap, uid, message_data, criteria):
+    def _parse_imap_message(self, imap, uid, message_data, criteria, folder=None):
         """Parse IMAP message data into a message-like object"""
         try:
             envelope = message_data.get(b'ENVELOPE')
@@ -1252,7 +1411,7 @@ class EmailSearchEngine:
             size = message_data.get(b'RFC822.SIZE', 0)
             
             if not envelope:
-                log(f"[IMAP] No envelope data for UID {uid}")
+                imap_log.debug("[IMAP] No envelope data for UID %s", uid)
                 return None
             
             # Parse envelope data
@@ -1294,13 +1453,15 @@ class EmailSearchEngine:
                 has_attachments=has_attachments,
                 imap_connection=imap,
                 size=size,
-                bodystructure=bodystructure
+                bodystructure=bodystructure,
+                folder=folder if self._imap_pool is not None else None,
+                connection_pool=self._imap_pool
             )
             
             return message_obj
             
         except Exception as e:
-            log(f"[IMAP] ERROR parsing message UID {uid}: {str(e)}")
+            imap_log.error("[IMAP] ERROR parsing message UID %s: %s", uid, e)
             return None
     
     def _decode_imap_header(self, header_value):
@@ -1330,7 +1491,7 @@ class EmailSearchEngine:
             return decoded_string.strip()
             
         except Exception as e:
-            log(f"[IMAP] Error decoding header: {str(e)}")
+            imap_log.warning("[IMAP] Error decoding header: %s", e)
             return str(header_value) if header_value else ""
     
     def _check_imap_attachments(self, bodystructure):
@@ -1339,38 +1500,10 @@ class EmailSearchEngine:
             return False
         
         try:
-            # Recursively check bodystructure for attachments
-            return self._has_attachments_recursive(bodystructure)
+            # Same part map (and attachment rules) as used for listing attachments
+            return any(part.is_attachment for part in parse_bodystructure(bodystructure))
         except Exception as e:
-            log(f"[IMAP] Error checking attachments: {str(e)}")
-            return False
-    
-    def _has_attachments_recursive(self, structure):
-        """Recursively check bodystructure for attachments"""
-        if not structure:
-            return False
-        
-        try:
-            # If it's a tuple/list and has multiple parts
-            if isinstance(structure, (tuple, list)) and len(structure) > 0:
-                # Check if this is a multipart structure
-                if isinstance(structure[0], (tuple, list)):
-                    # Multipart - check each part
-                    for part in structure:
-                        if isinstance(part, (tuple, list)) and self._has_attachments_recursive(part):
-                            return True
-                else:
-                    # Single part - check disposition
-                    if len(structure) > 8:
-                        disposition = structure[8] if len(structure) > 8 else None
-                        if disposition and isinstance(disposition, (tuple, list)) and len(disposition) > 0:
-                            if disposition[0] and b'attachment' in disposition[0].lower():
-                                return True
-            
-            return False
-            
-        except Exception as e:
-            log(f"[IMAP] Error in recursive attachment check: {str(e)}")
+            imap_log.error("[IMAP] Error checking attachments: %s", e)
             return False
     
     def _get_pop3_messages(self, connection, criteria, per_page=500):
@@ -1378,25 +1511,25 @@ class EmailSearchEngine:
         try:
             pop3 = connection.pop3_connection
             if not pop3:
-                log("[POP3] ERROR: No POP3 connection available")
+                imap_log.error("[POP3] ERROR: No POP3 connection available")
                 return []
             
-            log("[POP3] Retrieving message list...")
+            imap_log.debug("[POP3] Retrieving message list...")
             messages_list = []
             
             # Get message count
             num_messages = len(pop3.list()[1])
-            log(f"[POP3] Found {num_messages} messages")
+            imap_log.debug("[POP3] Found %d messages", num_messages)
             
             # Limit messages for performance
             max_messages = min(num_messages, per_page)
             start_index = max(1, num_messages - max_messages + 1)
             
-            log(f"[POP3] Retrieving {max_messages} most recent messages (from {start_index} to {num_messages})")
+            imap_log.debug("[POP3] Retrieving %d most recent messages (from %d to %d)", max_messages, start_index, num_messages)
             
             for i in range(start_index, num_messages + 1):
                 if self.search_cancelled:
-                    log("[POP3] Message retrieval cancelled")
+                    imap_log.debug("[POP3] Message retrieval cancelled")
                     break
                 
                 try:
@@ -1415,14 +1548,14 @@ class EmailSearchEngine:
                             messages_list.append(message_obj)
                 
                 except Exception as msg_error:
-                    log(f"[POP3] Error retrieving message {i}: {str(msg_error)}")
+                    imap_log.error("[POP3] Error retrieving message %s: %s", i, msg_error)
                     continue
             
-            log(f"[POP3] Successfully retrieved {len(messages_list)} messages")
+            imap_log.debug("[POP3] Successfully retrieved %d messages", len(messages_list))
             return messages_list
             
         except Exception as e:
-            log(f"[POP3] ERROR in _get_pop3_messages: {str(e)}")
+            imap_log.error("[POP3] ERROR in _get_pop3_messages: %s", e)
             return []
     
     def _create_pop3_message_object(self, message_num, email_msg, pop3_connection):
@@ -1458,7 +1591,7 @@ class EmailSearchEngine:
             return message_obj
             
         except Exception as e:
-            log(f"[POP3] Error creating message object: {str(e)}")
+            imap_log.error("[POP3] Error creating message object: %s", e)
             return None
 
 
@@ -1475,9 +1608,11 @@ class IMAPSender:
 class IMAPMessage:
     """Message object for IMAP messages, compatible with Exchange Message interface"""
     def __init__(self, uid, subject, sender, datetime_received, is_read, has_attachments, 
-                 imap_connection, size=0, bodystructure=None):
-        self.id = uid
+                 imap_connection, size=0, bodystructure=None, folder=None, connection_pool=None):
+        # UIDs are only unique within a folder
+        self.id = f"{folder}:{uid}" if folder else uid
         self.uid = uid
+        self.folder = folder
         self.subject = subject
         self.sender = sender
         self.datetime_received = datetime_received
@@ -1487,7 +1622,11 @@ class IMAPMessage:
         self.has_attachments = has_attachments
         self.size = size
         self.bodystructure = bodystructure
+        # Prefix of attachment server keys (account, folder, UIDVALIDITY), set by the search engine
+        self.server_key_prefix = None
         self._imap_connection = imap_connection
+        self._connection_pool = connection_pool
+        self._parts = None
         self._attachments = None
         self._body = None
     
@@ -1505,18 +1644,93 @@ class IMAPMessage:
             self._body = self._load_body()
         return self._body
     
+    def get_parts(self):
+        """
+        Part map of the message built from BODYSTRUCTURE
+        
+        Returns:
+            list: MessagePart objects, empty when the structure is not available
+        """
+        if self._parts is None:
+            bodystructure = self.bodystructure
+            if not bodystructure:
+                try:
+                    response = self._fetch(['BODYSTRUCTURE'])
+                    bodystructure = response.get(self.uid, {}).get(b'BODYSTRUCTURE')
+                except Exception as e:
+                    imap_log.error("[IMAP] Error fetching BODYSTRUCTURE for UID %s: %s", self.uid, e)
+            self._parts = parse_bodystructure(bodystructure)
+        return self._parts
+    
+    def _fetch(self, items):
+        """FETCH on a pooled session with the message folder selected, or on the shared connection"""
+        if self._connection_pool is not None and self.folder:
+            return self._connection_pool.run(lambda imap: imap.fetch([self.uid], items), self.folder)
+        return self._imap_connection.fetch([self.uid], items)
+    
+    def _fetch_parts(self, parts):
+        """
+        Fetch several parts with a single BODY.PEEK command (does not set \\Seen)
+        
+        Returns:
+            dict: Decoded content per section
+        """
+        response = self._fetch([f'BODY.PEEK[{part.section}]' for part in parts])
+        data = response.get(self.uid, {})
+        return {
+            part.section: decode_part_payload(data.get(f'BODY[{part.section}]'.encode()), part.encoding)
+            for part in parts
+        }
+    
+    def load_attachment_contents(self, attachments):
+        """Download content of several attachments of this message with one FETCH"""
+        parts_by_section = {part.section: part for part in self.get_parts()}
+        pending = [a for a in attachments if a.section in parts_by_section and not a.is_loaded]
+        if not pending:
+            return
+        
+        contents = self._fetch_parts([parts_by_section[a.section] for a in pending])
+        for attachment in pending:
+            attachment.content = contents.get(attachment.section)
+    
+    def _load_attachment_content(self, attachment):
+        """Loader of a single attachment part"""
+        self.load_attachment_contents([attachment])
+        return attachment.content if attachment.is_loaded else None
+    
     def _load_attachments(self):
-        """Load attachments from IMAP message"""
+        """Load attachment list from the part map, content is fetched per part on first access"""
         try:
             if not self.has_attachments:
                 return []
             
-            log(f"[IMAP] Loading attachments for message UID {self.uid}")
+            parts = self.get_parts()
+            if not parts:
+                return self._load_attachments_from_message()
+            
+            attachments = []
+            for part in parts:
+                if part.is_attachment:
+                    server_key = f"{self.server_key_prefix}:{self.uid}:{part.section}" if self.server_key_prefix else None
+                    attachments.append(IMAPAttachment(
+                        part.filename, size=part.size, content_type=part.content_type, section=part.section,
+                        loader=self._load_attachment_content, server_key=server_key
+                    ))
+            return attachments
+            
+        except Exception as e:
+            imap_log.error("[IMAP] Error loading attachments for UID %s: %s", self.uid, e)
+            return []
+    
+    def _load_attachments_from_message(self):
+        """Load attachments by fetching the full message (no usable BODYSTRUCTURE)"""
+        try:
+            imap_log.debug("[IMAP] Loading attachments for message UID %s", self.uid)
             
             # Fetch the full message to get attachments
-            response = self._imap_connection.fetch([self.uid], ['RFC822'])
+            response = self._fetch(['RFC822'])
             if self.uid not in response:
-                log(f"[IMAP] Could not fetch full message for UID {self.uid}")
+                imap_log.warning("[IMAP] Could not fetch full message for UID %s", self.uid)
                 return []
             
             raw_message = response[self.uid][b'RFC822']
@@ -1531,22 +1745,48 @@ class IMAPMessage:
                         if content:
                             attachment = IMAPAttachment(filename, content)
                             attachments.append(attachment)
-                            log(f"[IMAP] Found attachment: {filename}")
+                            imap_log.debug("[IMAP] Found attachment: %s", filename)
             
-            log(f"[IMAP] Loaded {len(attachments)} attachments for UID {self.uid}")
+            imap_log.debug("[IMAP] Loaded %d attachments for UID %s", len(attachments), self.uid)
             return attachments
             
         except Exception as e:
-            log(f"[IMAP] Error loading attachments for UID {self.uid}: {str(e)}")
+            imap_log.error("[IMAP] Error loading attachments for UID %s: %s", self.uid, e)
             return []
     
     def _load_body(self):
-        """Load message body from IMAP message"""
+        """Load message body from the text parts of the part map"""
         try:
-            log(f"[IMAP] Loading body for message UID {self.uid}")
+            text_parts = [part for part in self.get_parts() if part.is_body_text]
+            body_parts = ([part for part in text_parts if part.content_type == 'text/plain']
+                          or [part for part in text_parts if part.content_type == 'text/html'])
+            if not body_parts:
+                return self._load_body_from_message()
+            
+            contents = self._fetch_parts(body_parts)
+            body_text = ""
+            for part in body_parts:
+                payload = contents.get(part.section)
+                if payload:
+                    try:
+                        body_text += payload.decode(part.charset or 'utf-8', errors='ignore')
+                    except LookupError:
+                        body_text += payload.decode('utf-8', errors='ignore')
+                    body_text += "\n"
+            
+            return body_text.strip()
+            
+        except Exception as e:
+            imap_log.error("[IMAP] Error loading body for UID %s: %s", self.uid, e)
+            return ""
+    
+    def _load_body_from_message(self):
+        """Load message body from the raw message (no usable BODYSTRUCTURE)"""
+        try:
+            imap_log.debug("[IMAP] Loading body for message UID %s", self.uid)
             
             # Try to get just the text parts first
-            response = self._imap_connection.fetch([self.uid], ['BODY[TEXT]'])
+            response = self._fetch(['BODY[TEXT]'])
             if self.uid in response and b'BODY[TEXT]' in response[self.uid]:
                 body_text = response[self.uid][b'BODY[TEXT]']
                 if isinstance(body_text, bytes):
@@ -1554,7 +1794,7 @@ class IMAPMessage:
                 return str(body_text)
             
             # Fallback to full message
-            response = self._imap_connection.fetch([self.uid], ['RFC822'])
+            response = self._fetch(['RFC822'])
             if self.uid not in response:
                 return ""
             
@@ -1577,16 +1817,36 @@ class IMAPMessage:
             return body_text.strip()
             
         except Exception as e:
-            log(f"[IMAP] Error loading body for UID {self.uid}: {str(e)}")
+            imap_log.error("[IMAP] Error loading body for UID %s: %s", self.uid, e)
             return ""
 
 
 class IMAPAttachment:
-    """Attachment object for IMAP messages"""
-    def __init__(self, name, content):
+    """Attachment object for IMAP messages, content of a part is fetched on first access"""
+    def __init__(self, name, content=None, size=None, content_type=None, section=None, loader=None, server_key=None):
         self.name = name
-        self.content = content
-        self.size = len(content) if content else 0
+        self.size = size if size is not None else (len(content) if content else 0)
+        self.content_type = content_type
+        self.section = section
+        self.server_key = server_key
+        self._content = content
+        self._loader = loader
+    
+    @property
+    def is_loaded(self):
+        """Content is already available locally"""
+        return self._content is not None
+    
+    @property
+    def content(self):
+        """Attachment content, fetched from the server when first needed"""
+        if self._content is None and self._loader is not None:
+            self._content = self._loader(self)
+        return self._content
+    
+    @content.setter
+    def content(self, value):
+        self._content = value
     
     def __str__(self):
         return f"IMAPAttachment(name={self.name}, size={self.size})"
@@ -1630,7 +1890,7 @@ class POP3Message:
             if not self.has_attachments:
                 return []
             
-            log(f"[POP3] Loading attachments for message {self.message_num}")
+            imap_log.debug("[POP3] Loading attachments for message %s", self.message_num)
             
             # Get full message
             response = self._pop3_connection.retr(self.message_num)
@@ -1649,19 +1909,19 @@ class POP3Message:
                         if content:
                             attachment = IMAPAttachment(filename, content)
                             attachments.append(attachment)
-                            log(f"[POP3] Found attachment: {filename}")
+                            imap_log.debug("[POP3] Found attachment: %s", filename)
             
-            log(f"[POP3] Loaded {len(attachments)} attachments for message {self.message_num}")
+            imap_log.debug("[POP3] Loaded %d attachments for message %s", len(attachments), self.message_num)
             return attachments
             
         except Exception as e:
-            log(f"[POP3] Error loading attachments for message {self.message_num}: {str(e)}")
+            imap_log.error("[POP3] Error loading attachments for message %s: %s", self.message_num, e)
             return []
     
     def _load_body(self):
         """Load message body from POP3 message"""
         try:
-            log(f"[POP3] Loading body for message {self.message_num}")
+            imap_log.debug("[POP3] Loading body for message %s", self.message_num)
             
             # Get full message
             response = self._pop3_connection.retr(self.message_num)
@@ -1687,5 +1947,5 @@ class POP3Message:
             return body_text.strip()
             
         except Exception as e:
-            log(f"[POP3] Error loading body for message {self.message_num}: {str(e)}")
+            imap_log.error("[POP3] Error loading body for message %s: %s", self.message_num, e)
             return ""
\ No newline at end of file
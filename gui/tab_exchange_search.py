@@ -32,7 +32,9 @@ class ExchangeSearchTab(ttk.Frame):
             'attachment_name': tk.StringVar(),
             'attachment_extension': tk.StringVar(),
             'selected_period': tk.StringVar(value="wszystkie"),
-            'skip_searched_pdfs': tk.BooleanVar()
+            'skip_searched_pdfs': tk.BooleanVar(),
+            'use_message_index': tk.BooleanVar(),
+            'pdf_index_only': tk.BooleanVar()
         }
         
         # Folder exclusion support
@@ -66,6 +68,18 @@ class ExchangeSearchTab(ttk.Frame):
         # Set PDF history manager in search engine
         self.search_engine.pdf_history_manager = self.pdf_history_manager
         
+        # Initialize local message-metadata index
+        from gui.exchange_search_components.message_index import MessageIndex
+        self.search_engine.message_index = MessageIndex()
+
+        # Initialize content-addressed cache of extracted PDF text
+        from gui.exchange_search_components.pdf_text_cache import PDFTextCache
+        self.search_engine.pdf_processor.text_cache = PDFTextCache()
+        
+        # Initialize full-text index of PDF attachment text
+        from gui.exchange_search_components.pdf_text_index import PDFTextIndex
+        self.search_engine.pdf_text_index = PDFTextIndex()
+        
         self.create_widgets()
         
         # Add callback to update folder info when folder path changes
@@ -419,8 +433,8 @@ class ExchangeSearchTab(ttk.Frame):
     
     def start_search(self):
         """Start threaded search"""
-        # Validate configuration before starting search
-        if not self._validate_mail_configuration():
+        # Validate configuration before starting search (not needed for local PDF index search)
+        if not self._is_pdf_index_only_search() and not self._validate_mail_configuration():
             return
         
         self.results_display.clear_results()
@@ -433,6 +447,12 @@ class ExchangeSearchTab(ttk.Frame):
         # Update excluded_folders from checkboxes before search
         self.vars['excluded_folders'].set(self._get_excluded_folders_from_checkboxes())
         
+        # PDF search answered from the local full-text index never connects to the server
+        if self._is_pdf_index_only_search():
+            self.status_label.config(text="Wyszukiwanie w lokalnym indeksie PDF...", foreground="blue")
+            self.search_engine.search_pdf_index_threaded(self.connection, self._get_search_criteria(), self.current_page, self.per_page)
+            return
+        
         # Establish Exchange account connection before search
         # This sets connection.current_account_config with the Exchange account
         try:
@@ -520,15 +540,26 @@ class ExchangeSearchTab(ttk.Frame):
         
         return True
     
+    def _is_pdf_index_only_search(self):
+        """Check if the PDF search should be answered from the local index only"""
+        return bool(self.vars['pdf_index_only'].get() and self.vars['pdf_search_text'].get().strip())
+    
     def _perform_search(self):
         """Perform search in background thread"""
         try:
-            criteria = {key: var.get() if hasattr(var, 'get') else var for key, var in self.vars.items()}
+            criteria = self._get_search_criteria()
+            if self._is_pdf_index_only_search():
+                self.search_engine.search_pdf_index_threaded(self.connection, criteria, self.current_page, self.per_page)
+                return
             self.search_engine.search_emails_threaded(self.connection, criteria, self.current_page, self.per_page)
             
         except Exception as e:
             self._add_result({'type': 'search_error', 'error': str(e)})
     
+    def _get_search_criteria(self):
+        """Collect search criteria from UI variables"""
+        return {key: var.get() if hasattr(var, 'get') else var for key, var in self.vars.items()}
+    
     def _add_progress(self, message):
         """Add progress to queue"""
         # Also print to console for debugging
@@ -577,7 +608,15 @@ class ExchangeSearchTab(ttk.Frame):
             )
             self.status_label.config(text=f"Znaleziono {result.get('total_count', result['count'])} wiadomości", foreground="green")
             self.search_button.config(text="Rozpocznij wyszukiwanie")
-            
+
+        elif result['type'] == 'result_batch':
+            # Matches confirmed so far, the search is still running
+            self.results_display.append_results(result['results'], result['found_count'])
+            status_text = f"Znaleziono {result['found_count']} wiadomości (wyszukiwanie trwa...)"
+            if result.get('total_to_check'):
+                status_text += f" - sprawdzono {result['checked_count']}/{result['total_to_check']}"
+            self.status_label.config(text=status_text, foreground="blue")
+
         elif result['type'] == 'search_cancelled':
             self.status_label.config(text="Wyszukiwanie anulowane", foreground="orange")
             self.search_button.config(text="Rozpocznij wyszukiwanie")
@@ -591,14 +630,22 @@ class ExchangeSearchTab(ttk.Frame):
         """Go to specific page"""
         self.current_page = page
         self.status_label.config(text="Ładowanie strony...", foreground="blue")
-        threading.Thread(target=self._perform_search, daemon=True).start()
+        self._load_page()
     
     def change_per_page(self, per_page):
         """Change results per page"""
         self.per_page = per_page
         self.current_page = 0  # Reset to first page
         self.status_label.config(text="Ładowanie wyników...", foreground="blue")
-        threading.Thread(target=self._perform_search, daemon=True).start()
+        self._load_page()
+    
+    def _load_page(self):
+        """Serve the current page from the search session, or search again if it's stale"""
+        criteria = self._get_search_criteria()
+        if self.search_engine.has_session_for(criteria, self.per_page):
+            self.search_engine.load_page_threaded(self.current_page, self.per_page)
+        else:
+            threading.Thread(target=self._perform_search, daemon=True).start()
 
     def _load_saved_exclusions(self):
         """Load saved folder exclusions and apply them to checkboxes"""
@@ -661,6 +708,10 @@ class ExchangeSearchTab(ttk.Frame):
                         self.vars['attachments_required'].set(config["attachments_required"])
                     if "no_attachments_only" in config:
                         self.vars['no_attachments_only'].set(config["no_attachments_only"])
+                    if "use_message_index" in config:
+                        self.vars['use_message_index'].set(config["use_message_index"])
+                    if "pdf_index_only" in config:
+                        self.vars['pdf_index_only'].set(config["pdf_index_only"])
                     # Excluded folders will be loaded when folders are discovered
         except Exception as e:
             print(f"Błąd ładowania konfiguracji wyszukiwania: {e}")
@@ -688,6 +739,8 @@ class ExchangeSearchTab(ttk.Frame):
                 "unread_only": self.vars['unread_only'].get(),
                 "attachments_required": self.vars['attachments_required'].get(),
                 "no_attachments_only": self.vars['no_attachments_only'].get(),
+                "use_message_index": self.vars['use_message_index'].get(),
+                "pdf_index_only": self.vars['pdf_index_only'].get(),
                 "attachment_name": self.vars['attachment_name'].get(),
                 "attachment_extension": self.vars['attachment_extension'].get(),
                 "selected_period": self.vars['selected_period'].get()
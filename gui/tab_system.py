@@ -5,12 +5,17 @@ import multiprocessing
 import webbrowser
 from tools import logger, i18n, darkmode
 from tools.ocr_config import ocr_config
+from tools.ocr_engines import ocr_manager
 from tools.version_info import format_system_info
 from gui.system_components.backup_handler import BackupHandler
 from gui.system_components.system_operations import SystemOperations
 from gui.system_components.dependency_widget import DependencyWidget
 
 
+# Subsystem selector entry for changing the level of all subsystems
+LOG_SUBSYSTEM_ALL = "wszystkie"
+
+
 class SystemTab(ttk.Frame):
     def __init__(self, parent):
         super().__init__(parent)
@@ -559,6 +564,8 @@ class SystemTab(ttk.Frame):
                     ocr_config.set_max_workers(workers)
                 else:
                     raise ValueError("Number must be positive")
+            # Running OCR worker pool picks up the new size
+            ocr_manager.resize_pool(None)
         except ValueError:
             # Reset to current value on invalid input
             current = ocr_config.get_max_workers()
@@ -594,6 +601,21 @@ class SystemTab(ttk.Frame):
         self.log_info_label = ttk.Label(button_frame, text="", foreground="gray")
         self.log_info_label.pack(side="left", padx=(10, 0))
         
+        # Runtime log level switch (DEBUG enables per-message tracing)
+        self.log_level_var = tk.StringVar(value=logger.LEVEL_NAMES[logger.get_level()])
+        self.log_level_combo = ttk.Combobox(button_frame, textvariable=self.log_level_var, width=7, state="readonly",
+                                            values=[logger.LEVEL_NAMES[level] for level in sorted(logger.LEVEL_NAMES)])
+        self.log_level_combo.pack(side="right")
+        self.log_level_combo.bind('<<ComboboxSelected>>', self._on_log_level_change)
+        
+        self.log_subsystem_var = tk.StringVar(value=LOG_SUBSYSTEM_ALL)
+        self.log_subsystem_combo = ttk.Combobox(button_frame, textvariable=self.log_subsystem_var, width=10, state="readonly",
+                                                values=[LOG_SUBSYSTEM_ALL] + list(logger.SUBSYSTEMS))
+        self.log_subsystem_combo.pack(side="right", padx=(0, 5))
+        self.log_subsystem_combo.bind('<<ComboboxSelected>>', self._on_log_subsystem_change)
+        
+        ttk.Label(button_frame, text="Poziom logowania:").pack(side="right", padx=(0, 5))
+        
         # Text widget with scrollbar for logs
         text_frame = ttk.Frame(parent)
         text_frame.pack(fill="both", expand=True, padx=10, pady=5)
@@ -613,6 +635,23 @@ class SystemTab(ttk.Frame):
         # Load logs initially
         self.refresh_logs()
     
+    def _get_selected_log_subsystem(self):
+        """Selected subsystem, None for all subsystems"""
+        subsystem = self.log_subsystem_var.get()
+        return None if subsystem == LOG_SUBSYSTEM_ALL else subsystem
+    
+    def _on_log_subsystem_change(self, event=None):
+        """Show the current level of the selected subsystem"""
+        self.log_level_var.set(logger.LEVEL_NAMES[logger.get_level(self._get_selected_log_subsystem())])
+    
+    def _on_log_level_change(self, event=None):
+        """Apply the selected log level at runtime"""
+        subsystem = self._get_selected_log_subsystem()
+        level_name = self.log_level_var.get()
+        logger.set_level(level_name, subsystem)
+        logger.log(f"Poziom logowania ustawiony na {level_name} ({subsystem or LOG_SUBSYSTEM_ALL})")
+        self.log_info_label.config(text=f"Poziom logowania: {level_name} ({subsystem or LOG_SUBSYSTEM_ALL})")
+    
     def refresh_logs(self):
         """Refresh and display logs from app.log"""
         try:
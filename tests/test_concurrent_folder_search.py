@@ -0,0 +1,191 @@
+"""
+Test for concurrent per-folder search in EmailSearchEngine
+Folders are queried through a bounded worker pool, results must still be
+merged per folder and cancellation must be honoured.
+"""
+import unittest
+from unittest.mock import Mock, patch
+import sys
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Mock exchangelib before import
+sys.modules['exchangelib'] = Mock()
+sys.modules['exchangelib'].Q = Mock
+sys.modules['exchangelib'].Message = Mock
+
+# Mock IMAPClient
+sys.modules['imapclient'] = Mock()
+sys.modules['imapclient'].IMAPClient = Mock
+
+from gui.exchange_search_components.search_engine import EmailSearchEngine
+from gui.exchange_search_components.search_session import NewestMessageTracker
+from tools import logger
+
+
+class MockQuerySet:
+    """Mimics the chained exchangelib QuerySet API used by the search engine"""
+    def __init__(self, folder):
+        self.folder = folder
+        self.page_size = None
+
+    def only(self, *fields):
+        return self
+
+    def order_by(self, *fields):
+        return self
+
+    def __getitem__(self, s):
+        # Like exchangelib, slicing runs the query and returns an iterator
+        self.folder.slices.append(s)
+        self.folder.page_sizes.append(self.page_size)
+        return self._read(self.folder.messages[s])
+
+    def __iter__(self):
+        return self._read(self.folder.messages)
+
+    def _read(self, messages):
+        self.folder.enter()
+        try:
+            for message in messages:
+                self.folder.read_count += 1
+                yield message
+        finally:
+            self.folder.leave()
+
+
+class MockFolder:
+    """Exchange folder mock that records how many queries run at once"""
+    def __init__(self, name, messages, tracker):
+        self.name = name
+        self.parent = None
+        self.messages = messages
+        self.tracker = tracker
+        self.slices = []
+        self.page_sizes = []
+        self.read_count = 0
+
+    def enter(self):
+        with self.tracker['lock']:
+            self.tracker['active'] += 1
+            self.tracker['peak'] = max(self.tracker['peak'], self.tracker['active'])
+        time.sleep(0.02)
+
+    def leave(self):
+        with self.tracker['lock']:
+            self.tracker['active'] -= 1
+
+    def filter(self, *args, **kwargs):
+        return MockQuerySet(self)
+
+    def all(self):
+        return MockQuerySet(self)
+
+
+class MockMessage:
+    """Minimal Exchange message"""
+    def __init__(self, msg_id, day):
+        self.id = msg_id
+        self.subject = f"Wiadomość {msg_id}"
+        self.sender = None
+        self.datetime_received = datetime(2025, 1, day, tzinfo=timezone.utc)
+        self.is_read = True
+        self.has_attachments = False
+        self.attachments = []
+
+
+class TestConcurrentFolderSearch(unittest.TestCase):
+    """Test bounded parallel folder search"""
+
+    def setUp(self):
+        self.results = []
+        self.tracker = {'lock': threading.Lock(), 'active': 0, 'peak': 0}
+        self.folders = [
+            MockFolder(f"Folder {i}", [MockMessage(f"m{i}-{j}", i + 1) for j in range(3)], self.tracker)
+            for i in range(8)
+        ]
+        self.connection = Mock()
+        self.connection.current_account_config = {"type": "exchange", "name": "Test", "email": "t@example.com"}
+        self.connection.get_folder_with_subfolders.return_value = self.folders
+        self.search_engine = EmailSearchEngine(
+            progress_callback=lambda x: None,
+            result_callback=self.results.append,
+            max_folder_workers=3
+        )
+
+    def test_all_folders_merged(self):
+        """All folder results are merged and sorted newest first"""
+        self.search_engine._threaded_search(self.connection, {'folder_path': 'Inbox'})
+
+        self.assertEqual(self.results[-1]['type'], 'search_complete')
+        self.assertEqual(self.results[-1]['total_count'], 24)
+        dates = [r['datetime_received'] for r in self.results[-1]['results']]
+        self.assertEqual(dates, sorted(dates, reverse=True))
+        self.assertEqual(self.results[-1]['results'][0]['folder_path'], '/Folder 7')
+
+    def test_concurrency_is_capped(self):
+        """No more than max_folder_workers folders are queried at once"""
+        self.search_engine._threaded_search(self.connection, {'folder_path': 'Inbox'})
+
+        self.assertGreater(self.tracker['peak'], 1)
+        self.assertLessEqual(self.tracker['peak'], 3)
+
+    def test_non_exchange_accounts_stay_serial(self):
+        """IMAP/POP3 share one socket so only one worker is used"""
+        workers = self.search_engine._get_folder_worker_count({}, "imap_smtp", 10)
+        self.assertEqual(workers, 1)
+
+    def test_limit_pushed_into_query(self):
+        """The per-folder limit is sliced into the query and caps the page size, old folders stop early"""
+        old_folder = MockFolder("Archiwum", [MockMessage(f"old-{j}", 1) for j in range(50)], self.tracker)
+        new_folder = MockFolder("Nowe", [MockMessage(f"new-{j}", 20) for j in range(50)], self.tracker)
+        tracker = NewestMessageTracker(10)
+
+        new_outcome = self.search_engine._search_single_folder(new_folder, 0, 2, self.connection, None, {}, "exchange", 30, tracker)
+        old_outcome = self.search_engine._search_single_folder(old_folder, 1, 2, self.connection, None, {}, "exchange", 30, tracker)
+
+        self.assertEqual(new_folder.slices, [slice(None, 30)])
+        self.assertEqual(new_folder.page_sizes, [30])
+        self.assertEqual(len(new_outcome['messages']), 30)
+        self.assertEqual(old_outcome['messages'], [])
+        self.assertEqual(old_folder.read_count, 1)
+
+    def test_matches_streamed_during_search(self):
+        """Matches are sent as result_batch events before the final page"""
+        self.search_engine._threaded_search(self.connection, {'folder_path': 'Inbox', 'subject_search': 'Wiadomość m7'})
+
+        batches = [r for r in self.results if r['type'] == 'result_batch']
+        self.assertEqual(self.results[-1]['type'], 'search_complete')
+        self.assertTrue(batches)
+        self.assertTrue(all(row['subject'].startswith('Wiadomość m7') for b in batches for row in b['results']))
+        self.assertLessEqual(batches[-1]['found_count'], 3)
+
+    def test_folder_logging_follows_level(self):
+        """Per-folder lines are DEBUG, the ERROR level silences them"""
+        folder = MockFolder("Faktury", [MockMessage(f"f-{j}", 5) for j in range(3)], self.tracker)
+        logger.set_level("ERROR")
+        try:
+            with patch.object(logger, 'log') as subsystem_log, \
+                    patch('gui.exchange_search_components.search_engine.log') as plain_log:
+                self.search_engine._search_single_folder(folder, 0, 1, self.connection, None, {}, "exchange", 30)
+        finally:
+            logger.set_level("INFO")
+
+        subsystem_log.assert_not_called()
+        plain_log.assert_not_called()
+
+    def test_cancellation(self):
+        """Cancelling stops the search and reports search_cancelled"""
+        self.search_engine.progress_callback = lambda x: self.search_engine.cancel_search()
+        self.search_engine._threaded_search(self.connection, {'folder_path': 'Inbox'})
+
+        self.assertEqual(self.results[-1]['type'], 'search_cancelled')
+
+
+if __name__ == '__main__':
+    unittest.main()
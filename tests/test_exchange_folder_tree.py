@@ -0,0 +1,138 @@
+"""
+Test suite for the cached Exchange folder tree
+The hierarchy is read with one deep traversal, reused by search and folder
+discovery until it expires, and excluded folders are pruned with their subtrees
+"""
+import unittest
+from unittest.mock import Mock, patch
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Mock exchangelib before import
+sys.modules['exchangelib'] = Mock()
+sys.modules['exchangelib'].Q = Mock
+sys.modules['exchangelib'].Message = Mock
+
+# Mock IMAPClient
+sys.modules['imapclient'] = Mock()
+sys.modules['imapclient'].IMAPClient = Mock
+
+from gui.exchange_search_components import exchange_folder_tree
+from gui.exchange_search_components.mail_connection import MailConnection
+from gui.exchange_search_components.search_engine import EmailSearchEngine
+
+
+class MockFolder:
+    """Exchange folder as returned by a deep FindFolder"""
+    def __init__(self, folder_id, name, parent=None, changekey="ck1"):
+        self.id = folder_id
+        self.name = name
+        self.changekey = changekey
+        self.parent_folder_id = Mock(id=parent.id) if parent else None
+        self.folder_class = 'IPF.Note'
+        self.total_count = 1
+
+    @property
+    def children(self):
+        raise AssertionError("folder.children nie powinno być używane")
+
+
+class MockFolderQuerySet(list):
+    def only(self, *fields):
+        return self
+
+
+class CachingRoot(MockFolder):
+    """Root folder keeping the result of its deep traversal in memory like exchangelib"""
+    def __init__(self, server_folders):
+        super().__init__("root", "Top of Information Store")
+        self.server_folders = server_folders
+        self.deep_traversals = 0
+        self._subfolders = None
+
+    def walk(self):
+        if self._subfolders is None:
+            self.deep_traversals += 1
+            self._subfolders = list(self.server_folders)
+        return MockFolderQuerySet(self._subfolders)
+
+    def clear_cache(self):
+        self._subfolders = None
+
+
+class TestExchangeFolderTree(unittest.TestCase):
+    """Test single traversal, caching and exclusions"""
+
+    def setUp(self):
+        self.root = MockFolder("root", "Top of Information Store")
+        self.inbox = MockFolder("inbox", "Inbox", self.root)
+        self.faktury = MockFolder("faktury", "Faktury", self.inbox)
+        self.archiwum = MockFolder("archiwum", "Archiwum", self.inbox)
+        self.stare = MockFolder("stare", "Stare", self.archiwum)
+        self.sent = MockFolder("sent", "Sent Items", self.root)
+        self.folders = [self.inbox, self.faktury, self.archiwum, self.stare, self.sent]
+
+        self.root.walk = Mock(side_effect=lambda: MockFolderQuerySet(self.folders))
+        self.account = Mock(primary_smtp_address="Biuro@example.com", root=self.root, inbox=self.inbox,
+                            sent=self.sent, drafts=None, trash=None, junk=None, outbox=None)
+        self.connection = MailConnection()
+        self.connection.current_account_config = {
+            "type": "exchange", "email": "biuro@example.com", "username": "biuro", "password": "haslo",
+            "exchange_server": "mail.example.com", "domain": "example"
+        }
+
+    def test_search_folders_from_one_traversal(self):
+        """Search and folder discovery share one deep traversal, exclusions prune subtrees"""
+        folders = self.connection.get_folder_with_subfolders(self.account, "Inbox", "Archiwum")
+        available = self.connection.get_available_folders_for_exclusion(self.account, "Inbox")
+
+        self.assertEqual([f.name for f in folders],
+                         ["Top of Information Store", "Inbox", "Faktury", "Sent Items"])
+        self.assertIn("Stare", available)
+        self.assertEqual(self.root.walk.call_count, 1)
+
+    def test_tree_reloaded_after_ttl(self):
+        """An expired tree is read again and changed folders are detected"""
+        cache = self.connection.exchange_folder_trees
+        first = cache.get(self.account)
+
+        self.faktury.changekey = "ck2"
+        with patch.object(exchange_folder_tree.time, 'monotonic', return_value=first.created_at + cache.ttl + 1):
+            second = cache.get(self.account)
+
+        self.assertIsNot(first, second)
+        self.assertEqual(second.changed_folder_ids(first), {"faktury"})
+        self.assertEqual(self.root.walk.call_count, 2)
+
+    def test_expired_tree_read_from_server(self):
+        """Expired or refreshed trees clear the root folder cache and see new folders"""
+        root = CachingRoot([])
+        root.server_folders.append(MockFolder("inbox", "Inbox", root))
+        account = Mock(primary_smtp_address="biuro@example.com", root=root)
+        cache = exchange_folder_tree.ExchangeFolderTreeCache()
+        first = cache.get(account)
+        self.assertIs(cache.get(account), first)
+
+        root.server_folders.append(MockFolder("nowy", "Nowy", root))
+        with patch.object(exchange_folder_tree.time, 'monotonic', return_value=first.created_at + cache.ttl + 1):
+            second = cache.get(account)
+        root.server_folders.append(MockFolder("kolejny", "Kolejny", root))
+        third = cache.get(account, refresh=True)
+
+        self.assertEqual(second.changed_folder_ids(first), {"nowy"})
+        self.assertEqual(third.changed_folder_ids(second), {"kolejny"})
+        self.assertEqual(root.deep_traversals, 3)
+
+    def test_folder_path_from_tree_parents(self):
+        """Folder paths are built from the cached tree"""
+        engine = EmailSearchEngine(progress_callback=lambda x: None, result_callback=lambda x: None)
+        engine._folder_tree = self.connection.get_exchange_folder_tree(self.account)
+
+        self.assertEqual(engine._get_folder_path(self.stare), "/Odebrane/Archiwum/Stare")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+"""
+Test for the two-phase Exchange fetch
+Folders are queried for headers only, attachment metadata is loaded in batches
+only for messages that need it
+"""
+import unittest
+from unittest.mock import Mock, patch
+import sys
+import os
+from datetime import datetime, timezone
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Mock exchangelib before import
+sys.modules['exchangelib'] = Mock()
+sys.modules['exchangelib'].Q = Mock
+sys.modules['exchangelib'].Message = Mock
+
+# Mock IMAPClient
+sys.modules['imapclient'] = Mock()
+sys.modules['imapclient'].IMAPClient = Mock
+
+from gui.exchange_search_components import search_engine as search_engine_module
+from gui.exchange_search_components.search_engine import EmailSearchEngine
+
+
+class MockQuerySet:
+    """Records the fields requested through only()"""
+    def __init__(self, folder):
+        self.folder = folder
+
+    def only(self, *fields):
+        self.folder.requested_fields.append(fields)
+        return self
+
+    def order_by(self, *fields):
+        return self
+
+    def __getitem__(self, s):
+        return self
+
+    def __iter__(self):
+        return iter(self.folder.messages)
+
+
+class MockFolder:
+    def __init__(self, messages):
+        self.name = "Skrzynka odbiorcza"
+        self.parent = None
+        self.messages = messages
+        self.requested_fields = []
+
+    def filter(self, *args, **kwargs):
+        return MockQuerySet(self)
+
+    def all(self):
+        return MockQuerySet(self)
+
+
+class MockMessage:
+    def __init__(self, msg_id, has_attachments):
+        self.id = msg_id
+        self.subject = f"Wiadomość {msg_id}"
+        self.sender = None
+        self.datetime_received = datetime(2025, 3, 1, tzinfo=timezone.utc)
+        self.is_read = True
+        self.has_attachments = has_attachments
+        self.attachments = []
+
+
+class TestExchangeLazyAttachments(unittest.TestCase):
+    """Test metadata-only first pass and batched attachment metadata"""
+
+    def setUp(self):
+        self.engine = EmailSearchEngine(progress_callback=lambda x: None, result_callback=lambda x: None)
+        self.messages = [MockMessage(f"id{n}", has_attachments=n != 2) for n in range(5)]
+        self.account = Mock()
+        self.account.fetch.side_effect = lambda ids, only_fields: [
+            Mock(attachments=[Mock(name_=f"{m.id}.pdf")]) for m in ids
+        ]
+        self.engine._exchange_account = self.account
+
+    def test_first_pass_requests_headers_only(self):
+        """Folder queries don't ask for attachments, messages with attachments are pending"""
+        folder = MockFolder(self.messages)
+
+        outcome = self.engine._search_single_folder(folder, 0, 1, Mock(), None, {}, "exchange", 50)
+
+        self.assertEqual(len(outcome['messages']), 5)
+        self.assertTrue(folder.requested_fields)
+        for fields in folder.requested_fields:
+            self.assertNotIn('attachments', fields)
+        self.assertEqual(self.engine._pending_attachment_ids, {"id0", "id1", "id3", "id4"})
+
+    def test_attachment_metadata_loaded_in_batches(self):
+        """Only pending messages are fetched, in batches, and only once"""
+        self.engine._pending_attachment_ids = {"id0", "id1", "id3", "id4"}
+
+        with patch.object(search_engine_module, 'EXCHANGE_ATTACHMENT_BATCH_SIZE', 3):
+            self.engine._load_exchange_attachment_metadata(self.messages)
+            self.engine._load_exchange_attachment_metadata(self.messages)
+
+        batches = [[m.id for m in call.kwargs['ids']] for call in self.account.fetch.call_args_list]
+        self.assertEqual(batches, [["id0", "id1", "id3"], ["id4"]])
+        self.assertEqual(self.account.fetch.call_args.kwargs['only_fields'], ['attachments'])
+        self.assertEqual(len(self.messages[0].attachments), 1)
+        self.assertEqual(self.messages[2].attachments, [])
+        self.assertEqual(self.engine._pending_attachment_ids, set())
+
+
+if __name__ == '__main__':
+    unittest.main()
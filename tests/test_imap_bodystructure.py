@@ -0,0 +1,148 @@
+"""
+Test suite for the IMAP BODYSTRUCTURE part map
+Parts get their IMAP section numbers and decoded filenames, attachments and
+body text are fetched part by part with BODY.PEEK instead of RFC822,
+attachment filters are resolved from the part map
+"""
+import unittest
+from unittest.mock import Mock, patch
+import sys
+import os
+import base64
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Mock exchangelib before import
+sys.modules['exchangelib'] = Mock()
+sys.modules['exchangelib'].Q = Mock
+sys.modules['exchangelib'].Message = Mock
+
+# Mock IMAPClient
+sys.modules['imapclient'] = Mock()
+sys.modules['imapclient'].IMAPClient = Mock
+
+from gui.exchange_search_components import imap_bodystructure
+from gui.exchange_search_components.imap_bodystructure import parse_bodystructure, decode_part_payload
+from gui.exchange_search_components.search_engine import IMAPMessage, EmailSearchEngine
+
+
+PDF_BYTES = b"%PDF-1.4 faktura " * 100
+
+# multipart/mixed(multipart/alternative(text/plain, text/html), application/pdf, image/jpeg)
+# in the nested-list form returned by IMAPClient
+BODYSTRUCTURE = (
+    [
+        (
+            [
+                (b'text', b'plain', (b'charset', b'iso-8859-2'), None, None, b'quoted-printable', 40, 2, None, None, None, None),
+                (b'text', b'html', (b'charset', b'utf-8'), None, None, b'7bit', 120, 4, None, None, None, None),
+            ],
+            b'alternative', (b'boundary', b'alt'), None, None, None
+        ),
+        (b'application', b'pdf', (b'name', b'=?utf-8?B?ZmFrdHVyYSBuciAxLnBkZg==?='), None, None, b'base64', 2400,
+         None, (b'attachment', (b'filename*', b"utf-8''faktura%20nr%201.pdf")), None, None),
+        (b'image', b'jpeg', (b'name', b'zdj\xc4\x99cie.jpg'), None, None, b'base64', 5000000,
+         None, (b'attachment', (b'filename*0*', b"utf-8''zdj%C4%99", b'filename*1', b'cie.jpg')), None, None),
+    ],
+    b'mixed', (b'boundary', b'mix'), None, None, None
+)
+
+
+class TestPartMap(unittest.TestCase):
+    """Test section numbering, filenames and payload decoding"""
+
+    def test_sections_and_filenames(self):
+        """Nested parts get dotted sections, RFC 2231/2047 names are decoded"""
+        parts = parse_bodystructure(BODYSTRUCTURE)
+
+        self.assertEqual([p.section for p in parts], ['1.1', '1.2', '2', '3'])
+        self.assertEqual([p.content_type for p in parts], ['text/plain', 'text/html', 'application/pdf', 'image/jpeg'])
+        self.assertEqual(parts[2].filename, 'faktura nr 1.pdf')
+        self.assertEqual(parts[3].filename, 'zdjęcie.jpg')
+        self.assertEqual(parts[3].size, 5000000)
+        self.assertEqual([p.is_attachment for p in parts], [False, False, True, True])
+        self.assertEqual(parts[0].charset, 'iso-8859-2')
+
+    def test_single_part_message(self):
+        """A non-multipart message is section 1"""
+        parts = parse_bodystructure((b'text', b'plain', (b'charset', b'utf-8'), None, None, b'7bit', 10, 1))
+        self.assertEqual([(p.section, p.is_body_text) for p in parts], [('1', True)])
+        self.assertEqual(parse_bodystructure(None), [])
+
+    def test_base64_decoded_in_chunks(self):
+        """Chunked decoding gives the same bytes regardless of line breaks"""
+        encoded = base64.encodebytes(PDF_BYTES).replace(b'\n', b'\r\n')
+        with patch.object(imap_bodystructure, 'DECODE_CHUNK_SIZE', 7):
+            self.assertEqual(decode_part_payload(encoded, 'base64'), PDF_BYTES)
+        self.assertEqual(decode_part_payload(b'Za=BF=F3=B3w', 'quoted-printable'), b'Za\xbf\xf3\xb3w')
+
+
+class TestIMAPMessageParts(unittest.TestCase):
+    """Test part-wise fetching of attachments and body"""
+
+    def setUp(self):
+        self.imap = Mock()
+        self.fetched = []
+
+        def fetch(uids, items):
+            self.fetched.append(list(items))
+            data = {}
+            for item in items:
+                section = item[len('BODY.PEEK['):-1]
+                if section == '2':
+                    data[b'BODY[2]'] = base64.encodebytes(PDF_BYTES)
+                elif section == '1.1':
+                    data[b'BODY[1.1]'] = b'Dzie=F1 dobry'
+            return {42: data}
+
+        self.imap.fetch.side_effect = fetch
+        self.message = IMAPMessage(42, "Faktura", None, None, True, True, self.imap, bodystructure=BODYSTRUCTURE)
+
+    def test_attachments_listed_without_download(self):
+        """Listing attachments doesn't fetch anything, content fetches only its part"""
+        attachments = self.message.attachments
+        self.assertEqual([a.name for a in attachments], ['faktura nr 1.pdf', 'zdjęcie.jpg'])
+        self.assertEqual(self.fetched, [])
+
+        self.assertEqual(attachments[0].content, PDF_BYTES)
+        self.assertEqual(self.fetched, [['BODY.PEEK[2]']])
+
+    def test_body_from_text_part(self):
+        """Body comes from the text/plain part decoded with its charset"""
+        self.assertEqual(self.message.body, 'Dzień dobry')
+        self.assertEqual(self.fetched, [['BODY.PEEK[1.1]']])
+
+
+class TestAttachmentFiltersFromParts(unittest.TestCase):
+    """Test name/extension filters resolved without downloading the message"""
+
+    def setUp(self):
+        self.engine = EmailSearchEngine(progress_callback=lambda x: None, result_callback=lambda x: None)
+        self.imap = Mock()
+        self.message = IMAPMessage(42, "Faktura", None, None, True, True, self.imap, bodystructure=BODYSTRUCTURE)
+
+    def test_filters_use_decoded_part_names(self):
+        """RFC 2231/2047 filenames are matched, nothing is fetched"""
+        self.assertTrue(self.engine._check_attachment_filters(self.message, {'attachment_name': 'ZDJĘCIE'}))
+        self.assertTrue(self.engine._check_attachment_filters(
+            self.message, {'attachment_name': 'faktura', 'attachment_extension': 'pdf'}))
+        self.assertFalse(self.engine._check_attachment_filters(
+            self.message, {'attachment_name': 'faktura', 'attachment_extension': 'jpg'}))
+        self.imap.fetch.assert_not_called()
+
+    def test_extension_from_content_type(self):
+        """An attachment without extension in its name matches by content type"""
+        self.assertTrue(self.engine._attachment_matches_filters('skan', 'application/pdf', '', 'pdf'))
+        self.assertFalse(self.engine._attachment_matches_filters('skan', 'image/jpeg', '', 'pdf'))
+        self.assertFalse(self.engine._attachment_matches_filters('skan.txt', 'application/pdf', '', 'pdf'))
+
+    def test_has_attachments_from_part_map(self):
+        """Named non-text parts count as attachments, body text doesn't"""
+        self.assertTrue(self.engine._check_imap_attachments(BODYSTRUCTURE))
+        self.assertFalse(self.engine._check_imap_attachments(
+            (b'text', b'plain', (b'charset', b'utf-8'), None, None, b'7bit', 10, 1)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,314 @@
+"""
+Test suite for the pooled multi-folder IMAP search
+Subfolders come from one LIST (honouring excluded folders), folders are
+searched on separate pooled sessions and lazy loads borrow a session with
+the message folder selected
+"""
+import unittest
+from unittest.mock import Mock, patch
+import imaplib
+import sys
+import os
+import threading
+import time
+import tempfile
+import shutil
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Mock exchangelib before import
+sys.modules['exchangelib'] = Mock()
+sys.modules['exchangelib'].Q = Mock
+sys.modules['exchangelib'].Message = Mock
+
+# Mock IMAPClient
+sys.modules['imapclient'] = Mock()
+sys.modules['imapclient'].IMAPClient = Mock
+
+from gui.exchange_search_components.imap_connection_pool import IMAPConnectionPool
+from gui.exchange_search_components.mail_connection import MailConnection
+from gui.exchange_search_components.search_engine import EmailSearchEngine
+from gui.imap_search_components.imap_connection_pool import IMAPConnectionPool as IMAPTabConnectionPool
+from gui.imap_search_components.pdf_history_manager import PDFHistoryManager as IMAPTabHistoryManager
+from gui.imap_search_components.search_engine import EmailSearchEngine as IMAPTabSearchEngine, IMAPAttachment
+from tools import logger
+
+
+ENVELOPE = Mock(subject=b"Faktura", sender=None, from_=None, date=None)
+
+
+class FakeSession:
+    """IMAP session that tracks its selected folder and concurrent use"""
+
+    def __init__(self, server):
+        self.server = server
+        self.folder = None
+        self.logged_out = False
+        # Set when the server has closed the connection
+        self.dropped = False
+
+    def noop(self):
+        if self.dropped:
+            raise imaplib.IMAP4.abort("socket error: EOF")
+
+    def select_folder(self, folder, readonly=False):
+        self.server.selects.append(folder)
+        self.folder = folder
+        return {b'UIDVALIDITY': 7, b'UIDNEXT': 3}
+
+    def search(self, criteria):
+        if self.dropped:
+            raise imaplib.IMAP4.abort("socket error: EOF")
+        with self.server.lock:
+            self.server.active += 1
+            self.server.peak = max(self.server.peak, self.server.active)
+        time.sleep(0.02)
+        with self.server.lock:
+            self.server.active -= 1
+        return [1, 2]
+
+    def fetch(self, uids, items):
+        if 'ENVELOPE' in items:
+            return {uid: {b'ENVELOPE': ENVELOPE, b'FLAGS': (), b'RFC822.SIZE': 10,
+                          b'BODYSTRUCTURE': (b'text', b'plain', None, None, None, b'7bit', 10, 1)}
+                    for uid in uids}
+        return {uids[0]: {b'BODY[1]': f"treść z {self.folder}".encode()}}
+
+    def logout(self):
+        self.logged_out = True
+
+
+class FakeServer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.selects = []
+        self.sessions = []
+
+    def connect(self):
+        session = FakeSession(self)
+        self.sessions.append(session)
+        return session
+
+
+class TestIMAPConnectionPool(unittest.TestCase):
+    """Test session reuse, folder selection and broken sessions"""
+
+    def setUp(self):
+        self.server = FakeServer()
+        self.pool = IMAPConnectionPool(self.server.connect, max_size=2)
+
+    def test_sessions_reused_and_folder_selected_once(self):
+        with self.pool.connection("INBOX") as imap:
+            first = imap
+        with self.pool.connection("INBOX") as imap:
+            self.assertIs(imap, first)
+        self.assertEqual(self.server.selects, ["INBOX"])
+        self.assertEqual(len(self.server.sessions), 1)
+
+    def test_pool_is_bounded(self):
+        first = self.pool.acquire()
+        second = self.pool.acquire()
+        with self.assertRaises(TimeoutError):
+            self.pool.acquire(timeout=0.01)
+        self.pool.release(first)
+        self.assertIs(self.pool.acquire(timeout=0.01), first)
+        self.pool.release(second)
+
+    def test_broken_session_replaced(self):
+        with self.assertRaises(OSError):
+            with self.pool.connection() as imap:
+                broken = imap
+                raise OSError("połączenie zerwane")
+        self.assertTrue(broken.logged_out)
+        with self.pool.connection() as imap:
+            self.assertIsNot(imap, broken)
+
+        self.pool.close()
+        self.assertTrue(all(session.logged_out for session in self.server.sessions))
+
+    def test_command_error_keeps_session(self):
+        """A failed command (e.g. NO for a missing folder) keeps the session, only the folder is selected again"""
+        for pool_class in (IMAPConnectionPool, IMAPTabConnectionPool):
+            with self.subTest(pool=pool_class.__module__):
+                server = FakeServer()
+                pool = pool_class(server.connect, max_size=2)
+                with self.assertRaises(imaplib.IMAP4.error):
+                    with pool.connection("INBOX") as imap:
+                        first = imap
+                        raise imaplib.IMAP4.error("NO [NONEXISTENT] Unknown Mailbox")
+
+                with pool.connection("INBOX") as imap:
+                    self.assertIs(imap, first)
+                self.assertFalse(first.logged_out)
+                self.assertEqual(server.selects, ["INBOX", "INBOX"])
+                self.assertEqual(len(server.sessions), 1)
+
+    def test_stale_idle_session_checked(self):
+        """A session dropped while idle is found by NOOP and replaced"""
+        with self.pool.connection() as imap:
+            stale = imap
+        stale.dropped = True
+
+        with patch('gui.exchange_search_components.imap_connection_pool.IMAP_IDLE_CHECK_AFTER', 0):
+            session = self.pool.acquire()
+        self.assertIsNot(session, stale)
+        self.assertTrue(stale.logged_out)
+        self.pool.release(session)
+
+    def test_closed_pool_opens_no_sessions(self):
+        self.pool.close()
+        with self.assertRaises(RuntimeError):
+            self.pool.acquire()
+        self.assertEqual(self.server.sessions, [])
+
+
+class TestIMAPSubfolders(unittest.TestCase):
+    """Test recursive IMAP folder discovery"""
+
+    def test_subfolders_with_exclusions(self):
+        connection = MailConnection()
+        connection.current_account_config = {"type": "imap_smtp"}
+        imap = Mock()
+        imap.list_folders.return_value = [
+            ((b'\\HasChildren',), b'/', 'INBOX'),
+            ((b'\\HasNoChildren',), b'/', 'INBOX/Faktury'),
+            ((b'\\HasChildren',), b'/', 'INBOX/Archiwum'),
+            ((b'\\HasNoChildren',), b'/', 'INBOX/Archiwum/2024'),
+            ((b'\\Noselect', b'\\HasChildren'), b'/', 'INBOX/Kontenery'),
+            ((b'\\HasNoChildren',), b'/', 'INBOX/Kontenery/Umowy'),
+            ((b'\\HasNoChildren',), b'/', 'Sent'),
+        ]
+
+        folders = connection.get_folder_with_subfolders(imap, "Skrzynka odbiorcza", "Archiwum")
+
+        self.assertEqual(folders, ['INBOX', 'INBOX/Faktury', 'INBOX/Kontenery/Umowy'])
+
+
+class TestPooledIMAPSearch(unittest.TestCase):
+    """Test parallel folder search and lazy loads over the pool"""
+
+    def setUp(self):
+        self.server = FakeServer()
+        self.results = []
+        self.connection = Mock()
+        self.connection.current_account_config = {"type": "imap_smtp", "name": "Test", "email": "t@example.com"}
+        self.connection.get_folder_with_subfolders.return_value = ['INBOX', 'INBOX/A', 'INBOX/B', 'INBOX/C']
+        self.connection.get_imap_pool.return_value = IMAPConnectionPool(self.server.connect, max_size=3)
+        self.engine = EmailSearchEngine(progress_callback=lambda x: None, result_callback=self.results.append)
+
+    def test_folders_searched_in_parallel(self):
+        """Folders run on separate sessions and same UIDs from different folders stay separate"""
+        self.engine._threaded_search(self.connection, {'folder_path': 'Skrzynka odbiorcza'})
+
+        self.assertEqual(self.results[-1]['type'], 'search_complete')
+        self.assertEqual(self.results[-1]['total_count'], 8)
+        self.assertGreater(self.server.peak, 1)
+        self.assertLessEqual(len(self.server.sessions), 3)
+
+    def test_lazy_load_selects_message_folder(self):
+        """Body of a message is fetched on a session with its own folder selected"""
+        self.engine._imap_pool = self.connection.get_imap_pool.return_value
+        messages = {
+            folder: self.engine._get_imap_messages(folder, self.connection, None, {}, "imap_smtp")
+            for folder in ['INBOX/A', 'INBOX/B']
+        }
+
+        self.assertEqual(messages['INBOX/A'][0].body, "treść z INBOX/A")
+        self.assertEqual(messages['INBOX/B'][0].body, "treść z INBOX/B")
+        self.assertNotEqual(messages['INBOX/A'][0].id, messages['INBOX/B'][0].id)
+
+    def test_dropped_session_retried(self):
+        """A folder searched on a dropped session is searched again on a fresh one"""
+        pool = self.connection.get_imap_pool.return_value
+        self.engine._imap_pool = pool
+        with pool.connection() as imap:
+            imap.dropped = True
+
+        messages = self.engine._get_imap_messages('INBOX', self.connection, None, {}, "imap_smtp")
+
+        self.assertEqual(len(messages), 2)
+        self.assertEqual(len(self.server.sessions), 2)
+        self.assertTrue(self.server.sessions[0].logged_out)
+
+    def test_connection_lost_reported_as_folder_error(self):
+        """When the retry fails too, the folder fails instead of returning no messages"""
+        self.engine._imap_pool = self.connection.get_imap_pool.return_value
+        original_connect = self.server.connect
+
+        def connect_dropped():
+            session = original_connect()
+            session.dropped = True
+            return session
+
+        self.server.connect = connect_dropped
+        self.engine._imap_pool._connect = connect_dropped
+
+        with self.assertRaises(imaplib.IMAP4.abort):
+            self.engine._get_imap_messages('INBOX', self.connection, None, {}, "imap_smtp")
+
+
+class TestIMAPTabAttachmentKeys(unittest.TestCase):
+    """Test that the IMAP tab remembers attachment hashes by server key"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.server = FakeServer()
+        self.connection = Mock()
+        self.connection.current_account_config = {"type": "imap_smtp", "name": "Test", "email": "t@example.com"}
+        self.engine = IMAPTabSearchEngine(progress_callback=lambda x: None, result_callback=lambda x: None)
+        self.engine._imap_pool = IMAPTabConnectionPool(self.server.connect, max_size=2)
+        self.engine.pdf_history_manager = IMAPTabHistoryManager(os.path.join(self.temp_dir, "history.json"))
+
+    def tearDown(self):
+        self.engine.pdf_history_manager.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_server_key_prefix_assigned(self):
+        messages = self.engine._get_imap_messages('INBOX/A', self.connection, None, {}, "imap_smtp")
+
+        self.assertEqual({m.server_key_prefix for m in messages}, {"imap:t@example.com:INBOX/A:7"})
+
+    def test_known_attachment_skipped_without_download(self):
+        """A searched PDF is recognised by its server key on the next search"""
+        downloads = []
+
+        def loader(attachment):
+            downloads.append(attachment.name)
+            return b"%PDF faktura"
+
+        message = Mock(subject="Faktura", has_attachments=True, sender=Mock(email_address="biuro@example.com"))
+        message.attachments = [IMAPAttachment("fv.pdf", loader=loader, server_key="imap:t@example.com:INBOX:7:1:2")]
+        self.engine.pdf_processor.search_in_pdf_attachment = Mock(
+            return_value={'found': False, 'matches': [], 'method': 'text_extraction_failed'})
+
+        self.engine._check_pdf_content(message, "FV/2025/01", skip_searched_pdfs=True)
+        message.attachments = [IMAPAttachment("fv.pdf", loader=loader, server_key="imap:t@example.com:INBOX:7:1:2")]
+        result = self.engine._check_pdf_content(message, "FV/2025/01", skip_searched_pdfs=True)
+
+        self.assertEqual(result['skipped_count'], 1)
+        self.assertEqual(downloads, ["fv.pdf"])
+
+    def test_message_logging_follows_level(self):
+        """Per-batch, per-message and per-attachment lines are DEBUG, the ERROR level silences them"""
+        message = Mock(subject="Faktura", has_attachments=True, sender=Mock(email_address="biuro@example.com"))
+        message.attachments = [IMAPAttachment("fv.pdf", loader=lambda a: b"%PDF faktura")]
+        self.engine.pdf_processor.search_in_pdf_attachment = Mock(
+            return_value={'found': False, 'matches': [], 'method': 'text_extraction_failed'})
+        logger.set_level("ERROR")
+        try:
+            with patch.object(logger, 'log') as subsystem_log, \
+                    patch('gui.imap_search_components.search_engine.log') as plain_log:
+                self.engine._get_imap_messages('INBOX/A', self.connection, None, {}, "imap_smtp")
+                self.engine._check_pdf_content(message, "FV/2025/01")
+        finally:
+            logger.set_level("INFO")
+
+        subsystem_log.assert_not_called()
+        plain_log.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
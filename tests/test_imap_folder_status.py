@@ -0,0 +1,113 @@
+"""
+Test suite for STATUS-based IMAP folder discovery
+Folder details are read without SELECT, STATUS commands are pipelined and
+UIDVALIDITY/UIDNEXT from the previous refresh mark changed folders
+"""
+import unittest
+from unittest.mock import Mock, patch
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Mock exchangelib before import
+sys.modules['exchangelib'] = Mock()
+sys.modules['exchangelib'].Q = Mock
+sys.modules['exchangelib'].Message = Mock
+
+# Mock IMAPClient
+sys.modules['imapclient'] = Mock()
+sys.modules['imapclient'].IMAPClient = Mock
+
+from gui.imap_search_components import imap_folder_status
+from gui.imap_search_components.mail_connection import MailConnection
+
+
+class FakeIMAPConnection:
+    """imaplib connection recording the order of sent and completed commands"""
+
+    def __init__(self):
+        self.events = []
+        self.untagged_responses = {}
+
+    def _command(self, name, *args):
+        tag = f"A{len(self.events)}"
+        self.events.append(('send', args[0]))
+        return tag
+
+    def _command_complete(self, name, tag):
+        self.events.append(('complete', tag))
+        return 'OK', [b'STATUS completed']
+
+
+class TestFolderStatus(unittest.TestCase):
+    """Test folder details from STATUS and change detection"""
+
+    def setUp(self):
+        self.statuses = {
+            'INBOX': {b'MESSAGES': 10, b'UIDNEXT': 11, b'UIDVALIDITY': 1},
+            'INBOX/Faktury': {b'MESSAGES': 3, b'UIDNEXT': 4, b'UIDVALIDITY': 1},
+        }
+        self.imap = Mock()
+        self.imap.has_capability.return_value = False
+        self.imap.xlist_folders.side_effect = Exception("XLIST not supported")
+        self.imap.list_folders.return_value = [
+            ((b'\\HasChildren',), b'/', 'INBOX'),
+            ((b'\\HasNoChildren',), b'/', 'INBOX/Faktury'),
+            ((b'\\Noselect',), b'/', 'Kontenery'),
+        ]
+        self.imap.folder_status.side_effect = lambda name, items: dict(self.statuses[name])
+
+        self.config = {"type": "imap_smtp", "imap_server": "imap.example.com", "username": "biuro"}
+        self.connection = MailConnection()
+        self.connection.current_account_config = self.config
+        # The shared client may be busy with a search, folder refreshes must not touch it
+        self.connection.imap_connection = Mock()
+        self.connection._create_imap_client = Mock(return_value=self.imap)
+
+    def test_details_without_select(self):
+        """Counts come from STATUS on a pooled session, no folder is selected"""
+        folders = self.connection.get_folders_with_details(self.config)
+        self.connection.get_folders_with_details(self.config)
+
+        self.assertEqual([(f['name'], f['message_count'], f['uidnext']) for f in folders],
+                         [('INBOX', 10, 11), ('INBOX/Faktury', 3, 4)])
+        self.imap.select_folder.assert_not_called()
+        self.imap.logout.assert_not_called()
+        self.assertEqual(self.connection._create_imap_client.call_count, 1)
+        self.assertEqual(self.connection.imap_connection.mock_calls, [])
+
+    def test_other_account_uses_temporary_session(self):
+        other = {"type": "imap_smtp", "imap_server": "imap.example.com", "username": "kadry"}
+        self.connection.get_folders_with_details(other)
+
+        self.imap.logout.assert_called_once()
+        self.assertIsNone(self.connection.imap_pool)
+
+    def test_changed_folders_detected(self):
+        """Only folders with a new UIDNEXT/UIDVALIDITY are marked as changed"""
+        self.connection.get_folders_with_details(self.config)
+        unchanged = self.connection.get_folders_with_details(self.config)
+        self.statuses['INBOX/Faktury'] = {b'MESSAGES': 4, b'UIDNEXT': 5, b'UIDVALIDITY': 1}
+        changed = self.connection.get_folders_with_details(self.config)
+
+        self.assertFalse(any(f['changed'] for f in unchanged))
+        self.assertEqual([f['name'] for f in changed if f['changed']], ['INBOX/Faktury'])
+        self.assertIs(self.connection.get_cached_folders_with_details(self.config), changed)
+
+    def test_status_commands_pipelined(self):
+        """All STATUS commands are sent before the first response is awaited"""
+        conn = FakeIMAPConnection()
+        imap = Mock(_imap=conn)
+        imap._normalise_folder.side_effect = lambda name: name
+
+        with patch.object(imap_folder_status, '_parse_status_responses', return_value={}):
+            imap_folder_status.pipelined_folder_status(imap, ['INBOX', 'Sent', 'Trash'])
+
+        self.assertEqual([event for event, _ in conn.events],
+                         ['send', 'send', 'send', 'complete', 'complete', 'complete'])
+
+
+if __name__ == '__main__':
+    unittest.main()
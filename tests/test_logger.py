@@ -0,0 +1,131 @@
+"""
+Test suite for the buffered background log writer and log levels
+Lines are written by a writer thread, rotated logs are compressed,
+subsystem loggers skip formatting of disabled levels
+"""
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import glob
+import gzip
+import tempfile
+import shutil
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from tools import logger
+
+
+class TestBufferedLogger(unittest.TestCase):
+    """Test batched writes, flush and rotation"""
+
+    def setUp(self):
+        logger.flush_logs()
+        self.temp_dir = tempfile.mkdtemp()
+        self.log_file = os.path.join(self.temp_dir, "logs", "app.log")
+        self.console = open(os.devnull, 'w')
+        self.patches = [
+            patch.object(logger, 'LOG_FILE', self.log_file),
+            patch.object(sys, 'stdout', self.console),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        logger.clear_logs()
+        for p in reversed(self.patches):
+            p.stop()
+        self.console.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_lines_written_in_order_after_flush(self):
+        """log() returns immediately, flush_logs() makes the lines readable"""
+        for i in range(200):
+            logger.log(f"wiadomość {i}")
+
+        self.assertTrue(logger.flush_logs())
+        lines = logger.read_logs().splitlines()
+
+        self.assertEqual(len(lines), 200)
+        self.assertTrue(lines[0].endswith("| wiadomość 0"))
+        self.assertTrue(lines[-1].endswith("| wiadomość 199"))
+
+    def test_rotation_compresses_and_limits_backups(self):
+        """Full log files are gzip-compressed, only LOG_BACKUP_COUNT are kept"""
+        with patch.object(logger, 'LOG_MAX_BYTES', 1000), patch.object(logger, 'LOG_BACKUP_COUNT', 2):
+            for batch in range(4):
+                logger.log("x" * 1200)
+                logger.flush_logs()
+            logger.log("ostatnia linia")
+            logger.flush_logs()
+
+        archives = sorted(glob.glob(os.path.join(self.temp_dir, "logs", "app-*.log.gz")))
+        self.assertEqual(len(archives), 2)
+        with gzip.open(archives[-1], "rt", encoding="utf-8") as f:
+            self.assertIn("x" * 1200, f.read())
+        self.assertIn("ostatnia linia", logger.read_logs())
+
+        self.assertTrue(logger.clear_logs())
+        self.assertEqual(glob.glob(os.path.join(self.temp_dir, "logs", "*.gz")), [])
+
+
+class CountingArg:
+    """Argument counting how often it was formatted"""
+
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "arg"
+
+
+class TestLogLevels(unittest.TestCase):
+    """Test level gating and lazy formatting of subsystem loggers"""
+
+    def setUp(self):
+        self.messages = []
+        self.patches = [
+            patch.object(logger, 'log', self.messages.append),
+            patch.object(logger, '_default_level', logger.INFO),
+            patch.dict(logger._subsystem_levels, clear=True),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in reversed(self.patches):
+            p.stop()
+
+    def test_debug_is_not_formatted_when_off(self):
+        """Messages below the level are dropped before formatting"""
+        pdf_log = logger.get_logger('pdf')
+        arg = CountingArg()
+
+        pdf_log.debug("strona %s", arg)
+        pdf_log.info("PDF %s", "faktura.pdf")
+        pdf_log.error("błąd %s", "x")
+
+        self.assertEqual(arg.formatted, 0)
+        self.assertEqual(self.messages, ["PDF faktura.pdf", "[ERROR] błąd x"])
+
+    def test_runtime_level_per_subsystem(self):
+        """A subsystem level overrides the default until all levels are reset"""
+        logger.set_level("DEBUG", "imap")
+        logger.get_logger('imap').debug("UID %d", 7)
+        logger.get_logger('pdf').debug("strona %d", 1)
+        self.assertEqual(self.messages, ["[DEBUG] UID 7"])
+
+        logger.set_level("warning")
+        self.assertEqual(logger.get_level('imap'), logger.WARNING)
+        logger.get_logger('imap').info("pominięte")
+        self.assertEqual(len(self.messages), 1)
+
+        with self.assertRaises(ValueError):
+            logger.level_from_name("VERBOSE")
+
+
+if __name__ == '__main__':
+    unittest.main()
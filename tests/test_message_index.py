@@ -0,0 +1,138 @@
+"""
+Test suite for the local message-metadata index
+Covers incremental IMAP/POP3 sync and local header queries
+"""
+import unittest
+import sys
+import os
+import tempfile
+import shutil
+from datetime import datetime, timezone
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gui.exchange_search_components.message_index import MessageIndex
+
+
+class Sender:
+    def __init__(self, name, email_address):
+        self.name = name
+        self.email_address = email_address
+
+
+class Message:
+    """Parsed message as produced by the search engine"""
+    def __init__(self, uid, subject, day, is_read=False):
+        self.id = uid
+        self.uid = uid
+        self.subject = subject
+        self.sender = Sender("Biuro", "biuro@example.com")
+        self.datetime_received = datetime(2025, 3, day, tzinfo=timezone.utc)
+        self.is_read = is_read
+        self.has_attachments = True
+        self.size = 1000
+
+
+class FakeIMAP:
+    """Minimal IMAPClient stand-in"""
+    def __init__(self):
+        self.uidvalidity = 1
+        self.messages = {1: Message(1, "Faktura 1", 1), 2: Message(2, "Oferta", 2)}
+        self.fetched = []
+
+    @property
+    def uidnext(self):
+        return max(self.messages) + 1 if self.messages else 1
+
+    def select_folder(self, folder, readonly=False):
+        return {b'UIDVALIDITY': self.uidvalidity, b'UIDNEXT': self.uidnext}
+
+    def search(self, criteria):
+        return list(self.messages)
+
+    def fetch(self, uids, items, modifiers=None):
+        return {uid: {b'FLAGS': (b'\\Seen',) if self.messages[uid].is_read else ()} for uid in uids}
+
+    def parse(self, uids):
+        self.fetched.extend(uids)
+        return [self.messages[uid] for uid in uids]
+
+
+class TestMessageIndex(unittest.TestCase):
+    """Test incremental sync and local queries"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.index = MessageIndex(os.path.join(self.temp_dir, "index.db"))
+        self.imap = FakeIMAP()
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_imap_initial_and_incremental_sync(self):
+        """Only new UIDs are fetched on the second sync"""
+        self.index.sync_imap_folder(self.imap, "acc", "INBOX", self.imap.parse)
+        self.assertEqual(self.imap.fetched, [1, 2])
+
+        self.imap.messages[3] = Message(3, "Faktura 3", 3)
+        del self.imap.messages[2]
+        self.imap.messages[1].is_read = True
+        self.index.sync_imap_folder(self.imap, "acc", "INBOX", self.imap.parse)
+
+        self.assertEqual(self.imap.fetched, [1, 2, 3])
+        rows = self.index.query("acc", "INBOX")
+        self.assertEqual([row['msg_key'] for row in rows], ['3', '1'])
+        self.assertTrue(rows[1]['is_read'])
+
+    def test_unchanged_folder_skips_server_search(self):
+        """Same UIDVALIDITY/UIDNEXT means nothing to sync"""
+        self.index.sync_imap_folder(self.imap, "acc", "INBOX", self.imap.parse)
+        changes = self.index.sync_imap_folder(self.imap, "acc", "INBOX", self.imap.parse)
+        self.assertEqual(changes, 0)
+
+    def test_uidvalidity_change_resyncs(self):
+        """Changed UIDVALIDITY drops the folder and fetches everything again"""
+        self.index.sync_imap_folder(self.imap, "acc", "INBOX", self.imap.parse)
+        self.imap.uidvalidity = 2
+        self.index.sync_imap_folder(self.imap, "acc", "INBOX", self.imap.parse)
+        self.assertEqual(self.imap.fetched, [1, 2, 1, 2])
+
+    def test_local_query_filters(self):
+        """Subject, sender, date and unread filters run locally"""
+        self.index.sync_imap_folder(self.imap, "acc", "INBOX", self.imap.parse)
+
+        self.assertEqual(len(self.index.query("acc", "INBOX", subject="FAKTURA")), 1)
+        self.assertEqual(len(self.index.query("acc", "INBOX", sender="biuro")), 2)
+        since = datetime(2025, 3, 2, tzinfo=timezone.utc)
+        self.assertEqual(len(self.index.query("acc", "INBOX", since=since)), 1)
+        self.assertEqual(len(self.index.query("acc", "INBOX", limit=1)), 1)
+
+    def test_pop3_uidl_sync(self):
+        """POP3 messages are keyed by UIDL and removed when gone"""
+        class FakePOP3:
+            lines = [b'1 uid-a', b'2 uid-b']
+
+            def uidl(self):
+                return (b'+OK', self.lines, 0)
+
+        pop3 = FakePOP3()
+        fetched = []
+
+        def fetch(num):
+            fetched.append(num)
+            return Message(num, f"POP {num}", num)
+
+        self.index.sync_pop3_mailbox(pop3, "acc", fetch)
+        pop3.lines = [b'1 uid-b', b'2 uid-c']
+        self.index.sync_pop3_mailbox(pop3, "acc", fetch)
+
+        self.assertEqual(fetched, [1, 2, 2])
+        rows = {row['msg_key']: row for row in self.index.query("acc", "INBOX")}
+        self.assertEqual(set(rows), {'uid-b', 'uid-c'})
+        self.assertEqual(rows['uid-b']['message_num'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
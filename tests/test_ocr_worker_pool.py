@@ -0,0 +1,204 @@
+"""
+Test suite for the persistent OCR worker pool
+Workers load the OCR model once, the pool is reused across batches,
+page images are handed over through shared memory and Tesseract can stay
+loaded in-process (tesserocr)
+"""
+import unittest
+from unittest.mock import Mock, patch
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from multiprocessing import shared_memory
+
+from tools import ocr_engines
+from tools.ocr_engines import OCREngineManager, SharedImage
+
+
+class FakeReader:
+    created = 0
+
+    def __init__(self, languages, gpu=False):
+        FakeReader.created += 1
+
+    def readtext(self, image):
+        return [(None, f"tekst {image}", 0.9)]
+
+
+class FakeImage:
+    """Grayscale image whose pixels are the bytes of a text"""
+
+    mode = 'L'
+
+    def __init__(self, text):
+        self.data = text.encode()
+        self.size = (len(self.data), 1)
+
+    def tobytes(self):
+        return self.data
+
+
+def fake_frombuffer(mode, size, buffer, decoder, raw_mode, stride, orientation):
+    return bytes(buffer[:size[0] * size[1]]).decode()
+
+
+class TestOCRWorkerPool(unittest.TestCase):
+    """Test warm-up, reuse, resize and shutdown of the worker pool"""
+
+    def setUp(self):
+        FakeReader.created = 0
+        fake_easyocr = Mock()
+        fake_easyocr.Reader = FakeReader
+        config = Mock()
+        config.get_engine.return_value = 'easyocr'
+        config.get_use_gpu.return_value = False
+        config.get_multiprocessing.return_value = True
+        config.get_max_workers.return_value = 2
+        # Threads stand in for worker processes so the fake engine is shared
+        self.patches = [
+            patch.dict(sys.modules, {'easyocr': fake_easyocr}),
+            patch.dict(ocr_engines._loaded_engines, clear=True),
+            patch.object(ocr_engines, 'ocr_config', config),
+            patch.object(ocr_engines, 'ProcessPoolExecutor', ThreadPoolExecutor),
+        ]
+        for p in self.patches:
+            p.start()
+        self.manager = OCREngineManager()
+        self.manager.available_engines = {'easyocr': True}
+
+    def tearDown(self):
+        self.manager.shutdown_pool()
+        for p in reversed(self.patches):
+            p.stop()
+
+    def test_model_loaded_once_for_all_batches(self):
+        """Warm-up loads the model, later batches reuse the same pool and model"""
+        self.assertGreaterEqual(self.manager.warm_up(), 1)
+        pool = self.manager._pool
+
+        self.assertEqual(self.manager.perform_ocr_batch(["a", "b", "c"]), ["tekst a", "tekst b", "tekst c"])
+        self.assertEqual(self.manager.perform_ocr_batch(["d", "e"]), ["tekst d", "tekst e"])
+
+        self.assertIs(self.manager._pool, pool)
+        self.assertEqual(FakeReader.created, 1)
+
+    def test_resize_and_shutdown(self):
+        """Resizing recreates a running pool, shutdown stops it"""
+        self.manager.resize_pool(3)
+        self.assertIsNone(self.manager._pool)
+
+        self.manager.warm_up()
+        self.assertEqual(self.manager._pool_key, ('easyocr', False, 3, None))
+
+        self.manager.resize_pool(1)
+        self.assertEqual(self.manager._pool_key, ('easyocr', False, 1, None))
+
+        self.manager.shutdown_pool()
+        self.assertIsNone(self.manager._pool)
+        self.assertEqual(self.manager.perform_ocr_batch(["x", "y"]), ["tekst x", "tekst y"])
+
+    def test_images_passed_through_shared_memory(self):
+        """Workers read page pixels from shared memory, blocks are removed after the batch"""
+        fake_pil = Mock()
+        fake_pil.Image.frombuffer = fake_frombuffer
+        released = []
+        release = ocr_engines._release_shared_block
+
+        def track_release(block):
+            if block is not None:
+                released.append(block.name)
+            release(block)
+
+        submitted = []
+        submit = self.manager._submit_ocr_job
+
+        def track_submit(executor, image, *args):
+            future, block = submit(executor, image, *args)
+            submitted.append(block)
+            return future, block
+
+        with patch.dict(sys.modules, {'PIL': fake_pil}), \
+                patch.object(ocr_engines, '_release_shared_block', track_release), \
+                patch.object(self.manager, '_submit_ocr_job', track_submit):
+            results = self.manager.perform_ocr_batch([FakeImage(f"strona {n}") for n in range(7)])
+
+        self.assertEqual(results, [f"tekst strona {n}" for n in range(7)])
+        self.assertTrue(all(block is not None for block in submitted))
+        self.assertEqual(len(released), 7)
+        for name in released:
+            with self.assertRaises(FileNotFoundError):
+                shared_memory.SharedMemory(name=name)
+
+    def test_unsupported_images_are_not_shared(self):
+        """Images without raw pixel access fall back to pickling"""
+        self.assertIsNone(SharedImage.create("obraz"))
+
+
+class FakeTessAPI:
+    created = []
+
+    def __init__(self, lang, path=None):
+        FakeTessAPI.created.append(lang)
+        self.image = None
+
+    def SetImage(self, image):
+        self.image = image
+
+    def GetUTF8Text(self):
+        return f"tesserocr {self.image}"
+
+    def End(self):
+        pass
+
+
+class TestTesseractBackend(unittest.TestCase):
+    """Test tesserocr backend selection and pytesseract fallback"""
+
+    def setUp(self):
+        FakeTessAPI.created = []
+        self.fake_tesserocr = Mock()
+        self.fake_tesserocr.PyTessBaseAPI = FakeTessAPI
+        self.fake_pytesseract = Mock()
+        self.fake_pytesseract.image_to_string.side_effect = lambda image, lang: f"pytesseract {image}"
+        self.config = Mock()
+        self.patches = [
+            patch.dict(ocr_engines._loaded_engines, clear=True),
+            patch.object(ocr_engines, 'ocr_config', self.config),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in reversed(self.patches):
+            p.stop()
+
+    def test_tesserocr_api_stays_loaded(self):
+        """One API handle per language is reused for all pages"""
+        self.config.get_tesseract_backend.return_value = 'auto'
+        with patch.dict(sys.modules, {'tesserocr': self.fake_tesserocr}):
+            engine = ocr_engines._load_engine('tesseract')
+            texts = [ocr_engines._load_engine('tesseract').image_to_string(page, lang='pol+eng') for page in ("s1", "s2")]
+
+        self.assertIsInstance(engine, ocr_engines.TesserocrEngine)
+        self.assertEqual(texts, ["tesserocr s1", "tesserocr s2"])
+        self.assertEqual(FakeTessAPI.created, ['pol+eng'])
+
+    def test_falls_back_to_pytesseract(self):
+        """Missing tesserocr or an explicit setting selects pytesseract"""
+        for backend, modules in (('tesserocr', {'tesserocr': None}),
+                                 ('pytesseract', {'tesserocr': self.fake_tesserocr})):
+            ocr_engines._loaded_engines.clear()
+            self.config.get_tesseract_backend.return_value = backend
+            modules = dict(modules, pytesseract=self.fake_pytesseract)
+            with patch.dict(sys.modules, modules):
+                engine = ocr_engines._load_engine('tesseract')
+            self.assertIs(engine, self.fake_pytesseract, backend)
+        self.assertEqual(FakeTessAPI.created, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
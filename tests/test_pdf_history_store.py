@@ -0,0 +1,130 @@
+"""
+Test suite for the SQLite PDF search history
+Lookups go by PDF identifier and search text, writes are committed in batches
+and the old JSON history is migrated once
+"""
+import unittest
+from unittest.mock import patch
+import sys
+import os
+import json
+import sqlite3
+import tempfile
+import shutil
+import time
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gui.exchange_search_components import pdf_history_manager as history_module
+from gui.exchange_search_components.pdf_history_manager import PDFHistoryManager
+
+
+class TestPDFHistoryStore(unittest.TestCase):
+    """Test lookup, batched commits and JSON migration"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.json_path = os.path.join(self.temp_dir, "pdf_search_history.json")
+        self.db_path = os.path.join(self.temp_dir, "pdf_search_history.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def count_committed(self):
+        """Count searches visible to another connection"""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM pdf_searches").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_lookup_by_pdf_and_search_text(self):
+        """A PDF is searched per search text, skips are counted"""
+        manager = PDFHistoryManager(self.json_path)
+        manager.mark_pdf_as_searched("faktura.pdf", b"%PDF faktura", "NIP 123", found_matches=["NIP 123"],
+                                     sender_email="biuro@example.com")
+        manager.mark_pdf_as_skipped("faktura.pdf", b"%PDF faktura", "nip 123")
+        manager.mark_pdf_as_skipped("faktura.pdf", b"%PDF faktura", "nip 123")
+
+        self.assertTrue(manager.is_pdf_already_searched("faktura.pdf", b"%PDF faktura", " nip 123 "))
+        self.assertFalse(manager.is_pdf_already_searched("faktura.pdf", b"%PDF faktura", "REGON"))
+        self.assertFalse(manager.is_pdf_already_searched("faktura.pdf", b"%PDF inna", "NIP 123"))
+        self.assertEqual(manager.get_history_stats(), {
+            "unique_searched_pdfs": 1, "unique_skipped_pdfs": 1, "total_searches": 1, "total_skips": 2
+        })
+        self.assertEqual(manager.get_history_for_display()[0]["sender_email"], "biuro@example.com")
+
+        self.assertTrue(manager.clear_history())
+        self.assertEqual(manager.get_history_stats()["unique_searched_pdfs"], 0)
+        manager.close()
+
+    def test_writes_committed_in_batches(self):
+        """Writes stay pending until the batch is full or flush() is called"""
+        manager = PDFHistoryManager(self.json_path)
+        with patch.object(history_module, 'HISTORY_COMMIT_BATCH', 3), \
+                patch.object(history_module, 'HISTORY_COMMIT_INTERVAL', 60):
+            for n in range(4):
+                manager.mark_pdf_as_searched(f"plik{n}.pdf", b"%PDF", "szukaj")
+            self.assertEqual(self.count_committed(), 3)
+
+            manager.flush()
+            self.assertEqual(self.count_committed(), 4)
+        manager.close()
+
+    def test_pending_writes_committed_by_timer(self):
+        """A pending write is committed without a further write, so another connection can write"""
+        manager = PDFHistoryManager(self.json_path)
+        other = PDFHistoryManager(self.json_path)
+        with patch.object(history_module, 'HISTORY_COMMIT_INTERVAL', 0.05):
+            manager.mark_pdf_as_searched("plik.pdf", b"%PDF", "szukaj")
+            deadline = time.monotonic() + 2
+            while self.count_committed() == 0 and time.monotonic() < deadline:
+                time.sleep(0.02)
+            self.assertEqual(self.count_committed(), 1)
+
+            other.mark_pdf_as_searched("inny.pdf", b"%PDF inny", "szukaj")
+            other.flush()
+        self.assertEqual(self.count_committed(), 2)
+        other.close()
+        manager.close()
+
+    def test_json_history_migrated_once(self):
+        """Existing JSON history is imported and the file is kept for the legacy tab"""
+        pdf_id = PDFHistoryManager._get_pdf_identifier(None, "stary.pdf", b"%PDF stary")
+        data = {
+            "searched_pdfs": {
+                pdf_id: {
+                    "attachment_name": "stary.pdf",
+                    "first_searched": "2025-01-02T10:00:00",
+                    "sender_email": None,
+                    "searches": {"umowa": {"last_searched": "2025-01-02T10:00:00", "found_matches": True, "match_count": 2}}
+                }
+            },
+            "skipped_pdfs": {pdf_id: {"attachment_name": "stary.pdf", "first_skipped": "2025-01-03T10:00:00",
+                                      "skip_count": 4, "last_skipped": "2025-01-04T10:00:00"}}
+        }
+        with open(self.json_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+
+        manager = PDFHistoryManager(self.json_path)
+        self.assertTrue(manager.is_pdf_already_searched("stary.pdf", b"%PDF stary", "Umowa"))
+        self.assertEqual(manager.get_history_stats()["total_skips"], 4)
+        self.assertEqual(manager.get_history_for_display(),
+                         [{"filename": "stary.pdf", "date": "2025-01-02 10:00:00", "sender_email": "Brak danych"}])
+        manager.close()
+
+        with open(self.json_path, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), data)
+        self.assertFalse(os.path.exists(self.json_path + ".migrated"))
+
+        # Later changes to the JSON file are not imported a second time
+        with open(self.json_path, 'w', encoding='utf-8') as f:
+            json.dump({"searched_pdfs": {"inny": {"searches": {}}}}, f)
+        manager = PDFHistoryManager(self.json_path)
+        self.assertEqual(manager.get_history_stats()["unique_searched_pdfs"], 1)
+        manager.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
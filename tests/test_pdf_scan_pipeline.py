@@ -0,0 +1,280 @@
+"""
+Test suite for the pipelined PDF attachment scan
+Text extraction and OCR run in separate pools, results come back per message
+"""
+import unittest
+from unittest.mock import Mock, patch
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import os
+import tempfile
+import shutil
+import threading
+from datetime import datetime, timezone
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Mock exchangelib before import
+sys.modules['exchangelib'] = Mock()
+sys.modules['exchangelib'].Q = Mock
+sys.modules['exchangelib'].Message = Mock
+
+# Mock IMAPClient
+sys.modules['imapclient'] = Mock()
+sys.modules['imapclient'].IMAPClient = Mock
+
+from gui.exchange_search_components import pdf_processor as pdf_processor_module
+from gui.exchange_search_components import pdf_text_worker
+from gui.exchange_search_components.pdf_processor import PDFProcessor
+from gui.exchange_search_components import pdf_scan_pipeline
+from gui.exchange_search_components.pdf_scan_pipeline import PDFScanPipeline
+from gui.exchange_search_components import search_engine as search_engine_module
+from gui.exchange_search_components.search_engine import EmailSearchEngine
+from gui.exchange_search_components.pdf_history_manager import PDFHistoryManager
+
+
+PAGES = {
+    b"digital": ["Faktura", "NIP 111-222-33-44"],
+    b"scan": [""],
+}
+
+
+def fake_extract_text_pages(content, stop_at_text=None):
+    return PAGES[content], True
+
+
+class FakePage:
+    def __init__(self, text, extracted):
+        self.text = text
+        self.extracted = extracted
+
+    def extract_text(self):
+        self.extracted.append(self.text)
+        return self.text
+
+
+def fake_pdfplumber(page_texts, extracted):
+    """pdfplumber stand-in opening a PDF with the given page texts"""
+    pdf = Mock(pages=[FakePage(text, extracted) for text in page_texts])
+    pdf.__enter__ = Mock(return_value=pdf)
+    pdf.__exit__ = Mock(return_value=False)
+    return Mock(open=Mock(return_value=pdf))
+
+
+class MockAttachment:
+    def __init__(self, name, content):
+        self.name = name
+        self.content = content
+
+
+class MockMessage:
+    def __init__(self, msg_id, attachments):
+        self.id = msg_id
+        self.subject = f"Wiadomość {msg_id}"
+        self.sender = None
+        self.datetime_received = datetime(2025, 2, 1, tzinfo=timezone.utc)
+        self.has_attachments = bool(attachments)
+        self.attachments = attachments
+
+
+class TestPDFScanPipeline(unittest.TestCase):
+    """Test stage routing and message-level results"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.processor = PDFProcessor()
+        self.ocr_calls = []
+
+        def fake_ocr(content, search_text, name, content_hash=None, text_pages=None):
+            self.ocr_calls.append(name)
+            return {'found': True, 'matches': ['OCR 111-222-33-44'], 'method': 'ocr', 'pages': ['OCR 111-222-33-44']}
+
+        self.processor.search_with_ocr = fake_ocr
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _load(self, message):
+        attachments = [(a, a.name, a.content, None) for a in message.attachments]
+        return attachments, 0
+
+    @patch.object(pdf_processor_module, 'HAVE_OCR', True)
+    @patch.object(pdf_processor_module, 'HAVE_PDFPLUMBER', True)
+    @patch.object(pdf_processor_module, 'extract_text_pages', fake_extract_text_pages)
+    def test_text_layer_hit_skips_ocr(self):
+        """Only PDFs without a text hit are sent to OCR"""
+        messages = [
+            MockMessage(1, [MockAttachment("a.pdf", b"digital")]),
+            MockMessage(2, [MockAttachment("b.pdf", b"scan")]),
+        ]
+        pipeline = PDFScanPipeline(self.processor, use_processes=False)
+
+        outcomes = {m.id: o for m, o in pipeline.scan(messages, self._load, "1112223344")}
+
+        self.assertEqual(set(outcomes), {1, 2})
+        self.assertEqual(outcomes[1]['attachments'][0][2]['method'], 'text_extraction_normalized')
+        self.assertEqual(outcomes[2]['attachments'][0][2]['method'], 'ocr')
+        self.assertEqual(self.ocr_calls, ["b.pdf"])
+
+    def test_early_result_and_cancellation(self):
+        """Messages that can't be scanned return their early result; cancel stops the scan"""
+        pipeline = PDFScanPipeline(self.processor, use_processes=False)
+        outcomes = list(pipeline.scan([MockMessage(1, [])], lambda m: {'found': False, 'method': 'no_attachments_flag'}, "x"))
+        self.assertEqual(outcomes[0][1]['early_result']['method'], 'no_attachments_flag')
+
+        release = threading.Event()
+
+        def slow_load(message):
+            release.wait(2)
+            return [], 0
+
+        cancelled = PDFScanPipeline(self.processor, is_cancelled=lambda: True, use_processes=False)
+        self.assertEqual(list(cancelled.scan([MockMessage(1, [])], slow_load, "x")), [])
+        release.set()
+
+    @patch.object(pdf_processor_module, 'HAVE_OCR', False)
+    @patch.object(pdf_processor_module, 'HAVE_PDFPLUMBER', True)
+    @patch.object(pdf_processor_module, 'extract_text_pages', fake_extract_text_pages)
+    @patch('gui.exchange_search_components.search_engine.PDFScanPipeline')
+    def test_engine_auto_saves_matches(self, pipeline_class):
+        """Engine keeps auto-save into monthly folders for pipeline matches"""
+        pipeline_class.side_effect = lambda processor, **kwargs: PDFScanPipeline(processor, use_processes=False, **kwargs)
+        engine = EmailSearchEngine(progress_callback=lambda x: None, result_callback=lambda x: None)
+        engine.auto_save_pdfs = True
+        engine.pdf_save_directory = self.temp_dir
+        messages = [
+            MockMessage(1, [MockAttachment("fv.pdf", b"digital")]),
+            MockMessage(2, [MockAttachment("skan.pdf", b"scan")]),
+        ]
+
+        results = engine._scan_pdf_messages(messages, "111-222-33-44", False, {})
+
+        self.assertTrue(results[1]['found'])
+        self.assertFalse(results[2]['found'])
+        self.assertEqual(engine.saved_pdf_count, 1)
+        saved = [files for _, _, files in os.walk(self.temp_dir) if files]
+        self.assertEqual(saved, [["fv.pdf"]])
+
+
+class TestSharedExtractionPool(unittest.TestCase):
+    """Test that text extraction processes are started once for many scans"""
+
+    def tearDown(self):
+        pdf_scan_pipeline.shutdown_extraction_pool()
+
+    @patch.object(pdf_processor_module, 'HAVE_OCR', False)
+    @patch.object(pdf_processor_module, 'HAVE_PDFPLUMBER', True)
+    @patch.object(pdf_processor_module, 'extract_text_pages', fake_extract_text_pages)
+    def test_pool_reused_across_scans(self):
+        with patch.object(pdf_scan_pipeline, 'ProcessPoolExecutor',
+                          side_effect=lambda max_workers: ThreadPoolExecutor(max_workers)) as pool_class:
+            for _ in range(3):
+                pipeline = PDFScanPipeline(PDFProcessor(), extraction_workers=2)
+                message = MockMessage(1, [MockAttachment("a.pdf", b"digital")])
+                outcomes = list(pipeline.scan([message], lambda m: ([(a, a.name, a.content, None) for a in m.attachments], 0),
+                                              "111-222-33-44"))
+                self.assertTrue(outcomes[0][1]['attachments'][0][2]['found'])
+
+            self.assertEqual(pool_class.call_count, 1)
+            pdf_scan_pipeline.get_extraction_pool(3)
+            self.assertEqual(pool_class.call_count, 2)
+
+
+class TestPageByPageExtraction(unittest.TestCase):
+    """Test that pipeline extraction stops at the first page with a hit"""
+
+    PAGE_TEXTS = ["Umowa najmu", "NIP 111-222-33-44", "Załącznik", "Podpisy"]
+
+    def test_extraction_stops_at_hit(self):
+        extracted = []
+        with patch.object(pdf_text_worker, 'pdfplumber', fake_pdfplumber(self.PAGE_TEXTS, extracted), create=True):
+            pages, complete = pdf_processor_module.extract_text_pages(b"pdf", "1112223344")
+            self.assertEqual(pages, self.PAGE_TEXTS[:2])
+            self.assertFalse(complete)
+
+            pages, complete = pdf_processor_module.extract_text_pages(b"pdf")
+            self.assertEqual(pages, self.PAGE_TEXTS)
+            self.assertTrue(complete)
+
+    @patch.object(pdf_processor_module, 'HAVE_OCR', False)
+    @patch.object(pdf_processor_module, 'HAVE_PDFPLUMBER', True)
+    def test_partial_text_not_cached_or_indexed(self):
+        """A hit found before the last page is reported without pages, the cache only gets full documents"""
+        text_cache = Mock()
+        text_cache.get.return_value = None
+        processor = PDFProcessor(text_cache=text_cache)
+        message = MockMessage(1, [MockAttachment("umowa.pdf", b"pdf")])
+        extracted = []
+
+        with patch.object(pdf_text_worker, 'pdfplumber', fake_pdfplumber(self.PAGE_TEXTS, extracted), create=True):
+            pipeline = PDFScanPipeline(processor, use_processes=False)
+            outcomes = list(pipeline.scan([message], lambda m: ([(a, a.name, a.content, None) for a in m.attachments], 0),
+                                          "111-222-33-44"))
+            result = outcomes[0][1]['attachments'][0][2]
+            self.assertTrue(result['found'])
+            self.assertNotIn('pages', result)
+            self.assertEqual(len(extracted), 2)
+            text_cache.put.assert_not_called()
+
+            pipeline = PDFScanPipeline(processor, use_processes=False, find_all_matches=True)
+            outcomes = list(pipeline.scan([message], lambda m: ([(a, a.name, a.content, None) for a in m.attachments], 0),
+                                          "111-222-33-44"))
+            self.assertEqual(outcomes[0][1]['attachments'][0][2]['pages'], self.PAGE_TEXTS)
+            self.assertEqual(text_cache.put.call_count, 1)
+
+
+class CountingAttachment:
+    """Exchange-like attachment counting content downloads"""
+
+    def __init__(self, name, content, attachment_id):
+        self.name = name
+        self._content = content
+        self.attachment_id = Mock(id=attachment_id)
+        self.downloads = 0
+
+    @property
+    def content(self):
+        self.downloads += 1
+        return self._content
+
+
+class TestAttachmentIdentity(unittest.TestCase):
+    """Test that attachments are hashed once and recognised by server ids"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.history = PDFHistoryManager(os.path.join(self.temp_dir, "history.json"))
+        self.engine = EmailSearchEngine(progress_callback=lambda x: None, result_callback=lambda x: None)
+        self.engine.pdf_history_manager = self.history
+
+    def tearDown(self):
+        self.history.close()
+        shutil.rmtree(self.temp_dir)
+
+    @patch.object(pdf_processor_module, 'HAVE_OCR', False)
+    @patch.object(pdf_processor_module, 'HAVE_PDFPLUMBER', True)
+    @patch.object(pdf_processor_module, 'extract_text_pages', fake_extract_text_pages)
+    @patch('gui.exchange_search_components.search_engine.PDFScanPipeline')
+    def test_known_attachment_skipped_without_download(self, pipeline_class):
+        """A searched attachment is hashed once and later skipped by its server key"""
+        pipeline_class.side_effect = lambda processor, **kwargs: PDFScanPipeline(processor, use_processes=False, **kwargs)
+        attachment = CountingAttachment("fv.pdf", b"digital", "AAMkAttach1")
+        message = MockMessage("AAMkItem1", [attachment])
+        message.sender = Mock(email_address="biuro@example.com")
+
+        with patch('gui.exchange_search_components.search_engine.compute_content_hash',
+                   wraps=search_engine_module.compute_content_hash) as hasher:
+            results = self.engine._scan_pdf_messages([message], "111-222-33-44", True, {})
+        self.assertTrue(results["AAMkItem1"]['found'])
+        self.assertEqual(hasher.call_count, 1)
+        self.assertTrue(self.history.get_content_hash("ews:AAMkItem1:AAMkAttach1"))
+
+        downloads = attachment.downloads
+        results = self.engine._scan_pdf_messages([message], "111-222-33-44", True, {})
+        self.assertFalse(results["AAMkItem1"]['found'])
+        self.assertEqual(results["AAMkItem1"]['skipped_count'], 1)
+        self.assertEqual(attachment.downloads, downloads)
+
+if __name__ == '__main__':
+    unittest.main()
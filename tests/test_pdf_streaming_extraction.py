@@ -0,0 +1,155 @@
+"""
+Test suite for streaming (early-exit) PDF text extraction and page-lazy OCR
+Extraction stops at the first page with a match and reports hit page numbers,
+OCR only renders pages without a text layer
+"""
+import unittest
+from unittest.mock import Mock, patch
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gui.exchange_search_components import pdf_processor as pdf_processor_module
+from gui.exchange_search_components.pdf_processor import PDFProcessor
+
+
+class FakePage:
+    def __init__(self, text, extracted):
+        self.text = text
+        self.extracted = extracted
+
+    def extract_text(self):
+        self.extracted.append(self.text)
+        return self.text
+
+
+class FakePDF:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class TestStreamingExtraction(unittest.TestCase):
+    """Test early exit and page numbers of hits"""
+
+    def setUp(self):
+        self.extracted = []
+        texts = ["Wyciąg bankowy", "Przelew NIP 123-456-78-90", "Saldo", "NIP 1234567890"]
+        pages = [FakePage(text, self.extracted) for text in texts]
+        fake_pdfplumber = Mock()
+        fake_pdfplumber.open.side_effect = lambda stream: FakePDF(pages)
+        self.patches = [
+            patch.object(pdf_processor_module, 'HAVE_PDFPLUMBER', True),
+            patch.object(pdf_processor_module, 'pdfplumber', fake_pdfplumber, create=True),
+        ]
+        for p in self.patches:
+            p.start()
+        self.processor = PDFProcessor()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    def test_stops_at_first_matching_page(self):
+        """Pages after the first hit are not extracted"""
+        result = self.processor._search_with_text_extraction(b"pdf", "1234567890", "wyciag.pdf")
+
+        self.assertTrue(result['found'])
+        self.assertEqual(result['match_pages'], [2])
+        self.assertEqual(len(self.extracted), 2)
+        self.assertNotIn('pages', result)
+
+    def test_find_all_matches_reads_every_page(self):
+        """All pages are extracted and every hit page is reported"""
+        result = self.processor._search_with_text_extraction(b"pdf", "1234567890", "wyciag.pdf", find_all_matches=True)
+
+        self.assertTrue(result['found'])
+        self.assertEqual(result['match_pages'], [2, 4])
+        self.assertEqual(len(self.extracted), 4)
+        self.assertEqual(len(result['pages']), 4)
+
+
+class FakeImage:
+    def __init__(self, page_num, closed):
+        self.page_num = page_num
+        self.closed = closed
+
+    def close(self):
+        self.closed.append(self.page_num)
+
+
+class TestPageLazyOCR(unittest.TestCase):
+    """Test windowed OCR rendering"""
+
+    def setUp(self):
+        self.rendered = []
+        self.closed = []
+
+        def convert_from_bytes(content, dpi, poppler_path, first_page, last_page):
+            self.rendered.append((first_page, last_page))
+            return [FakeImage(n, self.closed) for n in range(first_page, last_page + 1)]
+
+        fake_tesseract = Mock()
+        fake_tesseract.image_to_string.side_effect = lambda image, lang: "NIP 5250001122" if image.page_num == 6 else "tekst"
+        self.patches = [
+            patch.object(pdf_processor_module, 'HAVE_OCR', True),
+            patch.object(pdf_processor_module, 'HAVE_ADVANCED_OCR', False),
+            patch.object(pdf_processor_module, 'convert_from_bytes', convert_from_bytes, create=True),
+            patch.object(pdf_processor_module, 'pdfinfo_from_bytes', lambda content, poppler_path: {"Pages": 20}, create=True),
+            patch.object(pdf_processor_module, 'pytesseract', fake_tesseract, create=True),
+        ]
+        for p in self.patches:
+            p.start()
+        self.processor = PDFProcessor()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+
+    def test_renders_windows_until_first_match(self):
+        """Only windows up to the hit are rendered and every image is released"""
+        result = self.processor._search_with_ocr(b"pdf", "5250001122", "skan.pdf")
+
+        self.assertTrue(result['found'])
+        self.assertEqual(result['match_pages'], [6])
+        self.assertEqual(self.rendered, [(1, 4), (5, 8)])
+        self.assertEqual(sorted(self.closed), list(range(1, 9)))
+        self.assertNotIn('pages', result)
+
+    def test_ocr_only_pages_without_text_layer(self):
+        """Pages with a text layer keep their text, only image-only pages are rendered"""
+        text_pages = ["Umowa najmu lokalu użytkowego nr 5/2025"] * 20
+        text_pages[5] = ""
+        text_pages[6] = "  "
+        text_pages[12] = ""
+
+        result = self.processor._search_with_ocr(b"pdf", "5250001122", "umowa.pdf", find_all_matches=True, text_pages=text_pages)
+
+        self.assertTrue(result['found'])
+        self.assertEqual(result['match_pages'], [6])
+        self.assertEqual(self.rendered, [(6, 7), (13, 13)])
+        self.assertEqual(result['pages'][0], text_pages[0])
+        self.assertEqual(result['pages'][12], "tekst")
+
+    def test_text_layer_everywhere_skips_ocr(self):
+        """A PDF whose every page has a text layer is never rendered"""
+        text_pages = ["Umowa najmu lokalu użytkowego nr 5/2025"] * 3
+        with patch.object(pdf_processor_module, 'HAVE_PDFPLUMBER', True), \
+                patch.object(self.processor, '_search_with_text_extraction',
+                             return_value={'found': False, 'matches': [], 'method': 'text_extraction', 'pages': text_pages}):
+            result = self.processor.search_in_pdf_attachment(Mock(content=b"pdf"), "5250001122", "umowa.pdf")
+
+        self.assertFalse(result['found'])
+        self.assertEqual(self.rendered, [])
+        self.assertEqual(result['pages'], text_pages)
+
+
+if __name__ == '__main__':
+    unittest.main()
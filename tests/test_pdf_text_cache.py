@@ -0,0 +1,74 @@
+"""
+Test suite for the content-addressed PDF text cache
+Cached page text must answer new search strings without re-parsing the PDF
+"""
+import unittest
+import sys
+import os
+import tempfile
+import shutil
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gui.exchange_search_components.pdf_processor import PDFProcessor
+from gui.exchange_search_components.pdf_text_cache import PDFTextCache
+
+
+class Attachment:
+    def __init__(self, content):
+        self.content = content
+
+
+class TestPDFTextCache(unittest.TestCase):
+    """Test cache storage, eviction and use by PDFProcessor"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache = PDFTextCache(os.path.join(self.temp_dir, "cache.db"))
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_put_and_get_by_method_engine_dpi(self):
+        """Entries are keyed by hash, method, engine and DPI"""
+        content_hash = PDFTextCache.compute_hash(b"%PDF-1.4 faktura")
+        self.cache.put(content_hash, 'text', ["Strona 1", "Strona 2"])
+        self.cache.put(content_hash, 'ocr', ["OCR 1"], engine='tesseract', dpi=200)
+
+        self.assertEqual(self.cache.get(content_hash, 'text'), ["Strona 1", "Strona 2"])
+        self.assertEqual(self.cache.get(content_hash, 'ocr', 'tesseract', 200), ["OCR 1"])
+        self.assertIsNone(self.cache.get(content_hash, 'ocr', 'easyocr', 200))
+        self.assertIsNone(self.cache.get("0" * 64, 'text'))
+
+    def test_lru_eviction(self):
+        """Least recently used entries are removed above the size limit"""
+        self.cache.max_size_bytes = 250
+        self.cache.put("a", 'text', ["x" * 100])
+        self.cache.put("b", 'text', ["y" * 100])
+        self.cache.get("a", 'text')
+        self.cache.put("c", 'text', ["z" * 100])
+
+        self.assertIsNotNone(self.cache.get("a", 'text'))
+        self.assertIsNone(self.cache.get("b", 'text'))
+        self.assertIsNotNone(self.cache.get("c", 'text'))
+
+    def test_processor_searches_cached_text(self):
+        """Cached pages are searched without opening the PDF"""
+        content = b"not a real pdf"
+        content_hash = PDFTextCache.compute_hash(content)
+        self.cache.put(content_hash, 'text', ["Faktura VAT nr FV/1/2025", "NIP 123-456-78-90"])
+
+        processor = PDFProcessor(text_cache=self.cache)
+        result = processor.search_in_pdf_attachment(Attachment(content), "fv/1/2025", "faktura.pdf")
+        self.assertTrue(result['found'])
+        self.assertEqual(result['method'], 'text_extraction')
+
+        result = processor.search_in_pdf_attachment(Attachment(content), "1234567890", "faktura.pdf")
+        self.assertTrue(result['found'])
+        self.assertEqual(result['method'], 'text_extraction_normalized')
+
+
+if __name__ == '__main__':
+    unittest.main()
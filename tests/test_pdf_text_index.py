@@ -0,0 +1,130 @@
+"""
+Test suite for the full-text index of PDF attachment text
+Covers normalized number lookups and the "search index only" mode
+"""
+import unittest
+from unittest.mock import Mock
+import sys
+import os
+import tempfile
+import shutil
+from datetime import datetime, timezone
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Mock exchangelib before import
+sys.modules['exchangelib'] = Mock()
+sys.modules['exchangelib'].Q = Mock
+sys.modules['exchangelib'].Message = Mock
+
+# Mock IMAPClient
+sys.modules['imapclient'] = Mock()
+sys.modules['imapclient'].IMAPClient = Mock
+
+from gui.exchange_search_components.search_engine import EmailSearchEngine, IMAPSender
+from gui.exchange_search_components.pdf_text_cache import PDFTextCache
+from gui.exchange_search_components.pdf_text_index import PDFTextIndex, normalize_text
+
+
+class MockAttachment:
+    def __init__(self, name, content):
+        self.name = name
+        self.content = content
+
+
+class MockMessage:
+    def __init__(self, msg_id, subject, attachments):
+        self.id = msg_id
+        self.subject = subject
+        self.sender = IMAPSender("Biuro", "biuro@example.com")
+        self.datetime_received = datetime(2025, 5, 1, tzinfo=timezone.utc)
+        self.has_attachments = True
+        self.attachments = attachments
+
+
+class TestPDFTextIndex(unittest.TestCase):
+    """Test index lookups and index-only search"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.index = PDFTextIndex(os.path.join(self.temp_dir, "index.db"))
+        self.cache = PDFTextCache(os.path.join(self.temp_dir, "cache.db"))
+
+    def tearDown(self):
+        self.index.close()
+        self.cache.close()
+        shutil.rmtree(self.temp_dir)
+
+    def make_connection(self, account_type="exchange"):
+        connection = Mock()
+        connection.current_account_config = None
+        connection.get_exchange_account_config.return_value = {"type": account_type, "email": "biuro@example.com"}
+        return connection
+
+    def test_index_search_limited_to_account_and_folders(self):
+        """Index-only search skips other accounts, excluded folders and folders outside the IMAP selection"""
+        self.index.index_document("h1", ["NIP 525-000-11-22"])
+        for account, message_key, folder in [
+            ("biuro@example.com", "m1", "/Odebrane/Faktury"),
+            ("inne@example.com", "m2", "/Odebrane/Faktury"),
+            ("biuro@example.com", "m3", "/Archiwum/2024"),
+            ("biuro@example.com", "m4", "Sent"),
+        ]:
+            self.index.add_occurrence("h1", account, message_key, "fv.pdf", folder=folder, subject=message_key)
+
+        results = []
+        engine = EmailSearchEngine(progress_callback=lambda x: None, result_callback=results.append)
+        engine.pdf_text_index = self.index
+
+        criteria = {'pdf_search_text': '5250001122', 'excluded_folders': 'Archiwum'}
+        engine._threaded_index_search(self.make_connection(), criteria, 0, 50)
+        self.assertEqual(sorted(r['subject'] for r in results[-1]['results']), ["m1", "m4"])
+
+        criteria = {'pdf_search_text': '5250001122', 'folder_path': 'Sent'}
+        engine._threaded_index_search(self.make_connection("imap_smtp"), criteria, 0, 50)
+        self.assertEqual([r['subject'] for r in results[-1]['results']], ["m4"])
+
+    def test_normalize_text(self):
+        """Digit separators are removed, other text is kept"""
+        self.assertEqual(normalize_text("NIP 123-456-78-90"), "nip 1234567890")
+        self.assertEqual(normalize_text("FV/12/2025"), "fv/122025")
+
+    def test_search_formatted_numbers(self):
+        """NIP written with separators is found by plain digits and vice versa"""
+        self.index.index_document("h1", ["Faktura FV/12/2025", "NIP 123-456-78-90"])
+        self.index.add_occurrence("h1", "acc", "m1", "faktura.pdf", folder="Faktury", subject="Faktura")
+
+        for query in ("1234567890", "123 456 78 90", "fv/12/2025"):
+            results = self.index.search(query)
+            self.assertEqual(len(results), 1, query)
+        self.assertEqual(self.index.search("1234567890")[0]['pages'], [2])
+        self.assertEqual(self.index.search("9999999999"), [])
+
+    def test_checked_pdfs_are_indexed_and_found_offline(self):
+        """Attachments seen by _check_pdf_content are answered by index-only search"""
+        content = b"pdf bytes"
+        self.cache.put(PDFTextCache.compute_hash(content), 'text', ["Nabywca NIP: 525-000-11-22"])
+
+        results = []
+        engine = EmailSearchEngine(progress_callback=lambda x: None, result_callback=results.append)
+        engine.pdf_processor.text_cache = self.cache
+        engine.pdf_text_index = self.index
+        engine._index_account_id = "biuro@example.com"
+        message = MockMessage("msg-1", "Faktura maj", [MockAttachment("fv.pdf", content)])
+
+        match = engine._check_pdf_content(message, "525-000-11-22", folder_path="Odebrane/Faktury")
+        self.assertTrue(match['found'])
+
+        engine._threaded_index_search(self.make_connection(), {'pdf_search_text': '5250001122'}, 0, 50)
+
+        self.assertEqual(results[-1]['type'], 'search_complete')
+        self.assertEqual(results[-1]['total_count'], 1)
+        row = results[-1]['results'][0]
+        self.assertEqual(row['subject'], "Faktura maj")
+        self.assertEqual(row['folder_path'], "Odebrane/Faktury")
+        self.assertEqual(row['pdf_match_info']['attachments'][0]['name'], "fv.pdf")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Test suite for the results list model
+Sorting, filtering and streamed inserts work on model rows, the results
+view only shows a window of them
+"""
+import unittest
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from gui.exchange_search_components.results_model import ResultListModel
+
+
+def make_row(hours_ago, sender, subject="Faktura"):
+    return {
+        'datetime_received': datetime(2025, 1, 10, tzinfo=timezone.utc) - timedelta(hours=hours_ago),
+        'sender': sender,
+        'subject': subject,
+        'folder_path': '/Odebrane',
+        'is_read': True,
+        'has_attachments': False,
+        'attachment_count': 0,
+    }
+
+
+class TestResultListModel(unittest.TestCase):
+    """Test the sorted, filtered view of result rows"""
+
+    def setUp(self):
+        self.model = ResultListModel()
+        self.model.set_rows([make_row(i, f"nadawca{i}@example.com") for i in range(1000)])
+
+    def test_window_and_sorting(self):
+        """Only the requested window is returned, sorting the same column twice reverses it"""
+        self.assertEqual([r['sender'] for r in self.model.window(10, 2)],
+                         ["nadawca10@example.com", "nadawca11@example.com"])
+
+        self.model.sort('Date')
+        self.assertEqual(self.model[0]['sender'], "nadawca0@example.com")
+        self.model.sort('Date')
+        self.assertEqual(self.model[0]['sender'], "nadawca999@example.com")
+
+    def test_filter_keeps_sorting(self):
+        """The filter narrows the view without losing rows or the sort order"""
+        self.model.sort('Sender', reverse=True)
+        self.model.set_filter("NADAWCA99")
+
+        self.assertEqual([r['sender'] for r in self.model.window(0, 3)],
+                         ["nadawca99@example.com", "nadawca999@example.com", "nadawca998@example.com"])
+        self.assertEqual(len(self.model), 11)
+        self.model.set_filter("")
+        self.assertEqual(len(self.model), 1000)
+
+    def test_streamed_rows_inserted_in_order(self):
+        """Rows of a running search go to their place, hidden rows are kept for later"""
+        model = ResultListModel()
+        model.set_filter("example")
+
+        self.assertEqual(model.insert_sorted(make_row(5, "a@example.com")), 0)
+        self.assertEqual(model.insert_sorted(make_row(1, "b@example.com")), 0)
+        self.assertEqual(model.insert_sorted(make_row(3, "c@example.com")), 1)
+        self.assertIsNone(model.insert_sorted(make_row(0, "d@other.pl")))
+
+        self.assertEqual([r['sender'] for r in model.view], ["b@example.com", "c@example.com", "a@example.com"])
+        self.assertEqual(len(model.rows), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Test for the search session (result cursor) used for pagination
+Page changes must be served from the session without searching again.
+"""
+import unittest
+from unittest.mock import Mock
+import sys
+import os
+from datetime import datetime, timezone
+
+# Add parent directory to path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# Mock exchangelib before import
+sys.modules['exchangelib'] = Mock()
+sys.modules['exchangelib'].Q = Mock
+sys.modules['exchangelib'].Message = Mock
+
+# Mock IMAPClient
+sys.modules['imapclient'] = Mock()
+sys.modules['imapclient'].IMAPClient = Mock
+
+from gui.exchange_search_components.search_engine import EmailSearchEngine
+from gui.exchange_search_components.search_session import SearchSession, ResultStream
+
+
+class MockMessage:
+    """Minimal Exchange message"""
+    def __init__(self, msg_id):
+        self.id = msg_id
+        self.subject = f"Wiadomość {msg_id}"
+        self.sender = None
+        self.datetime_received = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        self.is_read = True
+        self.has_attachments = False
+        self.attachments = []
+
+
+class TestSearchSession(unittest.TestCase):
+    """Test SearchSession paging and validity checks"""
+
+    def setUp(self):
+        self.criteria = {'subject_search': 'faktura', 'pdf_save_directory': '/tmp/a'}
+        self.messages = [MockMessage(i) for i in range(25)]
+        self.session = SearchSession(
+            self.criteria, 10, self.messages,
+            message_to_folder_map={3: '/Odebrane/Faktury'},
+            pdf_matches={3: {'found': True}}
+        )
+
+    def test_paging(self):
+        """Pages are sliced from the ordered messages"""
+        self.assertEqual(self.session.total_pages(10), 3)
+        self.assertEqual([m.id for m in self.session.get_page(2, 10)], [20, 21, 22, 23, 24])
+
+    def test_can_serve_same_criteria(self):
+        """Same criteria (ignoring save directory) can be served from the session"""
+        criteria = dict(self.criteria, pdf_save_directory='/tmp/b')
+        self.assertTrue(self.session.can_serve(criteria, 10))
+        self.assertTrue(self.session.can_serve(criteria, 5))
+
+    def test_changed_criteria_or_bigger_page_needs_new_search(self):
+        """Changed criteria or a page size above the fetch limit are rejected"""
+        self.assertFalse(self.session.can_serve({'subject_search': 'inne'}, 10))
+        self.assertFalse(self.session.can_serve(self.criteria, 50))
+
+    def test_engine_serves_page_from_session(self):
+        """Engine builds page results from the session only"""
+        results = []
+        engine = EmailSearchEngine(progress_callback=lambda x: None, result_callback=results.append)
+        engine.search_session = self.session
+
+        engine._threaded_load_page(0, 5)
+
+        self.assertEqual(results[-1]['type'], 'search_complete')
+        self.assertEqual(results[-1]['total_count'], 25)
+        self.assertEqual(results[-1]['total_pages'], 5)
+        self.assertEqual(results[-1]['results'][3]['folder_path'], '/Odebrane/Faktury')
+        self.assertEqual(results[-1]['results'][3]['pdf_match_info'], {'found': True})
+
+
+class TestResultStream(unittest.TestCase):
+    """Test batching of streamed matches"""
+
+    def test_batches_throttled_and_limited(self):
+        """First match is sent at once, later ones in batches, rows beyond one page only count"""
+        events = []
+        stream = ResultStream(events.append, limit=2, interval=60)
+
+        stream.add({'subject': 'a'})
+        stream.add({'subject': 'b'})
+        stream.add({'subject': 'c'})
+        stream.set_progress(3, 10)
+        self.assertEqual(len(events), 1)
+
+        stream.flush(force=True)
+        self.assertEqual([[r['subject'] for r in e['results']] for e in events], [['a'], ['b']])
+        self.assertEqual(events[-1]['found_count'], 3)
+        self.assertEqual((events[-1]['checked_count'], events[-1]['total_to_check']), (3, 10))
+
+
+if __name__ == '__main__':
+    unittest.main()
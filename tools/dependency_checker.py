@@ -133,6 +133,15 @@ class DependencyChecker:
                 'install_link': 'https://pypi.org/project/easyocr/',
                 'install_cmd': 'pip install easyocr'
             },
+            {
+                'name': 'tesserocr',
+                'type': 'module',
+                'module': 'tesserocr',
+                'required': False,
+                'description': 'Szybszy backend Tesseract (bez procesu na każdą stronę)',
+                'install_link': 'https://pypi.org/project/tesserocr/',
+                'install_cmd': 'pip install tesserocr'
+            },
             {
                 'name': 'PaddleOCR',
                 'type': 'module',
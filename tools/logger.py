@@ -1,11 +1,29 @@
 import os
 import datetime
 import glob
+import gzip
+import shutil
 import warnings
 import sys
+import atexit
+import queue
+import threading
+import time
 
 LOG_FILE = "logs/app.log"
 
+# Rotate the log file when it grows over this size (rotated files are gzip-compressed)
+LOG_MAX_BYTES = 5 * 1024 * 1024
+
+# Number of compressed rotated log files kept
+LOG_BACKUP_COUNT = 5
+
+# How long the writer collects more lines before writing a batch (seconds)
+LOG_FLUSH_INTERVAL = 0.5
+
+# Maximum number of lines written in one batch
+LOG_BATCH_SIZE = 500
+
 # Filter common torch/paddle warnings from logs
 _FILTERED_WARNINGS = [
     "torch",
@@ -26,19 +44,269 @@ def _should_filter_message(msg):
             return True
     return False
 
+# Queue items closing the log file (before logs are removed or at exit)
+_CLOSE_FILE = object()
+
+
+class _LogWriter:
+    """Background thread writing queued log lines to LOG_FILE and the console in batches"""
+    
+    def __init__(self):
+        self.pid = os.getpid()
+        self.queue = queue.Queue()
+        self._file = None
+        self._file_path = None
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+    
+    def put(self, timestamp, msg):
+        """Queue a log line (returns immediately)"""
+        self.queue.put((timestamp, msg))
+    
+    def flush(self, timeout=5.0, close_file=False):
+        """Wait until all queued lines are written, optionally closing the log file"""
+        if close_file:
+            self.queue.put(_CLOSE_FILE)
+        done = threading.Event()
+        self.queue.put(done)
+        return done.wait(timeout)
+    
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            
+            # Collect more lines for a moment so they are written together
+            deadline = time.monotonic() + LOG_FLUSH_INTERVAL
+            while len(batch) < LOG_BATCH_SIZE and isinstance(batch[-1], tuple):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            
+            lines = [item for item in batch if isinstance(item, tuple)]
+            if lines:
+                self._write(lines)
+            
+            for item in batch:
+                if item is _CLOSE_FILE:
+                    self._close_file()
+                elif isinstance(item, threading.Event):
+                    item.set()
+    
+    def _write(self, lines):
+        """Write a batch of (timestamp, msg) lines"""
+        try:
+            log_file = self._open_file()
+            log_file.write("".join(f"{timestamp} | {msg}\n" for timestamp, msg in lines))
+            log_file.flush()
+            if log_file.tell() >= LOG_MAX_BYTES:
+                self._rotate()
+        except Exception as e:
+            sys.stderr.write(f"Log write error: {e}\n")
+        
+        # Also print to console for immediate visibility
+        try:
+            sys.stdout.write("".join(f"[LOG {timestamp}] {msg}\n" for timestamp, msg in lines))
+            sys.stdout.flush()
+        except Exception:
+            pass
+    
+    def _open_file(self):
+        """Get the open log file, (re)opening it when LOG_FILE changed or was closed"""
+        if self._file is None or self._file_path != LOG_FILE:
+            self._close_file()
+            log_dir = os.path.dirname(LOG_FILE)
+            if log_dir:
+                os.makedirs(log_dir, exist_ok=True)
+            self._file = open(LOG_FILE, "a", encoding="utf-8")
+            self._file_path = LOG_FILE
+        return self._file
+    
+    def _close_file(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except Exception:
+                pass
+            self._file = None
+            self._file_path = None
+    
+    def _rotate(self):
+        """Compress the current log file into a timestamped .gz and start a new one"""
+        log_path = self._file_path
+        self._close_file()
+        
+        base = os.path.splitext(log_path)[0]
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        rotated_path = f"{base}-{stamp}.log"
+        os.replace(log_path, rotated_path)
+        with open(rotated_path, "rb") as src, gzip.open(f"{rotated_path}.gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(rotated_path)
+        
+        # Keep only the newest compressed logs
+        archives = sorted(glob.glob(f"{glob.escape(base)}-*.log.gz"))
+        for old_archive in archives[:-LOG_BACKUP_COUNT]:
+            os.remove(old_archive)
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer():
+    """Get the log writer of this process (a forked process starts its own)"""
+    global _writer
+    writer = _writer
+    if writer is None or writer.pid != os.getpid():
+        with _writer_lock:
+            if _writer is None or _writer.pid != os.getpid():
+                _writer = _LogWriter()
+            writer = _writer
+    return writer
+
+
+def _reset_after_fork():
+    # The writer thread and a held lock don't survive fork
+    global _writer, _writer_lock
+    _writer = None
+    _writer_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
 def log(msg):
     # Filter out torch/paddle warnings to keep logs clean
     if _should_filter_message(str(msg)):
         return
     
-    os.makedirs(os.path.dirname(LOG_FILE), exist_ok=True)
-    with open(LOG_FILE, "a", encoding="utf-8") as f:
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        f.write(f"{timestamp} | {msg}\n")
-    # Also print to console for immediate visibility
-    print(f"[LOG {timestamp}] {msg}")
+    # The line is written by the background writer thread
+    timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    _get_writer().put(timestamp, msg)
+
+# Log levels (plain log() calls are INFO)
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARN", ERROR: "ERROR"}
+
+# Subsystems that can have their own log level
+SUBSYSTEMS = ("imap", "exchange", "pdf", "ocr", "history")
+
+_default_level = INFO
+_subsystem_levels = {}
+
+
+def level_from_name(name):
+    """Get a log level from its name (DEBUG/INFO/WARN/WARNING/ERROR)"""
+    name = str(name).upper()
+    if name == "WARNING":
+        name = "WARN"
+    for level, level_name in LEVEL_NAMES.items():
+        if level_name == name:
+            return level
+    raise ValueError(f"Nieznany poziom logowania: {name}")
+
+
+def set_level(level, subsystem=None):
+    """
+    Set the minimum logged level at runtime
+    
+    Args:
+        level: Level value or name
+        subsystem: Subsystem name, or None for all subsystems
+    """
+    global _default_level
+    if isinstance(level, str):
+        level = level_from_name(level)
+    if subsystem is None:
+        _default_level = level
+        _subsystem_levels.clear()
+    else:
+        _subsystem_levels[subsystem] = level
+
+
+def get_level(subsystem=None):
+    """Get the minimum logged level of a subsystem (or the default level)"""
+    if subsystem is None:
+        return _default_level
+    return _subsystem_levels.get(subsystem, _default_level)
+
+
+class SubsystemLogger:
+    """
+    Logger of one subsystem with level gating and lazy %-style formatting
+    
+    Messages below the subsystem level return before the message is
+    formatted, so per-message tracing costs one comparison when it's off.
+    """
+    
+    __slots__ = ("name",)
+    
+    def __init__(self, name):
+        self.name = name
+    
+    def is_enabled_for(self, level):
+        return level >= _subsystem_levels.get(self.name, _default_level)
+    
+    def debug(self, msg, *args):
+        if DEBUG >= _subsystem_levels.get(self.name, _default_level):
+            self._emit(DEBUG, msg, args)
+    
+    def info(self, msg, *args):
+        if INFO >= _subsystem_levels.get(self.name, _default_level):
+            self._emit(INFO, msg, args)
+    
+    def warning(self, msg, *args):
+        if WARNING >= _subsystem_levels.get(self.name, _default_level):
+            self._emit(WARNING, msg, args)
+    
+    def error(self, msg, *args):
+        if ERROR >= _subsystem_levels.get(self.name, _default_level):
+            self._emit(ERROR, msg, args)
+    
+    def _emit(self, level, msg, args):
+        try:
+            text = msg % args if args else msg
+        except (TypeError, ValueError):
+            text = f"{msg} {args!r}"
+        if level != INFO:
+            text = f"[{LEVEL_NAMES[level]}] {text}"
+        log(text)
+
+
+_subsystem_loggers = {}
+
+
+def get_logger(subsystem):
+    """Get the logger of a subsystem (imap, exchange, pdf, ocr, history)"""
+    subsystem_logger = _subsystem_loggers.get(subsystem)
+    if subsystem_logger is None:
+        subsystem_logger = _subsystem_loggers.setdefault(subsystem, SubsystemLogger(subsystem))
+    return subsystem_logger
+
+def flush_logs(timeout=5.0):
+    """Wait until all logged lines are written to the log file"""
+    if _writer is None or _writer.pid != os.getpid():
+        return True
+    return _writer.flush(timeout)
+
+def _shutdown_logging():
+    """Write pending lines and close the log file at exit"""
+    if _writer is not None and _writer.pid == os.getpid():
+        _writer.flush(timeout=5.0, close_file=True)
+
+atexit.register(_shutdown_logging)
 
 def read_logs():
+    flush_logs()
     if not os.path.exists(LOG_FILE):
         return "Brak logów."
     with open(LOG_FILE, "r", encoding="utf-8") as f:
@@ -47,10 +315,14 @@ def read_logs():
 def clear_logs():
     """Clear all log files in the logs directory."""
     try:
+        # Write pending lines and release the open log file before removing it
+        if _writer is not None and _writer.pid == os.getpid():
+            _writer.flush(close_file=True)
+        
         logs_dir = os.path.dirname(LOG_FILE)
         if os.path.exists(logs_dir):
-            # Remove all log files in the logs directory
-            log_files = glob.glob(os.path.join(logs_dir, "*.log"))
+            # Remove all log files in the logs directory (including compressed rotated logs)
+            log_files = glob.glob(os.path.join(logs_dir, "*.log")) + glob.glob(os.path.join(logs_dir, "*.log.gz"))
             for log_file in log_files:
                 if os.path.exists(log_file):
                     os.remove(log_file)
@@ -12,9 +12,13 @@ DEFAULT_OCR_CONFIG = {
     "engine": "tesseract",  # tesseract, easyocr, paddleocr
     "use_gpu": False,       # Try to use GPU if available
     "multiprocessing": True, # Use multiprocessing for OCR operations
-    "max_workers": None     # None = auto-detect CPU count
+    "max_workers": None,    # None = auto-detect CPU count
+    "tesseract_backend": "auto"  # auto, tesserocr (resident API), pytesseract (process per page)
 }
 
+# Tesseract backends: tesserocr keeps the Tesseract API loaded, pytesseract runs tesseract per page
+TESSERACT_BACKENDS = ["auto", "tesserocr", "pytesseract"]
+
 class OCRConfig:
     """Handles OCR configuration persistence and management"""
     
@@ -108,6 +112,16 @@ class OCRConfig:
                 'suggestion': 'Wyłącz GPU lub wybierz EasyOCR/PaddleOCR'
             })
         
+        # Check Tesseract backend
+        if current_engine == "tesseract" and self.get_tesseract_backend() == "tesserocr":
+            import importlib.util
+            if importlib.util.find_spec("tesserocr") is None:
+                issues.append({
+                    'type': 'tesseract_backend_unavailable',
+                    'message': 'Backend tesserocr nie jest zainstalowany - używany będzie pytesseract',
+                    'suggestion': 'Zainstaluj: pip install tesserocr lub ustaw tesseract_backend na "auto"'
+                })
+        
         return issues
     
     def get_use_gpu(self):
@@ -136,6 +150,18 @@ class OCRConfig:
             self.config["max_workers"] = max_workers
             return True
         return False
+    
+    def get_tesseract_backend(self):
+        """Get Tesseract backend (auto = tesserocr if installed, otherwise pytesseract)"""
+        backend = self.config.get("tesseract_backend", "auto")
+        return backend if backend in TESSERACT_BACKENDS else "auto"
+    
+    def set_tesseract_backend(self, backend):
+        """Set Tesseract backend"""
+        if backend in TESSERACT_BACKENDS:
+            self.config["tesseract_backend"] = backend
+            return True
+        return False
 
 # Global instance
 ocr_config = OCRConfig()
\ No newline at end of file
@@ -1,10 +1,14 @@
 """
 OCR engine abstraction with multiprocessing support
 """
+import atexit
 import multiprocessing
+import threading
+from collections import deque
 from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import os
-from tools.logger import log
+from tools.logger import log, get_logger
 from tools.ocr_config import ocr_config
 
 # Import poppler utilities for automatic path detection
@@ -33,6 +37,80 @@ except ImportError as e:
     log(f"OCR engines: Failed to import tesseract_utils, using fallback path: {e}")
     TESSERACT_PATH = r"C:\Program Files\Tesseract-OCR\tesseract.exe"  # Fallback
 
+# Per-batch diagnostics are logged at DEBUG level
+ocr_log = get_logger('ocr')
+
+# Shared memory for handing page images to OCR worker processes without pickling
+try:
+    from multiprocessing import shared_memory
+    HAVE_SHARED_MEMORY = True
+except ImportError:
+    HAVE_SHARED_MEMORY = False
+
+# Image modes passed to workers as raw pixels (others are pickled)
+SHARED_IMAGE_MODES = ('L', 'RGB', 'RGBA')
+
+# Images kept in shared memory per worker while a batch runs
+SHARED_IMAGE_WINDOW_PER_WORKER = 2
+
+
+class SharedImage:
+    """Image pixels in a shared memory block, sent to OCR workers instead of a pickled PIL image"""
+    
+    __slots__ = ('name', 'size', 'mode')
+    
+    def __init__(self, name, size, mode):
+        self.name = name
+        self.size = size
+        self.mode = mode
+    
+    @classmethod
+    def create(cls, image):
+        """
+        Copy image pixels into a new shared memory block
+        
+        Returns:
+            tuple: (SharedImage, SharedMemory) - the caller owns and releases the block,
+                or None when the image can't be shared
+        """
+        if not HAVE_SHARED_MEMORY or getattr(image, 'mode', None) not in SHARED_IMAGE_MODES:
+            return None
+        
+        data = image.tobytes()
+        block = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+        block.buf[:len(data)] = data
+        return cls(block.name, tuple(image.size), image.mode), block
+    
+    def run(self, func, *args, **kwargs):
+        """Open the shared pixels as an image without copying and call func(image, *args, **kwargs)"""
+        from PIL import Image
+        
+        block = shared_memory.SharedMemory(name=self.name)
+        try:
+            image = Image.frombuffer(self.mode, self.size, block.buf, 'raw', self.mode, 0, 1)
+            try:
+                return func(image, *args, **kwargs)
+            finally:
+                del image
+        finally:
+            try:
+                block.close()
+            except BufferError:
+                # A view of the buffer is still referenced - it's released with the worker's garbage
+                pass
+
+
+def _release_shared_block(block):
+    """Close and remove a shared memory block created for an OCR job"""
+    if block is None:
+        return
+    try:
+        block.close()
+        block.unlink()
+    except Exception as e:
+        log(f"Błąd zwalniania pamięci współdzielonej OCR: {e}")
+
+
 class OCREngineManager:
     """Manages OCR engines and multiprocessing for OCR operations
     
@@ -40,10 +118,19 @@ class OCREngineManager:
     threading due to process creation overhead. For small batches (< 10 images) 
     or on Windows systems, consider disabling multiprocessing in favor of 
     single-threaded processing or ThreadPoolExecutor for better performance.
+    
+    Multiprocess OCR uses a long-lived worker pool: every worker loads its
+    engine/model once (see _load_engine) and reuses it for all pages. The pool
+    is created on first use or by warm_up() and recreated when the engine,
+    GPU mode or size changes.
     """
     
     def __init__(self):
         self.available_engines = self._detect_available_engines()
+        self._pool = None
+        self._pool_key = None
+        self._pool_size = None  # None = ocr_config max_workers / CPU count
+        self._pool_lock = threading.Lock()
         
     def _detect_available_engines(self):
         """Detect which OCR engines are available"""
@@ -140,58 +227,56 @@ class OCREngineManager:
                 results.append(text)
             return results
         
-        # Multi-process processing
-        max_workers = ocr_config.get_max_workers() or multiprocessing.cpu_count()
-        max_workers = min(max_workers, len(images))  # Don't create more workers than images
-        
-        current_engine = self.get_current_engine()
-        use_gpu = ocr_config.get_use_gpu()
-        
-        # Log multiprocessing setup with engine-specific GPU info
-        if current_engine == 'tesseract':
-            log(f"Uruchamiam multiproces OCR: {max_workers} workerów, silnik: {current_engine} (CPU only - parametr use_gpu zignorowany)")
-        else:
-            gpu_mode = "GPU" if use_gpu else "CPU"
-            log(f"Uruchamiam multiproces OCR: {max_workers} workerów, silnik: {current_engine}, tryb: {gpu_mode}")
-        
+        # Multi-process processing (persistent worker pool)
         try:
-            with ProcessPoolExecutor(max_workers=max_workers) as executor:
-                # Submit all jobs
-                futures = []
-                for i, image in enumerate(images):
-                    # Prepare arguments based on engine capabilities
-                    worker_kwargs = {}
-                    
-                    # Only pass use_gpu for engines that support it
-                    if current_engine in ['easyocr', 'paddleocr']:
-                        # Validate use_gpu parameter before passing
-                        if not isinstance(use_gpu, bool):
-                            log(f"Warning: use_gpu parameter should be boolean, got {type(use_gpu)}: {use_gpu}")
-                            worker_kwargs['use_gpu'] = bool(use_gpu)
-                        else:
-                            worker_kwargs['use_gpu'] = use_gpu
-                    elif current_engine == 'tesseract':
-                        # Tesseract doesn't support use_gpu, don't pass any parameters
-                        if use_gpu:
-                            log("Warning: GPU został żądany dla Tesseract, ale nie jest obsługiwany - używam CPU")
-                        # worker_kwargs remains empty for tesseract
+            executor, (current_engine, use_gpu, max_workers, _) = self._get_pool()
+            
+            # Log multiprocessing setup with engine-specific GPU info
+            if current_engine == 'tesseract':
+                ocr_log.debug("Uruchamiam multiproces OCR: %d workerów, silnik: %s (CPU only - parametr use_gpu zignorowany)", max_workers, current_engine)
+            else:
+                gpu_mode = "GPU" if use_gpu else "CPU"
+                ocr_log.debug("Uruchamiam multiproces OCR: %d workerów, silnik: %s, tryb: %s", max_workers, current_engine, gpu_mode)
+            
+            # Only pass use_gpu for engines that support it
+            worker_kwargs = {}
+            if current_engine in ['easyocr', 'paddleocr']:
+                worker_kwargs['use_gpu'] = use_gpu
+            
+            # Pages go to workers through shared memory; only a window of them
+            # is copied there at a time so the extra memory stays bounded
+            results = []
+            in_flight = deque()
+            next_image = 0
+            window = max_workers * SHARED_IMAGE_WINDOW_PER_WORKER
+            try:
+                while len(results) < len(images):
+                    while next_image < len(images) and len(in_flight) < window:
+                        in_flight.append(self._submit_ocr_job(
+                            executor, images[next_image], language, current_engine, worker_kwargs
+                        ))
+                        next_image += 1
                     
-                    future = executor.submit(_ocr_worker, image, language, current_engine, **worker_kwargs)
-                    futures.append(future)
-                
-                # Collect results
-                results = []
-                for i, future in enumerate(futures):
+                    future, shared_block = in_flight.popleft()
                     if progress_callback:
-                        progress_callback(i, len(futures))
-                    text = future.result()
-                    results.append(text)
-                
-                log(f"Multiproces OCR zakończony pomyślnie, przetworzono {len(results)} obrazów")
-                return results
+                        progress_callback(len(results), len(images))
+                    try:
+                        results.append(future.result())
+                    finally:
+                        _release_shared_block(shared_block)
+            finally:
+                for future, shared_block in in_flight:
+                    future.cancel()
+                    _release_shared_block(shared_block)
+            
+            ocr_log.debug("Multiproces OCR zakończony pomyślnie, przetworzono %d obrazów", len(results))
+            return results
                 
         except Exception as e:
             log(f"Błąd wieloprocesowego OCR: {e}, przełączam na tryb pojedynczy")
+            if isinstance(e, BrokenProcessPool):
+                # A crashed worker breaks the whole pool - the next batch starts a new one
+                self.shutdown_pool(wait=False)
             # Fallback to single-threaded processing (disable multiprocessing temporarily)
             results = []
             for i, image in enumerate(images):
@@ -205,26 +290,133 @@ class OCREngineManager:
                     results.append("")  # Empty result for failed image
             return results
     
+    def _submit_ocr_job(self, executor, image, language, engine, worker_kwargs):
+        """
+        Submit one image to the worker pool, passing its pixels through shared memory when possible
+        
+        Returns:
+            tuple: (future, shared memory block or None)
+        """
+        shared_block = None
+        payload = image
+        try:
+            shared = SharedImage.create(image)
+            if shared:
+                payload, shared_block = shared
+        except Exception as e:
+            log(f"Nie udało się przekazać obrazu przez pamięć współdzieloną, używam kopii: {e}")
+        
+        try:
+            return executor.submit(_ocr_worker, payload, language, engine, **worker_kwargs), shared_block
+        except Exception:
+            _release_shared_block(shared_block)
+            raise
+    
+    def _get_pool_settings(self, max_workers=None):
+        """Engine, GPU mode, size and Tesseract backend the worker pool should run with"""
+        engine = self.get_current_engine()
+        if not engine:
+            raise RuntimeError("Brak dostępnych silników OCR")
+        
+        use_gpu = ocr_config.get_use_gpu()
+        if engine in ['easyocr', 'paddleocr']:
+            # Validate use_gpu parameter before passing it to workers
+            if not isinstance(use_gpu, bool):
+                log(f"Warning: use_gpu parameter should be boolean, got {type(use_gpu)}: {use_gpu}")
+                use_gpu = bool(use_gpu)
+        else:
+            if use_gpu:
+                log("Warning: GPU został żądany dla Tesseract, ale nie jest obsługiwany - używam CPU")
+            use_gpu = False
+        
+        size = max_workers or self._pool_size or ocr_config.get_max_workers() or multiprocessing.cpu_count()
+        tesseract_backend = ocr_config.get_tesseract_backend() if engine == 'tesseract' else None
+        return engine, use_gpu, max(1, size), tesseract_backend
+    
+    def _get_pool(self, max_workers=None):
+        """
+        Get the persistent OCR worker pool, (re)creating it if needed
+        
+        Returns:
+            tuple: (executor, (engine, use_gpu, size, tesseract_backend))
+        """
+        key = self._get_pool_settings(max_workers)
+        with self._pool_lock:
+            if self._pool is not None and (self._pool_key != key or getattr(self._pool, '_broken', False)):
+                log(f"Zmiana ustawień puli OCR {self._pool_key} -> {key}, restart workerów")
+                self._shutdown_pool_locked(wait=False)
+            
+            if self._pool is None:
+                engine, use_gpu, size, tesseract_backend = key
+                log(f"Tworzenie puli workerów OCR: {size} procesów, silnik: {engine}")
+                self._pool = ProcessPoolExecutor(
+                    max_workers=size, initializer=_init_ocr_worker, initargs=(engine, use_gpu, tesseract_backend)
+                )
+                self._pool_key = key
+            
+            return self._pool, self._pool_key
+    
+    def warm_up(self, max_workers=None):
+        """
+        Start the OCR worker pool and load the engine model in every worker
+        
+        Args:
+            max_workers: Pool size (None = current setting)
+            
+        Returns:
+            int: Number of workers that finished warming up
+        """
+        try:
+            executor, (engine, use_gpu, size, _) = self._get_pool(max_workers)
+            futures = [executor.submit(_warm_up_worker, engine, use_gpu) for _ in range(size)]
+            worker_pids = {future.result() for future in futures}
+            log(f"Pula OCR rozgrzana: {len(worker_pids)} workerów, silnik: {engine}")
+            return len(worker_pids)
+        except Exception as e:
+            log(f"Błąd rozgrzewania puli OCR: {e}")
+            return 0
+    
+    def resize_pool(self, max_workers):
+        """
+        Change the worker pool size
+        
+        Args:
+            max_workers: New pool size (None = ocr_config max_workers / CPU count)
+        """
+        self._pool_size = max_workers
+        with self._pool_lock:
+            running = self._pool is not None
+        if running:
+            # Recreate the running pool with the new size; otherwise it's used on first start
+            self._get_pool()
+    
+    def shutdown_pool(self, wait=True):
+        """Stop the OCR worker pool (a new one is started by the next batch)"""
+        with self._pool_lock:
+            self._shutdown_pool_locked(wait)
+    
+    def _shutdown_pool_locked(self, wait):
+        """Stop the worker pool, caller holds _pool_lock"""
+        if self._pool is None:
+            return
+        try:
+            self._pool.shutdown(wait=wait, cancel_futures=True)
+            log("Pula workerów OCR zatrzymana")
+        except Exception as e:
+            log(f"Błąd zatrzymywania puli OCR: {e}")
+        self._pool = None
+        self._pool_key = None
+    
     def _ocr_tesseract(self, image, language):
-        """Perform OCR using Tesseract"""
-        import pytesseract
-        return pytesseract.image_to_string(image, lang=language)
+        """Perform OCR using Tesseract (tesserocr API or pytesseract, see ocr_config tesseract_backend)"""
+        tesseract = _load_engine('tesseract')
+        return tesseract.image_to_string(image, lang=language)
     
     def _ocr_easyocr_gpu(self, image, language):
         """Perform OCR using EasyOCR with GPU"""
         try:
-            import easyocr
-            import numpy as np
-            
-            # Convert PIL image to numpy array
-            if hasattr(image, 'convert'):
-                image = np.array(image.convert('RGB'))
-            
-            reader = easyocr.Reader(['en', 'pl'], gpu=True)
-            results = reader.readtext(image)
-            
-            # Combine all text results
-            return '\n'.join([result[1] for result in results])
+            reader = _load_engine('easyocr', use_gpu=True, gpu_fallback=False)
+            return _easyocr_text(reader, image)
         except Exception as e:
             log(f"Error in EasyOCR GPU: {e}")
             raise RuntimeError(f"EasyOCR GPU nie jest dostępny: {e}")
@@ -232,18 +424,8 @@ class OCREngineManager:
     def _ocr_easyocr_cpu(self, image, language):
         """Perform OCR using EasyOCR with CPU"""
         try:
-            import easyocr
-            import numpy as np
-            
-            # Convert PIL image to numpy array
-            if hasattr(image, 'convert'):
-                image = np.array(image.convert('RGB'))
-            
-            reader = easyocr.Reader(['en', 'pl'], gpu=False)
-            results = reader.readtext(image)
-            
-            # Combine all text results
-            return '\n'.join([result[1] for result in results])
+            reader = _load_engine('easyocr', use_gpu=False)
+            return _easyocr_text(reader, image)
         except Exception as e:
             log(f"Error in EasyOCR CPU: {e}")
             raise RuntimeError(f"EasyOCR CPU nie jest dostępny: {e}")
@@ -251,31 +433,9 @@ class OCREngineManager:
     def _ocr_paddleocr_gpu(self, image, language):
         """Perform OCR using PaddleOCR with GPU"""
         try:
-            from paddleocr import PaddleOCR
-            import numpy as np
-            
-            # Convert PIL image to numpy array
-            if hasattr(image, 'convert'):
-                image = np.array(image.convert('RGB'))
-            
-            # Create OCR instance with GPU enabled, with fallback to CPU
-            try:
-                ocr = PaddleOCR(use_angle_cls=True, lang='en', use_gpu=True)
-            except Exception as gpu_error:
-                log(f"Warning: PaddleOCR GPU initialization failed: {gpu_error}")
-                log("Falling back to CPU mode")
-                ocr = PaddleOCR(use_angle_cls=True, lang='en', use_gpu=False)
-                
-            results = ocr.ocr(image, cls=True)
-            
-            # Extract text from results
-            texts = []
-            if results and results[0]:
-                for line in results[0]:
-                    if line and len(line) > 1:
-                        texts.append(line[1][0])
-            
-            return '\n'.join(texts)
+            # GPU initialization falls back to CPU mode
+            ocr = _load_engine('paddleocr', use_gpu=True)
+            return _paddleocr_text(ocr, image)
         except Exception as e:
             log(f"Error in PaddleOCR GPU: {e}")
             raise RuntimeError(f"PaddleOCR GPU nie jest dostępny: {e}")
@@ -283,41 +443,197 @@ class OCREngineManager:
     def _ocr_paddleocr_cpu(self, image, language):
         """Perform OCR using PaddleOCR with CPU"""
         try:
-            from paddleocr import PaddleOCR
-            import numpy as np
-            
-            # Convert PIL image to numpy array
-            if hasattr(image, 'convert'):
-                image = np.array(image.convert('RGB'))
-            
-            # Explicitly create OCR instance with CPU mode
-            ocr = PaddleOCR(use_angle_cls=True, lang='en', use_gpu=False)
-            results = ocr.ocr(image, cls=True)
-            
-            # Extract text from results
-            texts = []
-            if results and results[0]:
-                for line in results[0]:
-                    if line and len(line) > 1:
-                        texts.append(line[1][0])
-            
-            return '\n'.join(texts)
+            ocr = _load_engine('paddleocr', use_gpu=False)
+            return _paddleocr_text(ocr, image)
         except Exception as e:
             log(f"Error in PaddleOCR CPU: {e}")
             raise RuntimeError(f"PaddleOCR CPU nie jest dostępny: {e}")
 
 
+# OCR engines loaded in this process, keyed by (engine, use_gpu).
+# Loading an EasyOCR/PaddleOCR model takes seconds, so every process
+# (pool worker or the GUI process) loads it once and reuses it.
+_loaded_engines = {}
+_loaded_engines_lock = threading.Lock()
+
+
+def _load_engine(engine, use_gpu=False, gpu_fallback=True):
+    """
+    Get an OCR engine instance for this process, loading it on first use
+    
+    Returns:
+        TesserocrEngine or pytesseract module (both provide image_to_string),
+        easyocr.Reader or PaddleOCR instance
+    """
+    key = (engine, bool(use_gpu))
+    if engine == 'tesseract':
+        key += (ocr_config.get_tesseract_backend(),)
+    with _loaded_engines_lock:
+        instance = _loaded_engines.get(key)
+        if instance is not None:
+            return instance
+        
+        if engine == 'tesseract':
+            instance = _load_tesseract_backend(key[2])
+        elif engine == 'easyocr':
+            import easyocr
+            try:
+                instance = easyocr.Reader(['en', 'pl'], gpu=use_gpu)
+            except Exception as reader_error:
+                log(f"Error creating EasyOCR reader with gpu={use_gpu}: {reader_error}")
+                # Fallback to CPU mode if GPU initialization fails
+                if not (use_gpu and gpu_fallback):
+                    raise
+                log("Falling back to CPU mode for EasyOCR")
+                instance = easyocr.Reader(['en', 'pl'], gpu=False)
+        elif engine == 'paddleocr':
+            from paddleocr import PaddleOCR
+            try:
+                instance = PaddleOCR(use_angle_cls=True, lang='en', use_gpu=use_gpu)
+            except Exception as constructor_error:
+                log(f"Error creating PaddleOCR with use_gpu={use_gpu}: {constructor_error}")
+                # Fallback to CPU mode if GPU initialization fails
+                if not (use_gpu and gpu_fallback):
+                    raise
+                log("Falling back to CPU mode for PaddleOCR")
+                instance = PaddleOCR(use_angle_cls=True, lang='en', use_gpu=False)
+        else:
+            raise RuntimeError(f"Nieobsługiwany silnik OCR: {engine}")
+        
+        log(f"Załadowano silnik OCR {engine} (GPU: {bool(use_gpu)}) w procesie {os.getpid()}")
+        _loaded_engines[key] = instance
+        return instance
+
+
+class TesserocrEngine:
+    """
+    Tesseract API kept loaded in the process (tesserocr)
+    
+    pytesseract starts a tesseract process and reloads the traineddata for
+    every page; this keeps one initialized API handle per language instead.
+    """
+    
+    DEFAULT_LANGUAGE = 'pol+eng'
+    
+    def __init__(self):
+        import tesserocr
+        self._tesserocr = tesserocr
+        self._tessdata_path = _get_tessdata_path()
+        self._apis = {}
+        # One API handle can't process two images at once
+        self._lock = threading.Lock()
+        # Fail early (and fall back to pytesseract) when traineddata is missing
+        self._get_api(self.DEFAULT_LANGUAGE)
+    
+    def _get_api(self, language):
+        """Get the API handle for a language, initializing it on first use"""
+        api = self._apis.get(language)
+        if api is None:
+            if self._tessdata_path:
+                api = self._tesserocr.PyTessBaseAPI(path=self._tessdata_path, lang=language)
+            else:
+                api = self._tesserocr.PyTessBaseAPI(lang=language)
+            self._apis[language] = api
+        return api
+    
+    def image_to_string(self, image, lang=DEFAULT_LANGUAGE):
+        """Recognize text on a PIL image (same call as pytesseract.image_to_string)"""
+        with self._lock:
+            api = self._get_api(lang)
+            api.SetImage(image)
+            return api.GetUTF8Text()
+    
+    def close(self):
+        """Release all API handles"""
+        with self._lock:
+            for api in self._apis.values():
+                api.End()
+            self._apis.clear()
+
+
+def _get_tessdata_path():
+    """tessdata directory of the detected Tesseract installation (None = tesserocr default)"""
+    tessdata_prefix = os.environ.get('TESSDATA_PREFIX')
+    if tessdata_prefix and os.path.isdir(tessdata_prefix):
+        return tessdata_prefix
+    if TESSERACT_PATH:
+        tessdata_path = os.path.join(os.path.dirname(TESSERACT_PATH), 'tessdata')
+        if os.path.isdir(tessdata_path):
+            return tessdata_path
+    return None
+
+
+def _load_tesseract_backend(backend):
+    """Load the configured Tesseract backend, falling back to pytesseract"""
+    if backend in ('auto', 'tesserocr'):
+        try:
+            return TesserocrEngine()
+        except Exception as e:
+            if backend == 'tesserocr':
+                log(f"Backend tesserocr niedostępny ({e}), używam pytesseract")
+    
+    import pytesseract
+    pytesseract.pytesseract.tesseract_cmd = TESSERACT_PATH
+    return pytesseract
+
+
+def _easyocr_text(reader, image):
+    """Run EasyOCR on an image and combine all text results"""
+    # Convert PIL image to numpy array
+    if hasattr(image, 'convert'):
+        import numpy as np
+        image = np.array(image.convert('RGB'))
+    
+    results = reader.readtext(image)
+    return '\n'.join([result[1] for result in results])
+
+
+def _paddleocr_text(ocr, image):
+    """Run PaddleOCR on an image and extract text from results"""
+    # Convert PIL image to numpy array
+    if hasattr(image, 'convert'):
+        import numpy as np
+        image = np.array(image.convert('RGB'))
+    
+    results = ocr.ocr(image, cls=True)
+    
+    texts = []
+    if results and results[0]:
+        for line in results[0]:
+            if line and len(line) > 1:
+                texts.append(line[1][0])
+    
+    return '\n'.join(texts)
+
+
+def _init_ocr_worker(engine, use_gpu, tesseract_backend=None):
+    """Pool worker initializer - load the OCR engine once when the worker starts"""
+    try:
+        if tesseract_backend:
+            # Workers use the backend selected in the GUI process, even if not saved yet
+            ocr_config.set_tesseract_backend(tesseract_backend)
+        _load_engine(engine, use_gpu)
+    except Exception as e:
+        # The error is raised again (and reported) by the first OCR job
+        log(f"Błąd ładowania silnika OCR {engine} w workerze: {e}")
+
+
+def _warm_up_worker(engine, use_gpu):
+    """Make sure the engine is loaded in a pool worker, returns the worker PID"""
+    _load_engine(engine, use_gpu)
+    return os.getpid()
+
+
 def _ocr_worker(image, language, engine, **kwargs):
     """Worker function for multiprocessing OCR (must be at module level)"""
-    # This function recreates the OCR setup in each worker process
+    # The engine is loaded once per worker process and reused (see _load_engine)
+    if isinstance(image, SharedImage):
+        return image.run(_ocr_worker, language, engine, **kwargs)
     
     # Extract supported parameters based on engine
     use_gpu = kwargs.get('use_gpu', False)
     
     if engine == 'tesseract':
-        import pytesseract
-        pytesseract.pytesseract.tesseract_cmd = TESSERACT_PATH
-        
         # Log warning if GPU parameter was passed for Tesseract
         if 'use_gpu' in kwargs and use_gpu:
             log("Warning: Tesseract nie obsługuje GPU, parametr use_gpu zostanie zignorowany")
@@ -327,16 +643,12 @@ def _ocr_worker(image, language, engine, **kwargs):
         if unsupported_args:
             log(f"Warning: Nieobsługiwane argumenty dla Tesseract: {unsupported_args}")
         
-        return pytesseract.image_to_string(image, lang=language)
+        tesseract = _load_engine('tesseract')
+        return tesseract.image_to_string(image, lang=language)
     
-    elif engine == 'easyocr':
+    elif engine in ('easyocr', 'paddleocr'):
+        engine_label = 'EasyOCR' if engine == 'easyocr' else 'PaddleOCR'
         try:
-            import easyocr
-            import numpy as np
-            
-            if hasattr(image, 'convert'):
-                image = np.array(image.convert('RGB'))
-            
             # Validate use_gpu parameter
             if not isinstance(use_gpu, bool):
                 log(f"Warning: use_gpu musi być boolean, otrzymano {type(use_gpu)}: {use_gpu}")
@@ -345,72 +657,22 @@ def _ocr_worker(image, language, engine, **kwargs):
             # Log warning for any unsupported arguments (use_gpu is supported)
             unsupported_args = [arg for arg in kwargs.keys() if arg not in ['use_gpu']]
             if unsupported_args:
-                log(f"Warning: Nieobsługiwane argumenty dla EasyOCR: {unsupported_args}")
+                log(f"Warning: Nieobsługiwane argumenty dla {engine_label}: {unsupported_args}")
             
-            # Create reader with GPU/CPU mode
-            try:
-                reader = easyocr.Reader(['en', 'pl'], gpu=use_gpu)
-            except Exception as reader_error:
-                log(f"Error creating EasyOCR reader with gpu={use_gpu}: {reader_error}")
-                # Fallback to CPU mode if GPU initialization fails
-                if use_gpu:
-                    log("Falling back to CPU mode for EasyOCR")
-                    reader = easyocr.Reader(['en', 'pl'], gpu=False)
-                else:
-                    raise
-                    
-            results = reader.readtext(image)
-            return '\n'.join([result[1] for result in results])
+            instance = _load_engine(engine, use_gpu)
+            if engine == 'easyocr':
+                return _easyocr_text(instance, image)
+            return _paddleocr_text(instance, image)
         except Exception as e:
-            log(f"Error in EasyOCR worker: {e}")
-            raise RuntimeError(f"EasyOCR nie jest dostępny: {e}")
-    
-    elif engine == 'paddleocr':
-        try:
-            from paddleocr import PaddleOCR
-            import numpy as np
-            
-            if hasattr(image, 'convert'):
-                image = np.array(image.convert('RGB'))
-            
-            # Validate use_gpu parameter
-            if not isinstance(use_gpu, bool):
-                log(f"Warning: use_gpu musi być boolean, otrzymano {type(use_gpu)}: {use_gpu}")
-                use_gpu = bool(use_gpu)
-            
-            # Log warning for any unsupported arguments (use_gpu is supported)
-            unsupported_args = [arg for arg in kwargs.keys() if arg not in ['use_gpu']]
-            if unsupported_args:
-                log(f"Warning: Nieobsługiwane argumenty dla PaddleOCR: {unsupported_args}")
-            
-            # Only pass supported arguments to PaddleOCR constructor
-            try:
-                ocr = PaddleOCR(use_angle_cls=True, lang='en', use_gpu=use_gpu)
-            except Exception as constructor_error:
-                log(f"Error creating PaddleOCR with use_gpu={use_gpu}: {constructor_error}")
-                # Fallback to CPU mode if GPU initialization fails
-                if use_gpu:
-                    log("Falling back to CPU mode for PaddleOCR")
-                    ocr = PaddleOCR(use_angle_cls=True, lang='en', use_gpu=False)
-                else:
-                    raise
-                    
-            results = ocr.ocr(image, cls=True)
-            
-            texts = []
-            if results and results[0]:
-                for line in results[0]:
-                    if line and len(line) > 1:
-                        texts.append(line[1][0])
-            
-            return '\n'.join(texts)
-        except Exception as e:
-            log(f"Error in PaddleOCR worker: {e}")
-            raise RuntimeError(f"PaddleOCR nie jest dostępny: {e}")
+            log(f"Error in {engine_label} worker: {e}")
+            raise RuntimeError(f"{engine_label} nie jest dostępny: {e}")
     
     else:
         raise RuntimeError(f"Nieobsługiwany silnik OCR w worker: {engine}")
 
 
 # Global instance
-ocr_manager = OCREngineManager()
\ No newline at end of file
+ocr_manager = OCREngineManager()
+
+# Stop worker processes when the application exits
+atexit.register(ocr_manager.shutdown_pool)
\ No newline at end of file